@@ -1,10 +1,10 @@
-import json
 import logging
 import subprocess
 from pathlib import Path
 import yt_dlp
 from pywhispercpp.model import Model
 from prepare_ground_truth import transcribe_clip
+from ingestion.manifest import get_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 def download_clip(url, start, end, output_path):
     ydl_opts = {
@@ -66,29 +67,17 @@ def main():
     transcription = transcribe_clip(model, clip_path)
     
     # 3. Update Manifest
-    if MANIFEST_FILE.exists():
-        with open(MANIFEST_FILE) as f:
-            manifest = json.load(f)
-    else:
-        manifest = []
-        
-    # Check if entry exists
-    entry = next((e for e in manifest if e["id"] == clip_id), None)
-    if not entry:
-        entry = {
-            "id": clip_id,
-            "clip_path": str(clip_path), # Relative path logic if needed, but absolute/relative consistency matters
-            "transcriptions": {}
-        }
-        manifest.append(entry)
-    
-    # Ensure path is correct in manifest (relative to repo root or absolute?)
-    # Existing manifest uses "data/clips/..."
-    entry["clip_path"] = f"data/clips/{clip_id}"
-    entry["transcriptions"]["pywhispercpp.small"] = transcription
-    
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        # Adds the entry unless it exists
+        store.add({"id": clip_id, "transcriptions": {}})
+
+        def save(entry):
+            # Ensure path is correct in manifest (relative to repo root or absolute?)
+            # Existing manifest uses "data/clips/..."
+            entry["clip_path"] = f"data/clips/{clip_id}"
+            entry.setdefault("transcriptions", {})["pywhispercpp.small"] = transcription
+
+        store.update(clip_id, save)
         
     logger.info("Manifest updated. Now running diarization...")
     
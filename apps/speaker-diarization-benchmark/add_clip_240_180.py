@@ -1,6 +1,7 @@
 import logging
 import subprocess
 from pathlib import Path
+from ingestion.manifest import get_store
 import yt_dlp
 
 # Configure logging
@@ -58,29 +59,20 @@ def main():
         logger.info(f"Clip already exists: {clip_path}")
     
     # 1.5 Register in Manifest
-    import json
-    MANIFEST_FILE = CLIPS_DIR / "manifest.json"
-    if MANIFEST_FILE.exists():
-        with open(MANIFEST_FILE, 'r') as f:
-            manifest = json.load(f)
-    else:
-        manifest = []
-        
-    entry = next((e for e in manifest if e['id'] == clip_id), None)
-    if not entry:
-        logger.info(f"Adding {clip_id} to manifest...")
-        entry = {
-            "id": clip_id,
-            "clip_path": f"data/clips/{clip_id}",
-            "transcriptions": {},
-            "title": "Ep 569 - A Derosa Garden (feat. Joe Derosa)",
-            "original_url": url,
-            "start_time": start_time,
-            "duration": duration
-        }
-        manifest.append(entry)
-        with open(MANIFEST_FILE, 'w') as f:
-            json.dump(manifest, f, indent=2)
+    store = get_store(CLIPS_DIR / "manifest.db", CLIPS_DIR / "manifest.json")
+    added = store.add({
+        "id": clip_id,
+        "clip_path": f"data/clips/{clip_id}",
+        "transcriptions": {},
+        "title": "Ep 569 - A Derosa Garden (feat. Joe Derosa)",
+        "original_url": url,
+        "start_time": start_time,
+        "duration": duration
+    })
+    # Close before the scripts below open the store
+    store.close()
+    if added:
+        logger.info(f"Added {clip_id} to manifest.")
     else:
         logger.info(f"Clip {clip_id} already in manifest.")
 
@@ -3,15 +3,17 @@ WHO:   Antigravity, User
        (Context: Creating Ground Truth Data for Speaker Diarization Benchmark)
 
 WHAT:  Applies speaker diarization to existing audio clips in the manifest.
-       [Inputs] data/clips/manifest.json, audio files referenced in manifest
-       [Outputs] Updates manifest.json with "speaker" field for each segment
+       [Inputs] Manifest store (mirrored to data/clips/manifest.json, re-exported at the end), audio files referenced in manifest
+       [Outputs] Updates the manifest store (data/clips/manifest.db) with "speaker" field for each segment
        [Side Effects] Downloads pyannote models (requires HF token)
        [How to run] uv run add_diarization.py
 
 WHEN:  2025-11-30
        [Change Log:
         - 2025-11-30: Initial creation
-        - 2025-11-30: Added safe_globals fix for PyTorch 2.6+ / pyannote compatibility]
+        - 2025-11-30: Added safe_globals fix for PyTorch 2.6+ / pyannote compatibility
+        - 2026-10-16: Max-overlap matching uses ingestion.alignment.TurnIndex
+        - 2026-10-16: Writes each clip to the manifest store as soon as it is diarized]
 
 WHERE: apps/speaker-diarization-benchmark/add_diarization.py
 
@@ -34,6 +36,8 @@ import torch
 import omegaconf
 from pyannote.audio import Pipeline
 from pyannote.audio.core.task import Specifications, Problem, Resolution
+from ingestion.alignment import TurnIndex, turns_from_diarization
+from ingestion.manifest import get_store
 
 # Configure logging
 
@@ -51,28 +55,13 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 DB_FILE = DATA_DIR / "speaker_embeddings.json"
 HF_TOKEN = "REDACTED_SECRET"
 
-def get_dominant_speaker(segment_start, segment_end, diarization):
-    """Find the speaker with the most overlap for a given time range."""
-    overlaps = {}
-    segment_duration = segment_end - segment_start
-    
-    for turn, _, speaker in diarization.itertracks(yield_label=True):
-        # Calculate overlap
-        start = max(segment_start, turn.start)
-        end = min(segment_end, turn.end)
-        overlap = max(0, end - start)
-        
-        if overlap > 0:
-            overlaps[speaker] = overlaps.get(speaker, 0) + overlap
-
-    if not overlaps:
-        return "UNKNOWN"
-        
-    # Return speaker with max overlap
-    return max(overlaps, key=overlaps.get)
+def get_dominant_speaker(segment_start, segment_end, turns):
+    """Find the speaker with the most overlap for a given time range (turns: a TurnIndex)."""
+    return turns.dominant_speaker(segment_start, segment_end)
 
 def main():
     parser = argparse.ArgumentParser()
@@ -81,12 +70,11 @@ def main():
     parser.add_argument("--clip-id", type=str, help="Process only this clip ID")
     args = parser.parse_args()
 
-    if not MANIFEST_FILE.exists():
+    if not MANIFEST_FILE.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found.")
         return
 
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
+    store = get_store(MANIFEST_DB, MANIFEST_FILE)
         
     logger.info("Loading pyannote pipeline...")
     try:
@@ -114,7 +102,7 @@ def main():
         logger.error(f"Failed to load pipeline: {e}")
         return
 
-    for entry in manifest:
+    for entry in store.entries():
         if args.clip_id and entry["id"] != args.clip_id:
             continue
 
@@ -216,19 +204,23 @@ def main():
         for turn, _, speaker in diarization.itertracks(yield_label=True):
             logger.debug(f"  Speaker {speaker}: {turn.start:.2f}s - {turn.end:.2f}s")
         
-        # Process each model's transcription
-        if "transcriptions" in entry:
-            for model_name, segments in entry["transcriptions"].items():
+        # Process each model's transcription. Aligning inside the store update means a
+        # transcription written by another run meanwhile is aligned too, not overwritten.
+        turns = TurnIndex(turns_from_diarization(diarization))
+
+        def align(entry):
+            for model_name, segments in entry.get("transcriptions", {}).items():
                 logger.info(f"  Aligning speakers for {model_name}...")
                 for seg in segments:
-                    speaker = get_dominant_speaker(seg["start"], seg["end"], diarization)
+                    speaker = get_dominant_speaker(seg["start"], seg["end"], turns)
                     logger.debug(f"    Segment {seg['start']:.2f}-{seg['end']:.2f}: {speaker}")
                     seg["speaker"] = speaker
-                    
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
-        
-    logger.info(f"Done! Updated manifest saved to {MANIFEST_FILE}")
+
+        store.update(entry["id"], align)
+
+    # One manifest.json export for the whole batch
+    store.close(export=True)
+    logger.info(f"Done! Updated manifest store {store.db_path} and exported {MANIFEST_FILE}")
 
 if __name__ == "__main__":
     main()
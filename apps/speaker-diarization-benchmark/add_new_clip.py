@@ -1,13 +1,11 @@
-import json
 import os
+from pathlib import Path
+from ingestion.manifest import get_store
 
-MANIFEST_PATH = 'data/clips/manifest.json'
+CLIPS_DIR = Path('data/clips')
 CLIP_PATH = '/Users/laptop/Development/Personal/psuedonymous/toolshed/apps/speaker-diarization-benchmark/data/clips/clip_local_mssp-old-test-ep-1_240_180.mp3'
 
 def main():
-    with open(MANIFEST_PATH, 'r') as f:
-        data = json.load(f)
-
     new_entry = {
         "id": os.path.basename(CLIP_PATH), 
         "clip_path": CLIP_PATH,
@@ -19,13 +17,11 @@ def main():
     }
     
     # Check if already exists
-    if not any(c['clip_path'] == CLIP_PATH for c in data):
-        data.append(new_entry)
-        with open(MANIFEST_PATH, 'w') as f:
-            json.dump(data, f, indent=4)
-        print(f"Added {CLIP_PATH} to manifest.")
-    else:
-        print("Clip already in manifest.")
+    with get_store(CLIPS_DIR / 'manifest.db', CLIPS_DIR / 'manifest.json') as store:
+        if store.find(Path(CLIP_PATH)) is None and store.add(new_entry):
+            print(f"Added {CLIP_PATH} to manifest.")
+        else:
+            print("Clip already in manifest.")
 
 if __name__ == "__main__":
     main()
@@ -16,7 +16,11 @@ HOW:
   1. Process an audio file:
      uv run audio_ingestion.py diarize <clip_path> --workflow <workflow_name>
 
-  2. Download a video:
+  2. Live diarization of a growing file or a PCM pipe (JSON lines on stdout):
+     uv run audio_ingestion.py stream <file.wav | -> [--clip-id <id>]
+     uv run audio_ingestion.py stream <clip_path> --replay  # replay a sample clip in real time
+
+  3. Download a video:
      uv run audio_ingestion.py download <URL> --output-dir <dir>
 
      Supported Providers:
@@ -38,9 +42,10 @@ HOW:
   - --output-dir: Directory to save the video
   
   [Outputs]
-  - Updates manifest.json with results.
+  - Updates the manifest store (data/clips/manifest.db) with results. Export manifest.json
+    for the ground-truth UI with `uv run python -m ingestion.manifest export`.
   - Generates a text report (unless --dry-run is used).
-  - Caches transcriptions in data/cache/transcriptions.
+  - Caches transcriptions in data/cache/transcriptions (keyed by audio content hash, model and decode options).
 
 WHO:
   Antigravity
@@ -56,7 +61,9 @@ WHAT:
 
 WHEN:
   2025-12-05
-  Last Modified: 2025-12-05
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Added the `stream` command (ingestion.streaming).
   
 WHERE:
   apps/speaker-diarization-benchmark/audio_ingestion.py
@@ -80,11 +87,12 @@ load_dotenv()
 sys.path.append(str(Path(__file__).parent))
 
 from ingestion.args import parse_args
-from ingestion.config import IngestionConfig, DownloadConfig
+from ingestion.config import IngestionConfig, DownloadConfig, StreamConfig
 from ingestion.download import download_video
 from ingestion.manifest import update_manifest
 from ingestion.report import generate_report
-from transcribe import transcribe, TranscriptionResult, Segment, Word
+from ingestion.transcription_cache import get_transcription_cache
+from transcribe import transcribe
 from utils import get_git_info
 
 # Configure logging
@@ -102,6 +110,11 @@ def main():
     if isinstance(config, DownloadConfig):
         download_video(config)
         return
+
+    if isinstance(config, StreamConfig):
+        from ingestion.streaming import stream_audio
+        stream_audio(config)
+        return
         
     logger.info(f"Processing clip: {config.clip_path}")
     
@@ -117,40 +130,12 @@ def main():
     logger.info("Starting transcription...")
     transcription_start = time.time()
     
-    # Caching logic (Simplified for now, can be moved to a module)
-    cache_dir = Path(__file__).parent / "data/cache/transcriptions"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_file = cache_dir / f"{config.clip_path.stem}.json"
-    
-    transcription_result = None
-    if cache_file.exists():
-        logger.info(f"Loading transcription from cache: {cache_file}")
-        try:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                # Reconstruct Pydantic models
-                segments = []
-                for s in data['segments']:
-                    words = [Word(**w) for w in s['words']]
-                    segments.append(Segment(start=s['start'], end=s['end'], text=s['text'], words=words))
-                transcription_result = TranscriptionResult(text=data['text'], segments=segments, language=data['language'])
-        except Exception as e:
-            logger.warning(f"Failed to load cache: {e}. Re-running transcription.")
-    
-    if transcription_result is None:
-        try:
-            transcription_result = transcribe(str(config.clip_path))
-            # Save to cache
-            with open(cache_file, 'w') as f:
-                if hasattr(transcription_result, 'model_dump'):
-                    data = transcription_result.model_dump()
-                else:
-                    data = transcription_result.dict()
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved transcription to cache: {cache_file}")
-        except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            return
+    cache = get_transcription_cache()
+    try:
+        transcription_result = cache.get_or_transcribe(config.clip_path, transcribe)
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        return
         
     transcription_time = time.time() - transcription_start
     logger.info(f"Transcription complete in {transcription_time:.2f}s")
@@ -167,6 +152,7 @@ def main():
     
     # Add transcription time to stats
     stats['transcription_time'] = transcription_time
+    stats.update(cache.stats())
     stats['total_time'] = time.time() - start_time_global
     
     # 3. Output Generation
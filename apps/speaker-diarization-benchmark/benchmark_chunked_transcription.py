@@ -0,0 +1,126 @@
+"""
+HOW:
+  uv run benchmark_chunked_transcription.py data/downloads/mssp-old-test-ep-1.wav
+  uv run benchmark_chunked_transcription.py <audio> --backend faster-whisper --workers 4 --chunk-length 120
+
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Compares single-pass `transcribe()` with chunked parallel transcription on one recording.
+  [Outputs]
+  - Wall time and speed factor for both runs.
+  - Word agreement: fraction of single-pass words matched (in order) by the chunked result,
+    and the mean absolute start-time difference of matched words.
+  - benchmark_chunked_transcription.json with the numbers above.
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/benchmark_chunked_transcription.py
+
+WHY:
+  benchmark_full_video.py showed single-pass transcription is the bottleneck on full episodes;
+  this checks how much the chunked mode saves and what it costs in word-level agreement.
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+
+from transcribe import BACKENDS, CHUNK_LENGTH, CHUNK_OVERLAP, SAMPLE_RATE, load_audio, transcribe
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def _words(result):
+    words = [w for seg in result.segments for w in seg.words]
+    tokens = [re.sub(r"[^\w']", "", w.word.lower()) for w in words]
+    return [(t, w.start) for t, w in zip(tokens, words) if t]
+
+
+def word_agreement(reference, candidate):
+    """(matched fraction of reference words, mean |start diff| of matched words)."""
+    ref, cand = _words(reference), _words(candidate)
+    matcher = difflib.SequenceMatcher(a=[t for t, _ in ref], b=[t for t, _ in cand], autojunk=False)
+    diffs = []
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            diffs.append(abs(ref[block.a + k][1] - cand[block.b + k][1]))
+    agreement = len(diffs) / len(ref) if ref else 1.0
+    return agreement, (sum(diffs) / len(diffs) if diffs else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-pass vs chunked transcription benchmark")
+    parser.add_argument("audio_path", type=str)
+    parser.add_argument("--backend", default="mlx", choices=list(BACKENDS))
+    parser.add_argument("--chunk-length", type=float, default=CHUNK_LENGTH)
+    parser.add_argument("--overlap", type=float, default=CHUNK_OVERLAP)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=str, default="benchmark_chunked_transcription.json")
+    args = parser.parse_args()
+
+    audio_path = Path(args.audio_path)
+    if not audio_path.exists():
+        logger.error(f"File not found: {audio_path}")
+        return
+    audio = load_audio(str(audio_path))
+    duration = len(audio) / SAMPLE_RATE
+    logger.info(f"Audio Duration: {duration:.2f}s ({duration/60:.2f} min)")
+
+    # Warmup on the first 10s so the model download is not timed. Chunked workers are
+    # separate processes and still pay their own model load, which is part of the real cost.
+    logger.info("Warming up backend...")
+    BACKENDS[args.backend](audio[:10 * SAMPLE_RATE], os.cpu_count() or 1)
+
+    results = {}
+    for name, kwargs in [
+        ("single_pass", {}),
+        ("chunked", {"chunked": True, "chunk_length": args.chunk_length, "overlap": args.overlap, "workers": args.workers}),
+    ]:
+        logger.info(f"--- {name} ---")
+        start_time = time.time()
+        result = transcribe(str(audio_path), backend=args.backend, **kwargs)
+        elapsed = time.time() - start_time
+        results[name] = {"result": result, "time": elapsed}
+        logger.info(f"{name}: {elapsed:.2f}s ({duration / elapsed:.2f}x realtime)")
+
+    agreement, start_diff = word_agreement(results["single_pass"]["result"], results["chunked"]["result"])
+    summary = {
+        "audio": str(audio_path),
+        "duration": duration,
+        "backend": args.backend,
+        "chunk_length": args.chunk_length,
+        "overlap": args.overlap,
+        "workers": args.workers,
+        "single_pass_time": results["single_pass"]["time"],
+        "chunked_time": results["chunked"]["time"],
+        "speedup": results["single_pass"]["time"] / results["chunked"]["time"],
+        "single_pass_words": len(_words(results["single_pass"]["result"])),
+        "chunked_words": len(_words(results["chunked"]["result"])),
+        "word_agreement": agreement,
+        "mean_start_diff": start_diff,
+    }
+
+    print("\n--- Results ---")
+    print(f"Single-pass: {summary['single_pass_time']:.2f}s | Chunked: {summary['chunked_time']:.2f}s "
+          f"| Speedup: {summary['speedup']:.2f}x")
+    print(f"Words: {summary['single_pass_words']} vs {summary['chunked_words']} "
+          f"| Agreement: {agreement:.2%} | Mean start diff: {start_diff:.3f}s")
+
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2)
+    logger.info(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
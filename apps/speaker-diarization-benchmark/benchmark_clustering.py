@@ -0,0 +1,196 @@
+"""
+HOW:
+  uv run benchmark_clustering.py
+  uv run benchmark_clustering.py --sizes 5000 50000 200000 --max-agglomerative 20000
+  uv run benchmark_clustering.py --embeddings word_embeddings.npy --threshold 0.5
+
+WHO:
+  Antigravity
+  (Context: Speaker Diarization Benchmark)
+
+WHAT:
+  Agglomerative vs online speaker clustering (`ingestion.clustering`) as the number of
+  embeddings grows.
+  [Inputs]
+  - Synthetic speaker embeddings (default): unit-norm points around --speakers random
+    directions, in speaker turns, with --noise spread.
+  - Or a saved (n, dim) embedding matrix via --embeddings; sizes are prefixes of it.
+  [Outputs]
+  - Per size and method: wall time, peak RSS of a fresh process, number of clusters.
+  - Label agreement (adjusted Rand index) of online against agglomerative, and of both against
+    the synthetic speakers.
+  - Runs whose process died (e.g. killed by the OOM killer) are listed as failed.
+  - benchmark_clustering.json with the numbers above.
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/benchmark_clustering.py
+
+WHY:
+  The agglomerative distance matrix grows with the square of the word count. Each run happens in
+  its own spawned process so peak RSS belongs to one method and one size.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import resource
+import signal
+import time
+from queue import Empty
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from ingestion.clustering import CLUSTERING_METHODS, cluster_embeddings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def synthetic_embeddings(n: int, dim: int, n_speakers: int, noise: float, seed: int = 0):
+    """(embeddings, speaker labels) in turns of 5-60 words."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_speakers, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    turns = []
+    while sum(len(t) for t in turns) < n:
+        turns.append(np.full(rng.integers(5, 60), rng.integers(n_speakers)))
+    truth = np.concatenate(turns)[:n]
+    X = centers[truth] + rng.normal(scale=noise, size=(n, dim))
+    return X.astype(np.float32), truth
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(X: np.ndarray, threshold: float, method: str, max_clusters: int, queue):
+    baseline = _peak_rss_mb()
+    start = time.time()
+    labels = cluster_embeddings(X, threshold, method=method, max_clusters=max_clusters)
+    queue.put({
+        'time': time.time() - start,
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_growth_mb': _peak_rss_mb() - baseline,
+        'labels': labels,
+    })
+
+
+def _run_in_process(target, args: tuple, label: str, poll: float = 1.0) -> dict:
+    """
+    Runs `target(*args, queue)` in a spawned process and returns what it put on the queue, or
+    {'error': ...} if the process died first (an exception, or killed by the OOM killer).
+    """
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    result = None
+    # Poll rather than block: a killed child never puts its result
+    while result is None:
+        try:
+            result = queue.get(timeout=poll)
+        except Empty:
+            if not proc.is_alive():
+                break
+    if result is None:
+        # The child may have put its result just before exiting
+        try:
+            result = queue.get(timeout=poll)
+        except Empty:
+            pass
+    proc.join()
+    if result is not None and proc.exitcode == 0:
+        return result
+    if proc.exitcode is not None and proc.exitcode < 0:
+        error = f"killed by signal {-proc.exitcode}"
+        if -proc.exitcode == signal.SIGKILL:
+            error += " (out of memory?)"
+    else:
+        error = f"exited with {proc.exitcode}"
+    logger.error(f"{label} {error}")
+    return {'error': error}
+
+
+def run_isolated(X: np.ndarray, threshold: float, method: str, max_clusters: int) -> dict:
+    return _run_in_process(_run, (X, threshold, method, max_clusters), f"{method} on {len(X)} points")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agglomerative vs online speaker clustering: time, memory, agreement")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 10000, 20000, 50000])
+    parser.add_argument("--embeddings", type=str, help="Saved (n, dim) .npy embedding matrix instead of synthetic data")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--speakers", type=int, default=6)
+    parser.add_argument("--noise", type=float, default=0.05, help="Per-dimension noise of synthetic embeddings")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--max-clusters", type=int, default=64)
+    parser.add_argument("--max-agglomerative", type=int, default=20000,
+                        help="Skip agglomerative above this many points")
+    parser.add_argument("--output", type=str, default="benchmark_clustering.json")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        data, truth = np.load(args.embeddings), None
+        sizes = [n for n in args.sizes if n <= len(data)] or [len(data)]
+    else:
+        data, truth = synthetic_embeddings(max(args.sizes), args.dim, args.speakers, args.noise)
+        sizes = args.sizes
+
+    results = []
+    failed = []
+    for n in sizes:
+        X = np.ascontiguousarray(data[:n])
+        runs = {}
+        for method in CLUSTERING_METHODS:
+            if method == "agglomerative" and n > args.max_agglomerative:
+                logger.info(f"Skipping agglomerative at {n} points (--max-agglomerative {args.max_agglomerative})")
+                continue
+            run = run_isolated(X, args.threshold, method, args.max_clusters)
+            if 'error' in run:
+                failed.append({'n': n, 'method': method, 'error': run['error']})
+                continue
+            runs[method] = run
+            logger.info(f"{n} points [{method}]: {run['time']:.2f}s, peak RSS {run['peak_rss_mb']:.0f} MB, "
+                        f"{run['labels'].max() + 1} clusters")
+
+        for method, run in runs.items():
+            row = {
+                'n': n,
+                'method': method,
+                'time': run['time'],
+                'peak_rss_mb': run['peak_rss_mb'],
+                'rss_growth_mb': run['rss_growth_mb'],
+                'clusters': int(run['labels'].max() + 1),
+                'ari_vs_agglomerative': None,
+                'ari_vs_truth': None,
+            }
+            if "agglomerative" in runs:
+                row['ari_vs_agglomerative'] = adjusted_rand_score(runs["agglomerative"]['labels'], run['labels'])
+            if truth is not None:
+                row['ari_vs_truth'] = adjusted_rand_score(truth[:n], run['labels'])
+            results.append(row)
+
+    def fmt(value):
+        return f"{value:.3f}" if value is not None else "-"
+
+    print(f"\n{'N':>8} {'Method':<14} {'Time':>9} {'Peak RSS':>10} {'Growth':>9} {'Clusters':>9} {'ARI/agg':>8} {'ARI/true':>9}")
+    for r in results:
+        print(f"{r['n']:>8} {r['method']:<14} {r['time']:>8.2f}s {r['peak_rss_mb']:>7.0f} MB {r['rss_growth_mb']:>6.0f} MB "
+              f"{r['clusters']:>9} {fmt(r['ari_vs_agglomerative']):>8} {fmt(r['ari_vs_truth']):>9}")
+    for r in failed:
+        print(f"{r['n']:>8} {r['method']:<14} FAILED: {r['error']}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'threshold': args.threshold, 'max_clusters': args.max_clusters,
+                   'embeddings': args.embeddings or 'synthetic', 'results': results, 'failed': failed}, f, indent=2)
+    logger.info(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+HOW:
+  uv run benchmark_frame_embeddings.py
+  uv run benchmark_frame_embeddings.py data/clips/clip_youtube_jAlKYYr1bpY_0_60.wav --window 1 --frame-step 0.1
+
+WHO:
+  Antigravity
+  (Context: Speaker Diarization Benchmark)
+
+WHAT:
+  Per-word vs frame-pooled word embeddings in `WordLevelWorkflow`, scored on speaker-change
+  boundaries.
+  [Inputs]
+  - Clips with a `<clip>_ground_truth.txt` next to them (lines `[start - end] Speaker: text`).
+  [Outputs]
+  - embedding_time per mode.
+  - For each segmentation threshold: boundary precision / recall / F1 against the ground-truth
+    speaker changes (a predicted boundary matches a reference one within --tolerance seconds),
+    and the mean offset of matched boundaries.
+  - benchmark_frame_embeddings.json with the numbers above.
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/benchmark_frame_embeddings.py
+
+WHY:
+  Frame mode costs one sliding pass per clip instead of one forward per word window; this
+  checks how much segmentation accuracy that trades away. Distances from pooled frames are
+  distributed differently, so each mode is scored over a sweep of thresholds.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from transcribe import transcribe
+from ingestion.transcription_cache import get_transcription_cache
+from ingestion.models import load_pyannote_model
+from ingestion.workflows.local.word_level import WordLevelWorkflow
+from ingestion.segmentation import ChangePointSegmenter, segments_from_boundaries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CLIPS_DIR = Path("data/clips")
+GROUND_TRUTH_LINE = re.compile(r"^\[(\d+(?:\.\d+)?) - (\d+(?:\.\d+)?)\] ([^:]+):")
+
+
+def ground_truth_path(clip_path: Path) -> Path:
+    return clip_path.with_name(f"{clip_path.stem}_ground_truth.txt")
+
+
+def load_turns(path: Path) -> List[Tuple[float, float, str]]:
+    turns = []
+    for line in path.read_text().splitlines():
+        match = GROUND_TRUTH_LINE.match(line.strip())
+        if match:
+            turns.append((float(match.group(1)), float(match.group(2)), match.group(3).strip()))
+    return sorted(turns)
+
+
+def speaker_changes(turns: List[Tuple[float, float, str]]) -> List[float]:
+    """Midpoints of the gaps between consecutive turns of different speakers."""
+    return [(prev[1] + cur[0]) / 2 for prev, cur in zip(turns, turns[1:]) if prev[2] != cur[2]]
+
+
+def segment_boundaries(segments: List[dict]) -> List[float]:
+    return [(prev['end'] + cur['start']) / 2 for prev, cur in zip(segments, segments[1:])]
+
+
+def boundary_scores(reference: List[float], hypothesis: List[float], tolerance: float) -> dict:
+    """Greedy one-to-one matching of boundaries within `tolerance`, closest pairs first."""
+    pairs = sorted(
+        (abs(r - h), i, j)
+        for i, r in enumerate(reference)
+        for j, h in enumerate(hypothesis)
+        if abs(r - h) <= tolerance
+    )
+    used_ref, used_hyp, offsets = set(), set(), []
+    for dist, i, j in pairs:
+        if i not in used_ref and j not in used_hyp:
+            used_ref.add(i)
+            used_hyp.add(j)
+            offsets.append(dist)
+    precision = len(offsets) / len(hypothesis) if hypothesis else 0.0
+    recall = len(offsets) / len(reference) if reference else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'mean_offset': sum(offsets) / len(offsets) if offsets else None,
+        'predicted': len(hypothesis),
+        'reference': len(reference),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-word vs frame-pooled word embeddings: boundary accuracy")
+    parser.add_argument("clips", nargs="*", help="Clip paths (default: data/clips/* with a ground truth file)")
+    parser.add_argument("--window", type=int, default=0, help="Context words on each side")
+    parser.add_argument("--frame-duration", type=float, default=1.0)
+    parser.add_argument("--frame-step", type=float, default=0.25)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.2, 0.3, 0.4, 0.5, 0.6, 0.7])
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Boundary match tolerance in seconds")
+    parser.add_argument("--output", type=str, default="benchmark_frame_embeddings.json")
+    args = parser.parse_args()
+
+    clips = [Path(c) for c in args.clips] or [
+        p for p in sorted(CLIPS_DIR.iterdir())
+        if p.suffix in (".wav", ".mp3") and ground_truth_path(p).exists()
+    ]
+    clips = [c for c in clips if ground_truth_path(c).exists()]
+    if not clips:
+        logger.error("No clips with a ground truth file found.")
+        return
+
+    model = load_pyannote_model("pyannote/embedding", token=os.getenv("HF_TOKEN"))
+    cache = get_transcription_cache()
+    results = []
+    for clip_path in clips:
+        reference = speaker_changes(load_turns(ground_truth_path(clip_path)))
+        transcription_result = cache.get_or_transcribe(clip_path, transcribe)
+        all_words = [w for seg in transcription_result.segments for w in seg.words]
+        logger.info(f"{clip_path.name}: {len(all_words)} words, {len(reference)} reference speaker changes")
+
+        for mode in ("word", "frame"):
+            workflow = WordLevelWorkflow({
+                'window': args.window,
+                'embedding_mode': mode,
+                'frame_duration': args.frame_duration,
+                'frame_step': args.frame_step,
+            })
+            start = time.time()
+            word_embeddings, valid_words = workflow.embed_words(clip_path, all_words, model)
+            embedding_time = time.time() - start
+
+            # One distance pass for the whole threshold sweep
+            sweep = ChangePointSegmenter(word_embeddings).boundary_sets(args.thresholds)
+            for threshold, boundaries in sweep.items():
+                segments = segments_from_boundaries(valid_words, boundaries)
+                scores = boundary_scores(reference, segment_boundaries(segments), args.tolerance)
+                results.append({
+                    'clip': clip_path.name,
+                    'mode': mode,
+                    'threshold': threshold,
+                    'embedding_time': embedding_time,
+                    'words_embedded': len(valid_words),
+                    **scores,
+                })
+            logger.info(f"{clip_path.name} [{mode}]: embedding {embedding_time:.2f}s for {len(valid_words)} words")
+
+    print(f"\n{'Clip':<40} {'Mode':<6} {'Thr':>5} {'Embed':>8} {'P':>6} {'R':>6} {'F1':>6} {'Offset':>7}")
+    for r in results:
+        offset = f"{r['mean_offset']:.2f}s" if r['mean_offset'] is not None else "-"
+        print(f"{r['clip']:<40} {r['mode']:<6} {r['threshold']:>5.2f} {r['embedding_time']:>7.2f}s "
+              f"{r['precision']:>6.2f} {r['recall']:>6.2f} {r['f1']:>6.2f} {offset:>7}")
+
+    print("\nBest threshold per mode (mean F1 over clips):")
+    for mode in ("word", "frame"):
+        rows = [r for r in results if r['mode'] == mode]
+        by_threshold = {}
+        for r in rows:
+            by_threshold.setdefault(r['threshold'], []).append(r['f1'])
+        best = max(by_threshold, key=lambda t: sum(by_threshold[t]) / len(by_threshold[t]))
+        embed = sum({r['clip']: r['embedding_time'] for r in rows}.values())
+        print(f"  {mode:<6} threshold {best:.2f}: F1 {sum(by_threshold[best]) / len(by_threshold[best]):.3f}, "
+              f"total embedding time {embed:.2f}s")
+
+    with open(args.output, 'w') as f:
+        json.dump({'window': args.window, 'frame_duration': args.frame_duration, 'frame_step': args.frame_step,
+                   'tolerance': args.tolerance, 'results': results}, f, indent=2)
+    logger.info(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
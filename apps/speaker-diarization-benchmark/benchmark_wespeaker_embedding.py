@@ -0,0 +1,163 @@
+"""
+HOW:
+  uv run benchmark_wespeaker_embedding.py
+  uv run benchmark_wespeaker_embedding.py data/clips/clip_local_mssp-old-test-ep-1_0_60.wav --window 1
+
+WHO:
+  Antigravity
+  (Context: Speaker Diarization Benchmark)
+
+WHAT:
+  Compares WeSpeaker word-window embedding paths on the sample clips.
+  [Paths]
+  - temp-file: the previous WeSpeakerWorkflow loop. `Audio.crop` per word, `sf.write` to a
+    temporary WAV, `model.extract_embedding(path)`.
+  - batched: `WeSpeakerEmbedder`. Whole-clip fbank once, per-span frame slices, batched forwards.
+  [Outputs]
+  - embedding_time per clip and path, speed factor.
+  - Mean / min cosine similarity between the two paths' embeddings of the same word.
+  - benchmark_wespeaker_embedding.json with the numbers above.
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/benchmark_wespeaker_embedding.py
+
+WHY:
+  The temp-file loop did hundreds of WAV writes and re-reads per 60 s clip; this measures what
+  the in-memory path saves and checks the embeddings still agree.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from transcribe import transcribe
+from ingestion.transcription_cache import get_transcription_cache
+from ingestion.models import load_wespeaker_model
+from ingestion.embedding import WeSpeakerEmbedder
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CLIPS_DIR = Path("data/clips")
+
+
+def word_spans(transcription_result, window: int):
+    """(start, end) of each word plus `window` context words, skipping words under 20 ms."""
+    words = [w for seg in transcription_result.segments for w in seg.words]
+    spans = []
+    for i, word in enumerate(words):
+        if word.end - word.start < 0.02:
+            continue
+        lo = max(0, i - window)
+        hi = min(len(words) - 1, i + window)
+        spans.append((words[lo].start, words[hi].end))
+    return spans
+
+
+def embed_temp_file(model, clip_path: Path, spans):
+    """The previous per-word crop -> WAV -> extract_embedding loop. Returns {span index: embedding}."""
+    import soundfile as sf
+    from pyannote.audio.core.io import Audio
+    from pyannote.core import Segment
+
+    audio_io = Audio(sample_rate=16000, mono="downmix")
+    rows = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir) / "temp_crop.wav"
+        for i, (start, end) in enumerate(spans):
+            try:
+                waveform, sr = audio_io.crop(clip_path, Segment(start, end))
+                sf.write(temp_path, waveform.numpy().T, sr)
+                emb = model.extract_embedding(str(temp_path))
+                rows[i] = emb.numpy() if isinstance(emb, torch.Tensor) else np.asarray(emb)
+            except Exception as e:
+                logger.debug(f"Temp-file path failed on span {i}: {e}")
+    return rows
+
+
+def cosine_similarities(a: dict, b: dict) -> np.ndarray:
+    common = sorted(set(a) & set(b))
+    if not common:
+        return np.empty(0)
+    x = np.vstack([a[i] for i in common])
+    y = np.vstack([b[i] for i in common])
+    x = x / np.linalg.norm(x, axis=1, keepdims=True)
+    y = y / np.linalg.norm(y, axis=1, keepdims=True)
+    return np.sum(x * y, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WeSpeaker temp-file vs batched in-memory embeddings")
+    parser.add_argument("clips", nargs="*", help="Clip paths (default: data/clips/*.wav)")
+    parser.add_argument("--window", type=int, default=0, help="Context words on each side")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--output", type=str, default="benchmark_wespeaker_embedding.json")
+    args = parser.parse_args()
+
+    clips = [Path(c) for c in args.clips] or sorted(CLIPS_DIR.glob("*.wav"))
+    if not clips:
+        logger.error(f"No clips given and none found in {CLIPS_DIR}")
+        return
+
+    model = load_wespeaker_model('english')
+    embedder = WeSpeakerEmbedder(model, batch_size=args.batch_size)
+    cache = get_transcription_cache()
+
+    results = []
+    for clip_path in clips:
+        spans = word_spans(cache.get_or_transcribe(clip_path, transcribe), args.window)
+        logger.info(f"{clip_path.name}: {len(spans)} word spans")
+
+        start = time.time()
+        old = embed_temp_file(model, clip_path, spans)
+        old_time = time.time() - start
+
+        start = time.time()
+        result = embedder.embed_spans(clip_path, spans)
+        new_time = time.time() - start
+        new = dict(zip(result.indices, result.embeddings))
+
+        sims = cosine_similarities(old, new)
+        row = {
+            'clip': clip_path.name,
+            'spans': len(spans),
+            'temp_file_embedded': len(old),
+            'batched_embedded': len(new),
+            'temp_file_time': old_time,
+            'batched_time': new_time,
+            'batched_stats': result.stats(),
+            'speedup': old_time / new_time if new_time else None,
+            'mean_cosine': float(sims.mean()) if len(sims) else None,
+            'min_cosine': float(sims.min()) if len(sims) else None,
+        }
+        results.append(row)
+        logger.info(
+            f"{clip_path.name}: temp-file {old_time:.2f}s, batched {new_time:.2f}s "
+            f"({row['speedup']:.1f}x), cosine mean {row['mean_cosine'] or 0:.4f} min {row['min_cosine'] or 0:.4f}"
+        )
+
+    total_old = sum(r['temp_file_time'] for r in results)
+    total_new = sum(r['batched_time'] for r in results)
+    print(f"\n{'Clip':<45} {'Spans':>6} {'Temp-file':>10} {'Batched':>9} {'Speedup':>8} {'Cosine':>7}")
+    for r in results:
+        print(f"{r['clip']:<45} {r['spans']:>6} {r['temp_file_time']:>9.2f}s {r['batched_time']:>8.2f}s "
+              f"{r['speedup']:>7.1f}x {r['mean_cosine'] or 0:>7.4f}")
+    print(f"{'Total':<45} {'':>6} {total_old:>9.2f}s {total_new:>8.2f}s {total_old / total_new:>7.1f}x")
+
+    with open(args.output, 'w') as f:
+        json.dump({'window': args.window, 'clips': results,
+                   'total_temp_file_time': total_old, 'total_batched_time': total_new}, f, indent=2)
+    logger.info(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,14 @@ import torch
 from scipy.spatial.distance import cosine
 from sklearn.cluster import AgglomerativeClustering
 from pyannote.audio import Model, Inference
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment as PyannoteSegment
 
 # Add current directory to sys.path to import transcribe
 import sys
 sys.path.append(str(Path(__file__).parent))
 from transcribe import transcribe
+from ingestion.transcription_cache import get_transcription_cache
+from ingestion.audio_cache import get_audio_cache
+from ingestion.segmentation import ChangePointSegmenter, segments_from_boundaries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,6 +28,7 @@ def main():
     parser = argparse.ArgumentParser(description="Benchmark word-level speaker diarization.")
     parser.add_argument("clip_path", type=str, help="Path to the audio clip.")
     parser.add_argument("--threshold", type=float, default=0.5, help="Cosine distance threshold for segmentation.")
+    parser.add_argument("--sweep", type=float, nargs="+", help="Also report segment counts for these segmentation thresholds (one distance pass).")
     parser.add_argument("--window", type=int, default=0, help="Number of context words on each side (0 = no window).")
     parser.add_argument("--save", action="store_true", help="Save results to manifest.json")
     parser.add_argument("--cluster-threshold", type=float, default=0.5, help="Clustering distance threshold.")
@@ -41,67 +43,19 @@ def main():
     # 1. Transcription
     logger.info("Starting transcription...")
     
-    # Cache setup
-    cache_dir = Path("data/cache/transcriptions")
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Create a safe filename for the model
-    model_safe_name = "mlx-community_whisper-large-v3-turbo"
-    cache_file = cache_dir / f"{clip_path.name}.{model_safe_name}.json"
-    
-    transcription_result = None
-    
-    if cache_file.exists():
-        logger.info(f"Loading cached transcription from {cache_file}")
-        try:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                # Reconstruct objects
-                from transcribe import TranscriptionResult, Segment, Word
-                
-                # We need to manually reconstruct because Pydantic's model_validate might need dicts
-                # Assuming the JSON is the result of model_dump()
-                
-                # Helper to reconstruct words
-                def dict_to_word(d):
-                    return Word(**d)
-                
-                segments = []
-                for s in data['segments']:
-                    s_words = [dict_to_word(w) for w in s.get('words', [])]
-                    segments.append(Segment(
-                        start=s['start'],
-                        end=s['end'],
-                        text=s['text'],
-                        words=s_words,
-                        speaker=s.get('speaker', "UNKNOWN")
-                    ))
-                    
-                transcription_result = TranscriptionResult(
-                    text=data['text'],
-                    segments=segments,
-                    language=data.get('language', 'en')
-                )
-                transcription_time = 0 # Cached
-        except Exception as e:
-            logger.warning(f"Failed to load cache: {e}. Re-running transcription.")
-    
-    if transcription_result is None:
-        start_time = time.time()
-        try:
-            transcription_result = transcribe(str(clip_path))
-            
-            # Save to cache
-            with open(cache_file, 'w') as f:
-                json.dump(transcription_result.model_dump(), f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            return
-        transcription_time = time.time() - start_time
-        logger.info(f"Transcription complete in {transcription_time:.2f}s")
-    else:
+    cache = get_transcription_cache()
+    start_time = time.time()
+    try:
+        transcription_result = cache.get_or_transcribe(clip_path, transcribe)
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        return
+    transcription_time = time.time() - start_time
+    if cache.hits:
         logger.info("Transcription loaded from cache.")
+        transcription_time = 0 # Cached
+    else:
+        logger.info(f"Transcription complete in {transcription_time:.2f}s")
 
     # Flatten words
     all_words = []
@@ -161,7 +115,7 @@ def main():
         logger.error(f"Failed to load embedding model: {e}")
         return
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     logger.info(f"Embedding each word with window={args.window}...")
     start_time = time.time()
@@ -183,7 +137,7 @@ def main():
             end_time_sec = all_words[w_end_idx].end
             
             # Crop audio for the window
-            waveform, sr = audio_io.crop(clip_path, PyannoteSegment(start_time_sec, end_time_sec))
+            waveform, sr = audio_cache.waveform(clip_path, start_time_sec, end_time_sec)
             
             # Embed
             emb = inference({"waveform": waveform, "sample_rate": sr})
@@ -200,59 +154,18 @@ def main():
     logger.info(f"Segmenting with threshold {args.threshold}...")
     start_time = time.time()
     
-    segments = []
-    if valid_words:
-        current_segment_words = [valid_words[0]]
-        # We'll keep track of the current segment's embeddings to calculate local average
-        current_segment_embeddings = [word_embeddings[0]]
-        current_segment_indices = [0]
-        
-        for i in range(1, len(valid_words)):
-            word = valid_words[i]
-            emb = word_embeddings[i]
-            
-            # Calculate average of LAST 3 words (or fewer)
-            context_embeddings = current_segment_embeddings[-3:]
-            context_avg = np.mean(context_embeddings, axis=0)
-            
-            # Calculate distance
-            dist = cosine(context_avg, emb)
-            
-            # Debug print for first few
-            if i < 10:
-                logger.info(f"Word: {word.word}, Dist: {dist:.4f}")
-
-            if dist > args.threshold:
-                # New segment
-                segments.append({
-                    "start": current_segment_words[0].start,
-                    "end": current_segment_words[-1].end,
-                    "text": " ".join([w.word for w in current_segment_words]),
-                    "word_count": len(current_segment_words),
-                    "word_indices": current_segment_indices
-                })
-                
-                # Reset
-                current_segment_words = [word]
-                current_segment_embeddings = [emb]
-                current_segment_indices = [i]
-            else:
-                # Add to current
-                current_segment_words.append(word)
-                current_segment_embeddings.append(emb)
-                current_segment_indices.append(i)
-                
-        # Add last segment
-        segments.append({
-            "start": current_segment_words[0].start,
-            "end": current_segment_words[-1].end,
-            "text": " ".join([w.word for w in current_segment_words]),
-            "word_count": len(current_segment_words),
-            "word_indices": current_segment_indices
-        })
+    segmenter = ChangePointSegmenter(word_embeddings)
+    boundaries = segmenter.boundaries(args.threshold)
+    # Debug print for first few
+    for word, dist in list(zip(valid_words, segmenter.tested_distances(boundaries)))[1:10]:
+        logger.info(f"Word: {word.word}, Dist: {dist:.4f}")
+    segments = segments_from_boundaries(valid_words, boundaries)
 
     segmentation_time = time.time() - start_time
     logger.info(f"Segmentation complete in {segmentation_time:.2f}s. Found {len(segments)} segments.")
+    if args.sweep:
+        for threshold, sweep_boundaries in segmenter.boundary_sets(args.sweep).items():
+            logger.info(f"Threshold {threshold}: {len(sweep_boundaries) + 1 if valid_words else 0} segments")
 
     # 4. Clustering & Identification
     logger.info("Clustering and identifying speakers...")
@@ -365,53 +278,47 @@ def main():
 
     # 5. Save to Manifest
     if args.save:
-        manifest_path = Path("data/clips/manifest.json")
-        if manifest_path.exists():
-            with open(manifest_path, 'r') as f:
-                manifest = json.load(f)
-            
-            # Find clip entry
-            clip_entry = next((c for c in manifest if c['id'] == clip_path.name), None)
-            if clip_entry:
-                # Prepare segments for manifest
-                manifest_segments = []
-                for seg in segments:
-                    manifest_segments.append({
-                        "start": seg['start'],
-                        "end": seg['end'],
-                        "text": seg['text'],
-                        "speaker": seg.get('speaker', "UNKNOWN")
-                    })
-                
-                # Save under a specific key
-                key = f"benchmark_tuned_t{args.threshold}_w{args.window}"
-                clip_entry['transcriptions'][key] = manifest_segments
-                
-                # Add metadata
-                from utils import get_git_info
-                git_info = get_git_info()
-                
-                if 'transcription_metadata' not in clip_entry:
-                    clip_entry['transcription_metadata'] = {}
-                
-                clip_entry['transcription_metadata'][key] = {
-                    "pipeline": "benchmark_word_level.py",
-                    "commit_hash": git_info['commit_hash'],
-                    "is_dirty": git_info['is_dirty'],
-                    "threshold": args.threshold,
-                    "window": args.window,
-                    "cluster_threshold": args.cluster_threshold,
-                    "id_threshold": args.id_threshold,
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                with open(manifest_path, 'w') as f:
-                    json.dump(manifest, f, indent=4)
-                print(f"\nSaved results to manifest under key '{key}'")
-            else:
-                logger.warning(f"Clip {clip_path.name} not found in manifest, cannot save.")
+        from ingestion.manifest import get_store
+        from utils import get_git_info
+
+        # Prepare segments for manifest
+        manifest_segments = []
+        for seg in segments:
+            manifest_segments.append({
+                "start": seg['start'],
+                "end": seg['end'],
+                "text": seg['text'],
+                "speaker": seg.get('speaker', "UNKNOWN")
+            })
+
+        # Save under a specific key
+        key = f"benchmark_tuned_t{args.threshold}_w{args.window}"
+        git_info = get_git_info()
+
+        def save(clip_entry):
+            clip_entry.setdefault('transcriptions', {})[key] = manifest_segments
+
+            # Add metadata
+            if 'transcription_metadata' not in clip_entry:
+                clip_entry['transcription_metadata'] = {}
+
+            clip_entry['transcription_metadata'][key] = {
+                "pipeline": "benchmark_word_level.py",
+                "commit_hash": git_info['commit_hash'],
+                "is_dirty": git_info['is_dirty'],
+                "threshold": args.threshold,
+                "window": args.window,
+                "cluster_threshold": args.cluster_threshold,
+                "id_threshold": args.id_threshold,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+        store = get_store()
+        if store.update(clip_path.name, save):
+            print(f"\nSaved results to manifest under key '{key}'")
         else:
-            logger.warning("Manifest not found, cannot save.")
+            logger.warning(f"Clip {clip_path.name} not found in manifest, cannot save.")
+        store.close()
 
 if __name__ == "__main__":
     main()
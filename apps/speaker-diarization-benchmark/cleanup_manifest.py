@@ -1,31 +1,34 @@
-import json
 from pathlib import Path
 import logging
+from ingestion.manifest import get_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MANIFEST_PATH = Path("data/clips/manifest.json")
+MANIFEST_DB = Path("data/clips/manifest.db")
 KEYS_TO_REMOVE = ["pywhispercpp.small", "faster_whisper_aligned", "pywhispercpp.base"]
 
 def main():
-    if not MANIFEST_PATH.exists():
+    if not MANIFEST_PATH.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found")
         return
 
-    with open(MANIFEST_PATH) as f:
-        manifest = json.load(f)
-
     count = 0
-    for clip in manifest:
+
+    def remove_keys(clip):
+        nonlocal count
         if 'transcriptions' in clip:
             for key in KEYS_TO_REMOVE:
                 if key in clip['transcriptions']:
                     del clip['transcriptions'][key]
                     count += 1
-    
-    with open(MANIFEST_PATH, 'w') as f:
-        json.dump(manifest, f, indent=2)
+
+    store = get_store(MANIFEST_DB, MANIFEST_PATH)
+    for clip_id in store.ids():
+        store.update(clip_id, remove_keys)
+    # One manifest.json export for the whole batch
+    store.close(export=True)
         
     logger.info(f"Removed {count} transcription entries from manifest.")
 
@@ -1,13 +1,10 @@
-import json
-import os
+from ingestion.manifest import get_store
 
 MANIFEST_PATH = 'data/clips/manifest.json'
+MANIFEST_DB = 'data/clips/manifest.db'
 
 def main():
-    with open(MANIFEST_PATH, 'r') as f:
-        data = json.load(f)
-
-    for clip in data:
+    def clean(clip):
         if 'transcriptions' in clip:
             # Remove mlx_whisper_turbo ONLY if mlx_whisper_turbo_seg_level exists
             if 'mlx_whisper_turbo' in clip['transcriptions'] and 'mlx_whisper_turbo_seg_level' in clip['transcriptions']:
@@ -19,10 +16,12 @@ def main():
             # User said "remove ... from the manifesto", implying global removal.
             # But if seg_level doesn't exist yet for some clips, we might lose data.
             # However, user seems to be focusing on the workflow where we generate seg_level.
-            pass
 
-    with open(MANIFEST_PATH, 'w') as f:
-        json.dump(data, f, indent=4)
+    store = get_store(MANIFEST_DB, MANIFEST_PATH)
+    for clip_id in store.ids():
+        store.update(clip_id, clean)
+    # One manifest.json export for the whole batch
+    store.close(export=True)
 
     print("Manifest cleaned up.")
 
@@ -7,6 +7,7 @@ import numpy as np
 from pyannote.audio import Model, Inference
 from sklearn.cluster import AgglomerativeClustering
 from sklearn.metrics.pairwise import cosine_distances
+from ingestion.manifest import get_store
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,6 +15,7 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 import os
 
 HF_TOKEN = os.getenv("HF_TOKEN")
@@ -23,18 +25,18 @@ def main():
     parser.add_argument("--clip-id", type=str, required=True, help="Clip ID to process")
     args = parser.parse_args()
 
-    if not MANIFEST_FILE.exists():
+    if not MANIFEST_FILE.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found.")
         return
        # Load manifest
-    with open(MANIFEST_FILE, 'r') as f:
-        manifest = json.load(f)
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        clip_data = store.get(args.clip_id)
+        available_ids = store.ids()
         
-    clip_data = next((c for c in manifest if c['id'] == args.clip_id), None)
     if not clip_data:
         logger.error(f"Clip {args.clip_id} not found in manifest.")
         # Debug: print all IDs
-        logger.info(f"Available IDs: {[c['id'] for c in manifest]}")
+        logger.info(f"Available IDs: {available_ids}")
         return
 
     transcriptions = clip_data.get('transcriptions', {})
@@ -106,9 +108,8 @@ def main():
     valid_indices = []
     new_segments = []
 
-    from pyannote.audio.core.io import Audio
-    from pyannote.core import Segment
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    from ingestion.audio_cache import get_audio_cache
+    audio_cache = get_audio_cache()
 
     for i, seg in enumerate(segments):
         start = seg['start']
@@ -130,7 +131,7 @@ def main():
 
         try:
             # Extract crop
-            waveform, sr = audio_io.crop(clip_path, Segment(start, end))
+            waveform, sr = audio_cache.waveform(clip_path, start, end)
             # Inference expects (channel, time) but usually handles it. 
             # Inference with window="whole" expects a file path or a waveform?
             # It expects path or {"waveform": ..., "sample_rate": ...}
@@ -175,9 +176,8 @@ def main():
     if len(X_clean) == 0:
         logger.warning("No valid embeddings for clustering.")
         # If no valid embeddings, we still want to save the new_segments with UNKNOWN labels
-        clip_entry['transcriptions']['mlx_whisper_turbo_seg_level'] = new_segments
-        with open(MANIFEST_FILE, 'w') as f:
-            json.dump(manifest, f, indent=2)
+        with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+            store.set_transcription(args.clip_id, 'mlx_whisper_turbo_seg_level', new_segments)
         logger.info(f"Saved segment-level diarization (with UNKNOWNs) to 'mlx_whisper_turbo_seg_level' in manifest.")
         return
 
@@ -249,10 +249,8 @@ def main():
         seg_idx = valid_indices[i]
         new_segments[seg_idx]['speaker'] = cluster_map[label]
 
-    clip_data['transcriptions']['mlx_whisper_turbo_seg_level'] = new_segments
-    
-    with open(MANIFEST_FILE, 'w') as f:
-        json.dump(manifest, f, indent=4)
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        store.set_transcription(args.clip_id, 'mlx_whisper_turbo_seg_level', new_segments)
         
     # Save embeddings to cache for manual correction/active learning
     cache_dir = DATA_DIR / "cache" / "embeddings"
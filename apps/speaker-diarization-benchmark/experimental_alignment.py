@@ -1,10 +1,11 @@
-import json
 import logging
 import torch
 from pathlib import Path
 from faster_whisper import WhisperModel
 from pyannote.audio import Pipeline
 import argparse
+from ingestion.alignment import assign_speakers
+from ingestion.manifest import get_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,6 +17,7 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 def align_words_with_diarization(words, diarization):
     """
@@ -25,19 +27,10 @@ def align_words_with_diarization(words, diarization):
     aligned_segments = []
     current_segment = None
     
-    for word in words:
-        # Find speaker at word midpoint
-        midpoint = word.start + (word.end - word.start) / 2
-        speaker = "UNKNOWN"
-        
-        # Check diarization
-        # pyannote Annotation.itertracks(yield_label=True)
-        # We can optimize this search, but for a 60s clip, linear scan is fine.
-        for turn, _, label in diarization.itertracks(yield_label=True):
-            if turn.start <= midpoint <= turn.end:
-                speaker = label
-                break
-        
+    # Find speaker at each word midpoint
+    word_speakers = assign_speakers(words, diarization, method="midpoint")
+    
+    for word, speaker in zip(words, word_speakers):
         # If speaker changed or no current segment, start new one
         if current_segment is None or current_segment["speaker"] != speaker:
             if current_segment:
@@ -130,19 +123,15 @@ def main():
     # But user said "Let's try it", implying we should apply it.
     # Let's save to a new key in manifest "faster_whisper_aligned"
     
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
-        
-    entry = next((e for e in manifest if e["id"] == clip_id), None)
-    if entry:
-        entry["transcriptions"]["faster_whisper_aligned"] = new_segments
+    def save(entry):
+        transcriptions = entry.setdefault("transcriptions", {})
+        transcriptions["faster_whisper_aligned"] = new_segments
         # Also update the main one for the UI to see
-        entry["transcriptions"]["pywhispercpp.small"] = new_segments 
+        transcriptions["pywhispercpp.small"] = new_segments 
         
-        with open(MANIFEST_FILE, "w") as f:
-            json.dump(manifest, f, indent=2)
-            
-        logger.info("Manifest updated!")
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        if store.update(clip_id, save):
+            logger.info("Manifest updated!")
 
 if __name__ == "__main__":
     main()
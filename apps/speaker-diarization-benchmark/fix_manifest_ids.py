@@ -1,21 +1,21 @@
-import json
 import os
+from ingestion.manifest import get_store
 
 MANIFEST_PATH = 'data/clips/manifest.json'
+MANIFEST_DB = 'data/clips/manifest.db'
 
 def main():
-    with open(MANIFEST_PATH, 'r') as f:
-        data = json.load(f)
-
-    for clip in data:
+    store = get_store(MANIFEST_DB, MANIFEST_PATH)
+    for clip in store.entries():
         # If ID is an absolute path, convert to basename
         if os.path.isabs(clip['id']):
             new_id = os.path.basename(clip['id'])
             print(f"Updating ID: {clip['id']} -> {new_id}")
+            store.delete(clip['id'])
             clip['id'] = new_id
-            
-    with open(MANIFEST_PATH, 'w') as f:
-        json.dump(data, f, indent=4)
+            store.put(clip)
+    # One manifest.json export for the whole batch
+    store.close(export=True)
 
     print("Manifest IDs updated.")
 
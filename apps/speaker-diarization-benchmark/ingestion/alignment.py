@@ -0,0 +1,171 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Word-to-speaker alignment against diarization turns, using sorted turn arrays and
+  `searchsorted` instead of a linear scan per word.
+
+  [Classes]
+  - TurnIndex: Diarization turns sorted by (start, end), with a running maximum of turn
+    ends so the turn covering a time is found by binary search, and turns grouped by
+    length class so the turns overlapping a range are too.
+
+  [Functions]
+  - assign_speakers(): Speaker label per word by midpoint, max-overlap or IoU.
+  - turns_from_diarization(): (start, end, speaker) tuples from a pyannote Annotation or
+    a pyannote 4.x DiarizeOutput.
+
+  [Assignment methods]
+  - "midpoint": first turn (in start order) containing the word midpoint. Same result as the
+    old linear `if start <= midpoint <= end: break` loops.
+  - "overlap": speaker with the largest total overlap with the word (ties: first speaker seen).
+  - "iou": turn with the largest intersection-over-union with the word.
+
+  [How to run/invoke it]
+  - `turns = TurnIndex(turns_from_diarization(diarization))`
+  - `speakers = assign_speakers(all_words, turns, method="midpoint")`
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/alignment.py
+
+WHY:
+  The same O(words x turns) alignment loop was copied into several workflows and scripts.
+  Midpoint lookups here are O(log T) per word. Overlap/IoU lookups are O(G log T + k), where
+  G is the number of turn-length classes (powers of two, so about log2 of longest/shortest
+  turn) and k the turns scanned: those overlapping the word, plus at most the overlap depth
+  of the turns per class. One long turn no longer widens the scan for every word.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Turn = Tuple[float, float, str]
+
+
+def turns_from_diarization(diarization: Any) -> List[Turn]:
+    """(start, end, speaker) for every turn of a pyannote diarization result."""
+    # pyannote 4.x DiarizeOutput
+    if not hasattr(diarization, 'itertracks'):
+        for attr in ('speaker_diarization', 'annotation'):
+            if hasattr(diarization, attr):
+                diarization = getattr(diarization, attr)
+                break
+
+    if hasattr(diarization, 'itertracks'):
+        return [(turn.start, turn.end, speaker) for turn, _, speaker in diarization.itertracks(yield_label=True)]
+    # Iterable of (turn, speaker) pairs
+    return [(turn.start, turn.end, speaker) for turn, speaker in diarization]
+
+
+def _bounds(item: Any) -> Tuple[float, float]:
+    if isinstance(item, dict):
+        return item['start'], item['end']
+    if isinstance(item, (tuple, list)):
+        return item[0], item[1]
+    return item.start, item.end
+
+
+class TurnIndex:
+    def __init__(self, turns: Iterable[Turn]):
+        turns = sorted(turns, key=lambda t: (t[0], t[1]))
+        self.starts = np.array([t[0] for t in turns], dtype=float)
+        self.ends = np.array([t[1] for t in turns], dtype=float)
+        self.speakers = [t[2] for t in turns]
+        # Running max of ends: the first turn whose running max reaches t is the first
+        # turn (in start order) that can contain t.
+        self.max_ends = np.maximum.accumulate(self.ends) if len(turns) else self.ends
+        # Turns grouped by length class [2^(e-1), 2^e): a turn of the class overlaps
+        # (start, end) only if it starts in (start - longest of the class, end), and the
+        # turns in that window that end before `start` all overlap each other.
+        lengths = self.ends - self.starts
+        classes = np.frexp(lengths)[1]
+        self._groups: List[Tuple[np.ndarray, np.ndarray, float]] = []
+        for c in np.unique(classes):
+            indices = np.flatnonzero(classes == c)
+            self._groups.append((self.starts[indices], indices, float(lengths[indices].max())))
+
+    def __len__(self) -> int:
+        return len(self.speakers)
+
+    def speakers_at(self, times: Sequence[float], default: Optional[str] = "UNKNOWN") -> List[Optional[str]]:
+        """Speaker of the first turn containing each time (start <= t <= end)."""
+        times = np.asarray(times, dtype=float)
+        if len(self) == 0:
+            return [default] * len(times)
+        first = np.searchsorted(self.max_ends, times, side='left')
+        last = np.searchsorted(self.starts, times, side='right') - 1
+        return [self.speakers[f] if f <= l else default for f, l in zip(first, last)]
+
+    def _candidate_indices(self, start: float, end: float) -> np.ndarray:
+        """Indices (in start order) of the turns that may overlap (start, end)."""
+        parts = []
+        for starts, indices, longest in self._groups:
+            lo = np.searchsorted(starts, start - longest, side='right')
+            hi = np.searchsorted(starts, end, side='left')
+            if lo < hi:
+                parts.append(indices[lo:hi])
+        if not parts:
+            return np.empty(0, dtype=int)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    def _candidates(self, start: float, end: float) -> Iterable[Tuple[int, float]]:
+        for i in self._candidate_indices(start, end):
+            overlap = min(end, self.ends[i]) - max(start, self.starts[i])
+            if overlap > 0:
+                yield i, overlap
+
+    def overlaps(self, start: float, end: float) -> Dict[str, float]:
+        """Total overlap per speaker with [start, end], in order of first overlapping turn."""
+        totals: Dict[str, float] = {}
+        for i, overlap in self._candidates(start, end):
+            totals[self.speakers[i]] = totals.get(self.speakers[i], 0) + overlap
+        return totals
+
+    def dominant_speaker(self, start: float, end: float, default: Optional[str] = "UNKNOWN") -> Optional[str]:
+        totals = self.overlaps(start, end)
+        if not totals:
+            return default
+        return max(totals, key=totals.get)
+
+    def best_iou_speaker(self, start: float, end: float, default: Optional[str] = "UNKNOWN") -> Optional[str]:
+        best, best_iou = default, 0.0
+        for i, overlap in self._candidates(start, end):
+            union = max(end, self.ends[i]) - min(start, self.starts[i])
+            iou = overlap / union
+            if iou > best_iou:
+                best, best_iou = self.speakers[i], iou
+        return best
+
+
+def assign_speakers(words: Sequence[Any],
+                    turns: Any,
+                    method: str = "midpoint",
+                    default: Optional[str] = "UNKNOWN") -> List[Optional[str]]:
+    """
+    Speaker label for each word.
+
+    Args:
+        words: Items with start/end (Word models, faster-whisper words, dicts or tuples).
+        turns: A TurnIndex, or anything `TurnIndex` / `turns_from_diarization` accepts.
+        method: "midpoint", "overlap" or "iou".
+        default: Label for words no turn covers.
+    """
+    if not isinstance(turns, TurnIndex):
+        if hasattr(turns, 'itertracks') or hasattr(turns, 'speaker_diarization') or hasattr(turns, 'annotation'):
+            turns = turns_from_diarization(turns)
+        turns = TurnIndex(turns)
+
+    bounds = [_bounds(w) for w in words]
+    if method == "midpoint":
+        return turns.speakers_at([s + (e - s) / 2 for s, e in bounds], default=default)
+    if method == "overlap":
+        return [turns.dominant_speaker(s, e, default=default) for s, e in bounds]
+    if method == "iou":
+        return [turns.best_iou_speaker(s, e, default=default) for s, e in bounds]
+    raise ValueError(f"Unknown alignment method: {method}")
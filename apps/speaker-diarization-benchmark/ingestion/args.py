@@ -24,6 +24,10 @@ WHEN:
   Last Modified: 2025-12-05
   Change Log:
   - 2025-12-05: Added `download` subcommand support.
+  - 2026-10-16: `get_workflow` accepts a shared `ModelRegistry`.
+  - 2026-10-16: Added `--embedding-mode`, `--frame-duration` and `--frame-step`.
+  - 2026-10-16: Added `--clustering` and `--max-clusters`.
+  - 2026-10-16: Added `stream` subcommand.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/args.py
@@ -35,11 +39,12 @@ WHY:
 
 import argparse
 from pathlib import Path
-from pathlib import Path
-from typing import Union
-from .config import IngestionConfig, WorkflowConfig, DownloadConfig
+from typing import Optional, Union
+from .config import IngestionConfig, WorkflowConfig, DownloadConfig, StreamConfig
+from .models import ModelRegistry
+from .clustering import CLUSTERING_METHODS
 
-def parse_args() -> Union[IngestionConfig, DownloadConfig]:
+def parse_args() -> Union[IngestionConfig, DownloadConfig, StreamConfig]:
     parser = argparse.ArgumentParser(description="Audio Ingestion CLI")
     
     # Subcommands
@@ -57,6 +62,12 @@ def parse_args() -> Union[IngestionConfig, DownloadConfig]:
     diarize_parser.add_argument("--window", type=int, default=0, help="Number of context words on each side (0 = no window).")
     diarize_parser.add_argument("--cluster-threshold", type=float, default=0.5, help="Clustering distance threshold.")
     diarize_parser.add_argument("--id-threshold", type=float, default=0.4, help="Identification distance threshold.")
+    diarize_parser.add_argument("--approximate-search", action="store_true", help="Use approximate nearest-neighbour search in the speaker identity index.")
+    diarize_parser.add_argument("--embedding-mode", type=str, default="word", choices=["word", "frame"], help="word_level: embed each word window ('word') or pool sliding-window frame embeddings per word ('frame').")
+    diarize_parser.add_argument("--frame-duration", type=float, default=1.0, help="Sliding window length in seconds for --embedding-mode frame.")
+    diarize_parser.add_argument("--frame-step", type=float, default=0.25, help="Sliding window hop in seconds for --embedding-mode frame.")
+    diarize_parser.add_argument("--clustering", type=str, default="agglomerative", choices=CLUSTERING_METHODS, help="Speaker clustering engine: exact 'agglomerative' or bounded-memory 'online'.")
+    diarize_parser.add_argument("--max-clusters", type=int, default=64, help="Upper bound on clusters for --clustering online.")
     
     # Global/Output args
     diarize_parser.add_argument("--output-dir", type=str, default=".", help="Directory to save the output text file.")
@@ -77,6 +88,29 @@ def parse_args() -> Union[IngestionConfig, DownloadConfig]:
     download_parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging.")
     download_parser.add_argument("--dry-run", action="store_true", help="Simulate actions without downloading.")
 
+    # Stream command
+    stream_parser = subparsers.add_parser(
+        "stream",
+        help="Live diarization of a growing file or PCM pipe",
+        description="Transcribe and diarize audio as it arrives. Segments are written as JSON lines as soon as they are final, then stored in the manifest under the 'streaming' workflow."
+    )
+    stream_parser.add_argument("source", type=str, help="Growing .wav/.pcm file, a finished clip with --replay, or '-' for raw PCM on stdin (mono 16 kHz).")
+    stream_parser.add_argument("--clip-id", type=str, help="Manifest clip ID to store the result under (default: the source file name; required for stdin).")
+    stream_parser.add_argument("--output", type=str, help="JSONL file to append segments to (default: stdout).")
+    stream_parser.add_argument("--backend", type=str, default="mlx", help="Transcription backend (see transcribe.BACKENDS).")
+    stream_parser.add_argument("--pcm-format", type=str, default="s16le", choices=["s16le", "f32le"], help="Sample format of raw PCM input.")
+    stream_parser.add_argument("--chunk-seconds", type=float, default=5.0, help="New audio between transcription passes.")
+    stream_parser.add_argument("--context", type=float, default=2.0, help="Seconds of already-committed audio re-transcribed for context.")
+    stream_parser.add_argument("--holdback", type=float, default=1.0, help="Words this close to the live edge wait for the next pass.")
+    stream_parser.add_argument("--id-threshold", type=float, default=0.4, help="Identification distance threshold.")
+    stream_parser.add_argument("--cluster-threshold", type=float, default=0.5, help="Distance threshold for joining an anonymous speaker.")
+    stream_parser.add_argument("--max-speakers", type=int, default=64, help="Upper bound on anonymous speakers.")
+    stream_parser.add_argument("--idle-timeout", type=float, default=10.0, help="Stop after a growing file has not grown for this many seconds.")
+    stream_parser.add_argument("--replay", action="store_true", help="Replay a finished clip in real time instead of following a growing file.")
+    stream_parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (0 = as fast as possible).")
+    stream_parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging.")
+    stream_parser.add_argument("--dry-run", action="store_true", help="Do not update the manifest.")
+
     args = parser.parse_args()
     
     if args.command == "diarize":
@@ -85,7 +119,13 @@ def parse_args() -> Union[IngestionConfig, DownloadConfig]:
             threshold=args.threshold,
             window=args.window,
             cluster_threshold=args.cluster_threshold,
-            id_threshold=args.id_threshold
+            id_threshold=args.id_threshold,
+            approximate_search=args.approximate_search,
+            embedding_mode=args.embedding_mode,
+            frame_duration=args.frame_duration,
+            frame_step=args.frame_step,
+            clustering=args.clustering,
+            max_clusters=args.max_clusters
         )
         
         return IngestionConfig(
@@ -98,6 +138,25 @@ def parse_args() -> Union[IngestionConfig, DownloadConfig]:
             verbose=args.verbose,
             dry_run=args.dry_run
         )
+    elif args.command == "stream":
+        return StreamConfig(
+            source=args.source,
+            clip_id=args.clip_id,
+            output=Path(args.output) if args.output else None,
+            backend=args.backend,
+            pcm_format=args.pcm_format,
+            chunk_seconds=args.chunk_seconds,
+            context=args.context,
+            holdback=args.holdback,
+            id_threshold=args.id_threshold,
+            cluster_threshold=args.cluster_threshold,
+            max_speakers=args.max_speakers,
+            idle_timeout=args.idle_timeout,
+            replay=args.replay,
+            speed=args.speed,
+            verbose=args.verbose,
+            dry_run=args.dry_run
+        )
     elif args.command == "download":
         return DownloadConfig(
             url=args.url,
@@ -125,7 +184,19 @@ WORKFLOW_CHOICES = [
     "assemblyai"
 ]
 
-def get_workflow(config: WorkflowConfig):
+def get_workflow(config: WorkflowConfig, registry: Optional[ModelRegistry] = None):
+    """
+    Builds the workflow for `config.name`.
+
+    Models are loaded lazily through `registry` (default: the process-wide registry from
+    `ingestion.models.get_registry`), so repeated runs in one process reuse warm models.
+    """
+    workflow = _create_workflow(config)
+    if registry is not None:
+        workflow.registry = registry
+    return workflow
+
+def _create_workflow(config: WorkflowConfig):
     if config.name == "pyannote":
         # Default to 3.1
         from .workflows.local.pyannote import PyannoteWorkflow
@@ -0,0 +1,208 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Content-addressed cache of decoded audio.
+
+  [Classes]
+  - AudioCache: Each source is decoded once (ffmpeg) to mono float32 PCM at the requested
+    sample rate, stored as `<sha256>_<rate>.npy` and memory-mapped on load. Slices by time
+    range are views into the mapping, so cropping a word costs no decode and no copy.
+    Entries are evicted least-recently-used beyond a size cap.
+
+  [Functions]
+  - get_audio_cache(): The process-wide cache at data/cache/audio.
+
+  [Configuration]
+  - AUDIO_CACHE_MAX_MB: Size cap for the cache directory (default 4096).
+
+  [How to run/invoke it]
+  - `cache = get_audio_cache()`
+  - `waveform, sr = cache.waveform(clip_path, start, end)`  # same shape as `Audio.crop`
+  - `samples = cache.crop(clip_path, start, end)`  # 1-D numpy view
+  - `stats.update(cache.stats())`  # audio_cache_hits / audio_cache_misses
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/audio_cache.py
+
+WHY:
+  `Audio.crop` decodes the clip again for every word, `librosa.load` decoded whole files just
+  to measure a duration, and WhisperPlus decoded the clip once more in `preprocess`.
+"""
+
+import logging
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ingestion.transcription_cache import hash_audio
+from transcribe import load_audio
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data/cache/audio"
+SAMPLE_RATE = 16000
+
+
+class AudioCache:
+    def __init__(self,
+                 cache_dir: Path = DEFAULT_CACHE_DIR,
+                 max_bytes: Optional[int] = 4096 * 10**6,
+                 sample_rate: int = SAMPLE_RATE,
+                 decode_fn: Callable[[str, int], np.ndarray] = load_audio):
+        """
+        Args:
+            cache_dir: Directory holding `<key>.npy` entries.
+            max_bytes: Total size cap; least-recently-used entries are removed beyond it.
+            sample_rate: Default sample rate of decoded audio.
+            decode_fn: `decode_fn(path, sample_rate)` -> 1-D float32 samples.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.decode_fn = decode_fn
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> content hash, so repeated lookups don't re-read the file
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        # key -> open memory map
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def key(self, audio_path: Path, sample_rate: Optional[int] = None) -> str:
+        audio_path = Path(audio_path)
+        st = audio_path.stat()
+        memo_key = (str(audio_path.resolve()), st.st_size, st.st_mtime_ns)
+        content_hash = self._hashes.get(memo_key)
+        if content_hash is None:
+            content_hash = self._hashes[memo_key] = hash_audio(audio_path)
+        return f"{content_hash}_{sample_rate or self.sample_rate}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npy"
+
+    def load(self, audio_path: Path, sample_rate: Optional[int] = None) -> np.ndarray:
+        """
+        Whole decoded signal as a 1-D float32 memory map.
+
+        The map is copy-on-write: writes stay private to this process, and `torch.from_numpy`
+        accepts it without copying.
+        """
+        sample_rate = sample_rate or self.sample_rate
+        key = self.key(audio_path, sample_rate)
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self.hits += 1
+                return array
+
+            path = self._path(key)
+            if path.exists():
+                try:
+                    array = np.load(path, mmap_mode='c')
+                    # Mark as recently used for LRU eviction
+                    os.utime(path)
+                except Exception as e:
+                    logger.warning(f"Failed to load cached audio {path.name}: {e}")
+                    array = None
+
+            if array is None:
+                self.misses += 1
+                array = self._decode(audio_path, sample_rate, path)
+            else:
+                self.hits += 1
+            self._arrays[key] = array
+        return array
+
+    def _decode(self, audio_path: Path, sample_rate: int, path: Path) -> np.ndarray:
+        samples = np.ascontiguousarray(self.decode_fn(str(audio_path), sample_rate), dtype=np.float32)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".npy")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, samples)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Decoded {Path(audio_path).name} to cache ({path.name}, {len(samples) / sample_rate:.1f}s).")
+        self._evict(keep=path)
+        return np.load(path, mmap_mode='c')
+
+    def crop(self, audio_path: Path, start: Optional[float] = None, end: Optional[float] = None,
+             sample_rate: Optional[int] = None) -> np.ndarray:
+        """Samples in [start, end) seconds, clipped to the signal; a view, not a copy."""
+        sample_rate = sample_rate or self.sample_rate
+        samples = self.load(audio_path, sample_rate)
+        num_samples = len(samples)
+        s = 0 if start is None else min(max(math.floor(start * sample_rate), 0), num_samples)
+        e = num_samples if end is None else min(max(math.floor(end * sample_rate), s), num_samples)
+        return samples[s:e]
+
+    def waveform(self, audio_path: Path, start: Optional[float] = None, end: Optional[float] = None,
+                 sample_rate: Optional[int] = None):
+        """`(tensor of shape (1, num_samples), sample_rate)`, like pyannote's `Audio.crop`."""
+        import torch
+
+        sample_rate = sample_rate or self.sample_rate
+        samples = self.crop(audio_path, start, end, sample_rate)
+        return torch.from_numpy(samples).unsqueeze(0), sample_rate
+
+    def duration(self, audio_path: Path) -> float:
+        """Length in seconds."""
+        return len(self.load(audio_path)) / self.sample_rate
+
+    def evict(self):
+        """Removes least-recently-used entries until the cache is within `max_bytes`."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self, keep: Optional[Path] = None):
+        if self.max_bytes is None:
+            return
+        entries = []
+        for path in self.cache_dir.glob("*.npy"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                # Open maps of the file stay valid; later loads decode again
+                path.unlink()
+                self._arrays.pop(path.stem, None)
+                logger.info(f"Evicted cached audio {path.name}.")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters in the shape used by workflow `run()` stats."""
+        return {'audio_cache_hits': self.hits, 'audio_cache_misses': self.misses}
+
+
+_cache: Optional[AudioCache] = None
+
+
+def get_audio_cache() -> AudioCache:
+    global _cache
+    if _cache is None:
+        max_mb = os.getenv("AUDIO_CACHE_MAX_MB")
+        _cache = AudioCache(max_bytes=int(float(max_mb) * 1e6) if max_mb else 4096 * 10**6)
+    return _cache
@@ -0,0 +1,308 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Speaker clustering engines behind one call, selected by `WorkflowConfig.clustering`.
+
+  [Functions]
+  - cluster_embeddings(): Labels for an (n, dim) embedding matrix with either engine.
+    "agglomerative" is scikit-learn's cosine / average-linkage clustering (O(n^2) memory).
+    "online" is `OnlineClusterer`.
+
+  [Classes]
+  - OnlineClusterer: Streaming, bounded-memory clustering with the same distance semantics.
+    Embeddings are L2-normalized, so the average-linkage cosine distance between a point x and a
+    cluster with mean vector m is 1 - x.m, and between two clusters it is 1 - m1.m2. A cluster is
+    therefore fully described by its vector sum and count.
+    - Mini-batches are assigned to the closest active cluster when it is within `threshold`.
+      Points that are not assigned open new clusters, one at a time.
+    - Every `merge_every` points:
+      - a merge pass joins cluster pairs closer than `threshold`, closest first, which is
+        average linkage at the cluster level;
+      - a split pass runs 2-means on each cluster's reservoir sample and splits it when the
+        two halves are further apart than `threshold`.
+    - When more than `max_clusters` are active, the closest pair is merged.
+    - Final labels are a second pass that assigns each point to its closest final centroid
+      direction (cosine). Early assignments made before later merges and splits are not kept,
+      and using the direction, not 1 - x.m, avoids favouring small clusters, whose mean
+      vectors are longer.
+    State is O(max_clusters * (reservoir_size + 1) * dim) regardless of n.
+
+  [How to run/invoke it]
+  - `labels = cluster_embeddings(X, threshold=0.5, method="online", max_clusters=64)`
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/clustering.py
+
+WHY:
+  At word level on a three-hour episode, the agglomerative distance matrix is gigabytes and
+  its time is at least quadratic.
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLUSTERING_METHODS = ["agglomerative", "online"]
+
+
+def _normalize(X: np.ndarray) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float64)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms > 0, norms, 1.0)
+
+
+def _first_appearance(labels: np.ndarray) -> np.ndarray:
+    """Renumbers labels 0..k-1 in order of first appearance."""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return order[inverse.reshape(-1)]
+
+
+class OnlineClusterer:
+    def __init__(self,
+                 threshold: float = 0.5,
+                 max_clusters: int = 64,
+                 batch_size: int = 256,
+                 merge_every: int = 1024,
+                 reservoir_size: int = 32,
+                 min_split_size: int = 16,
+                 seed: int = 0):
+        """
+        Args:
+            threshold: Cosine (average-linkage) distance below which points/clusters join.
+            max_clusters: Upper bound on active clusters; beyond it the closest pair merges.
+            batch_size: Points assigned per vectorized step.
+            merge_every: Points between merge/split passes.
+            reservoir_size: Members sampled per cluster for the split pass.
+            min_split_size: Clusters with fewer sampled members are never split.
+        """
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.batch_size = batch_size
+        self.merge_every = merge_every
+        self.reservoir_size = reservoir_size
+        self.min_split_size = min_split_size
+        self.rng = np.random.default_rng(seed)
+
+        self.sums: Optional[np.ndarray] = None  # (k, dim)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.reservoirs: List[np.ndarray] = []
+        self.seen: List[int] = []  # points offered to each reservoir
+        self.n_seen = 0
+        self._since_pass = 0
+        self.n_merges = 0
+        self.n_splits = 0
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.counts)
+
+    def means(self) -> np.ndarray:
+        return self.sums / self.counts[:, None]
+
+    # ------------------------------------------------------------------ streaming
+
+    def partial_fit(self, X: np.ndarray) -> "OnlineClusterer":
+        X = _normalize(X)
+        if self.sums is None:
+            self.sums = np.zeros((0, X.shape[1]))
+        for b in range(0, len(X), self.batch_size):
+            batch = X[b:b + self.batch_size]
+            self._assign_batch(batch)
+            self.n_seen += len(batch)
+            self._since_pass += len(batch)
+            if self._since_pass >= self.merge_every:
+                self._since_pass = 0
+                self._merge_pass()
+                self._split_pass()
+        return self
+
+    def _assign_batch(self, batch: np.ndarray):
+        pending = np.arange(len(batch))
+        if self.n_clusters:
+            dist = 1.0 - batch @ self.means().T
+            nearest = dist.argmin(axis=1)
+            ok = dist[np.arange(len(batch)), nearest] <= self.threshold
+            for i in np.where(ok)[0]:
+                self._add(nearest[i], batch[i])
+            pending = np.where(~ok)[0]
+
+        # Unassigned points one at a time, so later ones can join clusters opened by earlier ones
+        for i in pending:
+            x = batch[i]
+            if self.n_clusters:
+                dist = 1.0 - self.means() @ x
+                j = int(dist.argmin())
+                if dist[j] <= self.threshold:
+                    self._add(j, x)
+                    continue
+            self._open(x)
+            if self.n_clusters > self.max_clusters:
+                self._merge_closest(force=True)
+
+    def _add(self, j: int, x: np.ndarray):
+        self.sums[j] += x
+        self.counts[j] += 1
+        self.seen[j] += 1
+        reservoir = self.reservoirs[j]
+        if len(reservoir) < self.reservoir_size:
+            self.reservoirs[j] = np.vstack([reservoir, x])
+        else:
+            r = self.rng.integers(self.seen[j])
+            if r < self.reservoir_size:
+                reservoir[r] = x
+
+    def _open(self, x: np.ndarray):
+        self.sums = np.vstack([self.sums, x])
+        self.counts = np.append(self.counts, 1)
+        self.reservoirs.append(x[None, :].copy())
+        self.seen.append(1)
+
+    # ------------------------------------------------------------------ merge / split
+
+    def _merge(self, i: int, j: int):
+        """Folds cluster j into i."""
+        ci, cj = self.counts[i], self.counts[j]
+        # Reservoir of the union: members drawn from each side in proportion to its size
+        take_i = int(round(self.reservoir_size * ci / (ci + cj)))
+        ri, rj = self.reservoirs[i], self.reservoirs[j]
+        ri = ri[self.rng.permutation(len(ri))[:take_i]]
+        rj = rj[self.rng.permutation(len(rj))[:self.reservoir_size - len(ri)]]
+        self.reservoirs[i] = np.vstack([ri, rj])
+        self.seen[i] += self.seen[j]
+        self.sums[i] += self.sums[j]
+        self.counts[i] += cj
+        self._drop(j)
+        self.n_merges += 1
+
+    def _drop(self, j: int):
+        self.sums = np.delete(self.sums, j, axis=0)
+        self.counts = np.delete(self.counts, j)
+        del self.reservoirs[j]
+        del self.seen[j]
+
+    def _merge_closest(self, force: bool = False) -> bool:
+        if self.n_clusters < 2:
+            return False
+        means = self.means()
+        dist = 1.0 - means @ means.T
+        np.fill_diagonal(dist, np.inf)
+        i, j = np.unravel_index(dist.argmin(), dist.shape)
+        if not force and dist[i, j] > self.threshold:
+            return False
+        self._merge(min(i, j), max(i, j))
+        return True
+
+    def _merge_pass(self):
+        while self._merge_closest():
+            pass
+
+    def _two_means(self, members: np.ndarray, iterations: int = 10):
+        """(assignment, mean0, mean1) of a cosine 2-means over `members`."""
+        # Seed with the member furthest from the mean, and the member furthest from that one
+        a = members[(members @ members.mean(axis=0)).argmin()]
+        b = members[(members @ a).argmin()]
+        assign = np.zeros(len(members), dtype=bool)
+        for _ in range(iterations):
+            new = (members @ b) > (members @ a)
+            if new.all() or not new.any():
+                return None
+            if (new == assign).all():
+                break
+            assign = new
+            a = members[~assign].mean(axis=0)
+            b = members[assign].mean(axis=0)
+            a, b = a / np.linalg.norm(a), b / np.linalg.norm(b)
+        return assign, members[~assign].mean(axis=0), members[assign].mean(axis=0)
+
+    def _split_pass(self):
+        j = 0
+        while j < self.n_clusters and self.n_clusters < self.max_clusters:
+            members = self.reservoirs[j]
+            if len(members) < self.min_split_size:
+                j += 1
+                continue
+            split = self._two_means(members)
+            if split is None:
+                j += 1
+                continue
+            assign, m0, m1 = split
+            share = assign.mean()
+            # Both halves must be substantial and further apart than the merge threshold
+            if min(share, 1 - share) < 0.25 or 1.0 - m0 @ m1 <= self.threshold:
+                j += 1
+                continue
+
+            count = self.counts[j]
+            c1 = max(1, int(round(count * share)))
+            c0 = max(1, count - c1)
+            self.sums[j] = m0 * c0
+            self.counts[j] = c0
+            self.reservoirs[j] = members[~assign]
+            self.seen[j] = c0
+            self.sums = np.vstack([self.sums, m1 * c1])
+            self.counts = np.append(self.counts, c1)
+            self.reservoirs.append(members[assign])
+            self.seen.append(c1)
+            self.n_splits += 1
+            # Re-check j: its remaining half may split again
+
+    # ------------------------------------------------------------------ labels
+
+    def predict(self, X: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """Closest final centroid (cosine) for each point, in chunks."""
+        means = _normalize(self.means())
+        labels = np.empty(len(X), dtype=np.int64)
+        for c in range(0, len(X), chunk_size):
+            labels[c:c + chunk_size] = (_normalize(X[c:c + chunk_size]) @ means.T).argmax(axis=1)
+        return labels
+
+    def fit_predict(self, X: np.ndarray) -> np.ndarray:
+        if len(X) == 0:
+            return np.zeros(0, dtype=np.int64)
+        self.partial_fit(X)
+        self._merge_pass()
+        labels = _first_appearance(self.predict(X))
+        logger.debug(f"Online clustering: {len(X)} points -> {labels.max() + 1} clusters "
+                     f"({self.n_merges} merges, {self.n_splits} splits)")
+        return labels
+
+
+def cluster_embeddings(X: np.ndarray,
+                       threshold: float,
+                       method: str = "agglomerative",
+                       max_clusters: int = 64,
+                       **options) -> np.ndarray:
+    """
+    Cluster labels (0..k-1) for the rows of X.
+
+    Args:
+        threshold: Cosine distance threshold (average linkage) for both engines.
+        method: "agglomerative" or "online".
+        max_clusters / options: OnlineClusterer settings (ignored by "agglomerative").
+    """
+    if len(X) < 2:
+        return np.zeros(len(X), dtype=np.int64)
+    if method == "online":
+        return OnlineClusterer(threshold=threshold, max_clusters=max_clusters, **options).fit_predict(X)
+    if method != "agglomerative":
+        raise ValueError(f"Unknown clustering method {method!r}, expected one of {CLUSTERING_METHODS}")
+
+    from sklearn.cluster import AgglomerativeClustering
+
+    clustering = AgglomerativeClustering(
+        n_clusters=None,
+        distance_threshold=threshold,
+        metric='cosine',
+        linkage='average'
+    )
+    return clustering.fit_predict(X)
@@ -10,6 +10,7 @@ WHAT:
   - WorkflowConfig: Settings for specific diarization workflows (thresholds, models).
   - IngestionConfig: Settings for the main ingestion process (input paths, flags).
   - DownloadConfig: Settings for the video download process (URL, output).
+  - StreamConfig: Settings for live streaming diarization (source, chunking, thresholds).
 
   [Inputs]
   - None (these are data structures)
@@ -22,6 +23,10 @@ WHEN:
   Last Modified: 2025-12-05
   Change Log:
   - 2025-12-05: Added `DownloadConfig` class.
+  - 2026-10-16: Added `WorkflowConfig.approximate_search` for the speaker identity index.
+  - 2026-10-16: Added `WorkflowConfig.embedding_mode` / `frame_duration` / `frame_step`.
+  - 2026-10-16: Added `WorkflowConfig.clustering` / `max_clusters`.
+  - 2026-10-16: Added `StreamConfig` class.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/config.py
@@ -44,6 +49,15 @@ class WorkflowConfig(BaseModel):
     model_name: Optional[str] = None
     min_speakers: Optional[int] = None
     max_speakers: Optional[int] = None
+    approximate_search: bool = False
+    # word_level: "word" embeds each word window separately, "frame" pools sliding-window
+    # frame embeddings (frame_duration seconds, every frame_step seconds) per word
+    embedding_mode: str = "word"
+    frame_duration: float = 1.0
+    frame_step: float = 0.25
+    # "agglomerative" (exact, O(n^2) memory) or "online" (streaming, at most max_clusters clusters)
+    clustering: str = "agglomerative"
+    max_clusters: int = 64
 
 class IngestionConfig(BaseModel):
     clip_path: Path
@@ -61,3 +75,21 @@ class DownloadConfig(BaseModel):
     verbose: bool = False
     dry_run: bool = False
 
+class StreamConfig(BaseModel):
+    # Growing file, finished clip (with replay) or "-" for raw PCM on stdin
+    source: str
+    clip_id: Optional[str] = None
+    output: Optional[Path] = None
+    backend: str = "mlx"
+    pcm_format: str = "s16le"
+    chunk_seconds: float = 5.0
+    context: float = 2.0
+    holdback: float = 1.0
+    id_threshold: float = 0.4
+    cluster_threshold: float = 0.5
+    max_speakers: int = 64
+    idle_timeout: float = 10.0
+    replay: bool = False
+    speed: float = 1.0
+    verbose: bool = False
+    dry_run: bool = False
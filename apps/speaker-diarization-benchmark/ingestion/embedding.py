@@ -0,0 +1,446 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Batched, single-decode embedding engine for span-level speaker embeddings.
+
+  [Classes]
+  - SpanEmbedder: Maps the clip's 16 kHz mono buffer from the shared audio cache, slices
+    spans as views and embeds them in length-bucketed batches (one forward pass per bucket).
+  - WeSpeakerEmbedder: The same for a `wespeaker` model: Kaldi fbank features are computed
+    once over the whole clip, each span takes its frames (with per-span CMN) and spans with
+    equal frame counts share a forward pass. No temporary WAV files.
+  - FrameEmbedder: Runs the model once over the whole clip with a sliding window at a fixed
+    hop and pools the frame embeddings inside each span (cost follows audio length, not the
+    number of spans or how much they overlap).
+  - EmbeddingResult: Embedding matrix plus which spans were embedded and timing stats.
+
+  [Functions]
+  - pool_frames(): Mean of the unit-normalized frame embeddings centred inside each span.
+
+  [Inputs]
+  - A loaded pyannote `Model` (e.g. `pyannote/embedding`).
+  - A clip path and a list of (start, end) spans in seconds.
+
+  [Outputs]
+  - EmbeddingResult with one row per successfully embedded span.
+
+  [How to run/invoke it]
+  - `embedder = SpanEmbedder(model)`
+  - `result = embedder.embed_spans(clip_path, [(seg.start, seg.end) for seg in segments])`
+  - `WeSpeakerEmbedder(load_wespeaker_model()).embed_spans(clip_path, spans)`
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/embedding.py
+
+WHY:
+  Cropping with `Audio.crop` re-opens and re-decodes the file for every span, and
+  `Inference(window="whole")` runs a batch-size-1 forward pass per span. On hour-long
+  episodes that is thousands of decodes and forwards; here the clip is decoded once
+  and spans of similar length share a single masked forward pass.
+"""
+
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from ingestion.audio_cache import get_audio_cache
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class EmbeddingResult:
+    embeddings: np.ndarray
+    indices: List[int] = field(default_factory=list)
+    decode_time: float = 0.0
+    forward_time: float = 0.0
+    feature_time: float = 0.0
+
+    def stats(self) -> dict:
+        """Timing stats in the shape used by workflow `run()` results."""
+        stats = {
+            'embedding_time': self.decode_time + self.feature_time + self.forward_time,
+            'embedding_decode_time': self.decode_time,
+            'embedding_forward_time': self.forward_time,
+        }
+        if self.feature_time:
+            stats['embedding_feature_time'] = self.feature_time
+        return stats
+
+
+class SpanEmbedder:
+    def __init__(self,
+                 model,
+                 sample_rate: int = SAMPLE_RATE,
+                 batch_size: int = 32,
+                 min_duration: float = 0.02,
+                 length_tolerance: float = 0.25,
+                 device: Optional[torch.device] = None):
+        """
+        Args:
+            model: A pyannote `Model` returning one embedding per input chunk.
+            batch_size: Maximum number of spans per forward pass.
+            min_duration: Spans shorter than this (seconds) are skipped.
+            length_tolerance: Spans are bucketed so the longest span in a batch is at most
+                (1 + length_tolerance) times the shortest, which bounds padding.
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.min_duration = min_duration
+        self.length_tolerance = length_tolerance
+        self.device = device or torch.device("cpu")
+        self.model.to(self.device)
+        self.model.eval()
+        try:
+            self.supports_weights = "weights" in inspect.signature(self.model.forward).parameters
+        except (TypeError, ValueError):
+            self.supports_weights = False
+
+    def decode(self, clip_path: Path) -> torch.Tensor:
+        """The clip as a (1, num_samples) mono tensor, memory-mapped from the shared audio cache."""
+        waveform, _ = get_audio_cache().waveform(clip_path, sample_rate=self.sample_rate)
+        return waveform
+
+    def _slice(self, waveform: torch.Tensor, start: float, end: float) -> torch.Tensor:
+        num_samples = waveform.shape[-1]
+        s = min(max(int(round(start * self.sample_rate)), 0), num_samples)
+        e = min(max(int(round(end * self.sample_rate)), s), num_samples)
+        return waveform[:, s:e]
+
+    def _buckets(self, lengths: Sequence[int]) -> List[List[int]]:
+        """Groups span indices (sorted by length) into batches of similar length."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        buckets = []
+        current = []
+        for i in order:
+            if current and (
+                len(current) >= self.batch_size
+                or lengths[i] > lengths[current[0]] * (1 + self.length_tolerance)
+            ):
+                buckets.append(current)
+                current = []
+            current.append(i)
+        if current:
+            buckets.append(current)
+        return buckets
+
+    def _forward(self, chunks: List[torch.Tensor]) -> np.ndarray:
+        max_len = max(c.shape[-1] for c in chunks)
+        batch = torch.zeros(len(chunks), chunks[0].shape[0], max_len)
+        mask = torch.zeros(len(chunks), max_len)
+        for b, chunk in enumerate(chunks):
+            batch[b, :, :chunk.shape[-1]] = chunk
+            mask[b, :chunk.shape[-1]] = 1.0
+
+        batch = batch.to(self.device)
+        with torch.inference_mode():
+            if self.supports_weights and len(chunks) > 1:
+                out = self.model(batch, weights=mask.to(self.device))
+            else:
+                out = self.model(batch)
+        return out.detach().cpu().numpy()
+
+    def embed_spans(self, clip_path: Path, spans: Sequence[Tuple[float, float]]) -> EmbeddingResult:
+        """
+        Embeds each (start, end) span of the clip.
+
+        Spans shorter than `min_duration`, and spans whose forward pass fails, are left
+        out; `result.indices[k]` is the position in `spans` of `result.embeddings[k]`.
+        """
+        start_time = time.time()
+        waveform = self.decode(clip_path)
+        decode_time = time.time() - start_time
+
+        start_time = time.time()
+        candidates = [i for i, (s, e) in enumerate(spans) if e - s >= self.min_duration]
+        chunks = {i: self._slice(waveform, *spans[i]) for i in candidates}
+        candidates = [i for i in candidates if chunks[i].shape[-1] > 0]
+
+        rows = {}
+        for bucket in self._buckets([chunks[i].shape[-1] for i in candidates]):
+            span_ids = [candidates[b] for b in bucket]
+            try:
+                out = self._forward([chunks[i] for i in span_ids])
+                rows.update(zip(span_ids, out))
+            except Exception as e:
+                # One bad span should not take down the whole batch: retry one by one.
+                logger.debug(f"Batched forward failed ({e}); retrying {len(span_ids)} spans individually.")
+                for i in span_ids:
+                    try:
+                        rows[i] = self._forward([chunks[i]])[0]
+                    except Exception as e:
+                        logger.warning(f"Failed to embed span {i}: {e}")
+        forward_time = time.time() - start_time
+
+        indices = sorted(rows)
+        if indices:
+            embeddings = np.vstack([rows[i] for i in indices])
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+
+        return EmbeddingResult(
+            embeddings=embeddings,
+            indices=indices,
+            decode_time=decode_time,
+            forward_time=forward_time,
+        )
+
+
+class WeSpeakerEmbedder:
+    def __init__(self,
+                 speaker,
+                 batch_size: int = 64,
+                 min_duration: float = 0.02,
+                 num_mel_bins: int = 80,
+                 frame_length: float = 25,
+                 frame_shift: float = 10,
+                 block_seconds: float = 60.0):
+        """
+        Args:
+            speaker: A `wespeaker` Speaker (from `wespeaker.load_model`), whose `.model` is
+                run directly on batched fbank features.
+            batch_size: Maximum number of spans per forward pass.
+            min_duration: Spans shorter than this (seconds) are skipped.
+            num_mel_bins / frame_length / frame_shift: Fbank options, as in
+                `Speaker.compute_fbank` (milliseconds for the frame options).
+            block_seconds: The whole-clip fbank is computed in blocks of this many seconds
+                to bound the memory of the framed signal.
+        """
+        self.speaker = speaker
+        self.model = speaker.model
+        self.device = getattr(speaker, "device", None) or torch.device("cpu")
+        self.sample_rate = getattr(speaker, "resample_rate", SAMPLE_RATE)
+        # `Speaker.extract_embedding` loads files un-normalized (int16 scale) unless
+        # `wavform_norm` is set; match it so the features are the same.
+        self.scale = 1.0 if getattr(speaker, "wavform_norm", False) else 32768.0
+        self.batch_size = batch_size
+        self.min_duration = min_duration
+        self.num_mel_bins = num_mel_bins
+        self.frame_length = frame_length
+        self.frame_shift = frame_shift
+        self.block_seconds = block_seconds
+        self.frame_samples = int(self.sample_rate * frame_length / 1000)
+        self.shift_samples = int(self.sample_rate * frame_shift / 1000)
+        self.model.to(self.device)
+        self.model.eval()
+
+    def features(self, waveform: torch.Tensor) -> torch.Tensor:
+        """
+        (num_frames, num_mel_bins) fbank of the whole clip.
+
+        Kaldi fbank frames are computed independently (DC removal, pre-emphasis and windowing
+        are per frame), so blocks that overlap by one frame minus one shift concatenate to
+        exactly the single-pass result.
+        """
+        import torchaudio.compliance.kaldi as kaldi
+
+        num_samples = waveform.shape[-1]
+        if num_samples < self.frame_samples:
+            return torch.empty(0, self.num_mel_bins)
+        num_frames = 1 + (num_samples - self.frame_samples) // self.shift_samples
+        block_frames = max(1, int(self.block_seconds * self.sample_rate) // self.shift_samples)
+
+        blocks = []
+        for f0 in range(0, num_frames, block_frames):
+            f1 = min(f0 + block_frames, num_frames)
+            s = f0 * self.shift_samples
+            e = (f1 - 1) * self.shift_samples + self.frame_samples
+            blocks.append(kaldi.fbank(
+                waveform[:, s:e] * self.scale,
+                num_mel_bins=self.num_mel_bins,
+                frame_length=self.frame_length,
+                frame_shift=self.frame_shift,
+                sample_frequency=self.sample_rate,
+                window_type='hamming',
+            ))
+        return torch.cat(blocks)
+
+    def _frames(self, start: float, end: float, num_frames: int) -> Tuple[int, int]:
+        """Frame range of the span, the frames a crop of [start, end) would produce."""
+        s = max(int(start * self.sample_rate), 0)
+        e = int(end * self.sample_rate)
+        if e - s < self.frame_samples:
+            return 0, 0
+        first = min(int(round(s / self.shift_samples)), num_frames)
+        count = 1 + (e - s - self.frame_samples) // self.shift_samples
+        return first, min(first + count, num_frames)
+
+    def _forward(self, feats: torch.Tensor) -> np.ndarray:
+        with torch.inference_mode():
+            out = self.model(feats.to(self.device))
+            out = out[-1] if isinstance(out, tuple) else out
+        return out.detach().cpu().numpy()
+
+    def embed_spans(self, clip_path: Path, spans: Sequence[Tuple[float, float]]) -> EmbeddingResult:
+        """
+        Embeds each (start, end) span of the clip.
+
+        Spans shorter than `min_duration` or than one fbank frame, and spans whose forward
+        pass fails, are left out; `result.indices[k]` is the position in `spans` of
+        `result.embeddings[k]`.
+        """
+        start_time = time.time()
+        waveform, _ = get_audio_cache().waveform(clip_path, sample_rate=self.sample_rate)
+        decode_time = time.time() - start_time
+
+        start_time = time.time()
+        fbank = self.features(waveform)
+        ranges = {}
+        for i, (s, e) in enumerate(spans):
+            if e - s < self.min_duration:
+                continue
+            first, last = self._frames(s, e, fbank.shape[0])
+            if last > first:
+                ranges[i] = (first, last)
+        feature_time = time.time() - start_time
+
+        start_time = time.time()
+        # Stats pooling has no mask, so only spans with the same frame count are batched
+        by_length = {}
+        for i, (first, last) in ranges.items():
+            by_length.setdefault(last - first, []).append(i)
+
+        rows = {}
+        for length, span_ids in sorted(by_length.items()):
+            for b in range(0, len(span_ids), self.batch_size):
+                batch_ids = span_ids[b:b + self.batch_size]
+                feats = torch.stack([fbank[slice(*ranges[i])] for i in batch_ids])
+                # Per-span CMN, as `Speaker.compute_fbank(cmn=True)` does on a crop
+                feats = feats - feats.mean(dim=1, keepdim=True)
+                try:
+                    rows.update(zip(batch_ids, self._forward(feats)))
+                except Exception as e:
+                    logger.debug(f"Batched forward failed ({e}); retrying {len(batch_ids)} spans individually.")
+                    for k, i in enumerate(batch_ids):
+                        try:
+                            rows[i] = self._forward(feats[k:k + 1])[0]
+                        except Exception as e:
+                            logger.warning(f"Failed to embed span {i}: {e}")
+        forward_time = time.time() - start_time
+
+        indices = sorted(rows)
+        if indices:
+            embeddings = np.vstack([rows[i] for i in indices])
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+
+        return EmbeddingResult(
+            embeddings=embeddings,
+            indices=indices,
+            decode_time=decode_time,
+            forward_time=forward_time,
+            feature_time=feature_time,
+        )
+
+
+def pool_frames(frames: np.ndarray, centers: np.ndarray, spans: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    One embedding per (start, end) span: the mean of the unit-normalized frames whose centre
+    lies in the span, or the frame nearest to the span's midpoint when none does.
+
+    NaN frames are ignored; a span gets NaNs only when every frame is NaN.
+    `centers` must be increasing.
+    """
+    spans = np.asarray(spans, dtype=np.float64).reshape(-1, 2)
+    valid = ~np.isnan(frames).any(axis=1)
+    if not valid.any():
+        return np.full((len(spans), frames.shape[1]), np.nan, dtype=np.float32)
+
+    norms = np.linalg.norm(frames, axis=1, keepdims=True)
+    unit = np.where(valid[:, None] & (norms > 0), frames / np.where(norms > 0, norms, 1), 0.0)
+    # Prefix sums: sum and count of valid frames in [lo, hi) are two lookups per span
+    sums = np.vstack([np.zeros((1, frames.shape[1])), np.cumsum(unit, axis=0)])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+
+    lo = np.searchsorted(centers, spans[:, 0], side='left')
+    hi = np.searchsorted(centers, spans[:, 1], side='right')
+    n = counts[hi] - counts[lo]
+    pooled = (sums[hi] - sums[lo]) / np.maximum(n, 1)[:, None]
+
+    empty = np.where(n == 0)[0]
+    if len(empty):
+        valid_idx = np.where(valid)[0]
+        mids = spans[empty].mean(axis=1)
+        pos = np.clip(np.searchsorted(centers[valid_idx], mids), 1, max(len(valid_idx) - 1, 1))
+        left = valid_idx[pos - 1]
+        right = valid_idx[np.minimum(pos, len(valid_idx) - 1)]
+        nearest = np.where(np.abs(centers[left] - mids) <= np.abs(centers[right] - mids), left, right)
+        pooled[empty] = unit[nearest]
+    return pooled.astype(np.float32)
+
+
+class FrameEmbedder:
+    def __init__(self,
+                 model,
+                 duration: float = 1.0,
+                 step: float = 0.25,
+                 batch_size: int = 32,
+                 sample_rate: int = SAMPLE_RATE):
+        """
+        Args:
+            model: A pyannote `Model` returning one embedding per input chunk.
+            duration: Sliding window length in seconds.
+            step: Hop between windows in seconds; a frame is attributed to its window centre.
+            batch_size: Windows per forward pass.
+        """
+        from pyannote.audio import Inference
+
+        self.inference = Inference(model, window="sliding", duration=duration, step=step, batch_size=batch_size)
+        self.sample_rate = sample_rate
+
+    def frames(self, waveform: torch.Tensor) -> Tuple[np.ndarray, np.ndarray]:
+        """(frame embeddings (num_frames, dim), frame centre times (num_frames,))."""
+        output = self.inference({"waveform": waveform, "sample_rate": self.sample_rate})
+        window = output.sliding_window
+        data = np.asarray(output.data, dtype=np.float32).reshape(len(output.data), -1)
+        centers = window.start + np.arange(len(data)) * window.step + window.duration / 2
+        return data, centers
+
+    def embed_spans(self, clip_path: Path, spans: Sequence[Tuple[float, float]]) -> EmbeddingResult:
+        """
+        Embeds each (start, end) span of the clip from one sliding pass.
+
+        Spans are never dropped for being short (they take the nearest frame), only when
+        their pooled embedding is NaN; `result.indices[k]` is the position in `spans` of
+        `result.embeddings[k]`.
+        """
+        start_time = time.time()
+        waveform, _ = get_audio_cache().waveform(clip_path, sample_rate=self.sample_rate)
+        decode_time = time.time() - start_time
+
+        start_time = time.time()
+        frames, centers = self.frames(waveform)
+        forward_time = time.time() - start_time
+
+        start_time = time.time()
+        if len(frames) and len(spans):
+            pooled = pool_frames(frames, centers, spans)
+            indices = np.where(~np.isnan(pooled).any(axis=1))[0].tolist()
+            embeddings = pooled[indices]
+        else:
+            indices = []
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        feature_time = time.time() - start_time
+
+        return EmbeddingResult(
+            embeddings=embeddings,
+            indices=indices,
+            decode_time=decode_time,
+            forward_time=forward_time,
+            feature_time=feature_time,
+        )
@@ -0,0 +1,310 @@
+"""
+HOW:
+  One-shot migration from the legacy JSON database (run from apps/speaker-diarization-benchmark):
+    uv run python -m ingestion.identity migrate [--json data/speaker_embeddings.json] [--out data/speaker_index]
+
+  Inspect an index:
+    uv run python -m ingestion.identity info [--out data/speaker_index]
+
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Binary, memory-mapped speaker identity index with vectorized lookup.
+
+  [Classes]
+  - SpeakerIndex: float32 L2-normalized enrollment matrix (one row per enrolled vector,
+    grouped by speaker) plus a per-speaker prototype matrix (normalized mean of the raw
+    enrolled vectors). Lookup is one matrix multiply of all queries against all rows.
+
+  [Functions]
+  - load_speaker_index(): Loads data/speaker_index, (re)building it from
+    data/speaker_embeddings.json when the index is missing or older than the JSON file.
+  - migrate_json(): Builds and saves an index from the legacy JSON file.
+
+  [On-disk layout] (data/speaker_index/)
+  - embeddings.npy: (N, D) float32, L2-normalized, rows grouped by speaker (memory-mapped).
+  - labels.npy: (N,) unicode speaker name per row.
+  - prototypes.npy: (S, D) float32, L2-normalized mean of each speaker's raw vectors.
+  - meta.json: dim, counts per speaker, source file and its mtime.
+
+  [Matching modes]
+  - "prototype": distance to each speaker's mean vector (cosine(centroid, mean(known))).
+  - "nearest": distance to each speaker's closest enrolled vector (min cdist).
+    With approximate=True, an inverted-file (coarse k-means) search only scores the
+    vectors in the closest lists.
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/identity.py
+
+WHY:
+  data/speaker_embeddings.json is a JSON dict of Python float lists that every identification
+  path re-parsed and then compared speaker by speaker in a Python loop. The index loads
+  without parsing and scores every query against every enrolled vector in one matmul.
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_JSON_PATH = BASE_DIR / "data/speaker_embeddings.json"
+DEFAULT_INDEX_DIR = BASE_DIR / "data/speaker_index"
+
+# Distance reported when there is nothing to compare against (matches the legacy loops).
+NO_MATCH_DISTANCE = 2.0
+
+
+def _normalize(X: np.ndarray) -> np.ndarray:
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=-1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+class SpeakerIndex:
+    def __init__(self,
+                 embeddings: np.ndarray,
+                 labels: np.ndarray,
+                 prototypes: np.ndarray,
+                 metadata: Optional[Dict] = None):
+        """
+        Args:
+            embeddings: (N, D) L2-normalized rows, grouped so each speaker's rows are contiguous.
+            labels: (N,) speaker name per row.
+            prototypes: (S, D) L2-normalized prototype per speaker, in order of first appearance.
+        """
+        self.embeddings = embeddings
+        self.labels = np.asarray(labels)
+        self.prototypes = prototypes
+        self.metadata = metadata or {}
+
+        if len(self.labels):
+            change = np.flatnonzero(self.labels[1:] != self.labels[:-1]) + 1
+            self._offsets = np.concatenate([[0], change])
+        else:
+            self._offsets = np.zeros(0, dtype=int)
+        self.speakers: List[str] = [str(self.labels[i]) for i in self._offsets]
+        self._ivf = None
+
+    # ------------------------------------------------------------------ construction
+
+    @classmethod
+    def from_dict(cls, known_speakers: Dict[str, Sequence[Sequence[float]]], source: Optional[Path] = None) -> "SpeakerIndex":
+        """Builds an index from the legacy {name: [vector, ...]} mapping."""
+        names, blocks, prototypes = [], [], []
+        for name, vectors in known_speakers.items():
+            if not vectors:
+                continue
+            raw = np.asarray(vectors, dtype=np.float32)
+            nan_rows = np.isnan(raw).any(axis=1)
+            if nan_rows.any():
+                logger.warning(f"Skipping {nan_rows.sum()} NaN embeddings for {name}.")
+                raw = raw[~nan_rows]
+                if not len(raw):
+                    continue
+            names.extend([name] * len(raw))
+            blocks.append(_normalize(raw))
+            prototypes.append(raw.mean(axis=0))
+
+        if blocks:
+            embeddings = np.vstack(blocks)
+            prototypes = _normalize(np.vstack(prototypes))
+        else:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+            prototypes = np.zeros((0, 0), dtype=np.float32)
+
+        metadata = {
+            "dim": int(embeddings.shape[1]) if embeddings.size else 0,
+            "count": int(len(names)),
+            "speakers": {name: names.count(name) for name in dict.fromkeys(names)},
+            "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if source is not None:
+            metadata["source"] = str(source)
+            metadata["source_mtime"] = Path(source).stat().st_mtime
+
+        return cls(embeddings, np.asarray(names, dtype=str), prototypes, metadata)
+
+    @classmethod
+    def load(cls, index_dir: Path = DEFAULT_INDEX_DIR, mmap: bool = True) -> "SpeakerIndex":
+        index_dir = Path(index_dir)
+        mmap_mode = "r" if mmap else None
+        embeddings = np.load(index_dir / "embeddings.npy", mmap_mode=mmap_mode)
+        labels = np.load(index_dir / "labels.npy")
+        prototypes = np.load(index_dir / "prototypes.npy")
+        with open(index_dir / "meta.json") as f:
+            metadata = json.load(f)
+        return cls(embeddings, labels, prototypes, metadata)
+
+    def save(self, index_dir: Path = DEFAULT_INDEX_DIR):
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "embeddings.npy", np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        np.save(index_dir / "labels.npy", self.labels.astype(str))
+        np.save(index_dir / "prototypes.npy", np.ascontiguousarray(self.prototypes, dtype=np.float32))
+        with open(index_dir / "meta.json", "w") as f:
+            json.dump(self.metadata, f, indent=2)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    # ------------------------------------------------------------------ lookup
+
+    def distances(self, queries: np.ndarray, mode: str = "nearest", approximate: bool = False, nprobe: int = 4) -> np.ndarray:
+        """
+        Cosine distance of every query to every speaker, shape (M, S) with columns in
+        `self.speakers` order.
+
+        mode="prototype" compares against each speaker's mean vector, mode="nearest" against
+        each speaker's closest enrolled vector.
+        """
+        Q = _normalize(np.atleast_2d(queries))
+        if len(self) == 0:
+            return np.full((len(Q), 0), NO_MATCH_DISTANCE, dtype=np.float32)
+
+        if mode == "prototype":
+            return 1.0 - Q @ self.prototypes.T
+        if mode != "nearest":
+            raise ValueError(f"Unknown matching mode: {mode}")
+
+        if approximate:
+            return self._approximate_nearest(Q, nprobe)
+
+        sims = Q @ np.asarray(self.embeddings).T  # (M, N)
+        best = np.maximum.reduceat(sims, self._offsets, axis=1)  # (M, S)
+        return 1.0 - best
+
+    def identify(self,
+                 queries: np.ndarray,
+                 mode: str = "nearest",
+                 threshold: Optional[float] = None,
+                 approximate: bool = False) -> List[Tuple[Optional[str], float]]:
+        """
+        Best speaker for each query as (name, distance).
+
+        The name is None when the index is empty or, if `threshold` is given, when the best
+        distance is not below it. The distance is always the best distance found.
+        """
+        D = self.distances(queries, mode=mode, approximate=approximate)
+        if D.shape[1] == 0:
+            return [(None, NO_MATCH_DISTANCE) for _ in range(len(D))]
+
+        best = np.argmin(D, axis=1)
+        results = []
+        for row, col in enumerate(best):
+            dist = float(D[row, col])
+            if not np.isfinite(dist):
+                results.append((None, NO_MATCH_DISTANCE))
+                continue
+            name = self.speakers[col]
+            if threshold is not None and not dist < threshold:
+                name = None
+            results.append((name, dist))
+        return results
+
+    # ------------------------------------------------------------------ approximate search
+
+    def _build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Coarse spherical k-means over the enrolled vectors (inverted-file index)."""
+        X = np.asarray(self.embeddings)
+        nlist = nlist or max(1, int(np.sqrt(len(X))))
+        rng = np.random.default_rng(seed)
+        centroids = X[rng.choice(len(X), size=min(nlist, len(X)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(X @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = X[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        assign = np.argmax(X @ centroids.T, axis=1)
+        lists = [np.flatnonzero(assign == c) for c in range(len(centroids))]
+        self._ivf = (centroids, lists)
+
+    def _approximate_nearest(self, Q: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._ivf is None:
+            self._build_ivf()
+        centroids, lists = self._ivf
+        X = np.asarray(self.embeddings)
+        speaker_of_row = np.repeat(np.arange(len(self._offsets)), np.diff(np.append(self._offsets, len(X))))
+
+        D = np.full((len(Q), len(self.speakers)), NO_MATCH_DISTANCE, dtype=np.float32)
+        probes = np.argsort(-(Q @ centroids.T), axis=1)[:, :nprobe]
+        for q, probe in enumerate(probes):
+            rows = np.concatenate([lists[c] for c in probe])
+            if len(rows) == 0:
+                continue
+            dist = 1.0 - X[rows] @ Q[q]
+            np.minimum.at(D[q], speaker_of_row[rows], dist)
+        return D
+
+
+def migrate_json(json_path: Path = DEFAULT_JSON_PATH, index_dir: Path = DEFAULT_INDEX_DIR) -> SpeakerIndex:
+    """Builds a SpeakerIndex from the legacy JSON database and saves it to `index_dir`."""
+    with open(json_path) as f:
+        known_speakers = json.load(f)
+    index = SpeakerIndex.from_dict(known_speakers, source=json_path)
+    index.save(index_dir)
+    logger.info(f"Migrated {len(index)} vectors for {len(index.speakers)} speakers from {json_path} to {index_dir}")
+    return index
+
+
+def load_speaker_index(index_dir: Path = DEFAULT_INDEX_DIR, json_path: Path = DEFAULT_JSON_PATH) -> SpeakerIndex:
+    """
+    Loads the identity index, migrating from the JSON database first if the index is
+    missing or the JSON file has been modified since the index was built.
+    Returns an empty index if neither exists.
+    """
+    index_dir, json_path = Path(index_dir), Path(json_path)
+    meta_path = index_dir / "meta.json"
+
+    if json_path.exists():
+        stale = True
+        if meta_path.exists():
+            with open(meta_path) as f:
+                stale = json.load(f).get("source_mtime", 0) < json_path.stat().st_mtime
+        if stale:
+            try:
+                return migrate_json(json_path, index_dir)
+            except OSError as e:
+                logger.warning(f"Could not write speaker index to {index_dir} ({e}); using in-memory index.")
+                with open(json_path) as f:
+                    return SpeakerIndex.from_dict(json.load(f), source=json_path)
+
+    if meta_path.exists():
+        index = SpeakerIndex.load(index_dir)
+        logger.info(f"Loaded {len(index.speakers)} known speakers ({len(index)} vectors) from {index_dir}.")
+        return index
+
+    logger.warning(f"Speaker embeddings DB not found at {json_path}")
+    return SpeakerIndex.from_dict({})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speaker identity index")
+    parser.add_argument("command", choices=["migrate", "info"])
+    parser.add_argument("--json", type=str, default=str(DEFAULT_JSON_PATH), help="Legacy speaker_embeddings.json.")
+    parser.add_argument("--out", type=str, default=str(DEFAULT_INDEX_DIR), help="Index directory.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "migrate":
+        migrate_json(Path(args.json), Path(args.out))
+    else:
+        index = SpeakerIndex.load(Path(args.out))
+        print(json.dumps(index.metadata, indent=2))
+
+
+if __name__ == "__main__":
+    main()
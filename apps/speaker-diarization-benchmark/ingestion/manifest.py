@@ -1,68 +1,413 @@
 """
+HOW:
+  Read and write clips through the store:
+    with get_store() as store:
+        store.update(clip_id, fn)
+
+  manifest.json (used by data/clips/ground_truth_ui.html) is a mirror of the store. Writes
+  never touch it; batch scripts re-export it once at the end (`store.close(export=True)`),
+  and `get_store()` re-imports it on open when it changed (e.g. after a git pull) and the
+  store has nothing unexported. To export or import by hand:
+    uv run python -m ingestion.manifest export [--json data/clips/manifest.json]
+    uv run python -m ingestion.manifest import [--json data/clips/manifest.json] [--force]
+
 WHO:
   Antigravity
   (Context: Audio Ingestion System)
 
 WHAT:
-  Logic for updating the manifest.json file.
+  Manifest storage engine and the logic for updating clip entries.
+
+  [Classes]
+  - ManifestStore: SQLite-backed manifest. One row per clip (keyed by clip id) and one row
+    per (clip, transcription key), so a workflow run writes only its own segments.
+
+  [Functions]
+  - update_manifest(): Stores a workflow's segments for a clip.
+  - get_store(): The store at data/clips/manifest.db, mirrored to data/clips/manifest.json.
+
+  [Concurrency]
+  - WAL journal mode plus `BEGIN IMMEDIATE` transactions: parallel ingestion runs on
+    different (or the same) clips serialize their writes instead of clobbering each other.
 
 WHEN:
   2025-12-03
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Added `ManifestStore` (SQLite) with per-entry transactional writes and
+    on-demand JSON export; `update_manifest` no longer rewrites the whole JSON file.
+  - 2026-10-16: manifest.json is an exported mirror (on demand, or once at the end of a
+    batch); importing refuses to discard store writes that are not in it yet.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/manifest.py
 
 WHY:
   To centralize database-like operations on the manifest file.
+  Reading the whole manifest.json, finding the clip with a linear scan and rewriting the
+  file after every run was slow and lost updates when two runs overlapped.
 """
 
+import argparse
 import json
 import logging
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
-def update_manifest(clip_path: Path, workflow_name: str, segments: List[Dict[str, Any]], transcription_text: str):
-    manifest_path = Path(__file__).parent.parent / "data/clips/manifest.json"
-    if not manifest_path.exists():
-        logger.error(f"Manifest not found at {manifest_path}")
-        return
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_MANIFEST_PATH = BASE_DIR / "data/clips/manifest.json"
+DEFAULT_DB_PATH = BASE_DIR / "data/clips/manifest.db"
 
-    try:
-        with open(manifest_path, 'r') as f:
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    clip_path TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clips_clip_path ON clips (clip_path);
+CREATE TABLE IF NOT EXISTS transcriptions (
+    clip_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    segments TEXT NOT NULL,
+    PRIMARY KEY (clip_id, key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ManifestStore:
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, timeout: float = 30.0,
+                 mirror_path: Optional[Path] = None):
+        """
+        Args:
+            db_path: SQLite database file.
+            timeout: Seconds to wait for another process's write lock.
+            mirror_path: manifest.json mirrored by this store: re-imported by `get_store()`
+                and re-exported by `close(export=True)`.
+        """
+        self.db_path = Path(db_path)
+        self.mirror_path = Path(mirror_path) if mirror_path else None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self, export: bool = False):
+        """
+        Closes the connection. With `export`, first re-exports the mirror if anything was
+        written since the last export (a full manifest.json rewrite: do it once at the end
+        of a batch, not after every write).
+        """
+        try:
+            if export and self.mirror_path is not None and self.is_dirty():
+                if self.json_is_newer(self.mirror_path):
+                    logger.warning(f"Not exporting {self.mirror_path}: it was edited since the last export "
+                                   f"and the store has changes it does not have. Export with "
+                                   f"`python -m ingestion.manifest export` (drops the edits) or "
+                                   f"`import --force` (drops the store's changes).")
+                else:
+                    self.export_json(self.mirror_path)
+        finally:
+            self._conn.close()
+
+    def __enter__(self) -> "ManifestStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; takes the database write lock up front."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _mark_dirty(self, conn: sqlite3.Connection):
+        self._set_meta(conn, 'dirty', '1')
+
+    def is_dirty(self) -> bool:
+        """True if the store has writes that were not exported to manifest.json."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dirty'").fetchone()
+        return row is not None and row[0] == '1'
+
+    def _is_mirror(self, json_path: Path) -> bool:
+        return self.mirror_path is None or Path(json_path).resolve() == self.mirror_path.resolve()
+
+    # ------------------------------------------------------------------ reads
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+
+    def __contains__(self, clip_id: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM clips WHERE id = ?", (clip_id,)).fetchone() is not None
+
+    def ids(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT id FROM clips ORDER BY position")]
+
+    def _assemble(self, clip_id: str, data: str) -> Dict[str, Any]:
+        entry = json.loads(data)
+        rows = self._conn.execute(
+            "SELECT key, segments FROM transcriptions WHERE clip_id = ? ORDER BY position", (clip_id,)
+        ).fetchall()
+        if rows or 'transcriptions' in entry:
+            entry['transcriptions'] = {key: json.loads(segments) for key, segments in rows}
+        return entry
+
+    def get(self, clip_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT data FROM clips WHERE id = ?", (clip_id,)).fetchone()
+        return self._assemble(clip_id, row[0]) if row else None
+
+    def find(self, clip_path: Path) -> Optional[Dict[str, Any]]:
+        """Entry whose id is the file name of `clip_path`, or whose clip_path resolves to it."""
+        clip_path = Path(clip_path)
+        entry = self.get(clip_path.name)
+        if entry:
+            return entry
+        target = str(clip_path.resolve())
+        for clip_id, stored_path, data in self._conn.execute("SELECT id, clip_path, data FROM clips"):
+            if stored_path and (str(Path(stored_path).resolve()) == target
+                                or str((BASE_DIR / stored_path).resolve()) == target):
+                return self._assemble(clip_id, data)
+        return None
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        for clip_id, data in self._conn.execute("SELECT id, data FROM clips ORDER BY position").fetchall():
+            yield self._assemble(clip_id, data)
+
+    # ------------------------------------------------------------------ writes
+
+    def _put(self, conn: sqlite3.Connection, entry: Dict[str, Any]):
+        entry = dict(entry)
+        transcriptions = entry.pop('transcriptions', None)
+        if transcriptions is not None:
+            # Keep an (empty) transcriptions key on the entry
+            entry['transcriptions'] = {}
+        conn.execute(
+            """INSERT INTO clips (id, position, clip_path, data)
+               VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM clips), ?, ?)
+               ON CONFLICT(id) DO UPDATE SET clip_path = excluded.clip_path, data = excluded.data""",
+            (entry['id'], entry.get('clip_path'), json.dumps(entry)),
+        )
+        if transcriptions is not None:
+            # Drop keys the caller removed; keep positions of the ones that remain
+            stored = [row[0] for row in conn.execute(
+                "SELECT key FROM transcriptions WHERE clip_id = ?", (entry['id'],))]
+            for key in stored:
+                if key not in transcriptions:
+                    conn.execute("DELETE FROM transcriptions WHERE clip_id = ? AND key = ?", (entry['id'], key))
+            for key, segments in transcriptions.items():
+                self._put_transcription(conn, entry['id'], key, segments)
+
+    def _put_transcription(self, conn: sqlite3.Connection, clip_id: str, key: str, segments: Any):
+        conn.execute(
+            """INSERT INTO transcriptions (clip_id, key, position, segments)
+               VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM transcriptions WHERE clip_id = ?), ?)
+               ON CONFLICT(clip_id, key) DO UPDATE SET segments = excluded.segments""",
+            (clip_id, key, clip_id, json.dumps(segments)),
+        )
+
+    def put(self, entry: Dict[str, Any]):
+        """Inserts or replaces a whole clip entry (including its transcriptions, if given)."""
+        with self.transaction() as conn:
+            self._put(conn, entry)
+            self._mark_dirty(conn)
+
+    def add(self, entry: Dict[str, Any]) -> bool:
+        """Inserts a clip entry unless its id exists. Returns False if it already did."""
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM clips WHERE id = ?", (entry['id'],)).fetchone() is not None:
+                return False
+            self._put(conn, entry)
+            self._mark_dirty(conn)
+        return True
+
+    def delete(self, clip_id: str) -> bool:
+        """Removes a clip and its transcriptions. Returns False if the clip is unknown."""
+        with self.transaction() as conn:
+            deleted = conn.execute("DELETE FROM clips WHERE id = ?", (clip_id,)).rowcount > 0
+            conn.execute("DELETE FROM transcriptions WHERE clip_id = ?", (clip_id,))
+            if deleted:
+                self._mark_dirty(conn)
+        return deleted
+
+    def set_transcription(self, clip_id: str, key: str, segments: List[Dict[str, Any]]) -> bool:
+        """Stores segments under entry['transcriptions'][key]. Returns False if the clip is unknown."""
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM clips WHERE id = ?", (clip_id,)).fetchone() is None:
+                return False
+            self._put_transcription(conn, clip_id, key, segments)
+            self._mark_dirty(conn)
+        return True
+
+    def update(self, clip_id: str, fn: Callable[[Dict[str, Any]], None]) -> bool:
+        """
+        Read-modify-write of one entry inside a single transaction.
+        `fn` mutates the entry dict in place. Returns False if the clip is unknown.
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT data FROM clips WHERE id = ?", (clip_id,)).fetchone()
+            if row is None:
+                return False
+            entry = self._assemble(clip_id, row[0])
+            fn(entry)
+            self._put(conn, entry)
+            self._mark_dirty(conn)
+        return True
+
+    # ------------------------------------------------------------------ legacy JSON
+
+    def import_json(self, json_path: Path = DEFAULT_MANIFEST_PATH, force: bool = False):
+        """
+        Replaces the store's contents with a legacy manifest.json list.
+
+        Raises:
+            RuntimeError: If the store has writes that were never exported (they would be
+                lost), unless `force` is set.
+        """
+        json_path = Path(json_path)
+        with open(json_path) as f:
             data = json.load(f)
-    except json.JSONDecodeError:
-        logger.error(f"Failed to decode manifest at {manifest_path}")
-        return
-
-    # Find entry by ID (filename)
-    clip_id = clip_path.name
-    entry = next((item for item in data if item['id'] == clip_id), None)
-
-    if not entry:
-        logger.error(f"Clip ID {clip_id} not found in manifest.")
-        return
-
-    if 'transcriptions' not in entry:
-        entry['transcriptions'] = {}
-
-    # Format segments for manifest
-    manifest_segments = []
-    for seg in segments:
-        manifest_seg = {
-            "start": seg['start'],
-            "end": seg['end'],
-            "text": seg['text'],
-            "speaker": seg.get('speaker', 'UNKNOWN')
-        }
-        if 'match_info' in seg:
-             manifest_seg['match_info'] = seg['match_info']
-        manifest_segments.append(manifest_seg)
-
-    entry['transcriptions'][workflow_name] = manifest_segments
-    
-    with open(manifest_path, 'w') as f:
-        json.dump(data, f, indent=2)
-    
-    logger.info(f"Updated manifest.json for {clip_id} with workflow {workflow_name}")
+        with self.transaction() as conn:
+            # Checked under the write lock, so no writer can slip in before the replace
+            if self.is_dirty() and not force:
+                raise RuntimeError(f"{self.db_path} has changes that are not in a manifest.json export; "
+                                   f"importing {json_path} would discard them (pass force=True / --force).")
+            conn.execute("DELETE FROM transcriptions")
+            conn.execute("DELETE FROM clips")
+            for entry in data:
+                self._put(conn, entry)
+            if self._is_mirror(json_path):
+                self._set_meta(conn, 'json_mtime', str(json_path.stat().st_mtime))
+                self._set_meta(conn, 'dirty', '0')
+            else:
+                self._mark_dirty(conn)
+        logger.info(f"Imported {len(data)} clips from {json_path} into {self.db_path}")
+
+    def export_json(self, json_path: Path = DEFAULT_MANIFEST_PATH, indent: int = 2):
+        """Writes the legacy manifest.json list atomically (temp file + rename)."""
+        json_path = Path(json_path)
+        # Under the write lock, so the file holds every write committed before the
+        # export and none can land between the snapshot and clearing the dirty flag
+        with self.transaction() as conn:
+            data = list(self.entries())
+            fd, tmp_path = tempfile.mkstemp(dir=json_path.parent, prefix=".manifest_", suffix=".json")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=indent)
+                os.replace(tmp_path, json_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            if self._is_mirror(json_path):
+                self._set_meta(conn, 'json_mtime', str(json_path.stat().st_mtime))
+                self._set_meta(conn, 'dirty', '0')
+        logger.info(f"Exported {len(data)} clips to {json_path}")
+
+    def json_is_newer(self, json_path: Path = DEFAULT_MANIFEST_PATH) -> bool:
+        """True if manifest.json was modified after the last import/export."""
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return False
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_mtime'").fetchone()
+        return row is None or json_path.stat().st_mtime > float(row[0])
+
+
+def get_store(db_path: Path = DEFAULT_DB_PATH, json_path: Path = DEFAULT_MANIFEST_PATH) -> ManifestStore:
+    """
+    Opens the manifest store with `json_path` as its mirror.
+
+    manifest.json is imported when the store is empty, or when the file changed since the
+    last import/export and the store has no unexported writes. If both changed, the store is
+    used as is and a warning explains how to resolve it.
+    """
+    store = ManifestStore(db_path, mirror_path=json_path)
+    if Path(json_path).exists() and (len(store) == 0 or store.json_is_newer(json_path)):
+        if not store.is_dirty():
+            store.import_json(json_path)
+        elif store.json_is_newer(json_path):
+            logger.warning(f"{json_path} changed since it was last imported/exported, but the store "
+                           f"also has changes it does not have. Run `python -m ingestion.manifest export` "
+                           f"to keep the store's version or `import --force` to keep the file's.")
+    return store
+
+
+def update_manifest(clip_path: Path, workflow_name: str, segments: List[Dict[str, Any]], transcription_text: str,
+                    store: Optional[ManifestStore] = None):
+    own_store = store is None
+    if own_store:
+        if not DEFAULT_DB_PATH.exists() and not DEFAULT_MANIFEST_PATH.exists():
+            logger.error(f"Manifest not found at {DEFAULT_MANIFEST_PATH}")
+            return
+        store = get_store(DEFAULT_DB_PATH, DEFAULT_MANIFEST_PATH)
+
+    try:
+        # Find entry by ID (filename)
+        clip_id = clip_path.name
+
+        # Format segments for manifest
+        manifest_segments = []
+        for seg in segments:
+            manifest_seg = {
+                "start": seg['start'],
+                "end": seg['end'],
+                "text": seg['text'],
+                "speaker": seg.get('speaker', 'UNKNOWN')
+            }
+            if 'match_info' in seg:
+                 manifest_seg['match_info'] = seg['match_info']
+            manifest_segments.append(manifest_seg)
+
+        if not store.set_transcription(clip_id, workflow_name, manifest_segments):
+            logger.error(f"Clip ID {clip_id} not found in manifest.")
+            return
+
+        logger.info(f"Updated manifest store for {clip_id} with workflow {workflow_name}")
+    finally:
+        if own_store:
+            store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manifest store")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--json", type=str, default=str(DEFAULT_MANIFEST_PATH), help="Legacy manifest.json path.")
+    parser.add_argument("--db", type=str, default=str(DEFAULT_DB_PATH), help="SQLite manifest store path.")
+    parser.add_argument("--force", action="store_true",
+                        help="import: replace the store even if it has changes that were never exported.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = ManifestStore(Path(args.db), mirror_path=Path(args.json))
+    start_time = time.time()
+    if args.command == "export":
+        store.export_json(Path(args.json))
+    else:
+        store.import_json(Path(args.json), force=args.force)
+    store.close()
+    logger.info(f"Done in {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
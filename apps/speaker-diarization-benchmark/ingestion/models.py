@@ -0,0 +1,224 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Process-wide registry of warm models shared by all diarization workflows.
+
+  [Classes]
+  - ModelRegistry: Lazily loads each model once per (name, device, revision) key, keeps it
+    warm and evicts least-recently-used models when an optional memory cap is exceeded.
+
+  [Functions]
+  - get_registry(): The process-wide registry.
+  - load_pyannote_model(): `pyannote.audio.Model` (e.g. pyannote/embedding, pyannote/segmentation-3.0).
+  - load_pyannote_pipeline(): `pyannote.audio.Pipeline` (e.g. pyannote/speaker-diarization-3.1).
+  - load_wespeaker_model(): WeSpeaker model, falling back from 'english' to 'chinese'.
+
+  [Configuration]
+  - MODEL_REGISTRY_MAX_MB: Optional memory cap (estimated from parameter/buffer sizes).
+
+  [How to run/invoke it]
+  - `model = load_pyannote_model("pyannote/embedding")`
+  - `pipeline = load_pyannote_pipeline("pyannote/speaker-diarization-3.1", token=hf_token)`
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/models.py
+
+WHY:
+  Every `run()` used to reload its model from scratch (under `safe_globals`), so multi-clip
+  and threshold-sweep runs paid model load time once per run instead of once per process.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, Optional[str]]
+
+
+def _estimate_nbytes(obj: Any) -> int:
+    """Best-effort size of a model: parameters and buffers of it or its torch submodules."""
+    modules = []
+    if callable(getattr(obj, "parameters", None)):
+        modules.append(obj)
+    else:
+        for value in vars(obj).values() if hasattr(obj, "__dict__") else []:
+            if callable(getattr(value, "parameters", None)):
+                modules.append(value)
+
+    total = 0
+    for module in modules:
+        try:
+            for tensor in list(module.parameters()) + list(module.buffers()):
+                total += tensor.numel() * tensor.element_size()
+        except Exception:
+            continue
+    return total
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[ModelKey, Any]" = OrderedDict()
+        self._sizes: Dict[ModelKey, int] = {}
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0, 'load_time': 0.0}
+
+    def get(self,
+            name: str,
+            loader: Callable[[], Any],
+            device: str = "cpu",
+            revision: Optional[str] = None) -> Any:
+        """
+        Returns the model for (name, device, revision), calling `loader()` on first use.
+        A loader returning None is not cached, so a failed load can be retried.
+        """
+        key = (name, str(device), revision)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._models[key]
+
+            logger.info(f"Loading {name} (device={device}, revision={revision})...")
+            start_time = time.time()
+            model = loader()
+            load_time = time.time() - start_time
+            if model is None:
+                return None
+
+            self.stats['loads'] += 1
+            self.stats['load_time'] += load_time
+            self._models[key] = model
+            self._sizes[key] = _estimate_nbytes(model)
+            logger.info(f"Loaded {name} in {load_time:.2f}s ({self._sizes[key] / 1e6:.0f} MB).")
+            self._evict(keep=key)
+            return model
+
+    def _evict(self, keep: ModelKey):
+        if self.max_bytes is None:
+            return
+        while self.total_bytes() > self.max_bytes and len(self._models) > 1:
+            key = next(k for k in self._models if k != keep)
+            self.evict(key)
+
+    def evict(self, key: ModelKey):
+        with self._lock:
+            if key in self._models:
+                del self._models[key]
+                self._sizes.pop(key, None)
+                self.stats['evictions'] += 1
+                logger.info(f"Evicted {key[0]} (device={key[1]}) from model registry.")
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._models):
+                self.evict(key)
+
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        max_mb = os.getenv("MODEL_REGISTRY_MAX_MB")
+        _registry = ModelRegistry(max_bytes=int(float(max_mb) * 1e6) if max_mb else None)
+    return _registry
+
+
+def _from_pretrained(cls, name: str, token: Optional[str], revision: Optional[str]):
+    kwargs = {"revision": revision} if revision else {}
+    try:
+        return cls.from_pretrained(name, use_auth_token=token, **kwargs)
+    except TypeError:
+        # Newer pyannote versions use 'token' instead of 'use_auth_token'
+        return cls.from_pretrained(name, token=token, **kwargs)
+
+
+def load_pyannote_model(name: str = "pyannote/embedding",
+                        token: Optional[str] = None,
+                        device: str = "cpu",
+                        revision: Optional[str] = None,
+                        registry: Optional[ModelRegistry] = None):
+    """Loads a `pyannote.audio.Model` through the registry. Returns None if loading fails."""
+    def loader():
+        import torch
+        from pyannote.audio import Model
+        from ingestion.safe_globals import get_safe_globals
+
+        with torch.serialization.safe_globals(get_safe_globals()):
+            model = _from_pretrained(Model, name, token or os.getenv("HF_TOKEN"), revision)
+        if model is None:
+            logger.error(f"Failed to load {name}. Check HF_TOKEN.")
+            return None
+        model.to(torch.device(device))
+        model.eval()
+        return model
+
+    return (registry or get_registry()).get(name, loader, device=device, revision=revision)
+
+
+def load_pyannote_pipeline(name: str = "pyannote/speaker-diarization-3.1",
+                           token: Optional[str] = None,
+                           device: str = "cpu",
+                           revision: Optional[str] = None,
+                           registry: Optional[ModelRegistry] = None):
+    """Loads a `pyannote.audio.Pipeline` through the registry. Returns None if loading fails."""
+    def loader():
+        import torch
+        from pyannote.audio import Pipeline
+        from ingestion.safe_globals import get_safe_globals
+
+        with torch.serialization.safe_globals(get_safe_globals()):
+            pipeline = _from_pretrained(Pipeline, name, token or os.getenv("HF_TOKEN"), revision)
+        if pipeline is None:
+            logger.error(f"Failed to load {name}. Check HF_TOKEN.")
+            return None
+        pipeline.to(torch.device(device))
+        return pipeline
+
+    return (registry or get_registry()).get(name, loader, device=device, revision=revision)
+
+
+def load_wespeaker_model(language: str = "english",
+                         device: Optional[str] = None,
+                         registry: Optional[ModelRegistry] = None):
+    """Loads a WeSpeaker model through the registry, falling back to 'chinese'."""
+    import torch
+
+    if device is None:
+        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+
+    def loader():
+        import wespeaker
+
+        try:
+            model = wespeaker.load_model(language)
+        except Exception:
+            logger.warning(f"{language} model not found, trying 'chinese'...")
+            model = wespeaker.load_model('chinese')
+        if device.startswith("cuda"):
+            model.set_gpu(int(device.split(":")[-1]))
+        return model
+
+    return (registry or get_registry()).get(f"wespeaker/{language}", loader, device=device)
@@ -60,7 +60,14 @@ def generate_report(config: IngestionConfig,
         # Timing Stats
         f.write("--- Timing Stats ---\n")
         f.write(f"Transcription: {stats.get('transcription_time', 0):.2f}s\n")
+        if 'transcription_cache_hits' in stats:
+            f.write(f"  Cache:       {stats['transcription_cache_hits']} hits, {stats['transcription_cache_misses']} misses\n")
         f.write(f"Embedding:     {stats.get('embedding_time', 0):.2f}s\n")
+        if 'embedding_decode_time' in stats:
+            f.write(f"  Decode:      {stats['embedding_decode_time']:.2f}s\n")
+            if 'embedding_feature_time' in stats:
+                f.write(f"  Features:    {stats['embedding_feature_time']:.2f}s\n")
+            f.write(f"  Forward:     {stats.get('embedding_forward_time', 0):.2f}s\n")
         f.write(f"Segmentation:  {stats.get('segmentation_time', 0):.2f}s\n")
         f.write(f"Clustering:    {stats.get('clustering_time', 0):.2f}s\n")
         f.write(f"Total:         {stats.get('total_time', 0):.2f}s\n")
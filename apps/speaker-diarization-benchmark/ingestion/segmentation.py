@@ -0,0 +1,152 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Vectorized change-point segmentation of word embeddings.
+
+  A word starts a new segment when its cosine distance to the mean of the previous (up to)
+  `context` words of the current segment exceeds the threshold. This is the rule the word-level
+  workflows applied in a Python loop.
+
+  [Classes]
+  - ChangePointSegmenter: Computes the candidate distances once for an (n, dim) embedding
+    matrix. D[i, k-1] is the distance of word i to the k words before it (their sum, which has
+    the same direction as their mean), for k = 1..context. The rolling window sums are never
+    materialized. Their dot products with word i and their squared norms come from the
+    lag-0..context row-wise dot products X[i] . X[i-l], which are the only passes over the
+    (n, dim) matrix. A segment's context only reaches back to its first word, so the first
+    words after a boundary use the shorter contexts (k < context) and every other word uses
+    the full one. Boundaries for a threshold come from one comparison of the full-context
+    column plus jumps between candidates, so the Python work grows with the number of
+    boundaries, not the number of words. `boundary_sets(thresholds)` answers a whole
+    threshold sweep from the same distances.
+
+  [Functions]
+  - segments_from_boundaries(): Segment dicts (start, end, text, word_count, word_indices) for
+    chosen boundaries; text is only joined here.
+
+  [How to run/invoke it]
+  - `segmenter = ChangePointSegmenter(word_embeddings)`
+  - `segments = segments_from_boundaries(words, segmenter.boundaries(0.5))`
+  - `sweep = segmenter.boundary_sets([0.3, 0.4, 0.5])`  # {threshold: boundary indices}
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/segmentation.py
+
+WHY:
+  The loop re-stacked and averaged the context and called `scipy.spatial.distance.cosine`
+  for every word, built each segment's text while it ran, and had to run again for every
+  threshold tried.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+class ChangePointSegmenter:
+    def __init__(self, embeddings: Sequence[np.ndarray], context: int = 3):
+        """
+        Args:
+            embeddings: (n, dim) matrix or sequence of 1-D embeddings (numpy or torch), one per word.
+            context: Number of preceding words of the current segment compared against.
+        """
+        if isinstance(embeddings, np.ndarray) and embeddings.ndim == 2:
+            X = embeddings.astype(np.float64, copy=False)
+        elif len(embeddings):
+            X = np.stack([np.asarray(e, dtype=np.float64).ravel() for e in embeddings])
+        else:
+            X = np.zeros((0, 0))
+        self.context = context
+        self.n = len(X)
+        self.distances = self._distances(X)
+
+    def _distances(self, X: np.ndarray) -> np.ndarray:
+        """(n, context): cosine distance of word i to the sum of the k preceding words (NaN where i < k)."""
+        D = np.full((self.n, self.context), np.nan)
+        if self.n < 2:
+            return D
+        c = min(self.context, self.n - 1)
+        # lag[l][i] = X[i] . X[i-l]: the only (n, dim) passes; everything below is O(n * context^2)
+        lag = [np.full(self.n, np.nan) for _ in range(c + 1)]
+        for l in range(c + 1):
+            lag[l][l:] = np.einsum('ij,ij->i', X[l:], X[:self.n - l])
+
+        dots = np.zeros(self.n)  # X[i] . (X[i-1] + ... + X[i-k])
+        sq = np.zeros(self.n)  # |X[i-1] + ... + X[i-k]|^2
+        # Zero-norm or NaN vectors give NaN distances, which never exceed a threshold (as with scipy)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for k in range(1, c + 1):
+                dots[k:] += lag[k][k:]
+                # Adding X[i-k] to the window adds |X[i-k]|^2 + 2 X[i-k] . (X[i-1] + ... + X[i-k+1])
+                sq[k:] += lag[0][:self.n - k]
+                for a in range(1, k):
+                    sq[k:] += 2 * lag[k - a][k - a:self.n - a]
+                D[k:, k - 1] = 1.0 - dots[k:] / np.sqrt(sq[k:] * lag[0][k:])
+        return D
+
+    def boundaries(self, threshold: float) -> np.ndarray:
+        """Indices of the words that start a new segment (word 0 excluded)."""
+        above = self.distances > threshold
+        full = np.flatnonzero(above[:, self.context - 1]) if self.n else np.zeros(0, dtype=int)
+        found = []
+        start = 0
+        while True:
+            # The first context-1 words after `start` see only the words since the boundary
+            nxt = None
+            for k in range(1, self.context):
+                i = start + k
+                if i >= self.n:
+                    return np.asarray(found, dtype=int)
+                if above[i, k - 1]:
+                    nxt = i
+                    break
+            if nxt is None:
+                j = np.searchsorted(full, start + self.context)
+                if j == len(full):
+                    break
+                nxt = int(full[j])
+            found.append(nxt)
+            start = nxt
+        return np.asarray(found, dtype=int)
+
+    def boundary_sets(self, thresholds: Sequence[float]) -> Dict[float, np.ndarray]:
+        """{threshold: boundaries} for a sweep, from the same distances."""
+        return {threshold: self.boundaries(threshold) for threshold in thresholds}
+
+    def tested_distances(self, boundaries: Sequence[int]) -> np.ndarray:
+        """Distance each word was compared with the threshold at, given the boundaries (NaN for word 0)."""
+        starts = np.zeros(self.n, dtype=int)
+        starts[np.asarray(boundaries, dtype=int)] = np.asarray(boundaries, dtype=int)
+        starts = np.maximum.accumulate(starts)
+        k = np.minimum(np.arange(self.n) - starts, self.context)
+        out = np.full(self.n, np.nan)
+        rows = np.flatnonzero(k > 0)
+        out[rows] = self.distances[rows, k[rows] - 1]
+        # A word that starts a segment was tested against the previous segment's context
+        for b in boundaries:
+            prev = starts[b - 1]
+            out[b] = self.distances[b, min(b - prev, self.context) - 1]
+        return out
+
+
+def segments_from_boundaries(words: Sequence[Any], boundaries: Sequence[int]) -> List[Dict[str, Any]]:
+    """Segment dicts for `words` (objects with .word, .start, .end) split before each boundary index."""
+    if not len(words):
+        return []
+    edges = [0] + [int(b) for b in boundaries] + [len(words)]
+    segments = []
+    for lo, hi in zip(edges, edges[1:]):
+        segments.append({
+            "start": words[lo].start,
+            "end": words[hi - 1].end,
+            "text": " ".join(w.word for w in words[lo:hi]),
+            "word_count": hi - lo,
+            "word_indices": list(range(lo, hi))
+        })
+    return segments
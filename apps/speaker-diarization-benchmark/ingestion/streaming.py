@@ -0,0 +1,518 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Live diarization of audio that is still being recorded.
+
+  [Sources] (each yields 1-D float32 chunks at 16 kHz mono)
+  - read_pcm(): A raw PCM pipe, e.g. stdin fed by `ffmpeg ... -f s16le -ac 1 -ar 16000 -`.
+  - follow_file(): A growing .wav (16-bit or float, mono, 16 kHz) or raw .pcm/.raw file, read
+    as it is written until it stops growing for `idle_timeout` seconds.
+  - replay(): A finished clip (or array) paced in real time, or `speed` times faster, for tests
+    and latency measurements.
+
+  [Classes]
+  - SpeakerTracker: Online speaker assignment. Each segment embedding is matched against the
+    enrolled identities (`load_speaker_index()`); embeddings that match nobody join or open an
+    anonymous SPEAKER_xx by running cosine mean. An anonymous speaker whose mean later
+    matches an enrolled identity is reported under that name from then on.
+  - StreamingDiarizer: Buffers incoming audio. Every `chunk_seconds` it transcribes the
+    uncommitted audio plus `context` seconds before it, and commits the words whose midpoint
+    falls before `now - holdback`. Each committed transcript segment is then embedded and
+    assigned a speaker. Segments are final once emitted. Latency is bounded by
+    chunk_seconds + holdback + processing time, and memory by the uncommitted audio.
+
+  [Functions]
+  - stream_audio(): `audio_ingestion.py stream` entry point. Writes one JSON segment per line,
+    then stores the segments with `update_manifest` (same schema as the batch workflows).
+
+  [How to run/invoke it]
+  - `ffmpeg -f avfoundation -i ":0" -f s16le -ac 1 -ar 16000 - | uv run audio_ingestion.py stream - --clip-id live.wav`
+  - `uv run audio_ingestion.py stream data/clips/recording.wav`  # growing file
+  - `uv run audio_ingestion.py stream data/clips/clip.wav --replay --speed 1`  # replay a sample
+  - `for seg in StreamingDiarizer(transcribe_fn, embed_fn).run(chunks): ...`
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/streaming.py
+
+WHY:
+  `diarize` only works on a finished clip (transcribe, embed, then cluster everything). Live
+  podcast recording needs speaker-attributed text while the episode is still going.
+"""
+
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ingestion.identity import SpeakerIndex
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+PCM_FORMATS = {"s16le": np.int16, "f32le": np.float32}
+
+# transcribe_fn(samples) -> transcript segments (`transcribe.Segment`) in window-relative seconds
+TranscribeFn = Callable[[np.ndarray], List[Any]]
+# embed_fn(samples) -> 1-D embedding (NaN or None when the audio could not be embedded)
+EmbedFn = Callable[[np.ndarray], Optional[np.ndarray]]
+
+
+# --------------------------------------------------------------------------- sources
+
+def _decode_pcm(data: bytes, fmt: str) -> np.ndarray:
+    samples = np.frombuffer(data, dtype=PCM_FORMATS[fmt])
+    if fmt == "s16le":
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32)
+
+
+def read_pcm(stream: BinaryIO,
+             chunk_seconds: float = 1.0,
+             sample_rate: int = SAMPLE_RATE,
+             fmt: str = "s16le") -> Iterator[np.ndarray]:
+    """Chunks of mono PCM read from a binary stream (pipe or file) until EOF."""
+    width = np.dtype(PCM_FORMATS[fmt]).itemsize
+    size = max(1, int(chunk_seconds * sample_rate)) * width
+    leftover = b""
+    while True:
+        data = stream.read(size)
+        if not data:
+            break
+        data = leftover + data
+        usable = len(data) - len(data) % width
+        leftover = data[usable:]
+        if usable:
+            yield _decode_pcm(data[:usable], fmt)
+
+
+def _wav_header(f: BinaryIO, sample_rate: int) -> Optional[Tuple[int, str]]:
+    """(offset of the sample data, pcm format) of a WAV file, or None if the header is not written yet."""
+    f.seek(0)
+    head = f.read(12)
+    if len(head) < 12:
+        return None
+    if head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return f.tell(), fmt
+        body = f.read(chunk_size + chunk_size % 2)
+        if len(body) < chunk_size:
+            return None
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if channels != 1 or rate != sample_rate:
+                raise ValueError(f"Streaming needs mono {sample_rate} Hz audio, got {channels} ch at {rate} Hz "
+                                 f"(resample with `ffmpeg -ac 1 -ar {sample_rate}`)")
+            if (tag, bits) == (1, 16):
+                fmt = "s16le"
+            elif (tag, bits) == (3, 32):
+                fmt = "f32le"
+            else:
+                raise ValueError(f"Unsupported WAV encoding (format {tag}, {bits} bits); use 16-bit PCM or 32-bit float")
+
+
+def follow_file(path: Union[str, Path],
+                chunk_seconds: float = 1.0,
+                sample_rate: int = SAMPLE_RATE,
+                fmt: str = "s16le",
+                poll_interval: float = 0.25,
+                idle_timeout: float = 10.0) -> Iterator[np.ndarray]:
+    """
+    Chunks of a file that is still being written, like `tail -f`.
+
+    .wav files are parsed for their sample format (the header's data size is ignored, since
+    recorders only fill it in when they finish); other files are read as raw `fmt` PCM.
+    Stops once the file has not grown for `idle_timeout` seconds.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        offset = 0
+        if path.suffix.lower() == ".wav":
+            waited = 0.0
+            header = _wav_header(f, sample_rate)
+            while header is None:
+                if waited >= idle_timeout:
+                    return
+                time.sleep(poll_interval)
+                waited += poll_interval
+                header = _wav_header(f, sample_rate)
+            offset, fmt = header
+        f.seek(offset)
+
+        width = np.dtype(PCM_FORMATS[fmt]).itemsize
+        size = max(1, int(chunk_seconds * sample_rate)) * width
+        leftover = b""
+        idle = 0.0
+        while True:
+            data = f.read(size)
+            if not data:
+                if idle >= idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                idle += poll_interval
+                continue
+            idle = 0.0
+            data = leftover + data
+            usable = len(data) - len(data) % width
+            leftover = data[usable:]
+            if usable:
+                yield _decode_pcm(data[:usable], fmt)
+
+
+def replay(audio: Union[str, Path, np.ndarray],
+           chunk_seconds: float = 1.0,
+           speed: Optional[float] = 1.0,
+           sample_rate: int = SAMPLE_RATE) -> Iterator[np.ndarray]:
+    """
+    Chunks of a finished clip, each released when it would have been recorded.
+
+    `speed` > 1 replays faster than real time; None releases chunks as fast as they are consumed.
+    """
+    if not isinstance(audio, np.ndarray):
+        from ingestion.audio_cache import get_audio_cache
+
+        audio = get_audio_cache().load(Path(audio), sample_rate)
+    size = max(1, int(chunk_seconds * sample_rate))
+    started = time.monotonic()
+    for pos in range(0, len(audio), size):
+        chunk = audio[pos:pos + size]
+        if speed:
+            due = started + (pos + len(chunk)) / sample_rate / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        yield np.asarray(chunk, dtype=np.float32)
+
+
+# --------------------------------------------------------------------------- speakers
+
+class SpeakerTracker:
+    def __init__(self,
+                 index: Optional[SpeakerIndex] = None,
+                 id_threshold: float = 0.4,
+                 cluster_threshold: float = 0.5,
+                 max_speakers: int = 64,
+                 match_mode: str = "prototype"):
+        """
+        Args:
+            index: Enrolled identities; None or empty for anonymous speakers only.
+            id_threshold: Distance below which an embedding is given an enrolled name.
+            cluster_threshold: Cosine distance below which an embedding joins an anonymous speaker.
+            max_speakers: Cap on anonymous speakers; beyond it embeddings join the closest one.
+            match_mode: SpeakerIndex matching mode ("prototype" or "nearest").
+        """
+        self.index = index
+        self.id_threshold = id_threshold
+        self.cluster_threshold = cluster_threshold
+        self.max_speakers = max_speakers
+        self.match_mode = match_mode
+        self.sums: List[np.ndarray] = []
+        self.names: List[str] = []
+
+    def _identify(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        if self.index is None or len(self.index) == 0:
+            return None, float("inf")
+        return self.index.identify(vector, mode=self.match_mode)[0]
+
+    def assign(self, embedding: Optional[np.ndarray]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """(speaker name, match_info) for one segment embedding."""
+        if embedding is None or not np.all(np.isfinite(embedding)) or not np.any(embedding):
+            return "UNKNOWN", None
+        x = np.asarray(embedding, dtype=np.float64).ravel()
+        x = x / np.linalg.norm(x)
+
+        name, dist = self._identify(x)
+        match_info = None
+        if self.index is not None and len(self.index):
+            match_info = {"best_match": name or "None", "distance": dist}
+        if name and dist < self.id_threshold:
+            return name, match_info
+
+        j = None
+        if self.sums:
+            means = np.vstack(self.sums)
+            means = means / np.linalg.norm(means, axis=1, keepdims=True)
+            distances = 1.0 - means @ x
+            closest = int(distances.argmin())
+            if distances[closest] <= self.cluster_threshold or len(self.sums) >= self.max_speakers:
+                j = closest
+        if j is None:
+            self.sums.append(x.copy())
+            self.names.append(f"SPEAKER_{len(self.names):02d}")
+            j = len(self.sums) - 1
+        else:
+            self.sums[j] += x
+            # An anonymous speaker whose running mean matches an enrolled identity takes its name
+            if self.names[j].startswith("SPEAKER_"):
+                mean_name, mean_dist = self._identify(self.sums[j])
+                if mean_name and mean_dist < self.id_threshold:
+                    logger.info(f"{self.names[j]} identified as {mean_name} (distance {mean_dist:.3f}).")
+                    self.names[j] = mean_name
+        return self.names[j], match_info
+
+
+# --------------------------------------------------------------------------- diarizer
+
+class StreamingDiarizer:
+    def __init__(self,
+                 transcribe_fn: TranscribeFn,
+                 embed_fn: EmbedFn,
+                 tracker: Optional[SpeakerTracker] = None,
+                 sample_rate: int = SAMPLE_RATE,
+                 chunk_seconds: float = 5.0,
+                 context: float = 2.0,
+                 holdback: float = 1.0,
+                 min_embed_duration: float = 1.0):
+        """
+        Args:
+            transcribe_fn: Transcribes a window of samples; timestamps relative to the window.
+            embed_fn: Speaker embedding of a span of samples.
+            tracker: Speaker assignment (default: anonymous speakers only).
+            chunk_seconds: New audio between transcription passes.
+            context: Already-committed audio re-transcribed before the new audio.
+            holdback: Words ending this close to the live edge wait for the next pass.
+            min_embed_duration: Short segments are embedded over at least this much audio.
+        """
+        self.transcribe_fn = transcribe_fn
+        self.embed_fn = embed_fn
+        self.tracker = tracker or SpeakerTracker()
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_seconds
+        self.context = context
+        self.holdback = holdback
+        self.min_embed_duration = min_embed_duration
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # sample index of _buffer[0]
+        self._received = 0  # samples received so far
+        self._pending = 0  # samples received since the last pass
+        self._committed = 0.0  # seconds; words before this have been emitted
+        self._last_word = None
+        self.segments: List[Dict[str, Any]] = []
+        self.stats: Dict[str, float] = {'transcription_time': 0.0, 'embedding_time': 0.0, 'identification_time': 0.0}
+
+    @property
+    def position(self) -> float:
+        """Seconds of audio received so far."""
+        return self._received / self.sample_rate
+
+    def feed(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        """Adds audio; returns the segments that became final."""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._received += len(samples)
+        self._pending += len(samples)
+        if self._pending < self.chunk_seconds * self.sample_rate:
+            return []
+        return self._process(final=False)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Commits everything received (end of stream)."""
+        if self._received / self.sample_rate <= self._committed:
+            return []
+        return self._process(final=True)
+
+    def run(self, chunks: Iterable[np.ndarray]) -> Iterator[Dict[str, Any]]:
+        """Final segments as the chunks arrive, then the remainder at end of stream."""
+        latencies = []
+        arrivals = deque()  # (stream seconds, wall time) per received chunk
+        start = time.time()
+        for chunk in chunks:
+            arrivals.append((self.position + len(chunk) / self.sample_rate, time.time()))
+            new = self.feed(chunk)
+            for seg in new:
+                latencies.append(self._latency(seg, arrivals))
+                yield seg
+        for seg in self.flush():
+            latencies.append(self._latency(seg, arrivals))
+            yield seg
+
+        self.stats['audio_duration'] = self.position
+        self.stats['total_time'] = time.time() - start
+        if latencies:
+            self.stats['mean_latency'] = float(np.mean(latencies))
+            self.stats['max_latency'] = float(np.max(latencies))
+
+    @staticmethod
+    def _latency(seg: Dict[str, Any], arrivals: deque) -> float:
+        """Wall seconds between the arrival of a segment's last audio and its emission."""
+        # Arrivals are monotonic; older entries are no longer needed once a later segment is past them
+        while len(arrivals) > 1 and arrivals[1][0] < seg['end']:
+            arrivals.popleft()
+        for position, wall in arrivals:
+            if position >= seg['end']:
+                return time.time() - wall
+        return 0.0
+
+    def _window(self, start: float, end: float) -> np.ndarray:
+        """Buffered samples in [start, end) seconds."""
+        s = max(int(start * self.sample_rate) - self._buffer_start, 0)
+        e = max(int(end * self.sample_rate) - self._buffer_start, s)
+        return self._buffer[s:e]
+
+    def _process(self, final: bool) -> List[Dict[str, Any]]:
+        self._pending = 0
+        now = self.position
+        cut = now if final else max(self._committed, now - self.holdback)
+        window_start = max(self._buffer_start / self.sample_rate, self._committed - self.context)
+
+        start_time = time.time()
+        transcript = self.transcribe_fn(self._window(window_start, now))
+        self.stats['transcription_time'] += time.time() - start_time
+
+        # Words whose midpoint is in [committed, cut), in absolute time, grouped by transcript segment
+        groups = []
+        for seg in transcript:
+            kept = []
+            for w in seg.words:
+                start, end = w.start + window_start, w.end + window_start
+                mid = start + (end - start) / 2
+                if not (self._committed <= mid < cut):
+                    continue
+                # Drop a word that repeats the previous emitted word over the same time (window jitter)
+                prev = self._last_word
+                if prev is not None and start < prev[1] and w.word.strip().lower() == prev[2]:
+                    continue
+                kept.append((start, end, w.word))
+                self._last_word = (start, end, w.word.strip().lower())
+            if kept:
+                groups.append(kept)
+
+        emitted = []
+        for words in groups:
+            seg_start, seg_end = words[0][0], words[-1][1]
+            pad = max(0.0, self.min_embed_duration - (seg_end - seg_start)) / 2
+            start_time = time.time()
+            try:
+                embedding = self.embed_fn(self._window(seg_start - pad, seg_end + pad))
+            except Exception as e:
+                logger.debug(f"Embedding failed for [{seg_start:.2f} - {seg_end:.2f}]: {e}")
+                embedding = None
+            self.stats['embedding_time'] += time.time() - start_time
+
+            start_time = time.time()
+            speaker, match_info = self.tracker.assign(embedding)
+            self.stats['identification_time'] += time.time() - start_time
+
+            segment = {
+                "start": seg_start,
+                "end": seg_end,
+                "text": "".join(w[2] for w in words).strip(),
+                "speaker": speaker,
+                "word_count": len(words),
+            }
+            if match_info is not None:
+                segment["match_info"] = match_info
+            emitted.append(segment)
+
+        self._committed = cut
+        # Keep `context` seconds of committed audio (plus padding for short embeddings)
+        keep_from = max(0, int((cut - self.context - self.min_embed_duration) * self.sample_rate))
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+        self.segments.extend(emitted)
+        return emitted
+
+
+# --------------------------------------------------------------------------- defaults
+
+def make_transcriber(backend: str = "mlx") -> TranscribeFn:
+    """transcribe_fn running one of `transcribe.BACKENDS` on in-memory windows."""
+    from transcribe import BACKENDS, _parse_segments
+
+    def transcribe_fn(samples: np.ndarray):
+        if len(samples) == 0:
+            return []
+        return _parse_segments(BACKENDS[backend](samples, os.cpu_count() or 1))
+
+    return transcribe_fn
+
+
+def make_embedder(registry=None, sample_rate: int = SAMPLE_RATE) -> EmbedFn:
+    """embed_fn running pyannote/embedding on a span, like the word-level workflow."""
+    import torch
+    from pyannote.audio import Inference
+    from ingestion.models import load_pyannote_model
+
+    model = load_pyannote_model("pyannote/embedding", token=os.getenv("HF_TOKEN"), registry=registry)
+    if model is None:
+        raise RuntimeError("Failed to load pyannote/embedding. Check HF_TOKEN.")
+    inference = Inference(model, window="whole")
+
+    def embed_fn(samples: np.ndarray):
+        waveform = torch.from_numpy(np.ascontiguousarray(samples)).unsqueeze(0)
+        return np.asarray(inference({"waveform": waveform, "sample_rate": sample_rate}))
+
+    return embed_fn
+
+
+def stream_audio(config):
+    """Runs `audio_ingestion.py stream` for a StreamConfig."""
+    from ingestion.identity import load_speaker_index
+    from ingestion.manifest import update_manifest
+
+    if config.source == "-":
+        chunks = read_pcm(sys.stdin.buffer, config.chunk_seconds / 5, fmt=config.pcm_format)
+    elif config.replay:
+        chunks = replay(config.source, config.chunk_seconds / 5, speed=config.speed or None)
+    else:
+        chunks = follow_file(config.source, config.chunk_seconds / 5, fmt=config.pcm_format,
+                             idle_timeout=config.idle_timeout)
+
+    tracker = SpeakerTracker(load_speaker_index(), id_threshold=config.id_threshold,
+                             cluster_threshold=config.cluster_threshold, max_speakers=config.max_speakers)
+    diarizer = StreamingDiarizer(make_transcriber(config.backend), make_embedder(), tracker,
+                                 chunk_seconds=config.chunk_seconds, context=config.context,
+                                 holdback=config.holdback)
+
+    out = open(config.output, "a") if config.output else sys.stdout
+    try:
+        for seg in diarizer.run(chunks):
+            out.write(json.dumps(seg) + "\n")
+            out.flush()
+    finally:
+        if config.output:
+            out.close()
+
+    stats = diarizer.stats
+    logger.info(f"Streamed {stats['audio_duration']:.1f}s into {len(diarizer.segments)} segments "
+                f"(transcription {stats['transcription_time']:.2f}s, embedding {stats['embedding_time']:.2f}s, "
+                f"latency mean {stats.get('mean_latency', 0):.2f}s max {stats.get('max_latency', 0):.2f}s).")
+
+    clip_id = config.clip_id or (None if config.source == "-" else Path(config.source).name)
+    if config.dry_run or not clip_id:
+        logger.info("Skipping manifest update.")
+        return diarizer.segments
+    try:
+        update_manifest(
+            clip_path=Path(clip_id),
+            workflow_name="streaming",
+            segments=diarizer.segments,
+            transcription_text=" ".join(seg['text'] for seg in diarizer.segments)
+        )
+    except Exception as e:
+        logger.error(f"Failed to update manifest: {e}")
+    return diarizer.segments
@@ -0,0 +1,267 @@
+"""
+WHO:
+  Antigravity
+  (Context: Audio Ingestion System)
+
+WHAT:
+  Content-addressed cache of `TranscriptionResult`s.
+
+  [Classes]
+  - TranscriptionCache: Entries keyed by sha256(audio bytes) + model name + decode options,
+    stored as columnar `.npz` files and evicted least-recently-used beyond a size cap.
+
+  [Functions]
+  - get_transcription_cache(): The process-wide cache at data/cache/transcriptions.
+  - encode_result() / decode_result(): `TranscriptionResult` <-> flat numpy columns.
+
+  [Encoding]
+  - One float64 column per timestamp field (segment start/end, word start/end/probability),
+    UTF-8 text blobs with int64 offsets, and per-segment word counts. Loading builds the
+    pydantic models with `model_construct`, skipping per-word validation.
+
+  [Configuration]
+  - TRANSCRIPTION_CACHE_MAX_MB: Size cap for the cache directory (default 512).
+
+  [How to run/invoke it]
+  - `cache = get_transcription_cache()`
+  - `result = cache.get_or_transcribe(clip_path, transcribe)`
+  - `stats.update(cache.stats())`  # transcription_cache_hits / transcription_cache_misses
+
+WHEN:
+  2026-10-16
+
+WHERE:
+  apps/speaker-diarization-benchmark/ingestion/transcription_cache.py
+
+WHY:
+  audio_ingestion.py, benchmark_baseline.py and benchmark_word_level.py each had their own
+  cache keyed by file name, so a re-cut clip with the same name returned stale words, and
+  loading pretty-printed JSON re-validated every `Word`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from transcribe import DECODE_OPTIONS, MODEL_NAME, Segment, TranscriptionResult, Word
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / "data/cache/transcriptions"
+FORMAT_VERSION = 1
+
+
+def hash_audio(path: Path, chunk_size: int = 1 << 20) -> str:
+    """sha256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def encode_result(result: TranscriptionResult) -> Dict[str, np.ndarray]:
+    """Flattens a TranscriptionResult into numpy columns."""
+    segments = result.segments
+    words = [w for seg in segments for w in seg.words]
+
+    seg_text, seg_text_offsets = _pack_strings([seg.text for seg in segments])
+    # None speakers are stored as "" plus a mask
+    seg_speaker, seg_speaker_offsets = _pack_strings([seg.speaker or "" for seg in segments])
+    word_text, word_text_offsets = _pack_strings([w.word for w in words])
+    meta, _ = _pack_strings([json.dumps({'text': result.text, 'language': result.language,
+                                         'version': FORMAT_VERSION})])
+
+    return {
+        'meta': meta,
+        'seg_start': np.array([seg.start for seg in segments], dtype=np.float64),
+        'seg_end': np.array([seg.end for seg in segments], dtype=np.float64),
+        'seg_text': seg_text,
+        'seg_text_offsets': seg_text_offsets,
+        'seg_speaker': seg_speaker,
+        'seg_speaker_offsets': seg_speaker_offsets,
+        'seg_speaker_none': np.array([seg.speaker is None for seg in segments], dtype=bool),
+        'seg_word_counts': np.array([len(seg.words) for seg in segments], dtype=np.int64),
+        'word_start': np.array([w.start for w in words], dtype=np.float64),
+        'word_end': np.array([w.end for w in words], dtype=np.float64),
+        'word_probability': np.array([w.probability for w in words], dtype=np.float64),
+        'word_text': word_text,
+        'word_text_offsets': word_text_offsets,
+    }
+
+
+def decode_result(columns: Dict[str, np.ndarray]) -> TranscriptionResult:
+    """Rebuilds a TranscriptionResult from `encode_result` columns without re-validation."""
+    meta = json.loads(columns['meta'].tobytes().decode('utf-8'))
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported transcription cache format: {meta.get('version')}")
+
+    word_texts = _unpack_strings(columns['word_text'], columns['word_text_offsets'])
+    words = [
+        Word.model_construct(word=text, start=start, end=end, probability=prob)
+        for text, start, end, prob in zip(word_texts,
+                                          columns['word_start'].tolist(),
+                                          columns['word_end'].tolist(),
+                                          columns['word_probability'].tolist())
+    ]
+
+    seg_texts = _unpack_strings(columns['seg_text'], columns['seg_text_offsets'])
+    speakers = _unpack_strings(columns['seg_speaker'], columns['seg_speaker_offsets'])
+    bounds = np.concatenate([[0], np.cumsum(columns['seg_word_counts'])]).tolist()
+    segments = [
+        Segment.model_construct(start=start, end=end, text=text,
+                                words=words[bounds[i]:bounds[i + 1]],
+                                speaker=None if is_none else speaker)
+        for i, (start, end, text, speaker, is_none) in enumerate(zip(columns['seg_start'].tolist(),
+                                                                     columns['seg_end'].tolist(),
+                                                                     seg_texts,
+                                                                     speakers,
+                                                                     columns['seg_speaker_none'].tolist()))
+    ]
+    return TranscriptionResult.model_construct(text=meta['text'], segments=segments, language=meta['language'])
+
+
+class TranscriptionCache:
+    def __init__(self,
+                 cache_dir: Path = DEFAULT_CACHE_DIR,
+                 max_bytes: Optional[int] = 512 * 10**6,
+                 model_name: str = MODEL_NAME,
+                 options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            cache_dir: Directory holding `<key>.npz` entries.
+            max_bytes: Total size cap; least-recently-used entries are removed beyond it.
+            model_name / options: Default model and decode options that key entries.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.model_name = model_name
+        self.options = dict(DECODE_OPTIONS if options is None else options)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> content hash, so repeated lookups don't re-read the file
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def key(self, audio_path: Path, model_name: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
+        audio_path = Path(audio_path)
+        st = audio_path.stat()
+        memo_key = (str(audio_path.resolve()), st.st_size, st.st_mtime_ns)
+        content_hash = self._hashes.get(memo_key)
+        if content_hash is None:
+            content_hash = self._hashes[memo_key] = hash_audio(audio_path)
+
+        identity = json.dumps({
+            'audio': content_hash,
+            'model': model_name or self.model_name,
+            'options': self.options if options is None else options,
+        }, sort_keys=True)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npz"
+
+    def get(self, audio_path: Path, model_name: Optional[str] = None,
+            options: Optional[Dict[str, Any]] = None) -> Optional[TranscriptionResult]:
+        path = self._path(self.key(audio_path, model_name, options))
+        result = None
+        if path.exists():
+            try:
+                with np.load(path) as data:
+                    result = decode_result(dict(data))
+                # Mark as recently used for LRU eviction
+                os.utime(path)
+            except Exception as e:
+                logger.warning(f"Failed to load cached transcription {path.name}: {e}")
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if result is not None:
+            logger.info(f"Loaded transcription for {Path(audio_path).name} from cache ({path.name}).")
+        return result
+
+    def put(self, audio_path: Path, result: TranscriptionResult, model_name: Optional[str] = None,
+            options: Optional[Dict[str, Any]] = None) -> Path:
+        path = self._path(self.key(audio_path, model_name, options))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".npz")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **encode_result(result))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Saved transcription for {Path(audio_path).name} to cache ({path.name}).")
+        self.evict()
+        return path
+
+    def get_or_transcribe(self, audio_path: Path, transcribe_fn: Callable[[str], TranscriptionResult],
+                          model_name: Optional[str] = None,
+                          options: Optional[Dict[str, Any]] = None) -> TranscriptionResult:
+        """Cached result for the audio, or `transcribe_fn(str(audio_path))` stored in the cache."""
+        result = self.get(audio_path, model_name, options)
+        if result is None:
+            result = transcribe_fn(str(audio_path))
+            self.put(audio_path, result, model_name, options)
+        return result
+
+    def evict(self):
+        """Removes least-recently-used entries until the cache is within `max_bytes`."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                logger.info(f"Evicted cached transcription {path.name}.")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters in the shape used by workflow `run()` stats."""
+        return {'transcription_cache_hits': self.hits, 'transcription_cache_misses': self.misses}
+
+
+_cache: Optional[TranscriptionCache] = None
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    global _cache
+    if _cache is None:
+        max_mb = os.getenv("TRANSCRIPTION_CACHE_MAX_MB")
+        _cache = TranscriptionCache(max_bytes=int(float(max_mb) * 1e6) if max_mb else 512 * 10**6)
+    return _cache
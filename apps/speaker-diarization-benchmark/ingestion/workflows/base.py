@@ -6,22 +6,44 @@ WHO:
 WHAT:
   Abstract Base Class for Diarization Workflows.
 
+  [Classes]
+  - Workflow: Common interface (`run`) for all diarization workflows.
+  - StagedWorkflow: Workflow split into explicit stages
+    (embed -> cluster -> identify -> assemble) that hand typed artifacts to each other.
+  - EmbeddingArtifact, ClusterArtifact, IdentityArtifact: The artifacts passed between stages.
+
 WHEN:
   2025-12-03
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Added `StagedWorkflow` and stage artifacts.
+  - 2026-10-16: Added `registry` attribute for shared warm models.
+  - 2026-10-16: An embed artifact with no rows is assembled unlabelled instead of dropped.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/base.py
 
 WHY:
   To define a common interface for all diarization workflows.
+  Stages let a subclass override only the step it changes (e.g. identification) and reuse
+  the upstream embeddings and cluster labels instead of recomputing them.
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+
+import numpy as np
+
 from ..config import WorkflowConfig
 
 class Workflow(ABC):
+    # Model registry to load models from; `get_workflow` may inject one,
+    # otherwise the process-wide registry (ingestion.models.get_registry) is used.
+    registry: Optional[Any] = None
+
     def __init__(self, config: WorkflowConfig):
         self.config = config
 
@@ -40,3 +62,83 @@ class Workflow(ABC):
             - Dictionary of timing statistics
         """
         pass
+
+
+@dataclass
+class EmbeddingArtifact:
+    """Output of the embed stage: one embedding row per item in `indices`."""
+    items: List[Any]
+    embeddings: np.ndarray
+    indices: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ClusterArtifact:
+    """Output of the cluster stage: one cluster label per embedding row."""
+    embeddings: EmbeddingArtifact
+    labels: np.ndarray
+
+    def centroids(self) -> Dict[int, np.ndarray]:
+        X = self.embeddings.embeddings
+        return {int(label): np.mean(X[self.labels == label], axis=0) for label in np.unique(self.labels)}
+
+
+@dataclass
+class IdentityArtifact:
+    """Output of the identify stage: a speaker name per cluster label."""
+    clusters: ClusterArtifact
+    names: Dict[int, str]
+    match_info: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
+class StagedWorkflow(Workflow):
+    """
+    A workflow run as embed -> cluster -> identify -> assemble.
+
+    Each stage receives the artifact of the previous one, so subclasses override only the
+    stage they change. `embed` returns None when there is nothing to diarize; an artifact
+    with no embedded rows skips clustering and identification and goes straight to `assemble`.
+    Stage timings are reported as `embedding_time`, `clustering_time` and
+    `identification_time` (plus any extra keys a stage adds to `stats`).
+    """
+
+    @abstractmethod
+    def embed(self, clip_path: Path, transcription_result: Any, stats: Dict[str, float]) -> Optional[EmbeddingArtifact]:
+        pass
+
+    @abstractmethod
+    def cluster(self, embedded: EmbeddingArtifact, stats: Dict[str, float]) -> ClusterArtifact:
+        pass
+
+    def identify(self, clusters: ClusterArtifact, stats: Dict[str, float]) -> IdentityArtifact:
+        """Default identification: generic SPEAKER_XX labels."""
+        names = {int(label): f"SPEAKER_{int(label):02d}" for label in np.unique(clusters.labels)}
+        return IdentityArtifact(clusters=clusters, names=names)
+
+    @abstractmethod
+    def assemble(self, identities: IdentityArtifact, stats: Dict[str, float]) -> List[Dict[str, Any]]:
+        pass
+
+    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        stats = {'embedding_time': 0, 'segmentation_time': 0, 'clustering_time': 0, 'identification_time': 0}
+
+        start_time = time.time()
+        embedded = self.embed(clip_path, transcription_result, stats)
+        if not stats['embedding_time']:
+            stats['embedding_time'] = time.time() - start_time
+        if embedded is None:
+            return [], stats
+        if len(embedded.indices) == 0:
+            # Nothing to cluster: assemble the items with no speaker labels
+            clusters = ClusterArtifact(embeddings=embedded, labels=np.empty(0, dtype=int))
+            return self.assemble(IdentityArtifact(clusters=clusters, names={}), stats), stats
+
+        start_time = time.time()
+        clusters = self.cluster(embedded, stats)
+        stats['clustering_time'] = time.time() - start_time
+
+        start_time = time.time()
+        identities = self.identify(clusters, stats)
+        stats['identification_time'] = time.time() - start_time
+
+        return self.assemble(identities, stats), stats
@@ -9,6 +9,9 @@ WHAT:
 
 WHEN:
   2025-12-04
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Segmentation model comes from the shared model registry.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/local/overlapped_speech.py
@@ -35,11 +38,10 @@ class OverlappedSpeechDetectionWorkflow(Workflow):
         start_time = time.time()
         
         try:
-            import torch
             import numpy as np
-            from pyannote.audio import Model, Inference
+            from pyannote.audio import Inference
             from pyannote.core import Segment, Timeline
-            from ingestion.safe_globals import get_safe_globals
+            from ingestion.models import load_pyannote_model
         except ImportError:
             logger.error("pyannote.audio or dependencies not installed.")
             return [], stats
@@ -47,18 +49,16 @@ class OverlappedSpeechDetectionWorkflow(Workflow):
         try:
             device = "mps" if os.uname().sysname == "Darwin" else "cpu"
             
-            # Load model with safe globals
-            with torch.serialization.safe_globals(get_safe_globals()):
-                model = Model.from_pretrained(
-                    "pyannote/segmentation-3.0",
-                    token=os.getenv("HF_TOKEN")
-                )
+            model = load_pyannote_model(
+                "pyannote/segmentation-3.0",
+                token=os.getenv("HF_TOKEN"),
+                device=device,
+                registry=self.registry,
+            )
             
             if model is None:
                 logger.error("Failed to load pyannote/segmentation-3.0 model. Check HF_TOKEN.")
                 return [], stats
-
-            model.to(torch.device(device))
             
             # Run inference
             # Configure Inference to return chunks (duration=10s, step=0.1s)
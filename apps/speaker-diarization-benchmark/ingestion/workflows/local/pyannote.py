@@ -8,6 +8,10 @@ WHAT:
 
 WHEN:
   2025-12-03
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Pipeline comes from the shared model registry.
+  - 2026-10-16: Word alignment uses `ingestion.alignment` (binary search over turns).
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/pyannote.py
@@ -19,13 +23,15 @@ WHY:
 import os
 import time
 import logging
-import torch
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
-from .base import Workflow
+from ingestion.workflows.base import Workflow
+from ingestion.models import load_pyannote_pipeline
+from ingestion.alignment import TurnIndex, assign_speakers
 
 logger = logging.getLogger(__name__)
 
+class PyannoteWorkflow(Workflow):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.model_name = self.config.get("model_name", "pyannote/speaker-diarization-3.1")
@@ -49,16 +55,10 @@ logger = logging.getLogger(__name__)
         logger.info(f"Loading {self.model_name} pipeline...")
         
         try:
-            from pyannote.audio import Pipeline
-
-            with torch.serialization.safe_globals(get_safe_globals()):
-                try:
-                    pipeline = Pipeline.from_pretrained(self.model_name, use_auth_token=hf_token)
-                except TypeError:
-                    # Fallback for newer versions that might use 'token' or no argument if logged in
-                    pipeline = Pipeline.from_pretrained(self.model_name, token=hf_token)
-            
-            pipeline.to(torch.device("cpu")) # Force CPU for now
+            # Force CPU for now
+            pipeline = load_pyannote_pipeline(self.model_name, token=hf_token, device="cpu", registry=self.registry)
+            if pipeline is None:
+                return [], stats
         except Exception as e:
             logger.error(f"Failed to load pipeline: {e}")
             return [], stats
@@ -116,18 +116,8 @@ logger = logging.getLogger(__name__)
             logger.warning("No words found in transcription.")
             return [], stats
 
-        # Assign speaker to each word
-        word_speakers = []
-        for word in all_words:
-            midpoint = (word.start + word.end) / 2
-            assigned_speaker = "UNKNOWN"
-            
-            # Simple linear search (can be optimized)
-            for start, end, speaker in diar_segments:
-                if start <= midpoint <= end:
-                    assigned_speaker = speaker
-                    break
-            word_speakers.append(assigned_speaker)
+        # Assign speaker to each word (turn containing the word midpoint)
+        word_speakers = assign_speakers(all_words, TurnIndex(diar_segments), method="midpoint")
             
         # Group words into segments
         segments = []
@@ -12,6 +12,15 @@ WHAT:
 
 WHEN:
   2025-12-04
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Segments are embedded through `SpanEmbedder` (single decode, batched forwards).
+  - 2026-10-16: Rebuilt on `StagedWorkflow`; matching/nearest-neighbor override only `identify`
+    and reuse the embeddings and cluster labels instead of re-running them.
+  - 2026-10-16: Embedding model comes from the shared model registry.
+  - 2026-10-16: Identification uses the vectorized speaker identity index.
+  - 2026-10-16: Clustering engine is selectable (`clustering="online"` for bounded memory).
+  - 2026-10-16: Segments whose embeddings are all NaN are returned as UNKNOWN again.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/local/segment_level.py
@@ -21,24 +30,19 @@ WHY:
 """
 
 import os
-import time
 import logging
-import torch
 import numpy as np
-import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional
 from pathlib import Path
-from scipy.spatial.distance import cosine, cdist
-from sklearn.cluster import AgglomerativeClustering
-from pyannote.audio import Model, Inference
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment as PyannoteSegment
-from ingestion.workflows.base import Workflow
-from ingestion.safe_globals import get_safe_globals
+from ingestion.workflows.base import StagedWorkflow, EmbeddingArtifact, ClusterArtifact, IdentityArtifact
+from ingestion.embedding import SpanEmbedder
+from ingestion.models import load_pyannote_model
+from ingestion.identity import load_speaker_index
+from ingestion.clustering import cluster_embeddings
 
 logger = logging.getLogger(__name__)
 
-class SegmentLevelWorkflow(Workflow):
+class SegmentLevelWorkflow(StagedWorkflow):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.threshold = self.config.get("threshold", 0.5)
@@ -48,331 +52,101 @@ class SegmentLevelWorkflow(Workflow):
     def _load_model(self):
         logger.info("Loading embedding model (pyannote/embedding)...")
         try:
-            with torch.serialization.safe_globals(get_safe_globals()):
-                model = Model.from_pretrained("pyannote/embedding", use_auth_token=self.hf_token)
-            
-            inference = Inference(model, window="whole")
-            model.to(torch.device("cpu"))
-            return inference
+            model = load_pyannote_model("pyannote/embedding", token=self.hf_token, registry=self.registry)
+            if model is None:
+                return None
+            return SpanEmbedder(model)
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             return None
 
-    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
-        stats = {'embedding_time': 0, 'segmentation_time': 0, 'clustering_time': 0}
-        
-        inference = self._load_model()
-        if not inference:
-            return [], stats
-
-        audio_io = Audio(sample_rate=16000, mono="downmix")
-        
-        start_time = time.time()
-        embeddings = []
-        valid_indices = []
-        
+    def embed(self, clip_path: Path, transcription_result: Any, stats: Dict[str, float]) -> Optional[EmbeddingArtifact]:
         # transcription_result.segments contains the segments from transcription
         transcription_segments = transcription_result.segments
-        
-        for i, seg in enumerate(transcription_segments):
-            duration = seg.end - seg.start
-            if duration < 0.02:
-                continue
-                
-            try:
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
-                emb = inference({"waveform": waveform, "sample_rate": sr})
-                embeddings.append(emb)
-                valid_indices.append(i)
-            except Exception as e:
-                logger.warning(f"Failed to embed segment {i}: {e}")
-                pass
-                
-        stats['embedding_time'] = time.time() - start_time
-        
-        # Clustering
-        start_time = time.time()
-        
-        if not embeddings:
-            return [], stats
-            
-        X = np.vstack(embeddings)
-        
-        # Filter NaNs
+
+        embedder = self._load_model()
+        if not embedder:
+            return None
+
+        spans = [(seg.start, seg.end) for seg in transcription_segments]
+        result = embedder.embed_spans(clip_path, spans)
+        stats.update(result.stats())
+        if not result.indices:
+            return None
+
+        # Filter NaNs, keeping the map from clean rows back to segment indices.
+        # If every row is NaN the segments still come back, labelled UNKNOWN.
+        X = result.embeddings
         valid_mask = ~np.isnan(X).any(axis=1)
-        X_clean = X[valid_mask]
-        
-        # Map clean indices back to original segment indices
-        clean_to_original_map = []
-        for i, is_valid in enumerate(valid_mask):
-            if is_valid:
-                clean_to_original_map.append(valid_indices[i])
-                
-        if len(X_clean) > 0:
-            clustering = AgglomerativeClustering(
-                n_clusters=None,
-                distance_threshold=self.cluster_threshold,
-                metric='cosine',
-                linkage='average'
-            )
-            labels = clustering.fit_predict(X_clean)
-        else:
-            labels = []
-            
-        stats['clustering_time'] = time.time() - start_time
-        
-        # Assign speakers
-        final_segments = []
+        clean_to_original_map = [idx for idx, is_valid in zip(result.indices, valid_mask) if is_valid]
+
+        return EmbeddingArtifact(
+            items=transcription_segments,
+            embeddings=X[valid_mask],
+            indices=clean_to_original_map,
+        )
+
+    def cluster(self, embedded: EmbeddingArtifact, stats: Dict[str, float]) -> ClusterArtifact:
+        labels = cluster_embeddings(
+            embedded.embeddings,
+            self.cluster_threshold,
+            method=self.config.get("clustering", "agglomerative"),
+            max_clusters=self.config.get("max_clusters", 64)
+        )
+        return ClusterArtifact(embeddings=embedded, labels=labels)
+
+    def assemble(self, identities: IdentityArtifact, stats: Dict[str, float]) -> List[Dict[str, Any]]:
+        embedded = identities.clusters.embeddings
         
         # Initialize all as UNKNOWN
-        for seg in transcription_segments:
-            final_segments.append({
-                "start": seg.start,
-                "end": seg.end,
-                "text": seg.text,
-                "speaker": "UNKNOWN"
-            })
+        final_segments = [
+            {"start": seg.start, "end": seg.end, "text": seg.text, "speaker": "UNKNOWN"}
+            for seg in embedded.items
+        ]
             
         # Update with clustered labels
-        for i, label in enumerate(labels):
-            original_idx = clean_to_original_map[i]
-            final_segments[original_idx]['speaker'] = f"SPEAKER_{label:02d}"
+        for original_idx, label in zip(embedded.indices, identities.clusters.labels):
+            label = int(label)
+            final_segments[original_idx]['speaker'] = identities.names[label]
+            if label in identities.match_info:
+                final_segments[original_idx]['match_info'] = identities.match_info[label]
             
-        return final_segments, stats
+        return final_segments
 
 class SegmentLevelMatchingWorkflow(SegmentLevelWorkflow):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.id_threshold = self.config.get("id_threshold", 0.4)
 
-    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
-        # Run base implementation to get clusters
-        final_segments, stats = super().run(clip_path, transcription_result)
-        
-        # Extract embeddings again? Or refactor base to return them?
-        # Refactoring base is cleaner, but to avoid breaking changes let's just re-implement run 
-        # or better, let's modify base to be more extensible if I could.
-        # But for now, I will just copy-paste the core logic or call a helper.
-        # Actually, I'll just re-implement run to avoid complexity of refactoring base right now.
-        # Wait, I can just copy the logic since I have the code.
-        
-        # Re-run embedding/clustering logic (inefficient but safe)
-        # OR: Refactor base to separate steps.
-        # Let's refactor base slightly to separate steps? No, I'll just duplicate for now to be safe and fast.
-        
-        # Actually, let's just copy the full implementation from benchmark_baseline.py for this class
-        # to ensure it matches exactly what was there.
-        
-        inference = self._load_model()
-        if not inference:
-            return [], stats
+    match_mode = "prototype"
 
-        audio_io = Audio(sample_rate=16000, mono="downmix")
-        
-        start_time = time.time()
-        embeddings = []
-        valid_indices = []
-        
-        transcription_segments = transcription_result.segments
-        
-        for i, seg in enumerate(transcription_segments):
-            duration = seg.end - seg.start
-            if duration < 0.02:
-                continue
-            try:
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
-                emb = inference({"waveform": waveform, "sample_rate": sr})
-                embeddings.append(emb)
-                valid_indices.append(i)
-            except Exception:
-                pass
-                
-        stats['embedding_time'] = time.time() - start_time
-        
-        start_time = time.time()
-        if not embeddings:
-            return [], stats
-            
-        X = np.vstack(embeddings)
-        valid_mask = ~np.isnan(X).any(axis=1)
-        X_clean = X[valid_mask]
-        
-        clean_to_original_map = []
-        for i, is_valid in enumerate(valid_mask):
-            if is_valid:
-                clean_to_original_map.append(valid_indices[i])
-                
-        if len(X_clean) > 0:
-            clustering = AgglomerativeClustering(
-                n_clusters=None,
-                distance_threshold=self.cluster_threshold,
-                metric='cosine',
-                linkage='average'
-            )
-            labels_clean = clustering.fit_predict(X_clean)
-        else:
-            labels_clean = []
-            
-        stats['clustering_time'] = time.time() - start_time
-        
-        # Identification Logic
+    def identify(self, clusters: ClusterArtifact, stats: Dict[str, float]) -> IdentityArtifact:
         logger.info("Starting identification matching...")
-        
-        # Locate DB relative to this file? No, relative to repo root.
-        # Assuming repo root is 4 levels up from here?
-        # apps/speaker-diarization-benchmark/ingestion/workflows/local/segment_level.py -> ... -> apps/speaker-diarization-benchmark/
-        # DB is in apps/speaker-diarization-benchmark/data/speaker_embeddings.json
-        
-        # Let's find the DB path dynamically or hardcode relative to known structure
-        # current file: .../ingestion/workflows/local/segment_level.py
-        # parent: .../ingestion/workflows/local
-        # parent.parent: .../ingestion/workflows
-        # parent.parent.parent: .../ingestion
-        # parent.parent.parent.parent: .../speaker-diarization-benchmark
-        
-        base_dir = Path(__file__).parent.parent.parent.parent
-        db_path = base_dir / "data/speaker_embeddings.json"
-        
-        known_speakers = {}
-        if db_path.exists():
-            with open(db_path, 'r') as f:
-                known_speakers = json.load(f)
-                logger.info(f"Loaded {len(known_speakers)} known speakers from DB.")
-        else:
-            logger.warning(f"Speaker embeddings DB not found at {db_path}")
-            
-        cluster_centroids = {}
-        unique_labels = set(labels_clean) if len(X_clean) > 0 else set()
-        
-        for label in unique_labels:
-            clean_indices = np.where(labels_clean == label)[0]
-            cluster_embs = X_clean[clean_indices]
-            cluster_centroids[label] = np.mean(cluster_embs, axis=0)
+        index = load_speaker_index()
+
+        centroids = clusters.centroids()
+        labels = list(centroids)
+        matches = []
+        if labels:
+            matches = index.identify(
+                np.vstack([centroids[label] for label in labels]),
+                mode=self.match_mode,
+                approximate=self.config.get("approximate_search", False),
+            )
             
         final_labels = {}
         match_details = {}
         
-        for label, centroid in cluster_centroids.items():
-            min_dist = 2.0
-            best_match_name = "None"
+        for label, (best_match_name, min_dist) in zip(labels, matches):
+            match_details[label] = {"best_match": best_match_name or "None", "distance": min_dist}
             
-            for name, known_embs in known_speakers.items():
-                if not known_embs: continue
-                known_proto = np.mean(np.array(known_embs), axis=0)
-                d = cosine(centroid, known_proto)
-                if d < min_dist:
-                    min_dist = d
-                    best_match_name = name
-            
-            match_details[label] = {"best_match": best_match_name, "distance": min_dist}
-            
-            if min_dist < self.id_threshold:
+            if best_match_name and min_dist < self.id_threshold:
                 final_labels[label] = best_match_name
             else:
                 final_labels[label] = f"SPEAKER_{label:02d}"
                 
-        final_segments = []
-        for seg in transcription_segments:
-            final_segments.append({
-                "start": seg.start,
-                "end": seg.end,
-                "text": seg.text,
-                "speaker": "UNKNOWN"
-            })
-            
-        for i, label in enumerate(labels_clean):
-            original_idx = clean_to_original_map[i]
-            final_segments[original_idx]['speaker'] = final_labels[label]
-            if label in match_details:
-                final_segments[original_idx]['match_info'] = match_details[label]
-                
-        return final_segments, stats
+        return IdentityArtifact(clusters=clusters, names=final_labels, match_info=match_details)
 
 class SegmentLevelNearestNeighborWorkflow(SegmentLevelMatchingWorkflow):
-    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
-        # Almost identical to Matching, but uses Nearest Neighbor logic
-        # I'll copy paste and modify the matching loop
-        
-        inference = self._load_model()
-        if not inference:
-            return [], {} # Empty stats
-
-        audio_io = Audio(sample_rate=16000, mono="downmix")
-        start_time = time.time()
-        embeddings = []
-        valid_indices = []
-        transcription_segments = transcription_result.segments
-        
-        for i, seg in enumerate(transcription_segments):
-            duration = seg.end - seg.start
-            if duration < 0.02: continue
-            try:
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
-                emb = inference({"waveform": waveform, "sample_rate": sr})
-                embeddings.append(emb)
-                valid_indices.append(i)
-            except Exception: pass
-            
-        stats = {'embedding_time': time.time() - start_time, 'segmentation_time': 0, 'clustering_time': 0}
-        
-        start_time = time.time()
-        if not embeddings: return [], stats
-        
-        X = np.vstack(embeddings)
-        valid_mask = ~np.isnan(X).any(axis=1)
-        X_clean = X[valid_mask]
-        
-        clean_to_original_map = [valid_indices[i] for i, v in enumerate(valid_mask) if v]
-        
-        if len(X_clean) > 0:
-            clustering = AgglomerativeClustering(n_clusters=None, distance_threshold=self.cluster_threshold, metric='cosine', linkage='average')
-            labels_clean = clustering.fit_predict(X_clean)
-        else:
-            labels_clean = []
-            
-        stats['clustering_time'] = time.time() - start_time
-        
-        # NN Identification
-        base_dir = Path(__file__).parent.parent.parent.parent
-        db_path = base_dir / "data/speaker_embeddings.json"
-        known_speakers = {}
-        if db_path.exists():
-            with open(db_path, 'r') as f: known_speakers = json.load(f)
-            
-        cluster_centroids = {}
-        unique_labels = set(labels_clean) if len(X_clean) > 0 else set()
-        for label in unique_labels:
-            cluster_centroids[label] = np.mean(X_clean[labels_clean == label], axis=0)
-            
-        final_labels = {}
-        match_details = {}
-        
-        for label, centroid in cluster_centroids.items():
-            min_dist = 2.0
-            best_match_name = "None"
-            
-            for name, known_embs in known_speakers.items():
-                if not known_embs: continue
-                known_embs_arr = np.array(known_embs)
-                dists = cdist(centroid.reshape(1, -1), known_embs_arr, metric='cosine')
-                min_d_speaker = np.min(dists)
-                
-                if min_d_speaker < min_dist:
-                    min_dist = min_d_speaker
-                    best_match_name = name
-            
-            match_details[label] = {"best_match": best_match_name, "distance": min_dist}
-            if min_dist < self.id_threshold:
-                final_labels[label] = best_match_name
-            else:
-                final_labels[label] = f"SPEAKER_{label:02d}"
-                
-        final_segments = [{"start": s.start, "end": s.end, "text": s.text, "speaker": "UNKNOWN"} for s in transcription_segments]
-        
-        for i, label in enumerate(labels_clean):
-            original_idx = clean_to_original_map[i]
-            final_segments[original_idx]['speaker'] = final_labels[label]
-            if label in match_details:
-                final_segments[original_idx]['match_info'] = match_details[label]
-                
-        return final_segments, stats
+    # Distance to each known speaker's closest stored embedding rather than its mean
+    match_mode = "nearest"
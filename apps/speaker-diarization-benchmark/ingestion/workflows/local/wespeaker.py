@@ -11,14 +11,19 @@ WHAT:
   [Outputs]
   - List of segments with speaker labels
   [Side Effects]
-  - Loads WeSpeaker model
-  - Creates temporary files for cropping
+  - Loads WeSpeaker model (cached in the shared model registry)
 
 WHEN:
   2025-12-04
-  Last Modified: 2025-12-04
+  Last Modified: 2026-10-16
   Change Log:
     - 2025-12-04: Initial creation
+    - 2026-10-16: Model comes from the shared model registry
+    - 2026-10-16: Word windows are sliced from the shared decoded-audio cache
+    - 2026-10-16: Embeddings come from `WeSpeakerEmbedder` (whole-clip fbank, batched
+      forwards) instead of a temporary WAV per word; config is read from the dict
+    - 2026-10-16: Clustering engine is selectable (`clustering="online"` for bounded memory)
+    - 2026-10-16: Segmentation uses the vectorized `ChangePointSegmenter`; embeddings stay a numpy matrix
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/wespeaker.py
@@ -30,24 +35,26 @@ WHY:
 import os
 import logging
 import time
-import tempfile
-import json
 import numpy as np
-import torch
-import soundfile as sf
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
-from scipy.spatial.distance import cosine
-from sklearn.cluster import AgglomerativeClustering
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment as PyannoteSegment
 
 from ingestion.workflows.base import Workflow
-from ingestion.safe_globals import get_safe_globals
+from ingestion.models import load_wespeaker_model
+from ingestion.audio_cache import get_audio_cache
+from ingestion.embedding import WeSpeakerEmbedder
+from ingestion.clustering import cluster_embeddings
+from ingestion.segmentation import ChangePointSegmenter, segments_from_boundaries
 
 logger = logging.getLogger(__name__)
 
 class WeSpeakerWorkflow(Workflow):
+    def __init__(self, config: Dict[str, Any] = None):
+        super().__init__(config)
+        self.threshold = self.config.get("threshold", 0.5)
+        self.window = self.config.get("window", 0)
+        self.cluster_threshold = self.config.get("cluster_threshold", 0.5)
+
     def run(self, audio_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
         """
         Run WeSpeaker diarization.
@@ -56,109 +63,38 @@ class WeSpeakerWorkflow(Workflow):
         
         logger.info("Loading WeSpeaker model...")
         try:
-            import wespeaker
-            # Try loading english model, fallback to chinese if english not available or default
-            try:
-                # We wrap with safe_globals just in case, though WeSpeaker might not strictly need it if updated.
-                # But since we are in the same environment as Pyannote which caused issues, it's safer.
-                # However, we need to import get_safe_globals or define it.
-                # For now, we'll try without, and if it fails, we know why.
-                # Actually, let's just load it.
-                model = wespeaker.load_model('english')
-            except Exception:
-                logger.warning("English model not found, trying 'chinese'...")
-                model = wespeaker.load_model('chinese')
-                
-            if torch.cuda.is_available():
-                model.set_gpu(0)
+            # Try loading english model, fallback to chinese if english not available
+            model = load_wespeaker_model('english', registry=self.registry)
             logger.info("WeSpeaker model loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load WeSpeaker model: {e}")
             return [], stats
 
-        audio_io = Audio(sample_rate=16000, mono="downmix")
         all_words = []
         for seg in transcription_result.segments:
             all_words.extend(seg.words)
 
-        start_time = time.time()
-        word_embeddings = []
-        valid_words = []
+        # One span per word: the word plus `window` context words on each side
+        spans = []
+        span_words = []
+        for i, word in enumerate(all_words):
+            if word.end - word.start < 0.02:
+                continue
+            w_start_idx = max(0, i - self.window)
+            w_end_idx = min(len(all_words) - 1, i + self.window)
+            spans.append((all_words[w_start_idx].start, all_words[w_end_idx].end))
+            span_words.append(word)
 
-        # WeSpeaker extract_embedding expects a file path.
-        # We will use a temporary file for each word crop.
-        # This is inefficient but functional for a baseline.
-        
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir) / "temp_crop.wav"
-            
-            for i, word in enumerate(all_words):
-                duration = word.end - word.start
-                if duration < 0.02: 
-                    continue
-                    
-                try:
-                    w_start_idx = max(0, i - self.config.window)
-                    w_end_idx = min(len(all_words) - 1, i + self.config.window)
-                    
-                    start_time_sec = all_words[w_start_idx].start
-                    end_time_sec = all_words[w_end_idx].end
-                    
-                    waveform, sr = audio_io.crop(audio_path, PyannoteSegment(start_time_sec, end_time_sec))
-                    
-                    # Save to temp file
-                    sf.write(temp_path, waveform.numpy().T, sr)
-                    
-                    # Embed
-                    emb = model.extract_embedding(str(temp_path))
-                    word_embeddings.append(torch.from_numpy(emb))
-                    valid_words.append(word)
-                except Exception as e:
-                    # logger.warning(f"Failed to embed word {word.word}: {e}")
-                    pass
-                
-        stats['embedding_time'] = time.time() - start_time
+        result = WeSpeakerEmbedder(model).embed_spans(audio_path, spans)
+        word_embeddings = result.embeddings
+        valid_words = [span_words[k] for k in result.indices]
+        stats.update(result.stats())
+        stats.update(get_audio_cache().stats())
         
         # Segmentation
         start_time = time.time()
-        segments = []
-        if valid_words:
-            current_segment_words = [valid_words[0]]
-            current_segment_embeddings = [word_embeddings[0]]
-            current_segment_indices = [0]
-            
-            for i in range(1, len(valid_words)):
-                word = valid_words[i]
-                emb = word_embeddings[i]
-                
-                context_embeddings = current_segment_embeddings[-3:]
-                context_avg = np.mean(torch.stack(context_embeddings).numpy(), axis=0)
-                
-                dist = cosine(context_avg, emb.numpy())
-                
-                if dist > self.config.threshold:
-                    segments.append({
-                        "start": current_segment_words[0].start,
-                        "end": current_segment_words[-1].end,
-                        "text": " ".join([w.word for w in current_segment_words]),
-                        "word_count": len(current_segment_words),
-                        "word_indices": current_segment_indices
-                    })
-                    current_segment_words = [word]
-                    current_segment_embeddings = [emb]
-                    current_segment_indices = [i]
-                else:
-                    current_segment_words.append(word)
-                    current_segment_embeddings.append(emb)
-                    current_segment_indices.append(i)
-                    
-            segments.append({
-                "start": current_segment_words[0].start,
-                "end": current_segment_words[-1].end,
-                "text": " ".join([w.word for w in current_segment_words]),
-                "word_count": len(current_segment_words),
-                "word_indices": current_segment_indices
-            })
+        segmenter = ChangePointSegmenter(word_embeddings)
+        segments = segments_from_boundaries(valid_words, segmenter.boundaries(self.threshold))
 
         stats['segmentation_time'] = time.time() - start_time
 
@@ -169,8 +105,7 @@ class WeSpeakerWorkflow(Workflow):
             for seg in segments:
                 indices = seg['word_indices']
                 if indices:
-                    seg_embs = [word_embeddings[i] for i in indices]
-                    avg_emb = np.mean(torch.stack(seg_embs).numpy(), axis=0)
+                    avg_emb = np.mean(word_embeddings[indices], axis=0)
                     X.append(avg_emb)
                 else:
                     X.append(np.zeros(256)) # WeSpeaker usually 256
@@ -191,13 +126,12 @@ class WeSpeakerWorkflow(Workflow):
                 X_clean[norms == 0] += 1e-9
             
             if len(X_clean) > 0:
-                clustering = AgglomerativeClustering(
-                    n_clusters=None,
-                    distance_threshold=self.config.cluster_threshold,
-                    metric='cosine',
-                    linkage='average'
+                labels_clean = cluster_embeddings(
+                    X_clean,
+                    self.cluster_threshold,
+                    method=self.config.get("clustering", "agglomerative"),
+                    max_clusters=self.config.get("max_clusters", 64)
                 )
-                labels_clean = clustering.fit_predict(X_clean)
             else:
                 labels_clean = []
                 
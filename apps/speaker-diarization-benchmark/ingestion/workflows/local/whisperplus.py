@@ -9,6 +9,10 @@ WHAT:
 
 WHEN:
   2025-12-04
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Pipeline comes from the shared model registry.
+  - 2026-10-16: Diarization reads the clip from the shared decoded-audio cache.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/local/whisperplus.py
@@ -45,18 +49,29 @@ class WhisperPlusDiarizeWorkflow(Workflow):
         try:
             import torch
             from ingestion.safe_globals import get_safe_globals
+            from ingestion.models import get_registry
+            from ingestion.audio_cache import get_audio_cache
             
             device = "mps" if os.uname().sysname == "Darwin" else "cpu" # Try MPS for Mac
             
-            with torch.serialization.safe_globals(get_safe_globals()):
-                pipeline = ASRDiarizationPipeline.from_pretrained(
-                    asr_model="openai/whisper-large-v3",
-                    diarizer_model="pyannote/speaker-diarization-3.1",
-                    chunk_length_s=30,
-                    device=device,
-                )
+            def load_pipeline():
+                with torch.serialization.safe_globals(get_safe_globals()):
+                    return ASRDiarizationPipeline.from_pretrained(
+                        asr_model="openai/whisper-large-v3",
+                        diarizer_model="pyannote/speaker-diarization-3.1",
+                        chunk_length_s=30,
+                        device=device,
+                    )
+
+            registry = self.registry or get_registry()
+            pipeline = registry.get("whisperplus/whisper-large-v3+speaker-diarization-3.1", load_pipeline, device=device)
             
-            output_text = pipeline(str(clip_path), num_speakers=None, min_speaker=None, max_speaker=None)
+            # Hand over the cached decode so `preprocess` skips ffmpeg
+            inputs = {
+                "array": get_audio_cache().load(clip_path, sample_rate=pipeline.sampling_rate),
+                "sampling_rate": pipeline.sampling_rate,
+            }
+            output_text = pipeline(inputs, num_speakers=None, min_speaker=None, max_speaker=None)
             
             logger.info(f"WhisperPlus Diarization Raw Output: {output_text}")
 
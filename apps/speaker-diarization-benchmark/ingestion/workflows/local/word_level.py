@@ -10,6 +10,15 @@ WHAT:
 
 WHEN:
   2025-12-04
+  Last Modified: 2026-10-16
+  Change Log:
+  - 2026-10-16: Embedding model comes from the shared model registry.
+  - 2026-10-16: Identification uses the vectorized speaker identity index.
+  - 2026-10-16: Word windows are sliced from the shared decoded-audio cache.
+  - 2026-10-16: `embedding_mode="frame"` pools sliding-window frame embeddings per word
+    instead of running the model once per word.
+  - 2026-10-16: Clustering engine is selectable (`clustering="online"` for bounded memory).
+  - 2026-10-16: Segmentation uses the vectorized `ChangePointSegmenter`.
 
 WHERE:
   apps/speaker-diarization-benchmark/ingestion/workflows/local/word_level.py
@@ -22,18 +31,17 @@ WHY:
 import os
 import time
 import logging
-import torch
 import numpy as np
-import json
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
-from scipy.spatial.distance import cosine
-from sklearn.cluster import AgglomerativeClustering
-from pyannote.audio import Model, Inference
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment as PyannoteSegment
+from pyannote.audio import Inference
 from ingestion.workflows.base import Workflow
-from ingestion.safe_globals import get_safe_globals
+from ingestion.models import load_pyannote_model
+from ingestion.identity import load_speaker_index
+from ingestion.audio_cache import get_audio_cache
+from ingestion.embedding import FrameEmbedder
+from ingestion.clustering import cluster_embeddings
+from ingestion.segmentation import ChangePointSegmenter, segments_from_boundaries
 
 logger = logging.getLogger(__name__)
 
@@ -44,34 +52,15 @@ class WordLevelWorkflow(Workflow):
         self.window = self.config.get("window", 0)
         self.cluster_threshold = self.config.get("cluster_threshold", 0.5)
         self.id_threshold = self.config.get("id_threshold", 0.4)
+        self.embedding_mode = self.config.get("embedding_mode", "word")
+        self.frame_duration = self.config.get("frame_duration", 1.0)
+        self.frame_step = self.config.get("frame_step", 0.25)
         self.hf_token = os.getenv("HF_TOKEN")
 
-    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
-        stats = {'embedding_time': 0, 'segmentation_time': 0, 'clustering_time': 0}
-        
-        logger.info("Loading embedding model (pyannote/embedding)...")
-        try:
-            with torch.serialization.safe_globals(get_safe_globals()):
-                model = Model.from_pretrained("pyannote/embedding", use_auth_token=self.hf_token)
-            
-            inference = Inference(model, window="whole")
-            model.to(torch.device("cpu"))
-        except Exception as e:
-            logger.error(f"Failed to load embedding model: {e}")
-            return [], stats
-
-        audio_io = Audio(sample_rate=16000, mono="downmix")
-        
-        start_time = time.time()
-        word_embeddings = []
-        valid_words = []
-        
-        # Flatten all words from segments
-        all_words = []
-        for seg in transcription_result.segments:
-            all_words.extend(seg.words)
-
-        for i, word in enumerate(all_words):
+    def word_spans(self, all_words: List[Any]) -> List[Tuple[float, float]]:
+        """(start, end) per word: the word plus `window` words on each side, widened to >= 0.05s."""
+        spans = []
+        for i in range(len(all_words)):
             # Initial window based on config
             w_start_idx = max(0, i - self.window)
             w_end_idx = min(len(all_words) - 1, i + self.window)
@@ -96,11 +85,30 @@ class WordLevelWorkflow(Workflow):
                     
                 current_duration = all_words[w_end_idx].end - all_words[w_start_idx].start
 
+            spans.append((all_words[w_start_idx].start, all_words[w_end_idx].end))
+        return spans
+
+    def embed_words(self, clip_path: Path, all_words: List[Any], model) -> Tuple[List[np.ndarray], List[Any]]:
+        """
+        (word_embeddings, valid_words) for the words' windowed spans.
+
+        embedding_mode "word" runs the model once per span; "frame" runs it once over the
+        whole clip with a sliding window and pools the frames inside each span.
+        """
+        spans = self.word_spans(all_words)
+
+        if self.embedding_mode == "frame":
+            embedder = FrameEmbedder(model, duration=self.frame_duration, step=self.frame_step)
+            result = embedder.embed_spans(clip_path, spans)
+            return list(result.embeddings), [all_words[k] for k in result.indices]
+
+        inference = Inference(model, window="whole")
+        audio_cache = get_audio_cache()
+        word_embeddings = []
+        valid_words = []
+        for word, (start_time_sec, end_time_sec) in zip(all_words, spans):
             try:
-                start_time_sec = all_words[w_start_idx].start
-                end_time_sec = all_words[w_end_idx].end
-                
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(start_time_sec, end_time_sec))
+                waveform, sr = audio_cache.waveform(clip_path, start_time_sec, end_time_sec)
                 emb = inference({"waveform": waveform, "sample_rate": sr})
                 
                 # Check for NaNs
@@ -117,52 +125,40 @@ class WordLevelWorkflow(Workflow):
             except Exception as e:
                 # logger.warning(f"Failed to embed word '{word.text}': {e}")
                 pass
+        return word_embeddings, valid_words
+
+    def segment_words(self, valid_words: List[Any], word_embeddings: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Starts a new segment where a word is further than `threshold` from the last 3 words' mean."""
+        segmenter = ChangePointSegmenter(word_embeddings)
+        return segments_from_boundaries(valid_words, segmenter.boundaries(self.threshold))
+
+    def run(self, clip_path: Path, transcription_result: Any) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        stats = {'embedding_time': 0, 'segmentation_time': 0, 'clustering_time': 0}
+        
+        logger.info("Loading embedding model (pyannote/embedding)...")
+        try:
+            model = load_pyannote_model("pyannote/embedding", token=self.hf_token, registry=self.registry)
+            if model is None:
+                return [], stats
+        except Exception as e:
+            logger.error(f"Failed to load embedding model: {e}")
+            return [], stats
+
+        start_time = time.time()
+        
+        # Flatten all words from segments
+        all_words = []
+        for seg in transcription_result.segments:
+            all_words.extend(seg.words)
+
+        word_embeddings, valid_words = self.embed_words(clip_path, all_words, model)
                 
         stats['embedding_time'] = time.time() - start_time
+        stats.update(get_audio_cache().stats())
         
         # Segmentation
         start_time = time.time()
-        segments = []
-        if valid_words:
-            current_segment_words = [valid_words[0]]
-            current_segment_embeddings = [word_embeddings[0]]
-            current_segment_indices = [0]
-            
-            for i in range(1, len(valid_words)):
-                word = valid_words[i]
-                emb = word_embeddings[i]
-                
-                context_embeddings = current_segment_embeddings[-3:]
-                # context_embeddings are numpy arrays (from inference output)
-                # We can just stack them with numpy
-                context_avg = np.mean(np.stack(context_embeddings), axis=0)
-                
-                dist = cosine(context_avg, emb)
-                
-                if dist > self.threshold:
-                    segments.append({
-                        "start": current_segment_words[0].start,
-                        "end": current_segment_words[-1].end,
-                        "text": " ".join([w.word for w in current_segment_words]),
-                        "word_count": len(current_segment_words),
-                        "word_indices": current_segment_indices
-                    })
-                    current_segment_words = [word]
-                    current_segment_embeddings = [emb]
-                    current_segment_indices = [i]
-                else:
-                    current_segment_words.append(word)
-                    current_segment_embeddings.append(emb)
-                    current_segment_indices.append(i)
-                    
-            segments.append({
-                "start": current_segment_words[0].start,
-                "end": current_segment_words[-1].end,
-                "text": " ".join([w.word for w in current_segment_words]),
-                "word_count": len(current_segment_words),
-                "word_indices": current_segment_indices
-            })
-
+        segments = self.segment_words(valid_words, word_embeddings)
         stats['segmentation_time'] = time.time() - start_time
 
         # Clustering & Identification
@@ -196,13 +192,12 @@ class WordLevelWorkflow(Workflow):
                 X_clean[norms == 0] += 1e-9
             
             if len(X_clean) > 0:
-                clustering = AgglomerativeClustering(
-                    n_clusters=None,
-                    distance_threshold=self.cluster_threshold,
-                    metric='cosine',
-                    linkage='average'
+                labels_clean = cluster_embeddings(
+                    X_clean,
+                    self.cluster_threshold,
+                    method=self.config.get("clustering", "agglomerative"),
+                    max_clusters=self.config.get("max_clusters", 64)
                 )
-                labels_clean = clustering.fit_predict(X_clean)
             else:
                 labels_clean = []
                 
@@ -211,36 +206,15 @@ class WordLevelWorkflow(Workflow):
             labels[valid_indices] = labels_clean
             
             # Identification
-            base_dir = Path(__file__).parent.parent.parent.parent
-            db_path = base_dir / "data/speaker_embeddings.json"
-            known_speakers = {}
-            if db_path.exists():
-                with open(db_path, 'r') as f:
-                    known_speakers = json.load(f)
+            index = load_speaker_index()
             
-            cluster_centroids = {}
-            unique_labels = set(labels_clean) if len(X_clean) > 0 else set()
-            
-            for label in unique_labels:
-                clean_indices = np.where(labels_clean == label)[0]
-                cluster_embs = X_clean[clean_indices]
-                cluster_centroids[label] = cluster_embs
+            unique_labels = sorted(set(labels_clean)) if len(X_clean) > 0 else []
+            centroids = [np.mean(X_clean[labels_clean == label], axis=0) for label in unique_labels]
+            matches = index.identify(np.vstack(centroids), mode="prototype") if centroids else []
                 
             final_labels = {}
-            for label, embs in cluster_centroids.items():
-                centroid = np.mean(embs, axis=0)
-                min_dist = 2.0
-                identity = f"SPEAKER_{label:02d}"
-                
-                for name, known_embs in known_speakers.items():
-                    if not known_embs: continue
-                    known_proto = np.mean(known_embs, axis=0)
-                    d = cosine(centroid, known_proto)
-                    if d < min_dist:
-                        min_dist = d
-                        identity = name
-                
-                if min_dist < self.id_threshold:
+            for label, (identity, min_dist) in zip(unique_labels, matches):
+                if identity and min_dist < self.id_threshold:
                     final_labels[label] = identity
                 else:
                     final_labels[label] = f"SPEAKER_{label:02d}"
@@ -30,12 +30,12 @@ WHAT:
     - --workflow: The workflow to run (e.g., 'wespeaker', 'pyannote', 'segment_level_nearest_neighbor')
     
   Outputs:
-    - Updates manifest.json with transcription and diarization results.
+    - Updates the manifest store (data/clips/manifest.db) with transcription and diarization results.
     - Generates a plain text report in the current directory.
 
   Side Effects:
     - Downloads models if not present.
-    - Modifies manifest.json.
+    - Modifies data/clips/manifest.db (manifest.json is exported on demand).
 
   How to run/invoke it:
     # IMPORTANT: Run from the ROOT of the repository using `uv run` to ensure dependencies (like numpy) are available.
@@ -76,15 +76,20 @@ import numpy as np
 import torch
 from scipy.spatial.distance import cosine, cdist
 from sklearn.cluster import AgglomerativeClustering
-from pyannote.audio import Model, Inference
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment as PyannoteSegment
+from pyannote.audio import Inference
 
 # Add parent directory to sys.path to import transcribe
 sys.path.append(str(Path(__file__).parent.parent))
 try:
-    from transcribe import transcribe, TranscriptionResult, Segment, Word
+    from transcribe import transcribe
+    from ingestion.transcription_cache import get_transcription_cache
+    from ingestion.audio_cache import get_audio_cache
+    from ingestion.embedding import FrameEmbedder
     from utils import get_git_info
+    from ingestion.models import load_pyannote_model, load_pyannote_pipeline, load_wespeaker_model
+    from ingestion.identity import load_speaker_index
+    from ingestion.alignment import TurnIndex, assign_speakers
+    from ingestion.manifest import update_manifest
 except ImportError as e:
     # Fallback if running from a different context, though the sys.path append should work
     print(f"Error: Could not import 'transcribe' or 'utils' from parent directory. Exception: {e}")
@@ -97,43 +102,6 @@ logger = logging.getLogger(__name__)
 HF_TOKEN = os.getenv("HF_TOKEN")
 PYANNOTEAI_API_KEY = os.getenv("PYANNOTEAI_API_KEY")
 
-def get_safe_globals():
-    import torch
-    import omegaconf
-    import pytorch_lightning
-    import typing
-    import collections
-    from pyannote.audio.core.task import Specifications, Problem, Resolution
-    import pyannote.audio.core.model
-
-    return [
-        torch.torch_version.TorchVersion,
-        omegaconf.listconfig.ListConfig,
-        omegaconf.dictconfig.DictConfig,
-        Specifications,
-        Problem,
-        Resolution,
-        pyannote.audio.core.model.Introspection,
-        pytorch_lightning.callbacks.early_stopping.EarlyStopping,
-        pytorch_lightning.callbacks.model_checkpoint.ModelCheckpoint,
-        omegaconf.base.ContainerMetadata,
-        omegaconf.base.Metadata,
-        omegaconf.nodes.AnyNode,
-        omegaconf.nodes.StringNode,
-        omegaconf.nodes.IntegerNode,
-        omegaconf.nodes.FloatNode,
-        omegaconf.nodes.BooleanNode,
-        typing.Any,
-        list,
-        dict,
-        collections.defaultdict,
-        int,
-        float,
-        str,
-        tuple,
-        set,
-    ]
-
 def main():
     parser = argparse.ArgumentParser(description="Benchmark baseline: Text In, Text Out.")
     parser.add_argument("clip_path", type=str, help="Path to the audio clip.")
@@ -146,6 +114,9 @@ def main():
     parser.add_argument("--workflow", type=str, default="pyannote", choices=["pyannote", "wespeaker", "pyannote_community", "pyannote_3.1", "segment_level", "segment_level_matching", "segment_level_nearest_neighbor", "pyannote_api", "deepgram", "assemblyai"], help="Embedding/Diarization workflow to use.")
     parser.add_argument("--identify", action="store_true", help="Run speaker identification using local embeddings.")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing identifications in output.")
+    parser.add_argument("--embedding-mode", type=str, default="word", choices=["word", "frame"], help="pyannote workflow: embed each word window ('word') or pool sliding-window frame embeddings per word ('frame').")
+    parser.add_argument("--frame-duration", type=float, default=1.0, help="Sliding window length in seconds for --embedding-mode frame.")
+    parser.add_argument("--frame-step", type=float, default=0.25, help="Sliding window hop in seconds for --embedding-mode frame.")
     args = parser.parse_args()
 
     clip_path = Path(args.clip_path).resolve()
@@ -161,40 +132,12 @@ def main():
     logger.info("Starting transcription...")
     transcription_start = time.time()
     
-    # Caching logic
-    cache_dir = Path(__file__).parent.parent / "data/cache/transcriptions"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    cache_file = cache_dir / f"{clip_path.stem}.json"
-    
-    transcription_result = None
-    if cache_file.exists():
-        logger.info(f"Loading transcription from cache: {cache_file}")
-        try:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-                # Reconstruct Pydantic models
-                segments = []
-                for s in data['segments']:
-                    words = [Word(**w) for w in s['words']]
-                    segments.append(Segment(start=s['start'], end=s['end'], text=s['text'], words=words))
-                transcription_result = TranscriptionResult(text=data['text'], segments=segments, language=data['language'])
-        except Exception as e:
-            logger.warning(f"Failed to load cache: {e}. Re-running transcription.")
-    
-    if transcription_result is None:
-        try:
-            transcription_result = transcribe(str(clip_path))
-            # Save to cache
-            with open(cache_file, 'w') as f:
-                if hasattr(transcription_result, 'model_dump'):
-                    data = transcription_result.model_dump()
-                else:
-                    data = transcription_result.dict()
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved transcription to cache: {cache_file}")
-        except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            return
+    cache = get_transcription_cache()
+    try:
+        transcription_result = cache.get_or_transcribe(clip_path, transcribe)
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        return
         
     transcription_time = time.time() - transcription_start
     logger.info(f"Transcription complete in {transcription_time:.2f}s")
@@ -320,7 +263,7 @@ def main():
         
         # Timing Stats
         f.write("--- Timing Stats ---\n")
-        f.write(f"Transcription: {transcription_time:.2f}s\n")
+        f.write(f"Transcription: {transcription_time:.2f}s (cache hits: {cache.hits}, misses: {cache.misses})\n")
         f.write(f"Embedding:     {embedding_time:.2f}s\n")
         f.write(f"Segmentation:  {segmentation_time:.2f}s\n")
         f.write(f"Clustering:    {clustering_time:.2f}s\n")
@@ -359,64 +302,19 @@ def main():
     except Exception as e:
         logger.error(f"Failed to update manifest: {e}")
 
-def update_manifest(clip_path, workflow_name, segments, transcription_text):
-    manifest_path = Path(__file__).parent.parent / "data/clips/manifest.json"
-    if not manifest_path.exists():
-        logger.error(f"Manifest not found at {manifest_path}")
-        return
-
-    with open(manifest_path, 'r') as f:
-        data = json.load(f)
-
-    # Find entry by ID (filename)
-    clip_id = clip_path.name
-    entry = next((item for item in data if item['id'] == clip_id), None)
-
-    if not entry:
-        logger.error(f"Clip ID {clip_id} not found in manifest.")
-        return
-
-    if 'transcriptions' not in entry:
-        entry['transcriptions'] = {}
-
-    # Format segments for manifest
-    manifest_segments = []
-    for seg in segments:
-        manifest_seg = {
-            "start": seg['start'],
-            "end": seg['end'],
-            "text": seg['text'],
-            "speaker": seg.get('speaker', 'UNKNOWN')
-        }
-        if 'match_info' in seg:
-             manifest_seg['match_info'] = seg['match_info']
-        manifest_segments.append(manifest_seg)
-
-    entry['transcriptions'][workflow_name] = manifest_segments
-    
-    # Add metadata if needed, but for now just the segments
-    
-    with open(manifest_path, 'w') as f:
-        json.dump(data, f, indent=2)
-    
-    logger.info(f"Updated manifest.json for {clip_id} with workflow {workflow_name}")
-
 def run_segment_level_nearest_neighbor_workflow(clip_path, transcription_segments, args):
     # Reuse the logic from run_segment_level_matching_workflow but with Nearest Neighbor matching
     stats = {'embedding_time': 0, 'segmentation_time': 0, 'clustering_time': 0}
     
     logger.info("Loading embedding model (pyannote/embedding)...")
     try:
-        with torch.serialization.safe_globals(get_safe_globals()):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN)
         inference = Inference(model, window="whole")
-        model.to(torch.device("cpu"))
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
         return [], stats
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     start_time = time.time()
     embeddings = []
@@ -428,7 +326,7 @@ def run_segment_level_nearest_neighbor_workflow(clip_path, transcription_segment
             continue
             
         try:
-            waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
+            waveform, sr = audio_cache.waveform(clip_path, seg.start, seg.end)
             emb = inference({"waveform": waveform, "sample_rate": sr})
             embeddings.append(emb)
             valid_indices.append(i)
@@ -560,17 +458,7 @@ def run_pyannote_community_workflow(clip_path, all_words, args, model_name="pyan
     
     logger.info(f"Loading {model_name} pipeline...")
     try:
-        from pyannote.audio import Pipeline
-        import torch
-        with torch.serialization.safe_globals(get_safe_globals()):
-            try:
-                # Use 'token' instead of 'use_auth_token' for newer versions
-                pipeline = Pipeline.from_pretrained(model_name, use_auth_token=HF_TOKEN)
-            except TypeError:
-                 # Fallback for newer versions that might use 'token'
-                pipeline = Pipeline.from_pretrained(model_name, token=HF_TOKEN)
-        
-        pipeline.to(torch.device("cpu")) # Force CPU for now
+        pipeline = load_pyannote_pipeline(model_name, token=HF_TOKEN, device="cpu") # Force CPU for now
     except Exception as e:
         logger.error(f"Failed to load pipeline: {e}")
         return [], stats
@@ -599,18 +487,8 @@ def run_pyannote_community_workflow(clip_path, all_words, args, model_name="pyan
         for turn, _, speaker in diarization.itertracks(yield_label=True):
             diar_segments.append((turn.start, turn.end, speaker))
         
-    # Assign speaker to each word
-    word_speakers = []
-    for word in all_words:
-        midpoint = (word.start + word.end) / 2
-        assigned_speaker = "UNKNOWN"
-        
-        # Simple linear search (can be optimized)
-        for start, end, speaker in diar_segments:
-            if start <= midpoint <= end:
-                assigned_speaker = speaker
-                break
-        word_speakers.append(assigned_speaker)
+    # Assign speaker to each word (turn containing the word midpoint)
+    word_speakers = assign_speakers(all_words, TurnIndex(diar_segments), method="midpoint")
         
     # Group words into segments
     segments = []
@@ -650,34 +528,8 @@ def run_wespeaker_workflow(clip_path, all_words, args):
     # Embedding
     logger.info("Loading WeSpeaker model...")
     try:
-        import wespeaker
         # Try loading english model, fallback to chinese if english not available or default
-        # The documentation mentions 'chinese', let's try 'english' first.
-        # WeSpeaker might use torch.load internally, so we wrap it to be safe
-        # We need to import the safe globals classes first if they aren't available in this scope
-        # But for now, let's just try wrapping it with the basic torch classes if possible, 
-        # or just hope it doesn't use complex globals. 
-        # Actually, let's import the common ones.
-        import torch
-        
-        # Note: WeSpeaker might not need all these, but it doesn't hurt.
-        # However, defining the list again is verbose. 
-        # Since I can't easily share the list variable across functions without refactoring,
-        # I will just wrap it with an empty list which allows nothing extra, 
-        # OR if it fails, the user will see. 
-        # But wait, the user asked to "confirm that all the other workflows have the safe globals".
-        # So I should probably add it.
-        
-        # Let's assume WeSpeaker handles its own loading safely or doesn't use the problematic pickle features.
-        # But to be compliant with the request "confirm... have the safe globals", I should add it.
-        
-        try:
-            model = wespeaker.load_model('english')
-        except Exception:
-            logger.warning("English model not found, trying 'chinese'...")
-            model = wespeaker.load_model('chinese')
-            
-        model.set_gpu(0) if torch.cuda.is_available() else None
+        model = load_wespeaker_model('english')
         logger.info("WeSpeaker model loaded successfully.")
     except Exception as e:
         logger.error(f"Failed to load WeSpeaker model: {e}")
@@ -686,9 +538,8 @@ def run_wespeaker_workflow(clip_path, all_words, args):
 
     import tempfile
     import soundfile as sf
-    from pyannote.audio.core.io import Audio
     
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     start_time = time.time()
     word_embeddings = []
@@ -713,7 +564,7 @@ def run_wespeaker_workflow(clip_path, all_words, args):
                 start_time_sec = all_words[w_start_idx].start
                 end_time_sec = all_words[w_end_idx].end
                 
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(start_time_sec, end_time_sec))
+                waveform, sr = audio_cache.waveform(clip_path, start_time_sec, end_time_sec)
                 
                 # Save to temp file
                 sf.write(temp_path, waveform.numpy().T, sr)
@@ -837,16 +688,13 @@ def run_segment_level_workflow(clip_path, transcription_segments, args):
     
     logger.info("Loading embedding model (pyannote/embedding)...")
     try:
-        with torch.serialization.safe_globals(get_safe_globals()):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN)
         inference = Inference(model, window="whole")
-        model.to(torch.device("cpu"))
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
         return [], stats
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     start_time = time.time()
     embeddings = []
@@ -861,7 +709,7 @@ def run_segment_level_workflow(clip_path, transcription_segments, args):
             continue
             
         try:
-            waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
+            waveform, sr = audio_cache.waveform(clip_path, seg.start, seg.end)
             emb = inference({"waveform": waveform, "sample_rate": sr})
             embeddings.append(emb)
             valid_indices.append(i)
@@ -931,16 +779,13 @@ def run_segment_level_matching_workflow(clip_path, transcription_segments, args)
     
     logger.info("Loading embedding model (pyannote/embedding)...")
     try:
-        with torch.serialization.safe_globals(get_safe_globals()):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN)
         inference = Inference(model, window="whole")
-        model.to(torch.device("cpu"))
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
         return [], stats
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     start_time = time.time()
     embeddings = []
@@ -952,7 +797,7 @@ def run_segment_level_matching_workflow(clip_path, transcription_segments, args)
             continue
             
         try:
-            waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg.start, seg.end))
+            waveform, sr = audio_cache.waveform(clip_path, seg.start, seg.end)
             emb = inference({"waveform": waveform, "sample_rate": sr})
             embeddings.append(emb)
             valid_indices.append(i)
@@ -1169,38 +1014,51 @@ def run_pyannote_workflow(clip_path, all_words, args):
     # Embedding
     logger.info("Loading embedding model...")
     try:
-        with torch.serialization.safe_globals(get_safe_globals()):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN)
         inference = Inference(model, window="whole")
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
         return [], stats
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     start_time = time.time()
     word_embeddings = []
     valid_words = []
 
-    for i, word in enumerate(all_words):
-        duration = word.end - word.start
-        if duration < 0.02: 
-            continue
-            
-        try:
+    if args.embedding_mode == "frame":
+        # One sliding pass over the clip; each word pools the frames inside its window
+        spans = []
+        span_words = []
+        for i, word in enumerate(all_words):
+            if word.end - word.start < 0.02:
+                continue
             w_start_idx = max(0, i - args.window)
             w_end_idx = min(len(all_words) - 1, i + args.window)
+            spans.append((all_words[w_start_idx].start, all_words[w_end_idx].end))
+            span_words.append(word)
+        result = FrameEmbedder(model, duration=args.frame_duration, step=args.frame_step).embed_spans(clip_path, spans)
+        word_embeddings = list(result.embeddings)
+        valid_words = [span_words[k] for k in result.indices]
+    else:
+        for i, word in enumerate(all_words):
+            duration = word.end - word.start
+            if duration < 0.02: 
+                continue
             
-            start_time_sec = all_words[w_start_idx].start
-            end_time_sec = all_words[w_end_idx].end
+            try:
+                w_start_idx = max(0, i - args.window)
+                w_end_idx = min(len(all_words) - 1, i + args.window)
             
-            waveform, sr = audio_io.crop(clip_path, PyannoteSegment(start_time_sec, end_time_sec))
-            emb = inference({"waveform": waveform, "sample_rate": sr})
-            word_embeddings.append(emb)
-            valid_words.append(word)
-        except Exception as e:
-            pass
+                start_time_sec = all_words[w_start_idx].start
+                end_time_sec = all_words[w_end_idx].end
+            
+                waveform, sr = audio_cache.waveform(clip_path, start_time_sec, end_time_sec)
+                emb = inference({"waveform": waveform, "sample_rate": sr})
+                word_embeddings.append(emb)
+                valid_words.append(word)
+            except Exception as e:
+                pass
             
     stats['embedding_time'] = time.time() - start_time
     
@@ -1217,9 +1075,9 @@ def run_pyannote_workflow(clip_path, all_words, args):
             emb = word_embeddings[i]
             
             context_embeddings = current_segment_embeddings[-3:]
-            context_avg = np.mean(torch.stack(context_embeddings).numpy(), axis=0)
+            context_avg = np.mean(np.stack(context_embeddings), axis=0)
             
-            dist = cosine(context_avg, emb.numpy())
+            dist = cosine(context_avg, emb)
             
             if dist > args.threshold:
                 segments.append({
@@ -1255,7 +1113,7 @@ def run_pyannote_workflow(clip_path, all_words, args):
             indices = seg['word_indices']
             if indices:
                 seg_embs = [word_embeddings[i] for i in indices]
-                avg_emb = np.mean(torch.stack(seg_embs).numpy(), axis=0)
+                avg_emb = np.mean(np.stack(seg_embs), axis=0)
                 X.append(avg_emb)
             else:
                 X.append(np.zeros(512))
@@ -1351,12 +1209,7 @@ def run_pyannote_api_workflow(clip_path, all_words, args):
 
     logger.info("Loading Pyannote AI precision-2 pipeline...")
     try:
-        from pyannote.audio import Pipeline
-        import torch
-        with torch.serialization.safe_globals(get_safe_globals()):
-            pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-precision-2", token=PYANNOTEAI_API_KEY)
-        
-        pipeline.to(torch.device("cpu")) 
+        pipeline = load_pyannote_pipeline("pyannote/speaker-diarization-precision-2", token=PYANNOTEAI_API_KEY, device="cpu")
     except Exception as e:
         logger.error(f"Failed to load pipeline: {e}")
         return [], stats
@@ -1739,32 +1592,21 @@ def identify_speakers(clip_path, segments, args):
     logger.info("Starting speaker identification...")
     id_start_time = time.time()
     
-    db_path = Path(__file__).parent.parent / "data/speaker_embeddings.json"
-    if not db_path.exists():
-        logger.warning("Speaker embeddings DB not found. Skipping identification.")
-        return segments
-        
-    known_speakers = {}
-    with open(db_path, 'r') as f:
-        known_speakers = json.load(f)
-        
-    if not known_speakers:
-        logger.warning("No known speakers found in DB.")
+    index = load_speaker_index()
+    if len(index) == 0:
+        logger.warning("No known speakers found in DB. Skipping identification.")
         return segments
 
     # Load embedding model
     logger.info("Loading embedding model for identification...")
     try:
-        with torch.serialization.safe_globals(get_safe_globals()):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN)
         inference = Inference(model, window="whole")
-        model.to(torch.device("cpu"))
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
         return segments
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     # Group segments by speaker label
     speaker_segments = {}
@@ -1790,7 +1632,7 @@ def identify_speakers(clip_path, segments, args):
             if duration < 0.1: continue # Skip very short segments
             
             try:
-                waveform, sr = audio_io.crop(clip_path, PyannoteSegment(seg['start'], seg['end']))
+                waveform, sr = audio_cache.waveform(clip_path, seg['start'], seg['end'])
                 emb = inference({"waveform": waveform, "sample_rate": sr})
                 
                 if np.isnan(emb).any():
@@ -1817,22 +1659,9 @@ def identify_speakers(clip_path, segments, args):
             
         logger.info(f"  -> Avg emb shape: {avg_emb.shape}, Norm: {np.linalg.norm(avg_emb):.2f}")
 
-        # Match against DB
-        min_dist = 2.0
-        best_match = "None"
-        
-        # Nearest Neighbor against all known embeddings
-        for name, known_embs in known_speakers.items():
-            if not known_embs: continue
-            known_embs_arr = np.array(known_embs)
-            dists = cdist(avg_emb.reshape(1, -1), known_embs_arr, metric='cosine')
-            min_d = np.min(dists)
-            
-            # logger.info(f"    -> Dist to {name}: {min_d:.4f}") # Verbose debug
-            
-            if min_d < min_dist:
-                min_dist = min_d
-                best_match = name
+        # Match against DB: nearest neighbor against all known embeddings
+        best_match, min_dist = index.identify(avg_emb, mode="nearest")[0]
+        best_match = best_match or "None"
                 
         logger.info(f"  -> Best match for {local_label}: {best_match} (Dist: {min_dist:.4f})")
         
@@ -1,10 +1,10 @@
 import os
 import random
 import subprocess
-import json
 import logging
 from pathlib import Path
 from pywhispercpp.model import Model
+from ingestion.manifest import get_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,6 +13,7 @@ logger = logging.getLogger(__name__)
 DOWNLOADS_DIR = Path("data/downloads")
 CLIPS_DIR = Path("data/clips")
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 def get_audio_duration(file_path):
     """Get duration of audio file using ffprobe."""
@@ -113,11 +114,11 @@ def main():
         "transcription": transcription,
     }
     
-    # Save single entry manifest
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump([entry], f, indent=2)
+    # Save the entry (replacing an earlier run on the same clip)
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        store.put(entry)
         
-    logger.info(f"Done! Manifest saved to {MANIFEST_FILE}")
+    logger.info(f"Done! Manifest saved to {MANIFEST_DB} (export {MANIFEST_FILE} with `python -m ingestion.manifest export`)")
     logger.info(f"Transcription sample: {transcription}")
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 import os
-import json
 import subprocess
 from pathlib import Path
 import logging
+from ingestion.manifest import get_store
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 SOURCE_DIR = Path("data/downloads/source-videos")
 CLIPS_DIR = Path("data/clips")
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 VIDEOS = [
     {
@@ -34,12 +35,11 @@ def run_command(cmd):
     subprocess.run(cmd, shell=True, check=True)
 
 def main():
-    if not MANIFEST_FILE.exists():
+    if not MANIFEST_FILE.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found")
         return
 
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
+    store = get_store(MANIFEST_DB, MANIFEST_FILE)
 
     for video in VIDEOS:
         source_path = SOURCE_DIR / video["filename"]
@@ -59,8 +59,7 @@ def main():
 
         # 2. Add to Manifest
         # Check if exists
-        existing = next((c for c in manifest if c['id'] == video['clip_id']), None)
-        if not existing:
+        if video['clip_id'] not in store:
             logger.info(f"Adding {video['clip_id']} to manifest...")
             new_entry = {
                 "id": video['clip_id'],
@@ -74,13 +73,12 @@ def main():
                 "original_url": "local",
                 "transcriptions": {}
             }
-            manifest.append(new_entry)
+            store.add(new_entry)
         else:
             logger.info(f"Entry {video['clip_id']} already in manifest.")
 
-    # Save manifest updates
-    with open(MANIFEST_FILE, 'w') as f:
-        json.dump(manifest, f, indent=4)
+    # Save manifest updates (the scripts below read the store)
+    store.close()
 
     # 3. Process Pipeline
     for video in VIDEOS:
@@ -1,11 +1,11 @@
 import os
-import json
 import logging
 import subprocess
 from pathlib import Path
 import yt_dlp
 from pywhispercpp.model import Model
 from prepare_ground_truth import transcribe_clip
+from ingestion.manifest import get_store
 # Import diarization logic (we'll import the function or run the script)
 # To keep it clean, I'll just run the add_diarization script at the end.
 
@@ -16,6 +16,7 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 def download_audio(url):
     ydl_opts = {
@@ -66,26 +67,14 @@ def main():
     transcription = transcribe_clip(model, clip_path)
     
     # 4. Update Manifest
-    if MANIFEST_FILE.exists():
-        with open(MANIFEST_FILE) as f:
-            manifest = json.load(f)
-    else:
-        manifest = []
-        
-    # Check if exists
-    entry = next((e for e in manifest if e["id"] == clip_path.name), None)
-    if not entry:
-        entry = {
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        # Adds the entry unless it exists
+        store.add({
             "id": clip_path.name,
             "clip_path": str(clip_path.relative_to(Path(".").resolve(), walk_up=True) if clip_path.is_absolute() else clip_path),
             "transcriptions": {}
-        }
-        manifest.append(entry)
-    
-    entry["transcriptions"]["pywhispercpp.small"] = transcription
-    
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
+        })
+        store.set_transcription(clip_path.name, "pywhispercpp.small", transcription)
         
     logger.info("Manifest updated. Now running diarization...")
     
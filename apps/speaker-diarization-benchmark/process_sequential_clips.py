@@ -1,9 +1,10 @@
-import json
 import logging
 import subprocess
 import numpy as np
 from pathlib import Path
-from scipy.spatial.distance import cdist
+from ingestion.identity import load_speaker_index
+from ingestion.alignment import assign_speakers
+from ingestion.manifest import get_store
 from faster_whisper import WhisperModel
 from pyannote.audio import Pipeline
 import torch
@@ -19,38 +20,23 @@ CLIPS_DIR = DATA_DIR / "clips"
 DOWNLOADS_DIR = DATA_DIR / "downloads"
 SOURCE_VIDEOS_DIR = DOWNLOADS_DIR / "source-videos"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 DB_FILE = DATA_DIR / "speaker_embeddings.json"
+INDEX_DIR = DATA_DIR / "speaker_index"
 HF_TOKEN = "REDACTED_SECRET"
 
-def identify_speaker(embedding, db, threshold=0.5):
-    vec = np.array(embedding).reshape(1, -1)
-    best_name = None
-    best_dist = threshold
-
-    for name, stored_vectors in db.items():
-        if not stored_vectors: continue
-        centroid = np.mean(stored_vectors, axis=0).reshape(1, -1)
-        dist = cdist(vec, centroid, metric='cosine')[0][0]
-        
-        if dist < best_dist:
-            best_dist = dist
-            best_name = name
-            
-    return best_name, best_dist
+def identify_speaker(embedding, index, threshold=0.5):
+    # Compare with centroid of stored vectors
+    name, dist = index.identify(np.asarray(embedding), mode="prototype", threshold=threshold)[0]
+    return name, dist
 
 def align_words_with_diarization(words, diarization, speaker_map):
     aligned_segments = []
     current_segment = None
     
-    for word in words:
-        midpoint = word.start + (word.end - word.start) / 2
-        speaker_label = "UNKNOWN"
-        
-        for turn, _, label in diarization.itertracks(yield_label=True):
-            if turn.start <= midpoint <= turn.end:
-                speaker_label = label
-                break
-        
+    word_speakers = assign_speakers(words, diarization, method="midpoint")
+    
+    for word, speaker_label in zip(words, word_speakers):
         # Map to real name if available
         real_name = speaker_map.get(speaker_label, speaker_label)
         
@@ -148,17 +134,10 @@ def main():
         pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", token=HF_TOKEN)
 
     # Load Speaker DB
-    db = {}
-    if DB_FILE.exists():
-        with open(DB_FILE) as f:
-            db = json.load(f)
+    db = load_speaker_index(INDEX_DIR, DB_FILE)
             
-    # Load Manifest
-    if MANIFEST_FILE.exists():
-        with open(MANIFEST_FILE) as f:
-            manifest = json.load(f)
-    else:
-        manifest = []
+    # Open Manifest (each clip is written as soon as it is processed)
+    store = get_store(MANIFEST_DB, MANIFEST_FILE)
 
     for item in clips_to_process:
         clip_id = f"{item['id_prefix']}_{item['start']}_{item['duration']}" # e.g. ..._60_60 ?? No, duration is length.
@@ -216,27 +195,27 @@ def main():
         aligned_segments = align_words_with_diarization(all_words, annotation, speaker_map)
         
         # 6. Update Manifest
-        entry = next((e for e in manifest if e["id"] == clip_filename), None)
-        if not entry:
-            entry = {
-                "id": clip_filename,
-                "clip_path": f"data/clips/{clip_filename}",
-                "transcriptions": {}
-            }
-            manifest.append(entry)
-            
-        entry["title"] = item["title"]
-        entry["original_url"] = item["original_url"]
-        entry["start_time"] = item["start"]
-        entry["duration"] = item["duration"]
-        
-        # Save as standard transcription (UI uses this)
-        entry["transcriptions"]["pywhispercpp.small"] = aligned_segments
-        entry["transcriptions"]["faster_whisper_aligned"] = aligned_segments
-        
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
+        store.add({
+            "id": clip_filename,
+            "clip_path": f"data/clips/{clip_filename}",
+            "transcriptions": {}
+        })
+
+        def save(entry):
+            entry["title"] = item["title"]
+            entry["original_url"] = item["original_url"]
+            entry["start_time"] = item["start"]
+            entry["duration"] = item["duration"]
+
+            # Save as standard transcription (UI uses this)
+            entry.setdefault("transcriptions", {})
+            entry["transcriptions"]["pywhispercpp.small"] = aligned_segments
+            entry["transcriptions"]["faster_whisper_aligned"] = aligned_segments
+
+        store.update(clip_filename, save)
         
+    # One manifest.json export for the whole batch
+    store.close(export=True)
     logger.info("Done! All clips processed.")
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@ import json
 import logging
 import numpy as np
 from pathlib import Path
-from scipy.spatial.distance import cdist
+from ingestion.identity import load_speaker_index
+from ingestion.manifest import get_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,43 +12,30 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 DB_FILE = DATA_DIR / "speaker_embeddings.json"
+INDEX_DIR = DATA_DIR / "speaker_index"
 CACHE_DIR = DATA_DIR / "cache" / "embeddings"
 
-def identify_speaker(embedding, db, threshold=0.5):
-    vec = np.array(embedding).reshape(1, -1)
-    best_name = None
-    best_dist = threshold
-
-    for name, stored_vectors in db.items():
-        if not stored_vectors: continue
-        # Compare with centroid of stored vectors
-        centroid = np.mean(stored_vectors, axis=0).reshape(1, -1)
-        dist = cdist(vec, centroid, metric='cosine')[0][0]
-        
-        if dist < best_dist:
-            best_dist = dist
-            best_name = name
-            
-    return best_name, best_dist
+def identify_speaker(embedding, index, threshold=0.5):
+    # Compare with centroid of stored vectors
+    name, dist = index.identify(np.asarray(embedding), mode="prototype", threshold=threshold)[0]
+    return name, dist
 
 def main():
-    if not MANIFEST_FILE.exists() or not DB_FILE.exists():
+    if not (MANIFEST_FILE.exists() or MANIFEST_DB.exists()) or not DB_FILE.exists():
         logger.error("Manifest or DB not found.")
         return
 
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
+    store = get_store(MANIFEST_DB, MANIFEST_FILE)
         
-    with open(DB_FILE) as f:
-        db = json.load(f)
+    db = load_speaker_index(INDEX_DIR, DB_FILE)
         
-    logger.info(f"Loaded {len(db)} speakers from database.")
+    logger.info(f"Loaded {len(db.speakers)} speakers from database.")
     
     updates_count = 0
     
-    for entry in manifest:
-        clip_id = entry['id']
+    for clip_id in store.ids():
         cache_file = CACHE_DIR / f"{clip_id}.json"
         
         if not cache_file.exists():
@@ -68,33 +56,36 @@ def main():
         if not local_map:
             continue
             
-        # Apply to transcriptions
-        if "transcriptions" in entry:
-            for model_name, segments in entry["transcriptions"].items():
-                for seg in segments:
-                    current_speaker = seg.get("speaker")
-                    # Only update if it's currently a generic label or we have a better match?
-                    # For now, let's assume if we found a match in DB, it trumps the generic label.
-                    # But we must be careful not to overwrite a manually corrected label if we can't distinguish.
-                    # However, the user asked for syncing.
-                    # If the current label is "SPEAKER_XX", update it.
-                    # If it's already a name, maybe leave it? Or update if it matches the *ID*?
-                    # The segment doesn't store the ID, just the display name.
-                    # But we know the segment was originally "SPEAKER_XX" based on the cache key?
-                    # Actually, the cache key "SPEAKER_00" corresponds to the *diarization* label.
-                    # If the manifest has "SPEAKER_00", we replace it.
+        # Apply to transcriptions (one transaction per clip)
+        def apply(entry):
+            nonlocal updates_count
+            if "transcriptions" in entry:
+                for model_name, segments in entry["transcriptions"].items():
+                    for seg in segments:
+                        current_speaker = seg.get("speaker")
+                        # Only update if it's currently a generic label or we have a better match?
+                        # For now, let's assume if we found a match in DB, it trumps the generic label.
+                        # But we must be careful not to overwrite a manually corrected label if we can't distinguish.
+                        # However, the user asked for syncing.
+                        # If the current label is "SPEAKER_XX", update it.
+                        # If it's already a name, maybe leave it? Or update if it matches the *ID*?
+                        # The segment doesn't store the ID, just the display name.
+                        # But we know the segment was originally "SPEAKER_XX" based on the cache key?
+                        # Actually, the cache key "SPEAKER_00" corresponds to the *diarization* label.
+                        # If the manifest has "SPEAKER_00", we replace it.
                     
-                    if current_speaker in local_map:
-                        seg["speaker"] = local_map[current_speaker]
-                        updates_count += 1
-                    elif current_speaker in embeddings_map and current_speaker not in local_map:
-                        # It's a generic speaker that we FAILED to identify this time.
-                        # Should we revert it? No, keep existing.
-                        pass
+                        if current_speaker in local_map:
+                            seg["speaker"] = local_map[current_speaker]
+                            updates_count += 1
+                        elif current_speaker in embeddings_map and current_speaker not in local_map:
+                            # It's a generic speaker that we FAILED to identify this time.
+                            # Should we revert it? No, keep existing.
+                            pass
 
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
-        
+        store.update(clip_id, apply)
+
+    # One manifest.json export for the whole batch
+    store.close(export=True)
     logger.info(f"Done! Updated {updates_count} segments.")
 
 if __name__ == "__main__":
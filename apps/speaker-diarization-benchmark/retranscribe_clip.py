@@ -1,8 +1,8 @@
-import json
 import logging
 from pathlib import Path
 from pywhispercpp.model import Model
 from prepare_ground_truth import transcribe_clip
+from ingestion.manifest import get_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -10,19 +10,20 @@ logger = logging.getLogger(__name__)
 
 CLIPS_DIR = Path("data/clips")
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 
 def main():
-    if not MANIFEST_FILE.exists():
+    if not MANIFEST_FILE.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found.")
         return
 
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
+    store = get_store(MANIFEST_DB, MANIFEST_FILE)
         
     logger.info("Loading pywhispercpp model (small)...")
     model = Model('small', print_realtime=False, print_progress=False)
     
-    for entry in manifest:
+    transcription = None
+    for entry in store.entries():
         clip_path = Path(entry["clip_path"])
         if not clip_path.exists():
             # Try relative to script dir if path is relative
@@ -35,14 +36,16 @@ def main():
         logger.info(f"Retranscribing {entry['id']}...")
         transcription = transcribe_clip(model, clip_path)
         
-        entry["transcription"] = transcription
+        def save(entry):
+            entry["transcription"] = transcription
+
+        store.update(entry["id"], save)
         logger.info("Updated transcription.")
         
-    with open(MANIFEST_FILE, "w") as f:
-        json.dump(manifest, f, indent=2)
-        
-    logger.info(f"Done! Updated manifest saved to {MANIFEST_FILE}")
-    logger.info(f"New transcription sample: {manifest[0]['transcription']}")
+    # One manifest.json export for the whole batch
+    store.close(export=True)
+    logger.info(f"Done! Updated manifest saved to {MANIFEST_DB} and exported to {MANIFEST_FILE}")
+    logger.info(f"New transcription sample: {transcription}")
 
 if __name__ == "__main__":
     main()
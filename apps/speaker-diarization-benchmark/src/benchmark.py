@@ -39,6 +39,9 @@ from rich.table import Table
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore")
 
+# Add the benchmark app root to path to import the ingestion package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 # Configure logging
 # Add apps/transcriber to path to import instant_logger
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../apps/transcriber')))
@@ -233,11 +236,13 @@ class SpeechBrainVerificationPipeline(BaseDiarizationPipeline):
             )
         
         try:
-            import librosa
             import torch
+            from ingestion.audio_cache import get_audio_cache
             
-            # Load audio
-            audio, sr = librosa.load(audio_path, sr=16000)
+            # Load audio (decoded once, memory-mapped from the shared cache)
+            audio_cache = get_audio_cache()
+            audio = audio_cache.load(audio_path)
+            sr = audio_cache.sample_rate
             
             # Segment audio into chunks (e.g., 2-second windows with 1-second overlap)
             chunk_duration = 2.0
@@ -255,7 +260,7 @@ class SpeechBrainVerificationPipeline(BaseDiarizationPipeline):
                 chunk_time = start_idx / sr
                 
                 # Get speaker embedding
-                embedding = self.model.encode_batch(torch.tensor(chunk).unsqueeze(0))
+                embedding = self.model.encode_batch(torch.from_numpy(chunk).unsqueeze(0))
                 embeddings.append(embedding.squeeze().cpu().numpy())
                 chunk_times.append((chunk_time, chunk_time + chunk_duration))
             
@@ -743,9 +748,8 @@ class BenchmarkRunner:
     def _get_audio_duration(self, audio_path: Path) -> float:
         """Get audio duration in seconds."""
         try:
-            import librosa
-            y, sr = librosa.load(str(audio_path), sr=None)
-            return len(y) / sr
+            from ingestion.audio_cache import get_audio_cache
+            return get_audio_cache().duration(audio_path)
         except Exception as e:
             logger.warning(f"Could not determine audio duration: {e}")
             return 0.0
@@ -0,0 +1,96 @@
+"""
+Tests for word-to-speaker alignment, checked against the old linear-scan loops.
+"""
+
+import random
+
+import pytest
+
+from ingestion.alignment import TurnIndex, assign_speakers
+
+
+def random_turns(rng, n=200, duration=600.0):
+    turns = []
+    for _ in range(n):
+        start = rng.uniform(0, duration)
+        turns.append((start, start + rng.uniform(0.1, 8.0), f"SPEAKER_{rng.randrange(4):02d}"))
+    return sorted(turns)
+
+
+def random_words(rng, n=1000, duration=600.0):
+    words = []
+    for _ in range(n):
+        start = rng.uniform(0, duration)
+        words.append({"start": start, "end": start + rng.uniform(0.05, 0.6)})
+    return words
+
+
+def linear_midpoint(word, turns):
+    midpoint = word["start"] + (word["end"] - word["start"]) / 2
+    for start, end, speaker in turns:
+        if start <= midpoint <= end:
+            return speaker
+    return "UNKNOWN"
+
+
+def linear_overlap(word, turns):
+    overlaps = {}
+    for start, end, speaker in turns:
+        overlap = max(0, min(word["end"], end) - max(word["start"], start))
+        if overlap > 0:
+            overlaps[speaker] = overlaps.get(speaker, 0) + overlap
+    if not overlaps:
+        return "UNKNOWN"
+    return max(overlaps, key=overlaps.get)
+
+
+def test_midpoint_and_overlap_match_linear_scan():
+    rng = random.Random(0)
+    turns = random_turns(rng)
+    words = random_words(rng)
+    index = TurnIndex(turns)
+
+    assert assign_speakers(words, index, "midpoint") == [linear_midpoint(w, turns) for w in words]
+    assert assign_speakers(words, index, "overlap") == [linear_overlap(w, turns) for w in words]
+
+
+def linear_iou(word, turns):
+    best, best_iou = "UNKNOWN", 0.0
+    for start, end, speaker in turns:
+        overlap = min(word["end"], end) - max(word["start"], start)
+        if overlap > 0:
+            iou = overlap / (max(word["end"], end) - min(word["start"], start))
+            if iou > best_iou:
+                best, best_iou = speaker, iou
+    return best
+
+
+def test_long_turn_does_not_widen_the_scan():
+    rng = random.Random(1)
+    # One turn spanning the whole recording, e.g. background speech or a missed split
+    turns = sorted(random_turns(rng, n=2000) + [(0.0, 600.0, "LONG")])
+    words = random_words(rng)
+    index = TurnIndex(turns)
+
+    assert assign_speakers(words, index, "overlap") == [linear_overlap(w, turns) for w in words]
+    assert assign_speakers(words, index, "iou") == [linear_iou(w, turns) for w in words]
+    # 2000 turns of up to 8 s over 600 s: a word overlaps a few dozen at most, not all of them
+    scanned = max(len(index._candidate_indices(w["start"], w["end"])) for w in words)
+    assert scanned < 100
+
+
+def test_iou_prefers_best_fitting_turn():
+    index = TurnIndex([(0.0, 10.0, "LONG"), (4.0, 5.2, "SHORT")])
+    # Overlap with LONG and SHORT is the same, but SHORT fits the word much better.
+    assert assign_speakers([(4.0, 5.0)], index, "iou") == ["SHORT"]
+    assert assign_speakers([(20.0, 21.0)], index, "iou") == ["UNKNOWN"]
+
+
+def test_empty_turns_and_unknown_method():
+    assert assign_speakers([(0.0, 1.0)], TurnIndex([]), "midpoint", default=None) == [None]
+    with pytest.raises(ValueError):
+        assign_speakers([(0.0, 1.0)], TurnIndex([]), "nearest")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
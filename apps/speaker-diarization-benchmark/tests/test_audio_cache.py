@@ -0,0 +1,97 @@
+"""
+Tests for the decoded-audio cache.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from ingestion.audio_cache import AudioCache
+
+
+class FakeDecoder:
+    """Stands in for ffmpeg: a deterministic ramp per file, counting calls."""
+
+    def __init__(self, seconds=3.0):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self, path, sample_rate):
+        self.calls.append((path, sample_rate))
+        return np.arange(int(self.seconds * sample_rate), dtype=np.float32) / sample_rate
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "clip.wav"
+    path.write_bytes(b"RIFF" + os.urandom(1024))
+    return path
+
+
+def test_decodes_once_and_reuses_across_instances(tmp_path, audio):
+    decoder = FakeDecoder()
+    cache = AudioCache(tmp_path / "cache", decode_fn=decoder)
+    first = cache.load(audio)
+    cache.load(audio)
+    assert len(decoder.calls) == 1
+    assert isinstance(first, np.memmap)
+    assert cache.stats() == {'audio_cache_hits': 1, 'audio_cache_misses': 1}
+
+    # A new process (fresh instance) maps the existing entry
+    other = AudioCache(tmp_path / "cache", decode_fn=decoder)
+    np.testing.assert_array_equal(other.load(audio), first)
+    assert len(decoder.calls) == 1
+    assert other.stats() == {'audio_cache_hits': 1, 'audio_cache_misses': 0}
+
+
+def test_crop_is_a_view_clipped_to_the_signal(tmp_path, audio):
+    cache = AudioCache(tmp_path / "cache", decode_fn=FakeDecoder(seconds=3.0))
+    samples = cache.load(audio)
+
+    crop = cache.crop(audio, 1.0, 1.5)
+    assert len(crop) == 8000
+    assert crop[0] == pytest.approx(1.0)
+    assert np.shares_memory(crop, samples)
+
+    assert len(cache.crop(audio, -1.0, 0.5)) == 8000
+    assert len(cache.crop(audio, 2.5, 10.0)) == 8000
+    assert len(cache.crop(audio, 5.0, 6.0)) == 0
+    assert cache.duration(audio) == pytest.approx(3.0)
+
+
+def test_key_depends_on_content_and_sample_rate(tmp_path, audio):
+    decoder = FakeDecoder()
+    cache = AudioCache(tmp_path / "cache", decode_fn=decoder)
+    assert len(cache.load(audio)) == 48000
+    assert len(cache.load(audio, sample_rate=8000)) == 24000
+    assert len(decoder.calls) == 2
+
+    # Same name, different content
+    audio.write_bytes(b"RIFF" + os.urandom(1024))
+    cache.load(audio)
+    assert len(decoder.calls) == 3
+
+
+def test_evicts_least_recently_used(tmp_path):
+    decoder = FakeDecoder(seconds=1.0)
+    # Room for two 1-second entries (64 kB each plus the .npy header)
+    cache = AudioCache(tmp_path / "cache", max_bytes=140_000, decode_fn=decoder)
+    clips = []
+    for i in range(3):
+        path = tmp_path / f"clip{i}.wav"
+        path.write_bytes(os.urandom(256))
+        clips.append(path)
+
+    cache.load(clips[0])
+    cache.load(clips[1])
+    os.utime(cache._path(cache.key(clips[0])), (0, 0))
+    os.utime(cache._path(cache.key(clips[1])), (1, 1))
+    cache.load(clips[2])
+
+    remaining = {p.stem for p in (tmp_path / "cache").glob("*.npy")}
+    assert remaining == {cache.key(clips[1]), cache.key(clips[2])}
+
+    # Evicted entries are decoded again on the next load
+    cache.load(clips[0])
+    assert len(decoder.calls) == 4
@@ -0,0 +1,38 @@
+"""
+Tests for benchmark_clustering's isolated runs: a child that dies without putting its
+result (e.g. OOM-killed) is recorded as failed instead of hanging the parent.
+"""
+
+import os
+import signal
+import time
+
+import numpy as np
+
+from benchmark_clustering import _run_in_process, run_isolated
+
+
+def _killed(queue):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def _raises(queue):
+    raise MemoryError("out of memory")
+
+
+def test_killed_run_is_recorded_as_failed():
+    start = time.monotonic()
+    result = _run_in_process(_killed, (), "killed", poll=0.1)
+    assert result == {'error': "killed by signal 9 (out of memory?)"}
+    assert time.monotonic() - start < 30
+
+
+def test_run_that_raises_is_recorded_as_failed():
+    assert _run_in_process(_raises, (), "raises", poll=0.1) == {'error': "exited with 1"}
+
+
+def test_isolated_run_returns_labels():
+    X = np.eye(4, dtype=np.float32).repeat(5, axis=0)
+    run = run_isolated(X, 0.5, "online", 64)
+    assert run['labels'].tolist() == np.arange(4).repeat(5).tolist()
+    assert run['time'] >= 0 and run['peak_rss_mb'] > 0
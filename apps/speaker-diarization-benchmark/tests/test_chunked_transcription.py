@@ -0,0 +1,69 @@
+"""
+Tests for chunked transcription: silence splitting, window planning and stitching.
+"""
+
+import numpy as np
+
+import transcribe as transcribe_module
+from transcribe import (SAMPLE_RATE, Segment, Word, find_split_points, plan_windows, stitch,
+                        transcribe_chunked)
+
+
+def speech_with_pauses(duration, pauses, sample_rate=SAMPLE_RATE):
+    rng = np.random.default_rng(0)
+    audio = rng.normal(scale=0.3, size=int(duration * sample_rate)).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * sample_rate):int(end * sample_rate)] = 0.0
+    return audio
+
+
+def test_split_points_land_in_silence():
+    audio = speech_with_pauses(100.0, [(27.0, 27.5), (55.0, 55.4), (83.0, 83.2)])
+    cuts = find_split_points(audio, chunk_length=30.0, search=5.0)
+    assert len(cuts) == 3
+    for cut, (start, end) in zip(cuts, [(27.0, 27.5), (55.0, 55.4), (83.0, 83.2)]):
+        assert start <= cut <= end
+
+
+def test_plan_windows_overlap_and_cover():
+    windows = plan_windows(100.0, [30.0, 60.0], overlap=2.0)
+    assert windows == [(0.0, 32.0, 0.0, 30.0), (28.0, 62.0, 30.0, 60.0), (58.0, 100.0, 60.0, 100.0)]
+
+
+def fake_backend(audio, n_threads):
+    """One word per second of audio (window-relative timestamps)."""
+    duration = len(audio) / SAMPLE_RATE
+    words = [{'word': f" w{i}", 'start': float(i), 'end': i + 0.5, 'probability': 1.0}
+             for i in range(int(duration))]
+    return {'text': "", 'language': "en",
+            'segments': [{'start': 0.0, 'end': duration, 'text': "".join(w['word'] for w in words), 'words': words}]}
+
+
+def test_chunked_stitching_deduplicates_overlap(monkeypatch):
+    monkeypatch.setitem(transcribe_module.BACKENDS, "fake", fake_backend)
+    audio = speech_with_pauses(95.0, [(29.6, 30.0), (59.6, 60.0)])
+    result = transcribe_chunked(audio, backend="fake", chunk_length=30.0, overlap=2.0, workers=1)
+
+    starts = [w.start for seg in result.segments for w in seg.words]
+    # One word per second, no duplicates from the overlapping windows
+    assert starts == sorted(starts)
+    assert len(starts) == len(set(round(s, 3) for s in starts))
+    assert len(starts) >= 90
+    assert result.language == "en"
+
+
+def test_stitch_rebuilds_segment_after_dropping_boundary_repeat():
+    def segment(*words):
+        ws = [Word(word=w, start=s, end=e, probability=1.0) for w, s, e in words]
+        return Segment(start=ws[0].start, end=ws[-1].end, text="".join(w.word for w in ws).strip(), words=ws)
+
+    # "there" straddles the cut and both windows keep it by midpoint jitter
+    first = segment((" hello", 8.0, 8.5), (" there", 9.6, 10.2))
+    second = segment((" there", 9.7, 10.3), (" friend", 10.5, 11.0))
+    windows = [(0.0, 11.0, 0.0, 10.0), (9.0, 20.0, 9.8, 20.0)]
+    segments = stitch(windows, [[first], [second]])
+
+    assert [seg.text for seg in segments] == ["hello there", "friend"]
+    assert (segments[1].start, segments[1].end) == (10.5, 11.0)
+    # The caller's segment is left untouched
+    assert second.text == "there friend" and len(second.words) == 2
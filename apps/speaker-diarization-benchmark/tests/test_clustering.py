@@ -0,0 +1,63 @@
+"""
+Tests for the speaker clustering engines.
+"""
+
+import numpy as np
+import pytest
+from sklearn.metrics import adjusted_rand_score
+
+from ingestion.clustering import OnlineClusterer, cluster_embeddings
+
+
+def speakers(n_speakers=4, n=2000, dim=64, noise=0.03, seed=0):
+    """Unit-norm embeddings around random speaker directions, in turns of a few dozen points."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_speakers, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    truth = np.repeat(rng.integers(n_speakers, size=n // 25 + 1), 25)[:n]
+    X = centers[truth] + rng.normal(scale=noise, size=(n, dim))
+    return X.astype(np.float32), truth
+
+
+def test_online_matches_agglomerative_on_separable_speakers():
+    X, truth = speakers()
+    online = cluster_embeddings(X, 0.5, method="online")
+    agglomerative = cluster_embeddings(X, 0.5, method="agglomerative")
+    assert adjusted_rand_score(online, agglomerative) == 1.0
+    assert adjusted_rand_score(online, truth) == 1.0
+
+
+def test_labels_are_numbered_by_first_appearance():
+    X, _ = speakers(seed=1)
+    labels = cluster_embeddings(X, 0.5, method="online")
+    _, first = np.unique(labels, return_index=True)
+    assert list(labels[np.sort(first)]) == list(range(labels.max() + 1))
+
+
+def test_online_respects_max_clusters():
+    X, _ = speakers(n_speakers=10, seed=2)
+    clusterer = OnlineClusterer(threshold=0.5, max_clusters=4)
+    labels = clusterer.fit_predict(X)
+    assert labels.max() + 1 <= 4
+    assert clusterer.n_clusters <= 4
+    assert all(len(r) <= clusterer.reservoir_size for r in clusterer.reservoirs)
+
+
+def test_online_is_incremental():
+    X, truth = speakers(seed=3)
+    clusterer = OnlineClusterer(threshold=0.5)
+    for chunk in np.array_split(X, 7):
+        clusterer.partial_fit(chunk)
+    assert clusterer.n_seen == len(X)
+    assert adjusted_rand_score(clusterer.predict(X), truth) == 1.0
+
+
+@pytest.mark.parametrize("method", ["agglomerative", "online"])
+def test_fewer_than_two_points(method):
+    assert list(cluster_embeddings(np.zeros((0, 8)), 0.5, method=method)) == []
+    assert list(cluster_embeddings(np.ones((1, 8)), 0.5, method=method)) == [0]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        cluster_embeddings(np.ones((4, 8)), 0.5, method="spectral")
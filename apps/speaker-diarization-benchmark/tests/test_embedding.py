@@ -0,0 +1,180 @@
+"""
+Tests for frame pooling and the whole-clip embedders.
+
+Frame pooling uses small hand-checked arrays; the embedders run on a stub model
+and a stub audio cache, so no model weights or audio files are required. The fbank
+tests compare against `torchaudio.compliance.kaldi` and are skipped without torchaudio.
+"""
+
+import numpy as np
+import pytest
+import torch
+
+import ingestion.embedding as embedding_module
+from ingestion.embedding import FrameEmbedder, WeSpeakerEmbedder, pool_frames
+
+NAN = [np.nan, np.nan]
+
+
+def test_pool_frames_means_unit_frames_and_skips_nan():
+    # Unit frames: [1, 0], [0, 1], (NaN), [0.6, 0.8]
+    frames = np.array([[2.0, 0.0], [0.0, 3.0], NAN, [3.0, 4.0]])
+    centers = np.array([0.5, 1.5, 2.5, 3.5])
+
+    pooled = pool_frames(frames, centers, [(0.0, 2.0), (2.0, 4.0), (0.0, 4.0)])
+
+    assert np.allclose(pooled[0], [0.5, 0.5])
+    # The NaN frame at 2.5 neither contributes nor counts towards the mean
+    assert np.allclose(pooled[1], [0.6, 0.8])
+    assert np.allclose(pooled[2], [1.6 / 3, 1.8 / 3])
+
+
+def test_pool_frames_empty_span_takes_nearest_valid_frame():
+    frames = np.array([[2.0, 0.0], [0.0, 3.0], NAN, [3.0, 4.0]])
+    centers = np.array([0.5, 1.5, 2.5, 3.5])
+
+    pooled = pool_frames(frames, centers, [
+        (0.6, 0.7),   # between 0.5 and 1.5, closer to 0.5
+        (2.0, 2.9),   # only the NaN frame inside; nearest valid centre is 1.5
+        (0.0, 0.1),   # before the first centre
+        (5.0, 6.0),   # after the last centre
+    ])
+
+    assert np.allclose(pooled, [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [0.6, 0.8]])
+
+
+def test_pool_frames_single_valid_frame():
+    frames = np.array([NAN, [0.0, 5.0], NAN])
+    centers = np.array([0.5, 1.5, 2.5])
+
+    pooled = pool_frames(frames, centers, [(0.0, 1.0), (1.0, 2.0), (2.2, 3.0), (9.0, 9.5)])
+
+    assert np.allclose(pooled, [[0.0, 1.0]] * 4)
+
+
+def test_pool_frames_single_frame_clip():
+    pooled = pool_frames(np.array([[3.0, 4.0]]), np.array([0.5]), [(0.0, 0.1), (2.0, 3.0)])
+
+    assert np.allclose(pooled, [[0.6, 0.8], [0.6, 0.8]])
+
+
+def test_pool_frames_all_nan_frames_give_nan_rows():
+    pooled = pool_frames(np.array([NAN, NAN]), np.array([0.5, 1.5]), [(0.0, 1.0), (1.0, 2.0)])
+
+    assert pooled.shape == (2, 2)
+    assert np.isnan(pooled).all()
+
+
+class StubAudioCache:
+    def waveform(self, clip_path, sample_rate=16000):
+        return torch.zeros(1, 4 * sample_rate), sample_rate
+
+
+def frame_embedder(monkeypatch, frames, centers):
+    monkeypatch.setattr(embedding_module, "get_audio_cache", lambda: StubAudioCache())
+    embedder = FrameEmbedder.__new__(FrameEmbedder)
+    embedder.sample_rate = 16000
+    embedder.frames = lambda waveform: (np.asarray(frames, dtype=np.float32), np.asarray(centers))
+    return embedder
+
+
+def test_frame_embedder_keeps_short_spans(monkeypatch):
+    embedder = frame_embedder(monkeypatch, [[1.0, 0.0], [0.0, 1.0]], [0.5, 1.5])
+
+    result = embedder.embed_spans("clip.wav", [(0.0, 1.0), (1.40, 1.45)])
+
+    assert result.indices == [0, 1]
+    assert np.allclose(result.embeddings, [[1.0, 0.0], [0.0, 1.0]])
+
+
+def test_frame_embedder_indices_skip_nan_rows(monkeypatch):
+    embedder = frame_embedder(monkeypatch, [[1.0, 0.0]] * 3, [0.5, 1.5, 2.5])
+    pooled = np.array([[1.0, 0.0], NAN, [0.0, 1.0]], dtype=np.float32)
+    monkeypatch.setattr(embedding_module, "pool_frames", lambda frames, centers, spans: pooled)
+
+    result = embedder.embed_spans("clip.wav", [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0)])
+
+    assert result.indices == [0, 2]
+    assert np.allclose(result.embeddings, [[1.0, 0.0], [0.0, 1.0]])
+
+
+def test_frame_embedder_all_nan_frames_embed_nothing(monkeypatch):
+    embedder = frame_embedder(monkeypatch, [NAN, NAN], [0.5, 1.5])
+
+    result = embedder.embed_spans("clip.wav", [(0.0, 1.0), (1.0, 2.0)])
+
+    assert result.indices == []
+    assert len(result.embeddings) == 0
+
+
+def wespeaker_embedder(**kwargs):
+    speaker = type("StubSpeaker", (), {"model": torch.nn.Identity()})()
+    return WeSpeakerEmbedder(speaker, **kwargs)
+
+
+def kaldi_fbank(waveform, embedder):
+    kaldi = pytest.importorskip("torchaudio.compliance.kaldi")
+    return kaldi.fbank(
+        waveform * embedder.scale,
+        num_mel_bins=embedder.num_mel_bins,
+        frame_length=embedder.frame_length,
+        frame_shift=embedder.frame_shift,
+        sample_frequency=embedder.sample_rate,
+        window_type='hamming',
+    )
+
+
+@pytest.fixture
+def waveform():
+    rng = np.random.default_rng(0)
+    # Not a whole number of blocks or shifts, so the last block is partial
+    return torch.from_numpy(rng.normal(scale=0.1, size=(1, 3 * 16000 + 1234)).astype(np.float32))
+
+
+def test_blockwise_features_match_single_fbank(waveform):
+    embedder = wespeaker_embedder(block_seconds=0.37)
+    expected = kaldi_fbank(waveform, embedder)
+
+    features = embedder.features(waveform)
+
+    assert features.shape == expected.shape
+    assert torch.allclose(features, expected, atol=1e-4)
+
+
+def test_features_of_clip_shorter_than_one_frame(waveform):
+    embedder = wespeaker_embedder()
+
+    assert embedder.features(waveform[:, :embedder.frame_samples - 1]).shape == (0, embedder.num_mel_bins)
+
+
+def test_frames_match_a_crop(waveform):
+    pytest.importorskip("torchaudio")
+    embedder = wespeaker_embedder(block_seconds=0.5)
+    features = embedder.features(waveform)
+
+    # Starts on a frame shift, so the crop's frames are exactly a slice of the whole-clip fbank
+    for start, end in [(0.0, 1.0), (0.25, 0.8), (1.03, 2.5), (2.9, 3.05)]:
+        s, e = int(start * 16000), int(end * 16000)
+        crop = kaldi_fbank(waveform[:, s:e], embedder)
+        first, last = embedder._frames(start, end, features.shape[0])
+        assert last - first == crop.shape[0]
+        assert torch.allclose(features[first:last], crop, atol=1e-4)
+
+
+def test_frames_boundaries():
+    embedder = wespeaker_embedder()
+    num_frames = 298  # a 3 s clip at 25 ms / 10 ms
+
+    # Shorter than one 25 ms frame
+    assert embedder._frames(1.0, 1.02, num_frames) == (0, 0)
+    # Exactly one frame
+    assert embedder._frames(1.0, 1.025, num_frames) == (100, 101)
+    # Negative start is clamped to the clip start
+    assert embedder._frames(-0.5, 0.05, num_frames) == (0, 3)
+    # Spans running past the end are clipped to the available frames
+    assert embedder._frames(2.9, 3.5, num_frames) == (290, 298)
+    assert embedder._frames(3.2, 3.5, num_frames) == (298, 298)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
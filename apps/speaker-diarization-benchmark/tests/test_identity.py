@@ -0,0 +1,103 @@
+"""
+Tests for the speaker identity index.
+
+Results are checked against the legacy per-speaker loops (mean prototype / min cdist).
+"""
+
+import json
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import cdist, cosine
+
+from ingestion.identity import SpeakerIndex, load_speaker_index, migrate_json
+
+
+@pytest.fixture
+def known_speakers():
+    rng = np.random.default_rng(0)
+    return {
+        "Alice": rng.normal(size=(5, 16)).tolist(),
+        "Bob": rng.normal(size=(3, 16)).tolist(),
+        "Empty": [],
+        "Carol": rng.normal(size=(1, 16)).tolist(),
+    }
+
+
+def legacy_prototype(centroid, known_speakers):
+    best, min_dist = None, 2.0
+    for name, embs in known_speakers.items():
+        if not embs:
+            continue
+        d = cosine(centroid, np.mean(np.array(embs), axis=0))
+        if d < min_dist:
+            best, min_dist = name, d
+    return best, min_dist
+
+
+def legacy_nearest(centroid, known_speakers):
+    best, min_dist = None, 2.0
+    for name, embs in known_speakers.items():
+        if not embs:
+            continue
+        d = np.min(cdist(centroid.reshape(1, -1), np.array(embs), metric='cosine'))
+        if d < min_dist:
+            best, min_dist = name, d
+    return best, min_dist
+
+
+def test_matches_legacy_loops(known_speakers):
+    index = SpeakerIndex.from_dict(known_speakers)
+    queries = np.random.default_rng(1).normal(size=(8, 16))
+
+    assert index.speakers == ["Alice", "Bob", "Carol"]
+    for mode, legacy in [("prototype", legacy_prototype), ("nearest", legacy_nearest)]:
+        for query, (name, dist) in zip(queries, index.identify(queries, mode=mode)):
+            expected_name, expected_dist = legacy(query, known_speakers)
+            assert name == expected_name
+            assert dist == pytest.approx(expected_dist, abs=1e-5)
+
+
+def test_threshold_and_empty_index(known_speakers):
+    index = SpeakerIndex.from_dict(known_speakers)
+    query = np.array(known_speakers["Bob"][0])
+
+    assert index.identify(query, threshold=0.01)[0][0] == "Bob"
+    assert index.identify(-query, threshold=0.5)[0][0] is None
+    assert SpeakerIndex.from_dict({}).identify(query) == [(None, 2.0)]
+
+
+def test_approximate_search_finds_enrolled_vectors(known_speakers):
+    index = SpeakerIndex.from_dict(known_speakers)
+    for name in ["Alice", "Bob", "Carol"]:
+        query = np.array(known_speakers[name][0])
+        best, dist = index.identify(query, approximate=True)[0]
+        assert best == name
+        assert dist == pytest.approx(0.0, abs=1e-5)
+
+
+def test_migration_round_trip_and_staleness(tmp_path, known_speakers):
+    json_path = tmp_path / "speaker_embeddings.json"
+    index_dir = tmp_path / "speaker_index"
+    json_path.write_text(json.dumps(known_speakers))
+
+    migrated = migrate_json(json_path, index_dir)
+    loaded = load_speaker_index(index_dir, json_path)
+
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert loaded.speakers == migrated.speakers
+    assert np.allclose(loaded.prototypes, migrated.prototypes)
+    assert loaded.metadata["speakers"] == {"Alice": 5, "Bob": 3, "Carol": 1}
+
+    # A newer JSON file triggers a rebuild
+    known_speakers["Dave"] = [[1.0] * 16]
+    json_path.write_text(json.dumps(known_speakers))
+    meta = json.loads((index_dir / "meta.json").read_text())
+    meta["source_mtime"] = 0
+    (index_dir / "meta.json").write_text(json.dumps(meta))
+
+    assert "Dave" in load_speaker_index(index_dir, json_path).speakers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,204 @@
+"""
+Tests for the SQLite manifest store.
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+import ingestion.manifest as manifest_module
+from ingestion.manifest import ManifestStore, get_store, update_manifest
+
+
+@pytest.fixture
+def manifest_json(tmp_path):
+    data = [
+        {
+            "id": f"clip_{i}.wav",
+            "source_file": "episode.wav",
+            "clip_path": f"data/clips/clip_{i}.wav",
+            "start_time": i * 60,
+            "duration": 60,
+            "transcriptions": {
+                "mlx_whisper_turbo": [{"start": 0.0, "end": 1.0, "text": "hi", "speaker": "SPEAKER_00"}],
+            },
+        }
+        for i in range(3)
+    ]
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(data, indent=2))
+    return path, data
+
+
+def test_import_export_round_trip(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    store = get_store(tmp_path / "manifest.db", json_path)
+    assert store.ids() == [e["id"] for e in data]
+    assert store.get("clip_1.wav") == data[1]
+
+    out = tmp_path / "exported.json"
+    store.export_json(out)
+    assert json.loads(out.read_text()) == data
+
+
+def test_update_manifest_writes_one_key(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    store = get_store(tmp_path / "manifest.db", json_path)
+    segments = [{"start": 0.0, "end": 2.0, "text": "hello", "speaker": "Alice", "extra": 1}]
+    update_manifest(tmp_path / "clip_2.wav", "segment_level", segments, "hello", store=store)
+
+    entry = store.get("clip_2.wav")
+    assert list(entry["transcriptions"]) == ["mlx_whisper_turbo", "segment_level"]
+    assert entry["transcriptions"]["segment_level"] == [
+        {"start": 0.0, "end": 2.0, "text": "hello", "speaker": "Alice"}
+    ]
+    # Unknown clips are not created
+    assert not store.set_transcription("missing.wav", "segment_level", segments)
+
+
+def test_update_preserves_order_and_removes_keys(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    store = get_store(tmp_path / "manifest.db", json_path)
+
+    def edit(entry):
+        entry["transcriptions"]["new"] = []
+        del entry["transcriptions"]["mlx_whisper_turbo"]
+        entry["transcription_metadata"] = {"new": {"threshold": 0.5}}
+
+    assert store.update("clip_0.wav", edit)
+    entry = store.get("clip_0.wav")
+    assert entry["transcriptions"] == {"new": []}
+    assert entry["transcription_metadata"] == {"new": {"threshold": 0.5}}
+    assert store.ids() == [e["id"] for e in data]
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path, manifest_json):
+    json_path, _ = manifest_json
+    db_path = tmp_path / "manifest.db"
+    get_store(db_path, json_path).close()
+
+    def writer(n):
+        store = ManifestStore(db_path)
+        for i in range(10):
+            store.set_transcription(f"clip_{n % 3}.wav", f"workflow_{n}_{i}", [])
+
+            def bump(entry):
+                entry["counter"] = entry.get("counter", 0) + 1
+
+            store.update("clip_0.wav", bump)
+        store.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    store = ManifestStore(db_path)
+    assert store.get("clip_0.wav")["counter"] == 60
+    total = sum(len(store.get(cid)["transcriptions"]) for cid in store.ids())
+    assert total == 3 + 60
+
+
+def test_json_is_newer(tmp_path, manifest_json):
+    json_path, _ = manifest_json
+    store = get_store(tmp_path / "manifest.db", json_path)
+    assert not store.json_is_newer(json_path)
+    store.export_json(json_path)
+    assert not store.json_is_newer(json_path)
+
+
+def touch_later(path):
+    st = path.stat()
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+
+def test_update_manifest_does_not_touch_json(tmp_path, manifest_json, monkeypatch):
+    json_path, data = manifest_json
+    db_path = tmp_path / "manifest.db"
+    monkeypatch.setattr(manifest_module, "DEFAULT_DB_PATH", db_path)
+    monkeypatch.setattr(manifest_module, "DEFAULT_MANIFEST_PATH", json_path)
+    get_store(db_path, json_path).close()
+    before = json_path.read_bytes()
+    mtime = json_path.stat().st_mtime_ns
+
+    segments = [{"start": 0.0, "end": 2.0, "text": "hello", "speaker": "Alice"}]
+    update_manifest(tmp_path / "clip_1.wav", "segment_level", segments, "hello")
+    with get_store(db_path, json_path) as store:
+        store.set_transcription("clip_2.wav", "segment_level", segments)
+
+    assert json_path.read_bytes() == before
+    assert json_path.stat().st_mtime_ns == mtime
+    with get_store(db_path, json_path) as store:
+        # Not re-imported over the store's writes either
+        assert store.is_dirty()
+        assert store.get("clip_1.wav")["transcriptions"]["segment_level"] == segments
+
+
+def test_writes_are_mirrored_to_json_on_close_with_export(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    db_path = tmp_path / "manifest.db"
+    store = get_store(db_path, json_path)
+    store.set_transcription("clip_0.wav", "segment_level", [])
+    assert store.add({"id": "clip_3.wav", "clip_path": "data/clips/clip_3.wav", "transcriptions": {}})
+    assert not store.add({"id": "clip_3.wav"})
+    assert store.delete("clip_1.wav")
+    store.close(export=True)
+
+    mirrored = json.loads(json_path.read_text())
+    assert [e["id"] for e in mirrored] == ["clip_0.wav", "clip_2.wav", "clip_3.wav"]
+    assert mirrored[0]["transcriptions"]["segment_level"] == []
+    assert not ManifestStore(db_path).is_dirty()
+
+
+def test_close_without_writes_leaves_json_alone(tmp_path, manifest_json):
+    json_path, _ = manifest_json
+    get_store(tmp_path / "manifest.db", json_path).close()
+    mtime = json_path.stat().st_mtime_ns
+
+    with get_store(tmp_path / "manifest.db", json_path) as store:
+        store.get("clip_0.wav")
+    assert json_path.stat().st_mtime_ns == mtime
+
+
+def test_edited_json_is_reimported_when_store_is_clean(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    db_path = tmp_path / "manifest.db"
+    get_store(db_path, json_path).close()
+
+    data[0]["duration"] = 61
+    json_path.write_text(json.dumps(data))
+    touch_later(json_path)
+
+    with get_store(db_path, json_path) as store:
+        assert store.get("clip_0.wav")["duration"] == 61
+
+
+def test_import_does_not_discard_unexported_writes(tmp_path, manifest_json):
+    json_path, data = manifest_json
+    db_path = tmp_path / "manifest.db"
+    get_store(db_path, json_path).close()
+
+    # A writer without a mirror (or one that crashed before closing) leaves the store dirty
+    store = ManifestStore(db_path)
+    store.set_transcription("clip_0.wav", "store_only", [])
+    store.close()
+    data[1]["duration"] = 99
+    json_path.write_text(json.dumps(data))
+    touch_later(json_path)
+
+    store = get_store(db_path, json_path)
+    # Neither side is overwritten: no import on open, no export on close(export=True)
+    assert "store_only" in store.get("clip_0.wav")["transcriptions"]
+    assert store.get("clip_1.wav")["duration"] == 60
+    with pytest.raises(RuntimeError):
+        store.import_json(json_path)
+    store.close(export=True)
+    assert json.loads(json_path.read_text())[1]["duration"] == 99
+
+    with get_store(db_path, json_path) as store:
+        store.import_json(json_path, force=True)
+        assert "store_only" not in store.get("clip_0.wav")["transcriptions"]
+        assert not store.is_dirty()
@@ -0,0 +1,73 @@
+"""
+Tests for the process-wide model registry.
+
+Fake models stand in for torch modules, so no model downloads are required.
+"""
+
+import pytest
+
+from ingestion.models import ModelRegistry
+
+
+class FakeTensor:
+    def __init__(self, numel):
+        self._numel = numel
+
+    def numel(self):
+        return self._numel
+
+    def element_size(self):
+        return 4
+
+
+class FakeModel:
+    def __init__(self, numel):
+        self.weights = [FakeTensor(numel)]
+
+    def parameters(self):
+        return iter(self.weights)
+
+    def buffers(self):
+        return iter([])
+
+
+def test_loads_lazily_once_per_key():
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return FakeModel(10)
+
+    first = registry.get("pyannote/embedding", loader)
+    second = registry.get("pyannote/embedding", loader)
+    other_device = registry.get("pyannote/embedding", loader, device="mps")
+
+    assert first is second
+    assert other_device is not first
+    assert len(calls) == 2
+    assert registry.stats['hits'] == 1
+    assert registry.total_bytes() == 80
+
+
+def test_failed_load_is_not_cached():
+    registry = ModelRegistry()
+    assert registry.get("broken", lambda: None) is None
+    assert len(registry) == 0
+
+
+def test_evicts_least_recently_used_under_memory_cap():
+    registry = ModelRegistry(max_bytes=100)
+    registry.get("a", lambda: FakeModel(10))  # 40 bytes
+    registry.get("b", lambda: FakeModel(10))  # 40 bytes
+    registry.get("a", lambda: FakeModel(10))  # touch "a"
+    registry.get("c", lambda: FakeModel(10))  # over the cap: evicts "b"
+
+    assert ("a", "cpu", None) in registry
+    assert ("b", "cpu", None) not in registry
+    assert ("c", "cpu", None) in registry
+    assert registry.stats['evictions'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
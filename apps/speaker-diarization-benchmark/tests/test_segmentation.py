@@ -0,0 +1,81 @@
+"""
+Tests for the vectorized change-point segmenter against the per-word loop it replaced.
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import cosine
+
+from ingestion.segmentation import ChangePointSegmenter, segments_from_boundaries
+from transcribe import Word
+
+
+def loop_boundaries(embeddings, threshold):
+    """The previous segmentation loop: distance to the mean of the last 3 words of the current segment."""
+    boundaries, current = [], [embeddings[0]]
+    for i in range(1, len(embeddings)):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            dist = cosine(np.mean(np.stack(current[-3:]), axis=0), embeddings[i])
+        if dist > threshold:
+            boundaries.append(i)
+            current = [embeddings[i]]
+        else:
+            current.append(embeddings[i])
+    return boundaries
+
+
+def speaker_turns(n=300, dim=16, noise=0.8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(4, dim))
+    truth = np.repeat(rng.integers(4, size=n // 6 + 1), 6)[:n]
+    return centers[truth] + rng.normal(scale=noise, size=(n, dim))
+
+
+def words(n):
+    return [Word(word=f"w{i}", start=float(i), end=i + 0.5, probability=1.0) for i in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_loop_for_every_threshold(seed):
+    X = speaker_turns(seed=seed)
+    # Degenerate rows behave like scipy (NaN distance, never a boundary)
+    X[17] = 0.0
+    X[40] = np.nan
+    thresholds = [0.05, 0.2, 0.4, 0.6, 0.9, 1.2]
+    sweep = ChangePointSegmenter(list(X)).boundary_sets(thresholds)
+    for threshold in thresholds:
+        assert list(sweep[threshold]) == loop_boundaries(list(X), threshold)
+
+
+def test_tested_distances_are_the_loop_distances():
+    X = speaker_turns(n=60)
+    segmenter = ChangePointSegmenter(X)
+    boundaries = segmenter.boundaries(0.5)
+    tested = segmenter.tested_distances(boundaries)
+
+    starts = np.zeros(len(X), dtype=int)
+    for b in boundaries:
+        starts[b:] = b
+    for i in range(1, len(X)):
+        lo = max(starts[i - 1], i - 3)
+        assert tested[i] == pytest.approx(cosine(X[lo:i].mean(axis=0), X[i]))
+    assert np.isnan(tested[0])
+
+
+def test_segments_from_boundaries():
+    segments = segments_from_boundaries(words(5), [2, 4])
+    assert [s['text'] for s in segments] == ["w0 w1", "w2 w3", "w4"]
+    assert [s['word_indices'] for s in segments] == [[0, 1], [2, 3], [4]]
+    assert segments[1]['start'] == 2.0 and segments[1]['end'] == 3.5
+    assert segments_from_boundaries([], []) == []
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3])
+def test_short_inputs(n):
+    X = speaker_turns(n=max(n, 1))[:n]
+    segmenter = ChangePointSegmenter(list(X))
+    assert list(segmenter.boundaries(0.0)) == (loop_boundaries(list(X), 0.0) if n else [])
+    assert sum(s['word_count'] for s in segments_from_boundaries(words(n), segmenter.boundaries(0.5))) == n
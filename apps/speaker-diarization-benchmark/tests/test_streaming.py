@@ -0,0 +1,155 @@
+"""
+Tests for live streaming diarization, replaying a synthetic two-speaker recording.
+"""
+
+import io
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ingestion.identity import SpeakerIndex
+from ingestion.streaming import SpeakerTracker, StreamingDiarizer, follow_file, read_pcm, replay
+from transcribe import SAMPLE_RATE, Segment, Word
+
+TONES = {"a": 200.0, "b": 700.0}
+
+
+def recording(turns=(("a", 10), ("b", 10), ("a", 10))):
+    """One 0.5 s tone burst ("word") per second; the tone identifies the speaker."""
+    chunks = []
+    for speaker, seconds in turns:
+        t = np.arange(int(0.5 * SAMPLE_RATE)) / SAMPLE_RATE
+        burst = 0.5 * np.sin(2 * np.pi * TONES[speaker] * t)
+        second = np.zeros(SAMPLE_RATE)
+        second[int(0.1 * SAMPLE_RATE):int(0.1 * SAMPLE_RATE) + len(burst)] = burst
+        chunks.extend([second] * seconds)
+    return np.concatenate(chunks).astype(np.float32)
+
+
+def tone_of(samples):
+    spectrum = np.abs(np.fft.rfft(samples))
+    freqs = np.fft.rfftfreq(len(samples), 1 / SAMPLE_RATE)
+    return max(TONES, key=lambda s: spectrum[np.argmin(np.abs(freqs - TONES[s]))])
+
+
+def fake_transcribe(samples):
+    """A word per burst (timestamps from the audio itself), one segment per run of the same tone."""
+    frame = int(0.01 * SAMPLE_RATE)
+    energy = np.abs(samples[:len(samples) // frame * frame]).reshape(-1, frame).max(axis=1) > 0.1
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], energy.astype(int), [0]])))
+    segments, current = [], []
+    for on, off in zip(edges[::2], edges[1::2]):
+        text = tone_of(samples[on * frame:off * frame])
+        word = Word(word=f" {text}", start=on * 0.01, end=off * 0.01, probability=1.0)
+        if current and current[-1].word != word.word:
+            segments.append(current)
+            current = []
+        current.append(word)
+    if current:
+        segments.append(current)
+    return [Segment(start=ws[0].start, end=ws[-1].end, text="".join(w.word for w in ws), words=ws) for ws in segments]
+
+
+def fake_embed(samples):
+    spectrum = np.abs(np.fft.rfft(samples))
+    freqs = np.fft.rfftfreq(len(samples), 1 / SAMPLE_RATE)
+    return np.array([spectrum[np.argmin(np.abs(freqs - TONES[s]))] for s in sorted(TONES)] + [1e-3])
+
+
+def diarizer(index=None, **kwargs):
+    return StreamingDiarizer(fake_transcribe, fake_embed, SpeakerTracker(index), **kwargs)
+
+
+def test_replay_assigns_enrolled_and_anonymous_speakers():
+    index = SpeakerIndex.from_dict({"Alice": [[1.0, 0.0, 0.0]]})
+    segments = list(diarizer(index, chunk_seconds=2.5).run(replay(recording(), 0.5, speed=None)))
+
+    words = [w for seg in segments for w in seg['text'].split()]
+    assert len(words) == 30
+    assert sum(seg['word_count'] for seg in segments) == 30
+    starts = [seg['start'] for seg in segments]
+    assert starts == sorted(starts)
+    for seg in segments:
+        expected = "Alice" if set(seg['text'].split()) == {"a"} else "SPEAKER_00"
+        assert seg['speaker'] == expected
+        assert set(seg['text'].split()) in ({"a"}, {"b"})
+        assert seg['match_info']['best_match'] == "Alice"
+    # Batch schema, JSON-serializable for the JSONL stream
+    assert all({"start", "end", "text", "speaker"} <= set(seg) for seg in segments)
+    json.dumps(segments)
+
+
+def test_segments_are_emitted_within_chunk_plus_holdback():
+    d = diarizer(chunk_seconds=2.0, holdback=1.0)
+    audio = recording()
+    emitted = []
+    for chunk in replay(audio, 0.25, speed=None):
+        for seg in d.feed(chunk):
+            emitted.append(seg)
+            # Words are at most 0.6 s long; a word can wait for one extra pass
+            assert d.position - seg['end'] <= d.chunk_seconds + d.holdback + 0.6
+    emitted += d.flush()
+    assert len(emitted) and sum(seg['word_count'] for seg in emitted) == 30
+    # Only the uncommitted tail and the context are buffered
+    assert len(d._buffer) <= (d.context + d.min_embed_duration + d.chunk_seconds + d.holdback) * SAMPLE_RATE
+
+
+def test_replay_paces_in_real_time():
+    start = time.monotonic()
+    chunks = list(replay(np.zeros(SAMPLE_RATE, dtype=np.float32), 0.25, speed=10.0))
+    assert time.monotonic() - start >= 0.09
+    assert sum(len(c) for c in chunks) == SAMPLE_RATE
+
+
+def test_anonymous_speaker_takes_enrolled_name_once_its_mean_matches():
+    index = SpeakerIndex.from_dict({"Bob": [[1.0, 0.0]]})
+    tracker = SpeakerTracker(index, id_threshold=0.1, cluster_threshold=0.6)
+    # Each embedding alone is too far from Bob, but their running mean matches
+    assert tracker.assign(np.array([1.0, 0.6]))[0] == "SPEAKER_00"
+    assert tracker.assign(np.array([1.0, -0.6]))[0] == "Bob"
+    assert tracker.assign(np.array([np.nan, 0.0]))[0] == "UNKNOWN"
+
+
+def test_read_pcm_from_a_pipe():
+    audio = recording((("a", 2),))
+    pipe = io.BytesIO(audio.astype("<f4").tobytes())
+    chunks = list(read_pcm(pipe, 0.3, fmt="f32le"))
+    np.testing.assert_array_equal(np.concatenate(chunks), audio)
+
+
+def test_follow_growing_wav(tmp_path):
+    audio = recording((("a", 2), ("b", 2)))
+    pcm = (audio * 32767).astype("<i2").tobytes()
+    path = tmp_path / "live.wav"
+    # Header as written by a recorder that has not finished (sizes left at zero)
+    header = (b"RIFF" + struct.pack("<I", 0) + b"WAVE"
+              + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+              + b"data" + struct.pack("<I", 0))
+    path.write_bytes(b"")
+
+    def record():
+        with open(path, "ab") as f:
+            f.write(header)
+            for pos in range(0, len(pcm), 8001):
+                f.write(pcm[pos:pos + 8001])
+                f.flush()
+                time.sleep(0.01)
+
+    writer = threading.Thread(target=record)
+    writer.start()
+    received = np.concatenate(list(follow_file(path, 0.5, poll_interval=0.02, idle_timeout=0.3)))
+    writer.join()
+    np.testing.assert_allclose(received, audio, atol=1e-4)
+
+
+def test_follow_rejects_wrong_sample_rate(tmp_path):
+    path = tmp_path / "stereo.wav"
+    path.write_bytes(b"RIFF" + struct.pack("<I", 0) + b"WAVE"
+                     + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 2, 44100, 44100 * 4, 4, 16)
+                     + b"data" + struct.pack("<I", 0))
+    with pytest.raises(ValueError):
+        list(follow_file(path, idle_timeout=0.1))
@@ -0,0 +1,78 @@
+"""
+Tests for the content-addressed transcription cache.
+"""
+
+import os
+
+import pytest
+
+from ingestion.transcription_cache import TranscriptionCache, decode_result, encode_result
+from transcribe import Segment, TranscriptionResult, Word
+
+
+def make_result(text="hello world"):
+    words = [Word(word=" hello", start=0.0, end=0.4, probability=0.9),
+             Word(word=" wörld", start=0.5, end=1.1, probability=0.75)]
+    return TranscriptionResult(
+        text=text,
+        segments=[
+            Segment(start=0.0, end=1.1, text=text, words=words),
+            Segment(start=1.2, end=2.0, text="", words=[], speaker=None),
+        ],
+        language="en",
+    )
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "clip.wav"
+    path.write_bytes(b"RIFF" + os.urandom(1024))
+    return path
+
+
+def test_encode_decode_round_trip():
+    result = make_result()
+    assert decode_result(encode_result(result)).model_dump() == result.model_dump()
+
+
+def test_hit_and_miss_counters(tmp_path, audio):
+    cache = TranscriptionCache(tmp_path / "cache")
+    calls = []
+
+    def fake_transcribe(path):
+        calls.append(path)
+        return make_result()
+
+    first = cache.get_or_transcribe(audio, fake_transcribe)
+    second = cache.get_or_transcribe(audio, fake_transcribe)
+    assert len(calls) == 1
+    assert second.model_dump() == first.model_dump()
+    assert cache.stats() == {'transcription_cache_hits': 1, 'transcription_cache_misses': 1}
+
+
+def test_key_depends_on_content_model_and_options(tmp_path, audio):
+    cache = TranscriptionCache(tmp_path / "cache")
+    cache.put(audio, make_result())
+    assert cache.get(audio) is not None
+    assert cache.get(audio, model_name="other-model") is None
+    assert cache.get(audio, options={"word_timestamps": False}) is None
+
+    # Re-cut clip with the same file name
+    audio.write_bytes(b"RIFF" + os.urandom(1024))
+    assert cache.get(audio) is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = TranscriptionCache(tmp_path / "cache", max_bytes=None)
+    paths = []
+    for i in range(3):
+        audio = tmp_path / f"clip_{i}.wav"
+        audio.write_bytes(os.urandom(256))
+        paths.append(cache.put(audio, make_result(f"clip {i}")))
+        os.utime(paths[-1], (1000 + i, 1000 + i))
+
+    # Touch the oldest entry so the second one becomes least recently used
+    cache.get(tmp_path / "clip_0.wav")
+    cache.max_bytes = sum(p.stat().st_size for p in paths) - 1
+    cache.evict()
+    assert [p.exists() for p in paths] == [True, False, True]
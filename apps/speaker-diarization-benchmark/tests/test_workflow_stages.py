@@ -0,0 +1,95 @@
+"""
+Tests for the staged workflow base class (embed -> cluster -> identify -> assemble).
+
+These use synthetic embeddings, so no audio files or models are required.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ingestion.embedding import EmbeddingResult
+from ingestion.workflows.local.segment_level import SegmentLevelWorkflow
+from ingestion.workflows.base import (
+    StagedWorkflow,
+    EmbeddingArtifact,
+    ClusterArtifact,
+    IdentityArtifact,
+)
+
+
+class CountingWorkflow(StagedWorkflow):
+    def __init__(self):
+        super().__init__({})
+        self.calls = []
+
+    def embed(self, clip_path, transcription_result, stats):
+        self.calls.append("embed")
+        X = np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]])
+        return EmbeddingArtifact(items=["a", "b", "c"], embeddings=X, indices=[0, 1, 2])
+
+    def cluster(self, embedded, stats):
+        self.calls.append("cluster")
+        return ClusterArtifact(embeddings=embedded, labels=np.array([0, 0, 1]))
+
+    def assemble(self, identities, stats):
+        self.calls.append("assemble")
+        labels = identities.clusters.labels
+        return [{"text": item, "speaker": identities.names[int(l)]}
+                for item, l in zip(identities.clusters.embeddings.items, labels)]
+
+
+class RenamingWorkflow(CountingWorkflow):
+    def identify(self, clusters, stats):
+        self.calls.append("identify")
+        return IdentityArtifact(clusters=clusters, names={0: "Alice", 1: "Bob"})
+
+
+def test_default_identify_uses_generic_labels():
+    workflow = CountingWorkflow()
+    segments, stats = workflow.run("clip.wav", None)
+
+    assert [s["speaker"] for s in segments] == ["SPEAKER_00", "SPEAKER_00", "SPEAKER_01"]
+    assert workflow.calls == ["embed", "cluster", "assemble"]
+    assert {"embedding_time", "clustering_time", "identification_time"} <= set(stats)
+
+
+def test_identify_override_reuses_upstream_artifacts():
+    workflow = RenamingWorkflow()
+    segments, _ = workflow.run("clip.wav", None)
+
+    assert [s["speaker"] for s in segments] == ["Alice", "Alice", "Bob"]
+    assert workflow.calls.count("embed") == 1
+    assert workflow.calls.count("cluster") == 1
+
+
+def test_cluster_centroids():
+    embedded = EmbeddingArtifact(items=[], embeddings=np.array([[1.0, 0.0], [3.0, 0.0], [0.0, 2.0]]), indices=[0, 1, 2])
+    clusters = ClusterArtifact(embeddings=embedded, labels=np.array([0, 0, 1]))
+
+    centroids = clusters.centroids()
+    assert np.allclose(centroids[0], [2.0, 0.0])
+    assert np.allclose(centroids[1], [0.0, 2.0])
+
+
+class NaNEmbedder:
+    def embed_spans(self, clip_path, spans):
+        return EmbeddingResult(embeddings=np.full((len(spans), 4), np.nan), indices=list(range(len(spans))))
+
+
+def test_segment_level_all_nan_embeddings_keep_segments_as_unknown(monkeypatch):
+    workflow = SegmentLevelWorkflow({})
+    monkeypatch.setattr(workflow, "_load_model", lambda: NaNEmbedder())
+    transcript = SimpleNamespace(segments=[
+        SimpleNamespace(start=0.0, end=1.0, text="hello"),
+        SimpleNamespace(start=1.0, end=2.0, text="world"),
+    ])
+
+    segments, _ = workflow.run("clip.wav", transcript)
+
+    assert [(s["text"], s["speaker"]) for s in segments] == [("hello", "UNKNOWN"), ("world", "UNKNOWN")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
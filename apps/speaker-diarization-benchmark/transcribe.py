@@ -1,11 +1,39 @@
 # NOTE: The only combination of transcription we should be using is mlx-community/whisper-large-v3-turbo.
 # Do not change this model configuration without explicit approval.
+#
+# Backends: "mlx" (default, Apple Silicon) runs MODEL_NAME through mlx_whisper. "faster-whisper" and
+# "whisper.cpp" run the same large-v3-turbo weights on Linux/CPU.
+#
+# Chunked mode (`transcribe(path, chunked=True)`) splits long recordings at the quietest frame near
+# every `chunk_length` seconds, transcribes the windows (padded by `overlap` seconds on each side)
+# in a process pool and stitches the results: each word is kept only from the window whose core
+# range contains its midpoint, so words in the overlaps are not duplicated.
 
-import mlx_whisper
+import logging
+import multiprocessing
+import os
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
 from pydantic import BaseModel, Field
-from typing import List, Optional
+
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = "mlx-community/whisper-large-v3-turbo"
+# Decode options passed to mlx_whisper.transcribe (part of the transcription cache key)
+DECODE_OPTIONS = {"word_timestamps": True}
+
+# Same weights under the names the CPU engines use
+FASTER_WHISPER_MODEL = "large-v3-turbo"
+WHISPER_CPP_MODEL = "large-v3-turbo"
+
+SAMPLE_RATE = 16000
+CHUNK_LENGTH = 120.0  # seconds between split points
+CHUNK_OVERLAP = 2.0  # seconds of context added on each side of a window
+SPLIT_SEARCH = 10.0  # look for silence in the last N seconds before each split point
 
 class Word(BaseModel):
     word: str
@@ -25,21 +53,76 @@ class TranscriptionResult(BaseModel):
     segments: List[Segment]
     language: str = "en"
 
-def transcribe(audio_path: str) -> TranscriptionResult:
-    """
-    Transcribes the given audio file using mlx_whisper with the standardized model.
-    Returns a structured TranscriptionResult.
-    """
-    print(f"Transcribing {audio_path} with {MODEL_NAME}...")
-    
-    # Run transcription with word timestamps
-    result = mlx_whisper.transcribe(
-        audio_path, 
-        path_or_hf_repo=MODEL_NAME, 
-        word_timestamps=True
-    )
-    
-    # Parse into Pydantic models
+
+# --------------------------------------------------------------------------- backends
+#
+# A backend takes a file path or a 16 kHz mono float32 array plus a thread budget, and
+# returns a whisper-style dict: {'text', 'language', 'segments': [{'start', 'end', 'text',
+# 'words': [{'word', 'start', 'end', 'probability'}]}]}.
+
+_models: Dict[str, Any] = {}
+
+
+def _mlx_backend(audio: Union[str, np.ndarray], n_threads: int) -> Dict[str, Any]:
+    import mlx_whisper
+
+    return mlx_whisper.transcribe(audio, path_or_hf_repo=MODEL_NAME, **DECODE_OPTIONS)
+
+
+def _faster_whisper_backend(audio: Union[str, np.ndarray], n_threads: int) -> Dict[str, Any]:
+    from faster_whisper import WhisperModel
+
+    if "faster-whisper" not in _models:
+        _models["faster-whisper"] = WhisperModel(FASTER_WHISPER_MODEL, device="cpu", compute_type="int8",
+                                                 cpu_threads=n_threads)
+    segments, info = _models["faster-whisper"].transcribe(audio, **DECODE_OPTIONS)
+    segments = [
+        {
+            'start': s.start,
+            'end': s.end,
+            'text': s.text,
+            'words': [{'word': w.word, 'start': w.start, 'end': w.end, 'probability': w.probability}
+                      for w in (s.words or [])],
+        }
+        for s in segments
+    ]
+    return {'text': "".join(s['text'] for s in segments), 'segments': segments, 'language': info.language}
+
+
+def _whisper_cpp_backend(audio: Union[str, np.ndarray], n_threads: int) -> Dict[str, Any]:
+    from pywhispercpp.model import Model as PyWhisperModel
+
+    if "whisper.cpp" not in _models:
+        _models["whisper.cpp"] = PyWhisperModel(WHISPER_CPP_MODEL, print_realtime=False, print_progress=False)
+    # One whisper.cpp segment per word; t0/t1 are in centiseconds
+    tokens = _models["whisper.cpp"].transcribe(audio, n_threads=n_threads, token_timestamps=True,
+                                               max_len=1, split_on_word=True)
+
+    segments, current = [], []
+    for t in tokens:
+        if not t.text.strip():
+            continue
+        current.append({'word': t.text, 'start': t.t0 / 100, 'end': t.t1 / 100, 'probability': 0.0})
+        if t.text.rstrip().endswith(('.', '?', '!')):
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+
+    segments = [{'start': ws[0]['start'], 'end': ws[-1]['end'], 'text': "".join(w['word'] for w in ws), 'words': ws}
+                for ws in segments]
+    return {'text': "".join(s['text'] for s in segments), 'segments': segments, 'language': "en"}
+
+
+BACKENDS: Dict[str, Callable[[Union[str, np.ndarray], int], Dict[str, Any]]] = {
+    "mlx": _mlx_backend,
+    "faster-whisper": _faster_whisper_backend,
+    "whisper.cpp": _whisper_cpp_backend,
+}
+
+
+def _parse_segments(result: Dict[str, Any], offset: float = 0.0) -> List[Segment]:
+    """Whisper-style segment dicts -> Segment models, shifted by `offset` seconds."""
     segments = []
     for seg in result.get('segments', []):
         words = []
@@ -47,35 +130,208 @@ def transcribe(audio_path: str) -> TranscriptionResult:
             for w in seg['words']:
                 words.append(Word(
                     word=w['word'],
-                    start=w['start'],
-                    end=w['end'],
+                    start=w['start'] + offset,
+                    end=w['end'] + offset,
                     probability=w.get('probability', 0.0)
                 ))
-        
+
         segments.append(Segment(
-            start=seg['start'],
-            end=seg['end'],
+            start=seg['start'] + offset,
+            end=seg['end'] + offset,
             text=seg['text'].strip(),
             words=words
         ))
-        
+    return segments
+
+
+# --------------------------------------------------------------------------- chunking
+
+def load_audio(audio_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decodes any ffmpeg-readable file to a mono float32 array."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", str(audio_path),
+           "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, dtype=np.float32)
+
+
+def find_split_points(audio: np.ndarray,
+                      sample_rate: int = SAMPLE_RATE,
+                      chunk_length: float = CHUNK_LENGTH,
+                      search: float = SPLIT_SEARCH,
+                      frame: float = 0.03) -> List[float]:
+    """Split times (seconds): the lowest-energy frame in the `search` seconds before every `chunk_length`."""
+    frame_len = int(frame * sample_rate)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return []
+    energy = np.sqrt(np.mean(np.square(audio[:n_frames * frame_len].reshape(n_frames, frame_len)), axis=1))
+
+    total = len(audio) / sample_rate
+    search = min(search, chunk_length / 2)
+    cuts = []
+    pos = 0.0
+    while total - pos > chunk_length:
+        lo = int((pos + chunk_length - search) / frame)
+        hi = max(min(int((pos + chunk_length) / frame), n_frames), lo + 1)
+        cut = (lo + int(np.argmin(energy[lo:hi])) + 0.5) * frame
+        cuts.append(cut)
+        pos = cut
+    return cuts
+
+
+def plan_windows(duration: float, cuts: List[float], overlap: float = CHUNK_OVERLAP) -> List[Tuple[float, float, float, float]]:
+    """(window_start, window_end, keep_start, keep_end) per chunk."""
+    bounds = [0.0] + list(cuts) + [duration]
+    return [
+        (max(0.0, bounds[i] - overlap), min(duration, bounds[i + 1] + overlap), bounds[i], bounds[i + 1])
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def stitch(windows: List[Tuple[float, float, float, float]], results: List[List[Segment]]) -> List[Segment]:
+    """
+    Merges per-window segments (already in absolute time). Words are kept from the window
+    whose keep range contains their midpoint; segments losing words are trimmed.
+    """
+    stitched = []
+    last = len(windows) - 1
+    for i, ((_, _, keep_start, keep_end), segments) in enumerate(zip(windows, results)):
+
+        def inside(start, end):
+            mid = start + (end - start) / 2
+            return (i == 0 or mid >= keep_start) and (i == last or mid < keep_end)
+
+        for seg in segments:
+            if not seg.words:
+                if inside(seg.start, seg.end):
+                    stitched.append(seg)
+                continue
+            words = [w for w in seg.words if inside(w.start, w.end)]
+            if not words:
+                continue
+            if len(words) == len(seg.words):
+                stitched.append(seg)
+            else:
+                stitched.append(Segment(start=words[0].start, end=words[-1].end,
+                                        text="".join(w.word for w in words).strip(), words=words))
+
+    # Drop a word that repeats the previous kept word over the same time (boundary jitter)
+    deduped = []
+    prev = None
+    for seg in stitched:
+        if not seg.words:
+            deduped.append(seg)
+            continue
+        kept = []
+        for w in seg.words:
+            if prev is not None and w.start < prev.end and w.word.strip().lower() == prev.word.strip().lower():
+                continue
+            kept.append(w)
+            prev = w
+        if len(kept) == len(seg.words):
+            deduped.append(seg)
+        elif kept:
+            deduped.append(Segment(start=kept[0].start, end=kept[-1].end,
+                                   text="".join(w.word for w in kept).strip(), words=kept))
+    return [seg for seg in deduped if seg.words or seg.text]
+
+
+def _init_worker(backend: str, n_threads: int):
+    global _worker_backend, _worker_threads
+    _worker_backend, _worker_threads = backend, n_threads
+
+
+def _transcribe_window(audio: np.ndarray, offset: float) -> Tuple[List[Segment], str]:
+    result = BACKENDS[_worker_backend](audio, _worker_threads)
+    return _parse_segments(result, offset), result.get('language', "en")
+
+
+def transcribe_chunked(audio: Union[str, np.ndarray],
+                       backend: str = "mlx",
+                       chunk_length: float = CHUNK_LENGTH,
+                       overlap: float = CHUNK_OVERLAP,
+                       workers: Optional[int] = None,
+                       sample_rate: int = SAMPLE_RATE) -> TranscriptionResult:
+    """Chunked transcription of a file path or a mono float32 array at `sample_rate`."""
+    if isinstance(audio, (str, os.PathLike)):
+        audio = load_audio(audio, sample_rate)
+
+    duration = len(audio) / sample_rate
+    windows = plan_windows(duration, find_split_points(audio, sample_rate, chunk_length), overlap)
+    cpus = os.cpu_count() or 1
+    if workers is None:
+        workers = max(1, min(len(windows), cpus // 4))
+    workers = max(1, min(workers, len(windows)))
+    n_threads = max(1, cpus // workers)
+    logger.info(f"Transcribing {duration:.1f}s in {len(windows)} windows with {workers} workers ({backend}).")
+
+    chunks = [audio[int(ws * sample_rate):int(we * sample_rate)] for ws, we, _, _ in windows]
+    offsets = [ws for ws, _, _, _ in windows]
+    if workers == 1:
+        _init_worker(backend, n_threads)
+        outputs = [_transcribe_window(c, o) for c, o in zip(chunks, offsets)]
+    else:
+        # spawn: forked children can't safely reuse Metal/OpenMP state from the parent
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(backend, n_threads)) as pool:
+            outputs = list(pool.map(_transcribe_window, chunks, offsets))
+
+    segments = stitch(windows, [segs for segs, _ in outputs])
+    languages = Counter(lang for _, lang in outputs)
     return TranscriptionResult(
-        text=result.get('text', "").strip(),
+        text=" ".join(seg.text for seg in segments).strip(),
         segments=segments,
+        language=languages.most_common(1)[0][0] if languages else "en"
+    )
+
+
+def transcribe(audio_path: str,
+               backend: str = "mlx",
+               chunked: bool = False,
+               chunk_length: float = CHUNK_LENGTH,
+               overlap: float = CHUNK_OVERLAP,
+               workers: Optional[int] = None) -> TranscriptionResult:
+    """
+    Transcribes the given audio file using mlx_whisper with the standardized model.
+    Returns a structured TranscriptionResult.
+
+    `backend` selects another engine for the same model; `chunked=True` transcribes long
+    recordings as overlapping windows across `workers` processes (see transcribe_chunked).
+    """
+    print(f"Transcribing {audio_path} with {MODEL_NAME} ({backend}{', chunked' if chunked else ''})...")
+
+    if chunked:
+        return transcribe_chunked(audio_path, backend=backend, chunk_length=chunk_length,
+                                  overlap=overlap, workers=workers)
+
+    # Run transcription with word timestamps
+    result = BACKENDS[backend](audio_path, os.cpu_count() or 1)
+
+    # Parse into Pydantic models
+    return TranscriptionResult(
+        text=result.get('text', "").strip(),
+        segments=_parse_segments(result),
         language=result.get('language', "en")
     )
 
 if __name__ == "__main__":
+    import argparse
     import sys
     import json
-    
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe.py <audio_file>")
-        sys.exit(1)
-        
-    audio_file = sys.argv[1]
+
+    parser = argparse.ArgumentParser(description="Transcribe an audio file")
+    parser.add_argument("audio_file")
+    parser.add_argument("--backend", default="mlx", choices=list(BACKENDS))
+    parser.add_argument("--chunked", action="store_true", help="Split into overlapping windows and transcribe in parallel.")
+    parser.add_argument("--chunk-length", type=float, default=CHUNK_LENGTH)
+    parser.add_argument("--overlap", type=float, default=CHUNK_OVERLAP)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
     try:
-        transcription = transcribe(audio_file)
+        transcription = transcribe(args.audio_file, backend=args.backend, chunked=args.chunked,
+                                   chunk_length=args.chunk_length, overlap=args.overlap, workers=args.workers)
         print(json.dumps(transcription.model_dump(), indent=2))
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
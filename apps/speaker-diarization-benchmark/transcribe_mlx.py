@@ -1,8 +1,6 @@
-import json
 import sys
 from transcribe import transcribe
-
-MANIFEST_PATH = 'data/clips/manifest.json'
+from ingestion.manifest import get_store
 
 def main():
     if len(sys.argv) < 2:
@@ -22,36 +20,17 @@ def main():
     segments = [seg.model_dump() for seg in result.segments]
         
     # Update manifest
-    with open(MANIFEST_PATH, 'r') as f:
-        data = json.load(f)
-        
-    found = False
     from pathlib import Path
-    clip_path_abs = str(Path(clip_path).resolve())
-    clip_id_target = Path(clip_path).name
-
-    for clip in data:
-        # Check absolute path, relative path, or ID
-        current_abs = str(Path(clip['clip_path']).resolve()) if 'clip_path' in clip else ""
-        
-        # Debug matching
-        # print(f"Checking {clip['id']} | Abs: {current_abs} vs Target: {clip_path_abs}")
-        
-        if current_abs == clip_path_abs or clip['id'] == clip_id_target:
-            print(f"Match found! Updating {clip['id']}")
-            if 'transcriptions' not in clip:
-                clip['transcriptions'] = {}
-            clip['transcriptions']['mlx_whisper_turbo'] = segments
-            found = True
-            break
-            
-    if found:
-        with open(MANIFEST_PATH, 'w') as f:
-            json.dump(data, f, indent=4)
+    store = get_store()
+    clip = store.find(Path(clip_path))
+    if clip:
+        print(f"Match found! Updating {clip['id']}")
+        store.set_transcription(clip['id'], 'mlx_whisper_turbo', segments)
         print("Transcription saved to manifest.")
     else:
-        print(f"Clip not found in manifest! Target ID: {clip_id_target}, Target Path: {clip_path_abs}")
-        print("Available IDs:", [c['id'] for c in data])
+        print(f"Clip not found in manifest! Target ID: {Path(clip_path).name}, Target Path: {Path(clip_path).resolve()}")
+        print("Available IDs:", store.ids())
+    store.close()
 
 if __name__ == "__main__":
     main()
@@ -1,27 +1,27 @@
-import json
 import mlx_whisper
 from pathlib import Path
 import logging
+from ingestion.manifest import get_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 MANIFEST_PATH = Path("data/clips/manifest.json")
+MANIFEST_DB = Path("data/clips/manifest.db")
 CLIP_ID = "clip_youtube_jAlKYYr1bpY_0_60.wav"
 CLIP_PATH = Path("data/clips") / CLIP_ID
 MODEL_NAME = "mlx-community/whisper-large-v3-turbo"
 
 def main():
-    if not MANIFEST_PATH.exists():
+    if not MANIFEST_PATH.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found")
         return
 
-    with open(MANIFEST_PATH) as f:
-        manifest = json.load(f)
+    store = get_store(MANIFEST_DB, MANIFEST_PATH)
 
     # Find clip
-    clip_entry = next((c for c in manifest if c['id'] == CLIP_ID), None)
-    if not clip_entry:
+    if CLIP_ID not in store:
+        store.close()
         logger.error(f"Clip {CLIP_ID} not found in manifest")
         return
 
@@ -41,14 +41,8 @@ def main():
         })
 
     # Update manifest
-    if 'transcriptions' not in clip_entry:
-        clip_entry['transcriptions'] = {}
-    
-    clip_entry['transcriptions']['mlx_whisper_turbo'] = new_segments
-    
-    # Save
-    with open(MANIFEST_PATH, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    store.set_transcription(CLIP_ID, 'mlx_whisper_turbo', new_segments)
+    store.close()
     
     logger.info(f"Updated manifest with {len(new_segments)} segments from MLX Turbo.")
 
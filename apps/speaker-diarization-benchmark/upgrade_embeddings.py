@@ -3,7 +3,7 @@ ONE-OFF SCRIPT: Upgrade Speaker Embeddings to 512-dim
 
 This script upgrades the existing 256-dimensional speaker embeddings to 512-dimensional embeddings
 (compatible with the current pyannote/embedding model) by re-processing segments that have already
-been labeled in manifest.json.
+been labeled in the manifest store.
 
 It will OVERWRITE data/speaker_embeddings.json with the new high-dimensional vectors.
 """
@@ -11,11 +11,11 @@ It will OVERWRITE data/speaker_embeddings.json with the new high-dimensional vec
 import json
 import logging
 from pathlib import Path
-import torch
 import numpy as np
-from pyannote.audio import Model, Inference
-from pyannote.audio.core.io import Audio
-from pyannote.core import Segment
+from pyannote.audio import Inference
+from ingestion.models import load_pyannote_model
+from ingestion.audio_cache import get_audio_cache
+from ingestion.manifest import get_store
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,66 +24,31 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("data")
 CLIPS_DIR = DATA_DIR / "clips"
 MANIFEST_FILE = CLIPS_DIR / "manifest.json"
+MANIFEST_DB = CLIPS_DIR / "manifest.db"
 DB_FILE = DATA_DIR / "speaker_embeddings.json"
 HF_TOKEN = "REDACTED_SECRET"
 
 def main():
-    if not MANIFEST_FILE.exists():
+    if not MANIFEST_FILE.exists() and not MANIFEST_DB.exists():
         logger.error("Manifest not found.")
         return
 
-    # Load Manifest
-    with open(MANIFEST_FILE) as f:
-        manifest = json.load(f)
+    # Load Manifest (labels saved only to the store are included)
+    with get_store(MANIFEST_DB, MANIFEST_FILE) as store:
+        manifest = list(store.entries())
     logger.info(f"Loaded manifest with {len(manifest)} clips.")
 
     # Initialize Model
     logger.info("Loading embedding model (pyannote/embedding)...")
     try:
         # Using pyannote/embedding (access granted)
-        import omegaconf
-        import pytorch_lightning
-        import typing
-        import collections
-        from pyannote.audio.core.task import Specifications, Problem, Resolution
-        import pyannote.audio.core.model
-        
-        with torch.serialization.safe_globals([
-            torch.torch_version.TorchVersion,
-            omegaconf.listconfig.ListConfig,
-            omegaconf.dictconfig.DictConfig,
-            Specifications,
-            Problem,
-            Resolution,
-            pyannote.audio.core.model.Introspection,
-            pytorch_lightning.callbacks.early_stopping.EarlyStopping,
-            pytorch_lightning.callbacks.model_checkpoint.ModelCheckpoint,
-            omegaconf.base.ContainerMetadata,
-            omegaconf.base.Metadata,
-            omegaconf.nodes.AnyNode,
-            omegaconf.nodes.StringNode,
-            omegaconf.nodes.IntegerNode,
-            omegaconf.nodes.FloatNode,
-            omegaconf.nodes.BooleanNode,
-            typing.Any,
-            list,
-            dict,
-            collections.defaultdict,
-            int,
-            float,
-            str,
-            tuple,
-            set,
-        ]):
-            model = Model.from_pretrained("pyannote/embedding", use_auth_token=HF_TOKEN)
-        
+        model = load_pyannote_model("pyannote/embedding", token=HF_TOKEN, device="cpu") # Force CPU
         inference = Inference(model, window="whole")
-        model.to(torch.device("cpu")) # Force CPU
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         return
 
-    audio_io = Audio(sample_rate=16000, mono="downmix")
+    audio_cache = get_audio_cache()
     
     # New Database
     new_db = {}
@@ -119,7 +84,7 @@ def main():
             
             # Extract Embedding
             try:
-                waveform, sr = audio_io.crop(clip_path, Segment(seg['start'], seg['end']))
+                waveform, sr = audio_cache.waveform(clip_path, seg['start'], seg['end'])
                 emb = inference({"waveform": waveform, "sample_rate": sr})
                 
                 if speaker not in new_db:
@@ -8,7 +8,9 @@ import sys
 # apps/transcriber is the current directory
 sys.path.append(os.path.dirname(__file__))
 
-from universal_transcriber.transcribe import process_video
+from universal_transcriber.transcribe import process_video, close_db
+from universal_transcriber.whisper_pool import shutdown_pools
+from universal_transcriber.job_queue import JobQueue, QueueFull
 
 app = FastAPI()
 
@@ -16,17 +18,46 @@ class TranscribeRequest(BaseModel):
     url: str
     video_uuid: str = None
 
-@app.post("/transcribe")
+async def run_job(url, video_uuid):
+    if await process_video(url, video_uuid) is None:
+        raise RuntimeError("Processing failed (see logs)")
+
+# Requests only enqueue; TRANSCRIBE_WORKERS jobs run at a time
+queue = JobQueue(
+    os.environ.get("TRANSCRIBE_QUEUE_DB", "transcriptions/jobs.db"),
+    run_job,
+    workers=int(os.environ.get("TRANSCRIBE_WORKERS", "2")),
+    max_queued=int(os.environ.get("TRANSCRIBE_MAX_QUEUED", "100")),
+)
+
+@app.post("/transcribe", status_code=202)
 async def transcribe_endpoint(req: TranscribeRequest):
     print(f"Received transcription request for {req.url} (UUID: {req.video_uuid})")
     try:
-        await process_video(req.url, req.video_uuid)
-        return {"status": "success"}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        job, created = queue.submit(req.url, req.video_uuid)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {"job_id": job["id"], "status": job["status"], "deduplicated": not created}
+
+# async: the queue's SQLite connection belongs to the event loop thread, and sync
+# endpoints run in FastAPI's threadpool
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.on_event("startup")
+async def startup():
+    queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await queue.stop()
+    shutdown_pools()
+    await close_db()
 
 @app.get("/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    return {"status": "ok", "jobs": queue.stats()}
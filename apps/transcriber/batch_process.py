@@ -7,17 +7,28 @@ It serves as the orchestration layer that connects history fetching (via fetch_h
 with the video processing pipeline (via universal_transcriber/transcribe.py).
 
 Purpose:
-- Fetches the last N videos from the user's YouTube history.
+- Fetches the last N videos from the user's YouTube history. With `--incremental`, paging
+  stops at the watermark saved by the previous run and videos already processed (or skipped)
+  are dropped before any metadata call or download (state in `--sync-state`).
 - Filters out videos that are too long (> 3 hours).
-- Concurrently downloads audio and generates transcriptions using whisper.cpp.
-- Upserts metadata and transcription paths to InstantDB.
+- Runs a staged pipeline joined by bounded queues (a full queue pauses the stage before it):
+    download (--max-concurrent yt-dlp threads)
+      -> transcribe (--transcribe-workers whisper.cpp worker processes that keep the model
+         loaded, default: cores / n_threads, recycled every --max-jobs-per-worker files)
+      -> persist (bulk upserts to InstantDB every `--flush-every` finished videos)
+  so downloads overlap with transcription instead of competing for the same slots.
+- Reports per-stage throughput and queue depth every `--report-interval` seconds.
 
 Usage:
     python apps/transcriber/batch_process.py --limit <N> --max-concurrent <M>
 
 Arguments:
     - --limit (int): Number of most recent videos to fetch from history (default: 5).
-    - --max-concurrent (int): Maximum number of parallel downloads/transcriptions (default: 3).
+    - --max-concurrent (int): Maximum number of parallel downloads (default: 8).
+    - --transcribe-workers (int): Parallel transcriptions (default: cores / whisper n_threads).
+    - --flush-every (int): Number of finished videos to collect before writing them (default: 10).
+    - --incremental: Only process history entries newer than the last run's watermark.
+    - --sync-state (str): Incremental sync state file (default: transcriptions/sync_state.json).
 
 Outputs:
     - Audio files: apps/transcriber/downloads/<platform>_<id>_sound.wav
@@ -35,28 +46,172 @@ import asyncio
 import argparse
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fetch_history import fetch_history
-from universal_transcriber.transcribe import process_video
+from universal_transcriber.transcribe import download_audio, bulk_upsert_video_records, close_db
+from universal_transcriber.whisper_pool import get_pool, shutdown_pools
 from config_model import BatchConfig, WhisperConfig
+from lib.sync_state import SyncState
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-async def process_video_with_semaphore(sem, video, i, total, config: BatchConfig):
-    async with sem:
-        print(f"\n[{i}/{total}] Starting processing for: {video['title']}")
-        await process_video(video['url'], whisper_config=config.whisper_config)
-        print(f"[{i}/{total}] Finished processing for: {video['title']}")
+# Marks the end of a stage's input
+_DONE = object()
+
+class Stage:
+    """
+    A pool of `workers` coroutines running `fn` on items from `inbox` and putting non-None
+    results on `outbox`. `outbox` is bounded, so a slow next stage backpressures this one.
+    """
+
+    def __init__(self, name, fn, workers, inbox, outbox=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.inbox = inbox
+        self.outbox = outbox
+        self.done = 0
+        self.failed = 0
+        self.busy = 0
+        self.max_depth = 0
+        self.finished = False
+        self.started = time.monotonic()
+
+    async def _worker(self):
+        while True:
+            self.max_depth = max(self.max_depth, self.inbox.qsize())
+            item = await self.inbox.get()
+            if item is _DONE:
+                # Let the other workers see it too
+                await self.inbox.put(_DONE)
+                return
+            self.busy += 1
+            try:
+                result = await self.fn(item)
+            except Exception as e:
+                print(f"[{self.name}] Error: {e}")
+                result = None
+            finally:
+                self.busy -= 1
+            if result is None:
+                self.failed += 1
+                continue
+            self.done += 1
+            if self.outbox is not None:
+                await self.outbox.put(result)
+
+    async def run(self):
+        await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+        self.finished = True
+        if self.outbox is not None:
+            await self.outbox.put(_DONE)
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        depth = 0 if self.finished else self.inbox.qsize()
+        return (f"{self.name}: {self.done} done, {self.failed} failed, {self.busy}/{self.workers} busy, "
+                f"{self.done / elapsed * 60:.1f}/min, queue {depth} (max {self.max_depth})")
+
+async def run_pipeline(videos, config: BatchConfig, on_persisted=None):
+    """Runs the pipeline; `on_persisted(records)` is called after each successful bulk upsert."""
+    loop = asyncio.get_running_loop()
+    whisper_config = config.whisper_config
+    # Dedicated pools: network-bound downloads never wait behind a whisper run
+    download_pool = ThreadPoolExecutor(config.max_concurrent, thread_name_prefix="download")
+    transcribe_pool = get_pool(whisper_config, workers=config.transcribe_workers,
+                               max_jobs_per_worker=config.max_jobs_per_worker)
+    total = len(videos)
+
+    async def download(item):
+        i, video = item
+        print(f"\n[{i}/{total}] Downloading: {video['title']}")
+        try:
+            return i, video, await loop.run_in_executor(download_pool, download_audio, video['url'])
+        except Exception as e:
+            print(f"Error downloading {video['url']}: {e}")
+
+    async def transcribe(item):
+        i, video, (audio_path, vid_id, vid_title, platform, duration, upload_date, channel) = item
+        print(f"[{i}/{total}] Transcribing: {vid_title}")
+        segments, json_path = await transcribe_pool.transcribe(audio_path, vid_id, platform)
+        if not segments:
+            print(f"[{i}/{total}] Failed to get segments for {vid_title}")
+            return None
+        print(f"[{i}/{total}] Finished processing for: {vid_title}")
+        return {
+            "video_id": vid_id, "platform": platform, "url": video['url'], "title": vid_title,
+            "audio_path": audio_path, "json_path": json_path, "duration": duration,
+            "upload_date": upload_date, "channel": channel,
+        }
+
+    pending = []
+
+    async def flush():
+        records = pending[:]
+        pending.clear()
+        if records:
+            try:
+                await bulk_upsert_video_records(records)
+            except Exception:
+                # Keep them for the final flush
+                pending[:0] = records
+                raise
+            if on_persisted is not None:
+                on_persisted(records)
+
+    async def persist(record):
+        pending.append(record)
+        if len(pending) >= config.flush_every:
+            await flush()
+        return record
+
+    urls = asyncio.Queue()
+    downloaded = asyncio.Queue(maxsize=config.queue_size)
+    transcribed = asyncio.Queue(maxsize=config.queue_size)
+    stages = [
+        Stage("download", download, config.max_concurrent, urls, downloaded),
+        Stage("transcribe", transcribe, transcribe_pool.workers, downloaded, transcribed),
+        Stage("persist", persist, 1, transcribed),
+    ]
+    for item in enumerate(videos, 1):
+        urls.put_nowait(item)
+    urls.put_nowait(_DONE)
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(config.report_interval)
+            print("\n".join(["--- pipeline ---"] + [stage.report() for stage in stages]))
+
+    print(f"Pipeline: {config.max_concurrent} downloads, {transcribe_pool.workers} transcriptions "
+          f"x {transcribe_pool.threads} threads, queue size {config.queue_size}")
+    report_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(stage.run() for stage in stages))
+    finally:
+        report_task.cancel()
+        download_pool.shutdown(wait=False, cancel_futures=True)
+        # Write whatever finished, even if the run was interrupted
+        await flush()
+    print("\n".join(["--- pipeline summary ---"] + [stage.report() for stage in stages]))
 
 async def batch_process(config: BatchConfig):
-    print(f"Fetching last {config.limit} videos from history...")
+    state = SyncState(config.sync_state_path) if config.incremental else None
+    if state is not None:
+        print(f"Fetching up to {config.limit} new videos from history (watermark: {state.watermark})...")
+    else:
+        print(f"Fetching last {config.limit} videos from history...")
     # fetch_history is synchronous, but that's fine as it's a single quick operation (relative to processing)
     # We might want to make it async later if we fetch huge amounts, but for 50 it's fine.
     # Note: fetch_history prints a lot, we might want to silence it or just let it be.
-    videos = fetch_history(limit=config.limit)
+    videos = fetch_history(limit=config.limit, sync_state=state)
     
     if not videos:
         print("No videos found to process.")
+        if state is not None and videos is not None:
+            state.advance()
+            state.save()
         return
 
     print(f"\nfetched {len(videos)} videos. Filtering...")
@@ -81,26 +236,43 @@ async def batch_process(config: BatchConfig):
         
         if seconds > config.max_duration_hours * 3600:
             print(f"Skipping {v['title']} (Duration: {duration} > {config.max_duration_hours} hours)")
+            if state is not None:
+                state.mark_skipped([v['id']])
             continue
             
         filtered_videos.append(v)
         
-    print(f"\nProcessing {len(filtered_videos)} videos with concurrency limit {config.max_concurrent}...")
+    print(f"\nProcessing {len(filtered_videos)} videos...")
     
-    sem = asyncio.Semaphore(config.max_concurrent)
-    tasks = []
-    for i, video in enumerate(filtered_videos, 1):
-        task = asyncio.create_task(process_video_with_semaphore(sem, video, i, len(filtered_videos), config))
-        tasks.append(task)
-        
-    await asyncio.gather(*tasks)
+    def on_persisted(records):
+        # Saved after every flush, so an interrupted run keeps its progress
+        if state is not None:
+            state.mark_processed(r["video_id"] for r in records)
+            state.save()
+
+    try:
+        await run_pipeline(filtered_videos, config, on_persisted)
+    finally:
+        shutdown_pools()
+        await close_db()
+        if state is not None:
+            state.advance()
+            state.save()
+            print(f"Sync watermark: {state.watermark}")
     print("\nBatch processing complete!")
 
 def main():
     parser = argparse.ArgumentParser(description="Batch process YouTube videos from history.")
     parser.add_argument("--limit", type=int, default=5, help="Number of videos to fetch")
-    parser.add_argument("--max-concurrent", type=int, default=3, help="Max concurrent processings")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Max concurrent downloads")
+    parser.add_argument("--transcribe-workers", type=int, default=None, help="Parallel transcriptions (default: cores / n_threads)")
+    parser.add_argument("--max-jobs-per-worker", type=int, default=50, help="Replace a transcription worker process after N files")
+    parser.add_argument("--queue-size", type=int, default=4, help="Max items waiting between stages")
+    parser.add_argument("--report-interval", type=float, default=30.0, help="Seconds between pipeline reports")
     parser.add_argument("--max-duration", type=int, default=5, help="Max duration in hours")
+    parser.add_argument("--flush-every", type=int, default=10, help="Upsert finished videos in bulk every N videos")
+    parser.add_argument("--incremental", action="store_true", help="Only process history entries newer than the last run")
+    parser.add_argument("--sync-state", type=str, default="transcriptions/sync_state.json", help="Incremental sync state file")
     
     args = parser.parse_args()
     
@@ -109,6 +281,13 @@ def main():
         limit=args.limit,
         max_concurrent=args.max_concurrent,
         max_duration_hours=args.max_duration,
+        flush_every=args.flush_every,
+        transcribe_workers=args.transcribe_workers,
+        queue_size=args.queue_size,
+        max_jobs_per_worker=args.max_jobs_per_worker,
+        report_interval=args.report_interval,
+        incremental=args.incremental,
+        sync_state_path=args.sync_state,
         whisper_config=WhisperConfig() # Use defaults for now, could expose args too
     )
     
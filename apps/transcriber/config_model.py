@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 from pydantic import BaseModel, Field
 
 class WhisperModel(str, Enum):
@@ -18,6 +19,13 @@ class WhisperConfig(BaseModel):
 class BatchConfig(BaseModel):
     """Configuration for the batch processing workflow."""
     limit: int = Field(default=5, description="Number of videos to fetch from history")
-    max_concurrent: int = Field(default=3, description="Maximum number of concurrent processings")
+    max_concurrent: int = Field(default=8, description="Maximum number of concurrent downloads")
+    transcribe_workers: Optional[int] = Field(default=None, description="Parallel transcriptions (default: cores / whisper n_threads)")
+    max_jobs_per_worker: Optional[int] = Field(default=50, description="Replace a transcription worker process after this many files")
+    queue_size: int = Field(default=4, description="Maximum number of items waiting between pipeline stages")
+    incremental: bool = Field(default=False, description="Only process history entries newer than the last run's watermark")
+    sync_state_path: str = Field(default="transcriptions/sync_state.json", description="Where the incremental sync state is stored")
+    report_interval: float = Field(default=30.0, description="Seconds between pipeline progress reports")
     max_duration_hours: int = Field(default=5, description="Maximum duration of videos to process in hours")
+    flush_every: int = Field(default=10, description="Upsert finished videos to InstantDB in bulk every N videos")
     whisper_config: WhisperConfig = Field(default_factory=WhisperConfig, description="Whisper configuration")
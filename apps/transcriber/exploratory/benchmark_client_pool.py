@@ -0,0 +1,109 @@
+"""
+Measures InstantDBAdminAPI request latency and connection counts against a local mock server.
+
+Compares a fresh HTTPPool per call (what every method used to do: one ClientSession per
+request) with the shared pooled session, and checks that 429/503 responses are retried.
+
+Usage:
+    python apps/transcriber/exploratory/benchmark_client_pool.py --requests 200 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instantdb_admin_client import HTTPPool, InstantDBAdminAPI, Update
+
+
+def make_app(fail_rate, latency):
+    stats = {"requests": 0, "connections": set()}
+
+    async def handler(request):
+        stats["requests"] += 1
+        peer = request.transport.get_extra_info("peername") if request.transport else None
+        stats["connections"].add(peer)
+        await asyncio.sleep(latency)
+        if random.random() < fail_rate:
+            return web.Response(status=random.choice([429, 503]), text="try again", headers={"Retry-After": "0"})
+        if request.path == "/admin/query":
+            return web.json_response({"videos": []})
+        return web.json_response({"tx-id": stats["requests"]})
+
+    app = web.Application()
+    app.router.add_post("/admin/query", handler)
+    app.router.add_post("/admin/transact", handler)
+    return app, stats
+
+
+async def run(n, concurrency, pooled, base_url):
+    shared = HTTPPool(max_concurrency=concurrency, backoff_base=0.01)
+
+    async def call(request):
+        # Unpooled: a fresh session for every request, as before
+        http = shared if pooled else HTTPPool(max_concurrency=concurrency, backoff_base=0.01)
+        db = InstantDBAdminAPI("app", "token", base_url=base_url, http=http)
+        try:
+            await request(db)
+        finally:
+            if not pooled:
+                await db.close()
+        return http.stats
+
+    async def one(i):
+        return [
+            await call(lambda db: db.query({"videos": {"$": {"where": {"external_id": str(i)}}}})),
+            await call(lambda db: db.transact([Update(collection="videos", id=str(i), data={"title": str(i)})])),
+        ]
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with sem:
+            return await one(i)
+
+    start = time.perf_counter()
+    per_call = await asyncio.gather(*(limited(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    await shared.close()
+
+    if pooled:
+        totals = shared.stats
+    else:
+        per_call = [stats for pair in per_call for stats in pair]
+        totals = {k: sum(s[k] for s in per_call) for k in per_call[0]}
+    return elapsed, totals
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="Number of query+transact pairs")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of 429/503 responses")
+    parser.add_argument("--latency", type=float, default=0.002, help="Server-side latency in seconds")
+    args = parser.parse_args()
+
+    for pooled in (False, True):
+        app, server_stats = make_app(args.fail_rate, args.latency)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        elapsed, stats = await run(args.requests, args.concurrency, pooled, f"http://127.0.0.1:{port}")
+        calls = args.requests * 2
+        print(f"{'pooled' if pooled else 'per-call session':>16}: {elapsed:.2f}s "
+              f"| {elapsed / calls * 1000:.2f} ms/call "
+              f"| client connections: {stats['connections']} "
+              f"| server connections: {len(server_stats['connections'])} "
+              f"| retries: {stats['retries']} | failures: {stats['failures']}")
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
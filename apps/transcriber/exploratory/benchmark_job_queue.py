@@ -0,0 +1,96 @@
+"""
+Measures submit latency of the durable job queue behind /transcribe against a local aiohttp
+server, for fast and slow (simulated) transcriptions.
+
+With the queue, POST only inserts a row, so p50/p99 submit latency should not depend on how
+long a transcription takes. Also checks de-duplication (every URL is submitted twice) and
+429 backpressure (max_queued smaller than the number of URLs).
+
+Usage:
+    python apps/transcriber/exploratory/benchmark_job_queue.py --requests 300 --job-time 0.05 2.0
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from universal_transcriber.job_queue import JobQueue, QueueFull
+
+
+async def run(n, job_time, max_queued, workers):
+    async def handler(url, video_uuid):
+        await asyncio.sleep(job_time)
+
+    queue = JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"), handler, workers=workers, max_queued=max_queued)
+
+    async def transcribe(request):
+        body = await request.json()
+        try:
+            job, created = queue.submit(body["url"], body.get("video_uuid"))
+        except QueueFull as e:
+            return web.json_response({"detail": str(e)}, status=429, headers={"Retry-After": "30"})
+        return web.json_response({"job_id": job["id"], "status": job["status"], "deduplicated": not created}, status=202)
+
+    app = web.Application()
+    app.router.add_post("/transcribe", transcribe)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    queue.start()
+
+    latencies, statuses, dedup = [], {}, 0
+    async with aiohttp.ClientSession() as session:
+        async def submit(i):
+            nonlocal dedup
+            start = time.perf_counter()
+            async with session.post(f"http://127.0.0.1:{port}/transcribe",
+                                    json={"url": f"https://youtu.be/{i // 2}"}) as response:
+                data = await response.json()
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            dedup += bool(data.get("deduplicated"))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(n)))
+        elapsed = time.perf_counter() - start
+
+    jobs = queue.stats()
+    await queue.stop()
+    await runner.cleanup()
+    latencies.sort()
+    return {
+        "submits_per_s": n / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "statuses": statuses,
+        "deduplicated": dedup,
+        "jobs": jobs,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--job-time", type=float, nargs="+", default=[0.05, 2.0], help="Simulated seconds per job")
+    parser.add_argument("--max-queued", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    for job_time in args.job_time:
+        r = await run(args.requests, job_time, args.max_queued, args.workers)
+        print(f"job time {job_time:>5.2f}s: {r['submits_per_s']:.0f} submits/s | p50 {r['p50_ms']:.1f} ms "
+              f"| p99 {r['p99_ms']:.1f} ms | statuses {r['statuses']} | deduplicated {r['deduplicated']} "
+              f"| jobs {r['jobs']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Counts /admin/transact requests for a batch_process-like write load against a local mock server,
+with and without TransactBatcher.
+
+Each simulated job sends a progress update per step (the same entity every time) and a final
+video + transcription upsert, from `--jobs` concurrent coroutines.
+
+Usage:
+    python apps/transcriber/exploratory/benchmark_transact_batcher.py --jobs 50 --updates 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instantdb_admin_client import InstantDBAdminAPI, Link, Update
+
+
+def make_app(latency):
+    stats = {"requests": 0, "steps": 0, "max_bytes": 0}
+
+    async def handler(request):
+        body = await request.read()
+        stats["requests"] += 1
+        stats["steps"] += len(json.loads(body)["steps"])
+        stats["max_bytes"] = max(stats["max_bytes"], len(body))
+        await asyncio.sleep(latency)
+        return web.json_response({"tx-id": stats["requests"]})
+
+    app = web.Application()
+    app.router.add_post("/admin/transact", handler)
+    return app, stats
+
+
+async def run(jobs, updates, batched, base_url):
+    async with InstantDBAdminAPI("app", "token", base_url=base_url) as db:
+        transact = db.batcher().transact if batched else db.transact
+
+        async def job(i):
+            for p in range(updates):
+                await transact([Update(collection="jobs", id=f"job-{i}", data={"progress": p / updates})])
+                await asyncio.sleep(0.01)
+            await transact([
+                Update(collection="videos", id=f"video-{i}", data={"title": f"Video {i}"}),
+                Update(collection="transcriptions", id=f"tr-{i}", data={"path": f"/tmp/{i}.json"}),
+                Link(collection="videos", id=f"video-{i}", links={"transcriptions": f"tr-{i}"}),
+            ])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(job(i) for i in range(jobs)))
+        return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=50, help="Concurrent jobs")
+    parser.add_argument("--updates", type=int, default=20, help="Progress updates per job")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server-side latency in seconds")
+    args = parser.parse_args()
+
+    for batched in (False, True):
+        app, stats = make_app(args.latency)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        elapsed = await run(args.jobs, args.updates, batched, f"http://127.0.0.1:{port}")
+        calls = args.jobs * (args.updates + 1)
+        print(f"{'batched' if batched else 'direct':>8}: {elapsed:.2f}s | {calls} transact calls "
+              f"-> {stats['requests']} requests, {stats['steps']} steps "
+              f"| largest payload: {stats['max_bytes']} bytes")
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Measures video page enrichment against a local fake YouTube HTML server.
+
+Compares the old sequential per-video fetch with VideoDetailsFetcher.fetch_many on a cold
+cache and again on a warm cache (a re-sync), and checks the parsed fields.
+
+Usage:
+    python apps/transcriber/exploratory/benchmark_video_details.py --videos 50 --latency 0.3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from extractors.video_details import DetailsCache, VideoDetailsFetcher
+
+PAGE = """<html><head>
+<meta property="og:description" content="Description of {id}">
+<meta itemprop="channelId" content="UC{id}">
+<link itemprop="name" content="Channel {id}">
+<meta itemprop="datePublished" content="2024-01-01T00:00:00-08:00">
+<meta itemprop="interactionCount" content="{views}">
+</head></html>"""
+
+
+def serve(latency):
+    stats = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stats["requests"] += 1
+            time.sleep(latency)
+            video_id = self.path.rsplit("=", 1)[-1]
+            body = PAGE.format(id=video_id, views=len(video_id) * 1000).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3, help="Server-side seconds per page")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server, stats = serve(args.latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}/watch?v="
+    urls = {f"vid{i:03d}": base + f"vid{i:03d}" for i in range(args.videos)}
+    cache_path = os.path.join(tempfile.mkdtemp(), "video_details.json")
+
+    sequential = VideoDetailsFetcher(max_workers=1, rate=0)
+    start = time.perf_counter()
+    expected = {video_id: sequential.fetch(url) for video_id, url in urls.items()}
+    runs = [("sequential", time.perf_counter() - start, stats["requests"])]
+
+    for name in ("concurrent (cold cache)", "concurrent (warm cache)"):
+        before = stats["requests"]
+        fetcher = VideoDetailsFetcher(max_workers=args.workers, rate=args.rate, cache=DetailsCache(cache_path))
+        start = time.perf_counter()
+        details = fetcher.fetch_many(urls)
+        runs.append((name, time.perf_counter() - start, stats["requests"] - before))
+        assert details == expected, "parsed details differ from the sequential run"
+        fetcher.close()
+
+    print(f"{args.videos} videos, {args.latency}s per page, {args.workers} workers, {args.rate}/s limit")
+    for name, elapsed, requests in runs:
+        print(f"{name:>24}: {elapsed:6.2f}s | {requests} page requests")
+    print(f"sample: {expected['vid000']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Video Page Details
+==================
+
+Enriches history entries with metadata scraped from the video pages (description, channel
+id/url/name, upload date, view count). This is shared by `YouTubeHistoryFetcher` and
+`fetch_history.py`.
+
+- Pages are fetched concurrently (`max_workers` threads) over one pooled `requests.Session`.
+- A rate limiter spaces request starts at least `1 / rate` seconds apart, to stay polite.
+- Parsed details are kept in an on-disk JSON cache keyed by video id with a TTL, so a
+  re-sync only fetches pages for videos it has not seen recently.
+
+The fetcher takes page URLs as given, so it can be pointed at a local fake HTML server.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/transcriber/video_details.json")
+DEFAULT_TTL = 7 * 24 * 3600
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def parse_video_details(html: str) -> dict:
+    """
+    Extract metadata from a video page using regex.
+
+    Keys (each only when found): description, channel_id, channel_url, channel_name,
+    upload_date, view_count (int).
+    """
+    data = {}
+
+    # Description (og:description is usually good)
+    og_desc = re.search(r'<meta property="og:description" content="([^"]+)">', html)
+    if og_desc:
+        data['description'] = og_desc.group(1)
+    else:
+        desc_match = re.search(r'<meta name="description" content="([^"]+)">', html)
+        if desc_match:
+            data['description'] = desc_match.group(1)
+
+    # Channel ID
+    # <meta itemprop="channelId" content="UC...">
+    chan_id_match = re.search(r'<meta itemprop="channelId" content="([^"]+)">', html)
+    if chan_id_match:
+        data['channel_id'] = chan_id_match.group(1)
+    else:
+        # Try finding in link tags
+        # <link itemprop="url" href="http://www.youtube.com/channel/UC...">
+        chan_url_match = re.search(r'<link itemprop="url" href="https?://www\.youtube\.com/channel/(UC[^"]+)">', html)
+        if chan_url_match:
+            data['channel_id'] = chan_url_match.group(1)
+
+    # Channel URL
+    if data.get('channel_id'):
+        data['channel_url'] = f"https://www.youtube.com/channel/{data['channel_id']}"
+    else:
+        # Try to find user/custom URL
+        # <link itemprop="url" href="http://www.youtube.com/@UserName">
+        user_url_match = re.search(r'<link itemprop="url" href="(https?://www\.youtube\.com/@[^"]+)">', html)
+        if user_url_match:
+            data['channel_url'] = user_url_match.group(1)
+
+    # Channel Name
+    # <link itemprop="name" content="...">
+    chan_name_match = re.search(r'<link itemprop="name" content="([^"]+)">', html)
+    if chan_name_match:
+        data['channel_name'] = chan_name_match.group(1)
+
+    # Upload Date
+    date_match = re.search(r'<meta itemprop="datePublished" content="([^"]+)">', html)
+    if date_match:
+        data['upload_date'] = date_match.group(1)
+
+    # View Count
+    # <meta itemprop="interactionCount" content="12345">
+    views_match = re.search(r'<meta itemprop="interactionCount" content="(\d+)">', html)
+    if views_match:
+        data['view_count'] = int(views_match.group(1))
+    else:
+        # "viewCount":"12345" in JSON blobs
+        json_views = re.search(r'"viewCount":"(\d+)"', html)
+        if json_views:
+            data['view_count'] = int(json_views.group(1))
+
+    return data
+
+
+class RateLimiter:
+    """Spaces calls to `wait()` at least `1 / rate` seconds apart (thread-safe)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class DetailsCache:
+    """
+    On-disk cache of parsed video details: {video_id: {"fetched_at": epoch, "data": {...}}}.
+    Entries older than `ttl` seconds (by `clock`, epoch seconds) are treated as missing.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable details cache {path}: {e}")
+
+    def get(self, video_id: str) -> Optional[dict]:
+        entry = self.entries.get(video_id)
+        if entry is None or self.clock() - entry['fetched_at'] > self.ttl:
+            return None
+        return entry['data']
+
+    def put(self, video_id: str, data: dict):
+        with self._lock:
+            self.entries[video_id] = {'fetched_at': self.clock(), 'data': data}
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            now = self.clock()
+            entries = {k: v for k, v in self.entries.items() if now - v['fetched_at'] <= self.ttl}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Atomic replace, so an interrupted save never leaves a truncated cache
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self.entries = entries
+            self._dirty = False
+
+
+class VideoDetailsFetcher:
+    """
+    Concurrent, rate-limited, cached video page enrichment.
+
+    Args:
+        cookies: Cookies for the page requests (dict or cookie jar)
+        headers: Request headers (default: a desktop Chrome User-Agent)
+        max_workers: Pages fetched in parallel
+        rate: Maximum request starts per second
+        cache: DetailsCache to use (None disables caching)
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(self, cookies=None, headers: Optional[dict] = None, max_workers: int = 8, rate: float = 5.0,
+                 cache: Optional[DetailsCache] = None, timeout: float = 10):
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+        self.timeout = timeout
+        self.stats = {'fetched': 0, 'cached': 0, 'failed': 0}
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        if cookies is not None:
+            if isinstance(cookies, dict):
+                self.session.cookies.update(cookies)
+            else:
+                self.session.cookies = cookies
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch(self, url: str) -> dict:
+        """Fetch and parse one page (no cache). Returns {} on failure."""
+        self.limiter.wait()
+        start_time = datetime.now()
+        print(f"[{start_time.strftime('%H:%M:%S')}] Fetching details for {url}...")
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"Failed to fetch {url}: Status {response.status_code}")
+                return {}
+            return parse_video_details(response.text)
+        except Exception as e:
+            print(f"Warning: Failed to fetch details for {url}: {e}")
+            return {}
+
+    def fetch_many(self, urls: Dict[str, str]) -> Dict[str, dict]:
+        """Details for {video_id: url}, from the cache where fresh and fetched concurrently otherwise."""
+        results = {}
+        missing = {}
+        for video_id, url in urls.items():
+            cached = self.cache.get(video_id) if self.cache is not None else None
+            if cached is not None:
+                results[video_id] = cached
+                self.stats['cached'] += 1
+            else:
+                missing[video_id] = url
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                for video_id, data in zip(missing, pool.map(self.fetch, missing.values())):
+                    results[video_id] = data
+                    if data:
+                        self.stats['fetched'] += 1
+                        if self.cache is not None:
+                            self.cache.put(video_id, data)
+                    else:
+                        # Failures are not cached, the next sync retries them
+                        self.stats['failed'] += 1
+            if self.cache is not None:
+                self.cache.save()
+        return results
+
+    def close(self):
+        self.session.close()
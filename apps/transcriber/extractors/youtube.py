@@ -8,7 +8,8 @@ for each video, including Channel ID, Channel URL, Upload Date, and Description.
 
 It is designed to be robust against missing metadata in the initial feed by
 falling back to scraping the individual video pages (using the same authenticated session)
-to enrich the data.
+to enrich the data. Pages are fetched concurrently and rate limited, and the parsed details
+are cached on disk per video id (see `extractors/video_details.py`).
 
 Usage
 -----
@@ -23,6 +24,10 @@ Options
 - `--limit`: Number of videos to fetch (default: 5).
 - `--browser`: Browser to extract cookies from (default: 'chrome'). Options: chrome, firefox, safari, opera, edge.
 - `--cookies`: Path to a Netscape-formatted cookies file (optional, overrides --browser).
+- `--workers`: Video pages fetched in parallel (default: 8).
+- `--rate`: Maximum video page requests per second (default: 5).
+- `--details-cache`: Path of the video details cache (default: ~/.cache/transcriber/video_details.json).
+- `--no-cache`: Always fetch video pages.
 
 Example Output
 --------------
@@ -48,35 +53,44 @@ Description: custard? good! jam? good! beef? GOOD!!!!...
 import os
 import sys
 import json
-import re
-import requests
 import yt_dlp
 from typing import List, Optional
-from datetime import datetime, timedelta
 
 # Add parent directory to path to allow imports if running directly
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 
 from apps.transcriber.lib.models import VideoMetadata, Channel
 from apps.transcriber.lib.cookies import parse_netscape_cookies, find_cookie_file
+from apps.transcriber.lib.sync_state import SyncState
+from apps.transcriber.extractors.video_details import (
+    DEFAULT_CACHE_PATH, DEFAULT_HEADERS, DEFAULT_TTL, DetailsCache, VideoDetailsFetcher,
+)
 
 class YouTubeHistoryFetcher:
     """
     Fetcher for YouTube watch history.
     """
     
-    def __init__(self, cookie_file: str = None, browser: str = 'chrome'):
+    def __init__(self, cookie_file: str = None, browser: str = 'chrome',
+                 details_cache: Optional[str] = DEFAULT_CACHE_PATH, cache_ttl: float = DEFAULT_TTL,
+                 max_workers: int = 8, rate: float = 5.0):
         self.cookie_file = cookie_file
         self.browser = browser
         self.cookies = None
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
+        self.headers = dict(DEFAULT_HEADERS)
         
         # Load cookies immediately to be used by requests
         self._load_cookies()
 
+        # One pooled session for all video page fetches
+        self.details = VideoDetailsFetcher(
+            cookies=self.cookies,
+            headers=self.headers,
+            max_workers=max_workers,
+            rate=rate,
+            cache=DetailsCache(details_cache, cache_ttl) if details_cache else None,
+        )
+
     def _load_cookies(self):
         """
         Load cookies from file or browser into a format requests can use.
@@ -98,9 +112,12 @@ class YouTubeHistoryFetcher:
             with yt_dlp.YoutubeDL(opts) as ydl:
                 self.cookies = ydl.cookiejar
                 
-    def fetch_history(self, limit: int = 10) -> List[VideoMetadata]:
+    def fetch_history(self, limit: int = 10, sync_state: Optional[SyncState] = None) -> List[VideoMetadata]:
         """
         Fetch the most recent watch history.
+
+        With `sync_state`, paging stops at its watermark and only entries that are not
+        processed/skipped yet are returned (their ids are recorded in `sync_state.fetched`).
         """
         ydl_opts = {
             'quiet': True,
@@ -122,7 +139,8 @@ class YouTubeHistoryFetcher:
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             try:
-                info = ydl.extract_info(history_url, download=False)
+                # process=False keeps entries a lazy generator, so paging stops at the watermark
+                info = ydl.extract_info(history_url, download=False, process=sync_state is None)
             except Exception as e:
                 print(f"Error fetching history list: {e}")
                 return []
@@ -131,141 +149,83 @@ class YouTubeHistoryFetcher:
                 print("No entries found.")
                 return []
 
-            entries = list(info['entries'])
+            if sync_state is not None:
+                entries = sync_state.take_new(info['entries'], limit)
+            else:
+                entries = [entry for entry in info['entries'] if entry]
             print(f"Found {len(entries)} entries. Processing metadata...")
 
-            for entry in entries:
-                if not entry:
-                    continue
-                
-                video_id = entry.get('id')
-                url = entry.get('webpage_url', entry.get('url'))
-                title = entry.get('title')
-                
-                # Basic info from yt-dlp flat extraction
-                channel_name = entry.get('uploader')
-                channel_id = entry.get('channel_id') or entry.get('uploader_id')
-                channel_url = entry.get('channel_url') or entry.get('uploader_url')
-                duration = entry.get('duration')
-                view_count = entry.get('view_count')
-                upload_date = entry.get('upload_date')
-                description = entry.get('description')
-                
-                # We need more details (Description, Channel ID, Channel URL)
-                # We'll fetch the video page to get these if missing or to enrich
-                # Only fetch if we are missing critical info or description
-                if not description or not channel_id or not channel_url or not view_count:
-                    details = self._get_video_details(url)
-                    
-                    description = details.get('description', description)
-                    channel_id = channel_id or details.get('channel_id')
-                    channel_url = channel_url or details.get('channel_url')
-                    view_count = view_count or details.get('view_count')
-                    
-                    # Prefer details for channel name if yt-dlp missed it
-                    if not channel_name and details.get('channel_name'):
-                        channel_name = details.get('channel_name')
-                    
-                    # Prefer details for upload date if yt-dlp missed it
-                    if not upload_date and details.get('upload_date'):
-                        upload_date = details.get('upload_date')
+        # We need more details (Description, Channel ID, Channel URL)
+        # We'll fetch the video pages to get these if missing or to enrich
+        # Only fetch if we are missing critical info or description
+        needs_details = {
+            entry.get('id'): entry.get('webpage_url', entry.get('url'))
+            for entry in entries
+            if not entry.get('description')
+            or not (entry.get('channel_id') or entry.get('uploader_id'))
+            or not (entry.get('channel_url') or entry.get('uploader_url'))
+            or not entry.get('view_count')
+        }
+        all_details = self.details.fetch_many(needs_details)
+        print(f"Video details: {self.details.stats}")
 
-                # Create Channel object
-                channel = Channel(
-                    name=channel_name or "Unknown",
-                    id=channel_id,
-                    url=channel_url
-                )
+        for entry in entries:
+            video_id = entry.get('id')
+            url = entry.get('webpage_url', entry.get('url'))
+            title = entry.get('title')
+            
+            # Basic info from yt-dlp flat extraction
+            channel_name = entry.get('uploader')
+            channel_id = entry.get('channel_id') or entry.get('uploader_id')
+            channel_url = entry.get('channel_url') or entry.get('uploader_url')
+            duration = entry.get('duration')
+            view_count = entry.get('view_count')
+            upload_date = entry.get('upload_date')
+            description = entry.get('description')
+            
+            details = all_details.get(video_id)
+            if details is not None:
+                description = details.get('description', description)
+                channel_id = channel_id or details.get('channel_id')
+                channel_url = channel_url or details.get('channel_url')
+                view_count = view_count or details.get('view_count')
                 
-                # Create VideoMetadata object
-                video = VideoMetadata(
-                    id=video_id,
-                    title=title or "Unknown",
-                    video_url=url,
-                    upload_date=upload_date,
-                    description=description,
-                    duration=duration,
-                    view_count=view_count,
-                    channel=channel
-                )
+                # Prefer details for channel name if yt-dlp missed it
+                if not channel_name and details.get('channel_name'):
+                    channel_name = details.get('channel_name')
                 
-                results.append(video)
+                # Prefer details for upload date if yt-dlp missed it
+                if not upload_date and details.get('upload_date'):
+                    upload_date = details.get('upload_date')
+
+            # Create Channel object
+            channel = Channel(
+                name=channel_name or "Unknown",
+                id=channel_id,
+                url=channel_url
+            )
+            
+            # Create VideoMetadata object
+            video = VideoMetadata(
+                id=video_id,
+                title=title or "Unknown",
+                video_url=url,
+                upload_date=upload_date,
+                description=description,
+                duration=duration,
+                view_count=view_count,
+                channel=channel
+            )
+            
+            results.append(video)
                 
         return results
 
     def _get_video_details(self, url: str) -> dict:
         """
-        Fetch video page and extract metadata using regex.
+        Fetch video page and extract metadata using regex (uncached, see `self.details`).
         """
-        data = {}
-        start_time = datetime.now()
-        print(f"[{start_time.strftime('%H:%M:%S')}] Fetching details for {url}...")
-        
-        try:
-            # Update headers to match a modern Chrome
-            self.headers['User-Agent'] = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            
-            response = requests.get(url, cookies=self.cookies, headers=self.headers, timeout=10)
-            if response.status_code != 200:
-                print(f"Failed to fetch {url}: Status {response.status_code}")
-                return data
-            
-            html = response.text
-            
-            # Description
-            og_desc = re.search(r'<meta property="og:description" content="([^"]+)">', html)
-            if og_desc:
-                data['description'] = og_desc.group(1)
-            
-            # Channel ID
-            # <meta itemprop="channelId" content="UC...">
-            chan_id_match = re.search(r'<meta itemprop="channelId" content="([^"]+)">', html)
-            if chan_id_match:
-                data['channel_id'] = chan_id_match.group(1)
-            else:
-                # Try finding in link tags
-                # <link itemprop="url" href="http://www.youtube.com/channel/UC...">
-                chan_url_match = re.search(r'<link itemprop="url" href="https?://www\.youtube\.com/channel/(UC[^"]+)">', html)
-                if chan_url_match:
-                    data['channel_id'] = chan_url_match.group(1)
-            
-            # Channel URL
-            if data.get('channel_id'):
-                data['channel_url'] = f"https://www.youtube.com/channel/{data['channel_id']}"
-            else:
-                # Try to find user/custom URL
-                # <link itemprop="url" href="http://www.youtube.com/@UserName">
-                user_url_match = re.search(r'<link itemprop="url" href="(https?://www\.youtube\.com/@[^"]+)">', html)
-                if user_url_match:
-                    data['channel_url'] = user_url_match.group(1)
-
-            # Channel Name
-            # <link itemprop="name" content="...">
-            chan_name_match = re.search(r'<link itemprop="name" content="([^"]+)">', html)
-            if chan_name_match:
-                data['channel_name'] = chan_name_match.group(1)
-                
-            # Upload Date
-            date_match = re.search(r'<meta itemprop="datePublished" content="([^"]+)">', html)
-            if date_match:
-                data['upload_date'] = date_match.group(1)
-
-            # View Count
-            # <meta itemprop="interactionCount" content="12345">
-            views_match = re.search(r'<meta itemprop="interactionCount" content="(\d+)">', html)
-            if views_match:
-                data['view_count'] = int(views_match.group(1))
-            else:
-                # Try looking for "x views" text if meta tag missing (less reliable)
-                # "viewCount":"12345" in JSON blobs
-                json_views = re.search(r'"viewCount":"(\d+)"', html)
-                if json_views:
-                    data['view_count'] = int(json_views.group(1))
-
-            return data
-        except Exception as e:
-            print(f"Warning: Failed to fetch details for {url}: {e}")
-            return data
+        return self.details.fetch(url)
 
 if __name__ == "__main__":
     import argparse
@@ -274,11 +234,17 @@ if __name__ == "__main__":
     parser.add_argument("--limit", type=int, default=5, help="Number of videos to fetch")
     parser.add_argument("--cookies", type=str, help="Path to Netscape cookies file")
     parser.add_argument("--browser", type=str, default="chrome", help="Browser to extract cookies from (chrome, firefox, safari)")
+    parser.add_argument("--workers", type=int, default=8, help="Video pages fetched in parallel")
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum video page requests per second")
+    parser.add_argument("--details-cache", type=str, default=DEFAULT_CACHE_PATH, help="Path of the video details cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch video pages")
     
     args = parser.parse_args()
     
     try:
-        fetcher = YouTubeHistoryFetcher(cookie_file=args.cookies, browser=args.browser)
+        fetcher = YouTubeHistoryFetcher(cookie_file=args.cookies, browser=args.browser,
+                                        details_cache=None if args.no_cache else args.details_cache,
+                                        max_workers=args.workers, rate=args.rate)
         history = fetcher.fetch_history(limit=args.limit)
         
         print(f"\nFetched {len(history)} videos:")
@@ -3,10 +3,10 @@ import sys
 import json
 import argparse
 import yt_dlp
-import requests
-import re
 from datetime import datetime
 
+from extractors.video_details import DEFAULT_CACHE_PATH, DetailsCache, VideoDetailsFetcher
+
 def parse_netscape_cookies(cookie_file):
     """Parse Netscape cookies file into a dictionary for requests."""
     cookies = {}
@@ -25,55 +25,31 @@ def parse_netscape_cookies(cookie_file):
         print(f"Warning: Failed to parse cookies for requests: {e}")
     return cookies
 
+def _history_fields(details):
+    """Maps parsed page details onto this script's video_data keys."""
+    data = {k: details[k] for k in ('description', 'upload_date', 'view_count') if k in details}
+    if details.get('channel_name'):
+        data['channel'] = details['channel_name']
+    return data
+
 def get_video_details(url, cookies):
     """Fetch video page and extract metadata using regex."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
+    fetcher = VideoDetailsFetcher(cookies=cookies)
     try:
-        response = requests.get(url, cookies=cookies, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return {}
-        
-        html = response.text
-        data = {}
-        
-        # Description (og:description is usually good)
-        og_desc = re.search(r'<meta property="og:description" content="([^"]+)">', html)
-        if og_desc:
-            data['description'] = og_desc.group(1)
-        else:
-             desc_match = re.search(r'<meta name="description" content="([^"]+)">', html)
-             if desc_match:
-                 data['description'] = desc_match.group(1)
-
-        # Channel
-        channel_match = re.search(r'<link itemprop="name" content="([^"]+)">', html)
-        if channel_match:
-            data['channel'] = channel_match.group(1)
-            
-        # Date
-        date_match = re.search(r'<meta itemprop="datePublished" content="([^"]+)">', html)
-        if date_match:
-            data['upload_date'] = date_match.group(1)
-            
-        # Views
-        views_match = re.search(r'<meta itemprop="interactionCount" content="([^"]+)">', html)
-        if views_match:
-            data['view_count'] = views_match.group(1)
-
-        return data
-    except Exception as e:
-        print(f"Error fetching details for {url}: {e}")
-        return {}
+        return _history_fields(fetcher.fetch(url))
+    finally:
+        fetcher.close()
 
-def fetch_history(limit=10, cookie_file=None):
+def fetch_history(limit=10, cookie_file=None, details_cache=DEFAULT_CACHE_PATH, sync_state=None):
     """
     Fetches YouTube watch history using yt-dlp.
     
     Args:
         limit (int): Number of most recent videos to fetch.
         cookie_file (str): Path to the Netscape formatted cookies file.
+        details_cache (str): Path of the on-disk video details cache (None to always fetch pages).
+        sync_state (SyncState): Incremental mode: stop paging at the watermark and only return
+            entries that are not processed/skipped yet (see lib/sync_state.py).
     """
     # Resolve cookie file path
     if not cookie_file:
@@ -118,21 +94,38 @@ def fetch_history(limit=10, cookie_file=None):
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
             # extract_info with download=False fetches metadata
-            info = ydl.extract_info(history_url, download=False)
+            # (process=False keeps entries a lazy generator, so paging stops at the watermark)
+            info = ydl.extract_info(history_url, download=False, process=sync_state is None)
         except Exception as e:
             print(f"Error fetching history: {e}")
             return
 
         if 'entries' in info:
-            entries = list(info['entries']) # Convert generator to list
+            if sync_state is not None:
+                entries = sync_state.take_new(info['entries'], limit)
+            else:
+                entries = list(info['entries']) # Convert generator to list
             print(f"\nFound {len(entries)} videos:")
             
             results = []
+            entries = [entry for entry in entries if entry]
+
+            # Fallback if description or channel is missing: fetch those pages concurrently
+            needs_details = {
+                entry.get('id'): entry.get('webpage_url', entry.get('url'))
+                for entry in entries
+                if not entry.get('description') or not entry.get('uploader')
+            }
+            fetcher = VideoDetailsFetcher(
+                cookies=cookie_dict,
+                cache=DetailsCache(details_cache) if details_cache else None,
+            )
+            try:
+                all_details = fetcher.fetch_many(needs_details)
+            finally:
+                fetcher.close()
             
             for i, entry in enumerate(entries):
-                if not entry:
-                    continue
-                
                 # Extract relevant fields
                 video_data = {
                     "title": entry.get('title'),
@@ -145,14 +138,11 @@ def fetch_history(limit=10, cookie_file=None):
                     "id": entry.get('id')
                 }
                 
-                # Fallback if description or channel is missing
-                if not video_data.get('description') or not video_data.get('channel'):
-                    # print(f"Fetching details for {video_data['url']}...")
-                    details = get_video_details(video_data['url'], cookie_dict)
-                    # Only update if we found something
-                    for k, v in details.items():
-                        if v:
-                            video_data[k] = v
+                details = _history_fields(all_details.get(video_data['id'], {}))
+                # Only update if we found something
+                for k, v in details.items():
+                    if v:
+                        video_data[k] = v
 
                 results.append(video_data)
                 
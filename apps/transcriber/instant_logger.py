@@ -1,85 +1,238 @@
+import json
 import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
 import time
 import uuid
-import os
-import requests
-import json
 from datetime import datetime
 
+import requests
+
+# Sentinel that stops the background thread (flush requests are threading.Events)
+_STOP = object()
+
+
 class InstantDBHandler(logging.Handler):
-    def __init__(self, app_id, admin_token, source="python-app"):
+    """
+    Logging handler that ships records to the InstantDB `logs` namespace.
+
+    `emit` only formats the record and puts an update step on a bounded queue; a background
+    thread batches steps into one `/admin/transact` request per `batch_size` records or every
+    `flush_interval` seconds, over a single keep-alive `requests.Session`.
+
+    When the queue is full (or a request fails) steps are dropped (`overflow="drop"`) or
+    appended to `spill_path` as JSON lines (`overflow="spill"`); spilled steps are re-sent
+    after the next successful request. Pending records are flushed on `close()`, which
+    `logging.shutdown()` calls at interpreter exit.
+    """
+
+    def __init__(self, app_id, admin_token, source="python-app",
+                 base_url="https://api.instantdb.com",
+                 batch_size=100,
+                 flush_interval=2.0,
+                 max_buffer=10000,
+                 overflow="drop",
+                 spill_path=None,
+                 timeout=5):
         super().__init__()
+        if overflow not in ("drop", "spill"):
+            raise ValueError(f"overflow must be 'drop' or 'spill', got {overflow!r}")
         self.app_id = app_id
         self.admin_token = admin_token
         self.source = source
-        self.base_url = "https://api.instantdb.com"
+        self.base_url = base_url.rstrip("/")
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {admin_token}",
             "App-Id": app_id
         }
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path or os.path.join(tempfile.gettempdir(), f"instantdb_logs_{source}.jsonl")
+        self.timeout = timeout
+
+        self.sent = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.requests = 0
+
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._spill_lock = threading.Lock()
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        self._thread = threading.Thread(target=self._run, name=f"InstantDBHandler-{source}", daemon=True)
+        self._thread.start()
+
+    def _make_step(self, record):
+        msg = self.format(record)
+
+        # Construct the log entry
+        log_id = str(uuid.uuid4())
+        log_entry = {
+            "timestamp": int(record.created * 1000),
+            "created_at": datetime.fromtimestamp(record.created).isoformat(), # Required by schema (string)
+            "level": record.levelname,
+            "message": msg,
+            "source": self.source,
+            "file": record.filename,
+            "line": record.lineno,
+            "module": record.module
+        }
+
+        # We use the 'logs' namespace
+        return ["update", "logs", log_id, log_entry]
 
     def emit(self, record):
+        # Records logged by the sender itself (e.g. urllib3) would feed back into the queue
+        if threading.get_ident() == self._thread.ident:
+            return
         try:
-            msg = self.format(record)
-            
-            # Construct the log entry
-            log_id = str(uuid.uuid4())
-            log_entry = {
-                "timestamp": int(time.time() * 1000),
-                "created_at": datetime.now().isoformat(), # Required by schema (string)
-                "level": record.levelname,
-                "message": msg,
-                "source": self.source,
-                "file": record.filename,
-                "line": record.lineno,
-                "module": record.module
-            }
-
-            # Construct the transaction step
-            # We use the 'logs' namespace
-            step = [
-                "update",
-                "logs",
-                log_id,
-                log_entry
-            ]
-
-            # Send the request synchronously
-            response = requests.post(
-                f"{self.base_url}/admin/transact",
-                headers=self.headers,
-                json={"steps": [step]},
-                timeout=5
-            )
-            
-            if response.status_code != 200:
-                # Fallback to stderr if logging fails
-                print(f"Failed to log to InstantDB: {response.text}")
-
-        except Exception as e:
+            step = self._make_step(record)
+        except Exception:
             self.handleError(record)
-            print(f"Error in InstantDBHandler: {e}")
+            return
+        try:
+            self._queue.put_nowait(step)
+        except queue.Full:
+            self._overflow([step])
+
+    def _overflow(self, steps):
+        if self.overflow == "spill":
+            with self._spill_lock:
+                with open(self.spill_path, "a") as f:
+                    for step in steps:
+                        f.write(json.dumps(step) + "\n")
+            self.spilled += len(steps)
+        else:
+            self.dropped += len(steps)
+
+    # ------------------------------------------------------------------ background thread
+
+    def _post(self, steps):
+        """Sends one transaction. Returns True on success."""
+        self.requests += 1
+        try:
+            response = self._session.post(f"{self.base_url}/admin/transact", json={"steps": steps},
+                                          timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error in InstantDBHandler: {e}", file=sys.stderr)
+            return False
+        if response.status_code != 200:
+            # Fallback to stderr if logging fails
+            print(f"Failed to log to InstantDB: {response.text}", file=sys.stderr)
+            return False
+        self.sent += len(steps)
+        return True
+
+    def _send(self, steps):
+        if not steps:
+            return
+        if not self._post(steps):
+            self._overflow(steps)
+        elif self.overflow == "spill":
+            self._replay_spill()
+
+    def _replay_spill(self):
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path) or os.path.getsize(self.spill_path) == 0:
+                return
+            with open(self.spill_path) as f:
+                steps = [json.loads(line) for line in f if line.strip()]
+            os.remove(self.spill_path)
+        self.spilled -= min(self.spilled, len(steps))
+        for i in range(0, len(steps), self.batch_size):
+            batch = steps[i:i + self.batch_size]
+            if not self._post(batch):
+                self._overflow(steps[i:])
+                return
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                # Drain whatever was queued before (and alongside) the sentinel
+                events = [item] if item is not _STOP else []
+                stop = item is _STOP
+                while True:
+                    try:
+                        step = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if step is _STOP:
+                        stop = True
+                    elif isinstance(step, threading.Event):
+                        events.append(step)
+                    else:
+                        batch.append(step)
+                for i in range(0, len(batch), self.batch_size):
+                    self._send(batch[i:i + self.batch_size])
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                for event in events:
+                    event.set()
+                if stop:
+                    return
+                continue
 
-def setup_instant_logging(app_id, admin_token, source="python-app"):
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._send(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def flush(self, timeout=None):
+        """Blocks until every record emitted so far has been sent (or dropped/spilled)."""
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        # Blocking put: the flush request must not be dropped when the buffer is full
+        self._queue.put(done)
+        done.wait(timeout if timeout is not None else self.timeout * 4)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(self.timeout * 4)
+        self._session.close()
+        super().close()
+
+    def stats(self):
+        return {"sent": self.sent, "dropped": self.dropped, "spilled": self.spilled,
+                "requests": self.requests, "queued": self._queue.qsize()}
+
+
+def setup_instant_logging(app_id, admin_token, source="python-app", **handler_options):
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    
+
     # Check if handler already exists to avoid duplicates
     for h in logger.handlers:
         if isinstance(h, InstantDBHandler):
             return logger
 
-    handler = InstantDBHandler(app_id, admin_token, source)
+    handler = InstantDBHandler(app_id, admin_token, source, **handler_options)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
     logger.addHandler(handler)
-    
+
     # Also add console handler if not present
     has_console = any(isinstance(h, logging.StreamHandler) for h in logger.handlers)
     if not has_console:
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
-        
+
     return logger
@@ -12,15 +12,29 @@ The client provides three main components:
 - Auth: Handles authentication operations
 - Storage: Manages file storage operations
 
+All three share one HTTPPool: a long-lived aiohttp session (keep-alive connection pooling)
+with a concurrency cap and jittered exponential-backoff retries on 429/5xx. Transactions and
+magic-code emails are not retried after a timeout, since the server may already have acted. Use the client
+as an async context manager, or call `await client.close()` when done.
+
+Queries can optionally be served from a QueryCache (TTL + LRU), which the client invalidates
+per namespace whenever it transacts.
+
 (written mostly by claude-3-5-sonnet-20241022 with gentle guidance by @aphexcx)
 """
 
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import json
+import random
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, BinaryIO, Dict, List, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
 
 import aiohttp
 from typing_extensions import TypedDict
@@ -131,16 +145,265 @@ class StorageFile:
     last_modified: int
 
 
+class HTTPPool:
+    """Shared HTTP session for the admin client.
+
+    Owns one `aiohttp.ClientSession` per event loop (created lazily), so every request reuses
+    pooled keep-alive connections instead of opening a new TCP/TLS connection per call.
+
+    Args:
+        max_concurrency (int): Maximum number of requests in flight at once
+        max_retries (int): Retries on 429/5xx responses, connection errors and timeouts.
+            Requests sent with `idempotent=False` are only retried when the server cannot
+            have processed them: failures to connect, 429 and 503
+        backoff_base (float): First retry delay in seconds; doubles per attempt (full jitter)
+        backoff_max (float): Upper bound for a single retry delay in seconds
+        timeout (float): Total timeout per request attempt in seconds
+        connection_limit (int): Size of the connection pool
+
+    Example:
+        Share one pool between clients:
+            pool = HTTPPool(max_concurrency=8)
+            db = InstantDBAdminAPI(app_id, admin_token, http=pool)
+            print(pool.stats)
+
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    # Answers that mean the request was turned away rather than (maybe) processed
+    UNPROCESSED_STATUSES = frozenset({429, 503})
+
+    def __init__(
+            self,
+            max_concurrency: int = 16,
+            max_retries: int = 3,
+            backoff_base: float = 0.25,
+            backoff_max: float = 8.0,
+            timeout: float = 60.0,
+            connection_limit: int = 32,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "connections": 0, "latency": 0.0}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # A session is bound to the loop it was created in (e.g. one per asyncio.run)
+            trace = aiohttp.TraceConfig()
+
+            async def on_connection_create_end(session, ctx, params):
+                self.stats["connections"] += 1
+
+            trace.on_connection_create_end.append(on_connection_create_end)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace],
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            error: str,
+            idempotent: bool = True,
+            **kwargs: Any,
+    ) -> str:
+        """Send a request and return the response body.
+
+        Args:
+            idempotent (bool): Whether sending the request twice is harmless. Pass False
+                for non-idempotent requests: they are not retried after a timeout, a dropped
+                connection or a 500/502/504, since the server may have processed them.
+
+        Raises:
+            Exception: `"{error}: {body}"` if the final attempt does not return 200
+
+        """
+        session = self._ensure_session()
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    async with session.request(method, url, **kwargs) as response:
+                        status = response.status
+                        text = await response.text()
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.stats["latency"] += time.perf_counter() - start
+                unsent = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt >= self.max_retries or not (idempotent or unsent):
+                    self.stats["failures"] += 1
+                    raise Exception(f"{error}: {e}") from e
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            self.stats["latency"] += time.perf_counter() - start
+            if status == 200:
+                return text
+            retry_statuses = self.RETRY_STATUSES if idempotent else self.UNPROCESSED_STATUSES
+            if status in retry_statuses and attempt < self.max_retries:
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+                continue
+            self.stats["failures"] += 1
+            raise Exception(f"{error}: {text}")
+
+    async def request_json(self, method: str, url: str, error: str, **kwargs: Any) -> Any:
+        return json.loads(await self.request(method, url, error, **kwargs))
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class QueryCache:
+    """Client-side cache for `InstantDBAdminAPI.query` results.
+
+    Entries are keyed by the normalized query (plus impersonation headers) and expire after
+    the smallest TTL of the namespaces the query touches. The least recently used entry is
+    evicted beyond `max_entries`.
+
+    Every namespace named in a query (top-level collections and nested link labels) is
+    tracked, and `invalidate()` drops the entries touching any of the given namespaces; the
+    client calls it with the collections and link labels of each transaction it sends.
+
+    Args:
+        ttl (float): Default time-to-live in seconds
+        namespace_ttl (Dict[str, float], optional): Per-namespace TTL overrides (0 disables caching)
+        max_entries (int): Maximum number of cached queries
+        clock (Callable[[], float]): Monotonic time source in seconds. Defaults to time.monotonic
+
+    Example:
+        Cache video lookups for a minute, never cache jobs:
+            cache = QueryCache(ttl=60, namespace_ttl={"jobs": 0})
+            db = InstantDBAdminAPI(app_id, admin_token, query_cache=cache)
+            print(cache.stats)
+
+    """
+
+    def __init__(
+            self,
+            ttl: float = 30.0,
+            namespace_ttl: Optional[Dict[str, float]] = None,
+            max_entries: int = 1024,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.namespace_ttl = namespace_ttl or {}
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        # key -> (expires_at, namespaces, result)
+        self._entries: OrderedDict[str, tuple[float, frozenset[str], Any]] = OrderedDict()
+        # Bumped on every invalidation, so a query that was in flight during a write is not stored
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+
+    @staticmethod
+    def namespaces(query: Dict[str, Any]) -> frozenset[str]:
+        names = set()
+        stack = [query]
+        while stack:
+            node = stack.pop()
+            for name, sub in node.items():
+                if name == "$":
+                    continue
+                names.add(name)
+                if isinstance(sub, dict):
+                    stack.append(sub)
+        return frozenset(names)
+
+    @staticmethod
+    def key(query: Dict[str, Any], headers: Dict[str, str]) -> str:
+        scope = {k: v for k, v in headers.items() if k.startswith("as-")}
+        return json.dumps([query, scope], sort_keys=True, separators=(",", ":"), default=str)
+
+    def generation(self, names: frozenset[str]) -> tuple[int, ...]:
+        return (self._epoch, *(self._generations.get(name, 0) for name in sorted(names)))
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return copy.deepcopy(entry[2])
+
+    def put(self, key: str, names: frozenset[str], result: Any, generation: tuple[int, ...]) -> None:
+        if generation != self.generation(names):
+            return
+        ttl = min((self.namespace_ttl.get(name, self.ttl) for name in names), default=self.ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (self.clock() + ttl, names, copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, names: Optional[set[str]] = None) -> None:
+        """Drop entries touching any of `names` (every entry when `names` is None)."""
+        if names is None:
+            self._entries.clear()
+            self._epoch += 1
+        else:
+            for key in [k for k, (_, entry_names, _) in self._entries.items() if entry_names & names]:
+                del self._entries[key]
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+        self.stats["invalidations"] += 1
+
+    @staticmethod
+    def step_namespaces(steps: List[Step]) -> set[str]:
+        names = set()
+        for step in steps:
+            names.add(step.collection)
+            links = getattr(step, "links", None)
+            if links:
+                names.update(links)
+        return names
+
+
 class Auth:
     """Handles authentication operations for InstantDB.
 
     Provides methods for user authentication, token management, and user operations.
     """
 
-    def __init__(self, config: Dict[str, str], headers: Dict[str, str]):
+    def __init__(self, config: Dict[str, str], headers: Dict[str, str], http: Optional[HTTPPool] = None):
         self.base_url = config["base_url"]
         self.app_id = config["app_id"]
         self.headers = headers
+        self.http = http or HTTPPool()
 
     async def generate_magic_code(self, email: str) -> Dict[str, str]:
         """Generate a magic code for the user with the given email.
@@ -162,11 +425,11 @@ class Auth:
             Exception: If magic code generation fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(f"{self.base_url}/admin/magic_code", json={"email": email}) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to generate magic code: {await response.text()}")
-                return await response.json()
+        return await self.http.request_json(
+            "POST", f"{self.base_url}/admin/magic_code", "Failed to generate magic code",
+            # A retried send after a timeout or 5xx can email the user twice
+            idempotent=False, headers=self.headers, json={"email": email},
+        )
 
     async def create_token(self, email: str) -> str:
         """Create a login token for the user with the given email.
@@ -188,15 +451,11 @@ class Auth:
             Exception: If token creation fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(
-                    f"{self.base_url}/admin/refresh_tokens",
-                    json={"email": email},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to create token: {await response.text()}")
-                data = await response.json()
-                return data["user"]["refresh_token"]
+        data = await self.http.request_json(
+            "POST", f"{self.base_url}/admin/refresh_tokens", "Failed to create token",
+            headers=self.headers, json={"email": email},
+        )
+        return data["user"]["refresh_token"]
 
     async def verify_token(self, token: str) -> User:
         """Verify a token and return the associated user.
@@ -219,15 +478,11 @@ class Auth:
             Exception: If token verification fails
 
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    f"{self.base_url}/runtime/auth/verify_refresh_token",
-                    json={"app-id": self.app_id, "refresh-token": token},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to verify token: {await response.text()}")
-                data = await response.json()
-                return data["user"]
+        data = await self.http.request_json(
+            "POST", f"{self.base_url}/runtime/auth/verify_refresh_token", "Failed to verify token",
+            json={"app-id": self.app_id, "refresh-token": token},
+        )
+        return data["user"]
 
     async def get_user(self, **params: Dict[str, str]) -> User:
         """Retrieve a user by id, email, or refresh token.
@@ -251,12 +506,10 @@ class Auth:
 
         """
         query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.get(f"{self.base_url}/admin/users?{query_string}") as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get user: {await response.text()}")
-                data = await response.json()
-                return data["user"]
+        data = await self.http.request_json(
+            "GET", f"{self.base_url}/admin/users?{query_string}", "Failed to get user", headers=self.headers,
+        )
+        return data["user"]
 
     async def delete_user(self, **params: Dict[str, str]) -> User:
         """Delete a user by id, email, or refresh token.
@@ -283,12 +536,10 @@ class Auth:
 
         """
         query_string = "&".join(f"{k}={v}" for k, v in params.items())
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.delete(f"{self.base_url}/admin/users?{query_string}") as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to delete user: {await response.text()}")
-                data = await response.json()
-                return data["deleted"]
+        data = await self.http.request_json(
+            "DELETE", f"{self.base_url}/admin/users?{query_string}", "Failed to delete user", headers=self.headers,
+        )
+        return data["deleted"]
 
     async def sign_out(self, email: str) -> None:
         """Sign out a user and invalidate their tokens.
@@ -305,19 +556,20 @@ class Auth:
             Exception: If sign out fails or user not found
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(f"{self.base_url}/admin/sign_out", json={"email": email}) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to sign out user: {await response.text()}")
+        await self.http.request(
+            "POST", f"{self.base_url}/admin/sign_out", "Failed to sign out user",
+            headers=self.headers, json={"email": email},
+        )
 
 
 class Storage:
     """Handles file storage operations for InstantDB."""
 
-    def __init__(self, config: Dict[str, str], headers: Dict[str, str]):
+    def __init__(self, config: Dict[str, str], headers: Dict[str, str], http: Optional[HTTPPool] = None):
         self.base_url = config["base_url"]
         self.app_id = config["app_id"]
         self.headers = headers
+        self.http = http or HTTPPool()
 
     async def uploadFile(
             self,
@@ -368,22 +620,16 @@ class Storage:
             file_data = file.read()
 
         # Direct upload to /admin/storage/upload
-        async with aiohttp.ClientSession() as session:
-            async with session.put(
-                    f"{self.base_url}/admin/storage/upload",
-                    data=file_data,
-                    headers=headers,
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to upload file: {await response.text()}")
-
-                try:
-                    data = await response.json()
-                    # Return the data as-is, which should have the format { data: { id: string } }
-                    return data
-                except Exception:
-                    # If there's an error parsing the JSON, return a simplified response
-                    return {"data": {"id": None}, "success": response.status == 200}
+        text = await self.http.request(
+            "PUT", f"{self.base_url}/admin/storage/upload", "Failed to upload file",
+            data=file_data, headers=headers,
+        )
+        try:
+            # Return the data as-is, which should have the format { data: { id: string } }
+            return json.loads(text)
+        except Exception:
+            # If there's an error parsing the JSON, return a simplified response
+            return {"data": {"id": None}, "success": True}
 
     async def upload(
             self,
@@ -434,15 +680,11 @@ class Storage:
             Exception: If getting download URL fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.get(
-                    f"{self.base_url}/admin/storage/signed-download-url",
-                    params={"app_id": self.app_id, "filename": pathname},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get download URL: {await response.text()}")
-                data = await response.json()
-                return data["data"]
+        data = await self.http.request_json(
+            "GET", f"{self.base_url}/admin/storage/signed-download-url", "Failed to get download URL",
+            headers=self.headers, params={"app_id": self.app_id, "filename": pathname},
+        )
+        return data["data"]
 
     async def list(self) -> List[StorageFile]:
         """List all files in storage.
@@ -460,12 +702,10 @@ class Storage:
             Exception: If listing files fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.get(f"{self.base_url}/admin/storage/files", headers=self.headers) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to list files: {await response.text()}")
-                data = await response.json()
-                return [StorageFile(**file) for file in data["data"]]
+        data = await self.http.request_json(
+            "GET", f"{self.base_url}/admin/storage/files", "Failed to list files", headers=self.headers,
+        )
+        return [StorageFile(**file) for file in data["data"]]
 
     async def delete(self, pathname: str) -> None:
         """Delete a file from storage.
@@ -481,13 +721,10 @@ class Storage:
             Exception: If file deletion fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.delete(
-                    f"{self.base_url}/admin/storage/files",
-                    params={"filename": pathname},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to delete file: {await response.text()}")
+        await self.http.request(
+            "DELETE", f"{self.base_url}/admin/storage/files", "Failed to delete file",
+            headers=self.headers, params={"filename": pathname},
+        )
 
     async def delete_many(self, pathnames: List[str]) -> None:
         """Delete multiple files from storage.
@@ -507,13 +744,10 @@ class Storage:
             Exception: If deleting files fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(
-                    f"{self.base_url}/admin/storage/files/delete",
-                    json={"filenames": pathnames},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to delete files: {await response.text()}")
+        await self.http.request(
+            "POST", f"{self.base_url}/admin/storage/files/delete", "Failed to delete files",
+            headers=self.headers, json={"filenames": pathnames},
+        )
 
 
 class InstantDBAdminAPI:
@@ -526,15 +760,26 @@ class InstantDBAdminAPI:
         app_id (str): Your InstantDB application ID
         admin_token (str): Your InstantDB admin token
         base_url (str, optional): InstantDB API base URL. Defaults to "https://api.instantdb.com"
+        http (HTTPPool, optional): Connection pool to use. Defaults to a new HTTPPool
+        query_cache (QueryCache, optional): Cache for `query` results. Defaults to no caching
+        **pool_options: HTTPPool options (max_concurrency, max_retries, ...) when `http` is not given
 
     Example:
         Initialize the client and query data:
-        client = InstantDBAdminAPI(app_id="your-app-id", admin_token="your-token")
-        result = await client.query({"users": {}})
+        async with InstantDBAdminAPI(app_id="your-app-id", admin_token="your-token") as client:
+            result = await client.query({"users": {}})
 
     """
 
-    def __init__(self, app_id: str, admin_token: str, base_url: str = "https://api.instantdb.com"):
+    def __init__(
+            self,
+            app_id: str,
+            admin_token: str,
+            base_url: str = "https://api.instantdb.com",
+            http: Optional[HTTPPool] = None,
+            query_cache: Optional[QueryCache] = None,
+            **pool_options: Any,
+    ):
         self.config = {"app_id": app_id, "base_url": base_url}
         self.headers = {
             "Content-Type": "application/json",
@@ -544,11 +789,24 @@ class InstantDBAdminAPI:
             "Instant-Core-Version": CORE_VERSION,
         }
 
+        self.http = http or HTTPPool(**pool_options)
+        self.query_cache = query_cache
+
         # Initialize components
-        self.auth = Auth(self.config, self.headers)
-        self.storage = Storage(self.config, self.headers)
+        self.auth = Auth(self.config, self.headers, self.http)
+        self.storage = Storage(self.config, self.headers, self.http)
         self._impersonation_opts: Optional[Dict[str, Any]] = None
 
+    async def __aenter__(self) -> InstantDBAdminAPI:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session (clients created with `as_user` share it)."""
+        await self.http.close()
+
     def as_user(self, **opts: Dict[str, Any]) -> InstantDBAdminAPI:
         """Create a new client instance that makes requests on behalf of a user.
 
@@ -574,6 +832,8 @@ class InstantDBAdminAPI:
             self.config["app_id"],
             self.headers["Authorization"].split(" ")[1],
             self.config["base_url"],
+            http=self.http,
+            query_cache=self.query_cache,
         )
         new_client._impersonation_opts = opts
         new_client._update_headers_with_impersonation()
@@ -591,13 +851,15 @@ class InstantDBAdminAPI:
         elif "guest" in self._impersonation_opts:
             self.headers["as-guest"] = "true"
 
-    async def query(self, query: Dict[str, Any]) -> Dict[str, Any]:
+    async def query(self, query: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
         """Execute an InstaQL query to fetch data.
 
         Use this to query your data using InstantDB's InstaQL query language.
 
         Args:
             query (Dict[str, Any]): The InstaQL query object
+            use_cache (bool): Serve from / store in `query_cache` when the client has one.
+                Pass False to always hit the server.
 
         Returns:
             Dict[str, Any]: Query results
@@ -622,14 +884,25 @@ class InstantDBAdminAPI:
             Exception: If the query fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(
-                    f"{self.config['base_url']}/admin/query",
-                    json={"query": query},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Query failed: {await response.text()}")
-                return await response.json()
+        cache = self.query_cache if use_cache else None
+        if cache is None:
+            return await self.http.request_json(
+                "POST", f"{self.config['base_url']}/admin/query", "Query failed",
+                headers=self.headers, json={"query": query},
+            )
+
+        key = cache.key(query, self.headers)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        names = cache.namespaces(query)
+        generation = cache.generation(names)
+        result = await self.http.request_json(
+            "POST", f"{self.config['base_url']}/admin/query", "Query failed",
+            headers=self.headers, json={"query": query},
+        )
+        cache.put(key, names, result, generation)
+        return result
 
     async def debug_query(
             self,
@@ -659,23 +932,22 @@ class InstantDBAdminAPI:
             Exception: If the debug query fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session, session.post(
-                f"{self.config['base_url']}/admin/query_perms_check",
-                json={"query": query, "rules-override": rules},
-        ) as response:
-            if response.status != 200:
-                raise Exception(f"Debug query failed: {await response.text()}")
-            data = await response.json()
-            return {
-                "result": data["result"],
-                "checkResults": [DebugCheckResult(**r) for r in data["check-results"]],
-            }
+        data = await self.http.request_json(
+            "POST", f"{self.config['base_url']}/admin/query_perms_check", "Debug query failed",
+            headers=self.headers, json={"query": query, "rules-override": rules},
+        )
+        return {
+            "result": data["result"],
+            "checkResults": [DebugCheckResult(**r) for r in data["check-results"]],
+        }
 
-    async def transact(self, steps: list[Step]) -> dict[str, Any]:
+    async def transact(self, steps: list[Step], idempotent: bool = False) -> dict[str, Any]:
         """Execute a transaction using type-safe Step objects.
 
         Args:
             steps: List of Step objects representing database operations
+            idempotent: Set when applying the steps twice is harmless (e.g. only Updates of
+                fixed attributes), to also retry after timeouts and 5xx responses
 
         Returns:
             dict[str, Any]: Transaction results
@@ -702,14 +974,17 @@ class InstantDBAdminAPI:
         # Convert Step objects to lists
         step_lists = [step.to_list() for step in steps]
 
-        async with aiohttp.ClientSession(headers=self.headers) as session, session.post(
-                f"{self.config['base_url']}/admin/transact",
-                json={"steps": step_lists},
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"Transaction failed: {error_text}")
-            return await response.json()
+        try:
+            return await self.http.request_json(
+                "POST", f"{self.config['base_url']}/admin/transact", "Transaction failed",
+                # The server may have committed a transaction whose response timed out or
+                # failed with a 5xx
+                idempotent=idempotent, headers=self.headers, json={"steps": step_lists},
+            )
+        finally:
+            # Also on failure: a timed-out transaction may still have been applied
+            if self.query_cache is not None:
+                self.query_cache.invalidate(QueryCache.step_namespaces(steps))
 
     async def debug_transact(
             self,
@@ -738,11 +1013,185 @@ class InstantDBAdminAPI:
             Exception: If the debug transaction fails
 
         """
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            async with session.post(
-                    f"{self.config['base_url']}/admin/transact_perms_check",
-                    json={"steps": steps, "rules-override": rules},
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Debug transaction failed: {await response.text()}")
-                return await response.json()
+        return await self.http.request_json(
+            "POST", f"{self.config['base_url']}/admin/transact_perms_check", "Debug transaction failed",
+            headers=self.headers, json={"steps": steps, "rules-override": rules},
+        )
+
+    def batcher(self, **options: Any) -> TransactBatcher:
+        """Create a TransactBatcher that coalesces transactions sent through this client.
+
+        Args:
+            **options: TransactBatcher options (max_delay, max_steps, max_bytes)
+
+        Example:
+            Coalesce concurrent progress updates:
+                batcher = db.batcher(max_delay=0.1)
+                await asyncio.gather(*(batcher.transact([job.to_instant_update()]) for job in jobs))
+                await batcher.close()
+
+        """
+        return TransactBatcher(self, **options)
+
+
+class TransactBatcher:
+    """Write-behind coalescer for `InstantDBAdminAPI.transact`.
+
+    Steps submitted concurrently (from any number of coroutines) within `max_delay` seconds
+    are sent together in as few `/admin/transact` requests as possible:
+
+    - Repeated `Update`s of the same entity are merged into the first one (later attributes
+      win), unless any other step on that entity (`Merge`, `Delete`, `Link`, `Unlink`) comes
+      in between, or the merged step would push its request past `max_bytes` (the Update is
+      then sent as a step of its own).
+    - Requests are cut at `max_steps` steps or `max_bytes` of JSON payload. A caller's steps
+      stay in one request unless they alone exceed the limits.
+    - Requests are sent in submission order, one at a time.
+
+    Each `transact()` call returns when every request carrying its steps has committed (with
+    the response of the last one), or raises that request's error.
+
+    Args:
+        client (InstantDBAdminAPI): Client used to send the transactions
+        max_delay (float): Seconds to wait for more steps before sending
+        max_steps (int): Maximum steps per request
+        max_bytes (int): Maximum JSON payload size per request
+
+    """
+
+    def __init__(
+            self,
+            client: InstantDBAdminAPI,
+            max_delay: float = 0.05,
+            max_steps: int = 500,
+            max_bytes: int = 512 * 1024,
+    ):
+        self.client = client
+        self.max_delay = max_delay
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self.stats = {"calls": 0, "steps": 0, "merged": 0, "requests": 0}
+        self._pending: List[tuple[List[Step], asyncio.Future]] = []
+        self._pending_steps = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def transact(self, steps: list[Step]) -> dict[str, Any]:
+        """Queue steps for the next batch and wait until they are committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(steps), future))
+        self._pending_steps += len(steps)
+        self.stats["calls"] += 1
+        self.stats["steps"] += len(steps)
+
+        if self._pending_steps >= self.max_steps:
+            self._schedule()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._schedule)
+        return await future
+
+    def _schedule(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Send everything queued so far."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_steps = self._pending, [], 0
+        if not pending:
+            return
+        if self._send_lock is None:
+            self._send_lock = asyncio.Lock()
+
+        chunks, owners = self._plan(pending)
+        async with self._send_lock:
+            results: Dict[int, Any] = {}
+            for i, chunk in enumerate(chunks):
+                self.stats["requests"] += 1
+                try:
+                    results[i] = await self.client.transact(chunk)
+                except Exception as e:
+                    results[i] = e
+
+        for (_, future), chunk_ids in zip(pending, owners):
+            if future.done():
+                continue
+            errors = [results[i] for i in chunk_ids if isinstance(results[i], Exception)]
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result(results[max(chunk_ids)] if chunk_ids else {})
+
+    @staticmethod
+    def _size(step: Step) -> int:
+        # Serialized step plus its ", " separator in the `{"steps": [...]}` payload
+        return len(json.dumps(step.to_list())) + 2
+
+    def _plan(self, pending: List[tuple[List[Step], asyncio.Future]]) -> tuple[List[List[Step]], List[set[int]]]:
+        """Merge and chunk the pending steps. Returns the requests and, per caller, the requests it waits for."""
+        empty = len(json.dumps({"steps": []}))
+        chunks: List[List[Step]] = [[]]
+        sizes = [empty]
+        owners: List[set[int]] = []
+        # (collection, id) -> (chunk index, position) of the Update later Updates merge into
+        updates: Dict[tuple[str, str], tuple[int, int]] = {}
+
+        for steps, _ in pending:
+            chunk_ids: set[int] = set()
+            new_steps = []
+            for step in steps:
+                key = (getattr(step, "collection", None), getattr(step, "id", None))
+                if isinstance(step, Update) and key in updates:
+                    c, pos = updates[key]
+                    target = chunks[c][pos]
+                    merged = Update(collection=target.collection, id=target.id,
+                                    data={**target.data, **step.data})
+                    growth = self._size(merged) - self._size(target)
+                    # Merge only while the earlier request stays within max_bytes;
+                    # otherwise the Update is sent as a step of its own (below)
+                    if sizes[c] + growth <= self.max_bytes:
+                        chunks[c][pos] = merged
+                        sizes[c] += growth
+                        chunk_ids.add(c)
+                        self.stats["merged"] += 1
+                        continue
+                # Later Updates must not merge into anything before this step, or they
+                # would run before it
+                updates.pop(key, None)
+                new_steps.append(step)
+
+            step_sizes = [self._size(step) for step in new_steps]
+            # Keep the caller's steps together when they fit in one request
+            if chunks[-1] and (len(chunks[-1]) + len(new_steps) > self.max_steps
+                               or sizes[-1] + sum(step_sizes) > self.max_bytes):
+                chunks.append([])
+                sizes.append(empty)
+            for step, size in zip(new_steps, step_sizes):
+                if chunks[-1] and (len(chunks[-1]) >= self.max_steps or sizes[-1] + size > self.max_bytes):
+                    chunks.append([])
+                    sizes.append(empty)
+                c = len(chunks) - 1
+                if isinstance(step, Update):
+                    updates[(step.collection, step.id)] = (c, len(chunks[c]))
+                chunks[c].append(step)
+                sizes[c] += size
+                chunk_ids.add(c)
+            owners.append(chunk_ids)
+
+        if not chunks[-1]:
+            chunks.pop()
+        return chunks, owners
+
+    async def close(self) -> None:
+        """Send anything still queued."""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from typing import Iterable, List, Optional
+
+
+class SyncState:
+    """
+    Local state for incremental watch-history syncs, stored as JSON:
+
+    - `watermark`: id of the newest history entry up to which everything has been handled.
+      History is newest-first, so a sync stops paging once it reaches this entry.
+    - `processed`: external ids of videos that were transcribed and persisted.
+    - `skipped`: external ids that were deliberately not processed (e.g. too long).
+
+    A sync records the ids it paged (newest first) in `fetched`, then marks outcomes and calls
+    `advance()`. The watermark only moves past entries that were processed or skipped, so a
+    failed video is seen (and retried) again by the next sync. If a sync stopped at its limit
+    before reaching the watermark, the watermark stays put until a later sync closes the gap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark: Optional[str] = None
+        self.processed = set()
+        self.skipped = set()
+        self.fetched: List[str] = []
+        self.complete = False
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.watermark = data.get('watermark')
+            self.processed = set(data.get('processed', []))
+            self.skipped = set(data.get('skipped', []))
+
+    def take_new(self, entries: Iterable[dict], limit: int) -> List[dict]:
+        """
+        Consumes history entries (newest first, possibly a lazy generator) until the watermark
+        or until `limit` unhandled entries were found, records their ids in `fetched`, and returns
+        the unhandled ones. Stopping early means yt-dlp never requests the older history pages.
+        """
+        self.fetched = []
+        self.complete = True
+        new = []
+        for entry in entries:
+            if not entry:
+                continue
+            video_id = entry.get('id')
+            if video_id == self.watermark:
+                break
+            if len(new) >= limit:
+                self.complete = False
+                break
+            self.fetched.append(video_id)
+            if not self.is_handled(video_id):
+                new.append(entry)
+        print(f"Incremental sync: {len(self.fetched)} entries since the watermark, {len(new)} not yet handled")
+        return new
+
+    def is_handled(self, video_id: str) -> bool:
+        return video_id in self.processed or video_id in self.skipped
+
+    def mark_processed(self, video_ids: Iterable[str]):
+        self.processed.update(video_ids)
+
+    def mark_skipped(self, video_ids: Iterable[str]):
+        self.skipped.update(video_ids)
+
+    def advance(self) -> Optional[str]:
+        """Moves the watermark to the newest fetched entry with only handled entries below it."""
+        if not self.complete:
+            return self.watermark
+        for video_id in reversed(self.fetched):
+            if not self.is_handled(video_id):
+                break
+            self.watermark = video_id
+        return self.watermark
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    'watermark': self.watermark,
+                    'processed': sorted(self.processed),
+                    'skipped': sorted(self.skipped),
+                }, f, indent=2)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -12,6 +12,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 
 from apps.transcriber.extractors.youtube import YouTubeHistoryFetcher
 from apps.transcriber.lib.models import VideoMetadata, Channel
+from apps.transcriber.lib.sync_state import SyncState
 
 class VideoProcessor:
     def __init__(self, base_dir: str):
@@ -151,10 +152,17 @@ def main():
     parser.add_argument("--limit", type=int, default=50, help="Number of videos to fetch")
     parser.add_argument("--cookies", type=str, help="Path to Netscape cookies file")
     parser.add_argument("--url", type=str, help="Process a specific video URL instead of history")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process history entries newer than the last run (skips already processed videos)")
+    parser.add_argument("--sync-state", type=str, default=None,
+                        help="Incremental sync state file (default: transcriptions/process_queue_sync_state.json)")
     
     args = parser.parse_args()
     
     history = []
+    # Base dir is apps/transcriber
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    state = None
     
     if args.url:
         # Create a dummy VideoMetadata for the single URL
@@ -196,36 +204,48 @@ def main():
     else:
         # Initialize Fetcher
         try:
+            if args.incremental:
+                state = SyncState(args.sync_state or os.path.join(base_dir, "transcriptions", "process_queue_sync_state.json"))
+                print(f"Incremental sync from watermark {state.watermark}")
             fetcher = YouTubeHistoryFetcher(cookie_file=args.cookies)
-            history = fetcher.fetch_history(limit=args.limit)
+            history = fetcher.fetch_history(limit=args.limit, sync_state=state)
         except Exception as e:
             print(f"Error initializing fetcher: {e}")
             return
 
     # Initialize Processor
-    # Base dir is apps/transcriber
-    base_dir = os.path.dirname(os.path.abspath(__file__))
     processor = VideoProcessor(base_dir)
     
     processed_count = 0
     
-    for video in history:
-        # Filter: Skip if > 3 hours (10800 seconds)
-        if video.duration and video.duration > 10800:
-            print(f"Skipping {video.title}: Duration {video.duration}s > 3 hours")
-            continue
-            
-        print(f"\nProcessing {video.title}...")
-        
-        # Download
-        audio_path = processor.download_audio(video)
-        if not audio_path:
-            continue
+    try:
+        for video in history:
+            # Filter: Skip if > 3 hours (10800 seconds)
+            if video.duration and video.duration > 10800:
+                print(f"Skipping {video.title}: Duration {video.duration}s > 3 hours")
+                if state is not None:
+                    state.mark_skipped([video.id])
+                continue
+                
+            print(f"\nProcessing {video.title}...")
             
-        # Transcribe
-        success = processor.transcribe(audio_path, video)
-        if success:
-            processed_count += 1
+            # Download
+            audio_path = processor.download_audio(video)
+            if not audio_path:
+                continue
+                
+            # Transcribe
+            success = processor.transcribe(audio_path, video)
+            if success:
+                processed_count += 1
+                if state is not None:
+                    state.mark_processed([video.id])
+                    state.save()
+    finally:
+        if state is not None:
+            state.advance()
+            state.save()
+            print(f"Sync watermark: {state.watermark}")
             
     print(f"\nDone! Processed {processed_count} videos.")
 
@@ -0,0 +1,23 @@
+"""
+Shared fixtures for the transcriber tests.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def transcriber_env(monkeypatch):
+    """Lets universal_transcriber.transcribe (and api/server, which import it) be imported:
+    placeholder InstantDB credentials, and no InstantDB log handler. Skips without yt-dlp
+    or pywhispercpp."""
+    for module in ("yt_dlp", "pywhispercpp"):
+        pytest.importorskip(module)
+    monkeypatch.setenv("INSTANT_APP_ID", "test-app")
+    monkeypatch.setenv("INSTANT_ADMIN_TOKEN", "test-token")
+    # Keep the imported modules from shipping test logs to InstantDB
+    monkeypatch.setattr("instant_logger.setup_instant_logging",
+                        lambda *args, **kwargs: logging.getLogger("transcriber-tests"))
@@ -0,0 +1,244 @@
+"""
+Tests for HTTPPool against a local aiohttp stand-in server: retries and backoff, which
+failures non-idempotent requests (transact, magic codes) are retried on, one session
+per event loop, and the max_concurrency limit.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+from aiohttp import web
+
+from instantdb_admin_client import HTTPPool, InstantDBAdminAPI, Update
+
+
+class StandIn:
+    """Answers each request with the next (status, headers, delay) in `script` (then 200)."""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            status, headers, delay = self.script.pop(0) if self.script else (200, {}, 0.0)
+            await asyncio.sleep(delay)
+            body = {"tx-id": self.requests} if status == 200 else {"message": f"status {status}"}
+            return web.json_response(body, status=status, headers=headers)
+        finally:
+            self.in_flight -= 1
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._runner.cleanup()
+
+
+def pool(**options):
+    options.setdefault("backoff_base", 0.001)
+    return HTTPPool(**options)
+
+
+def run(script, body):
+    """Runs `body(server)` against a stand-in server answering with `script`."""
+    async def main():
+        async with StandIn(script) as server:
+            return await body(server), server
+
+    return asyncio.run(main())
+
+
+def error(status):
+    return (status, {}, 0.0)
+
+
+def test_idempotent_request_is_retried_on_5xx():
+    http = pool()
+
+    async def body(server):
+        try:
+            return await http.request_json("GET", server.base_url + "/q", "failed")
+        finally:
+            await http.close()
+
+    result, server = run([error(500), error(502)], body)
+    assert result == {"tx-id": 3}
+    assert server.requests == 3
+    assert http.stats["retries"] == 2
+
+
+def test_retries_stop_at_max_retries():
+    http = pool(max_retries=2)
+
+    async def body(server):
+        try:
+            with pytest.raises(Exception, match="failed: .*status 504"):
+                await http.request("GET", server.base_url + "/q", "failed")
+        finally:
+            await http.close()
+
+    _, server = run([error(504)] * 5, body)
+    assert server.requests == 3
+    assert http.stats["failures"] == 1
+
+
+@pytest.mark.parametrize("status", [500, 502, 504])
+def test_transact_is_not_retried_after_a_5xx_it_may_have_committed(status):
+    async def body(server):
+        db = InstantDBAdminAPI("app", "token", base_url=server.base_url, http=pool())
+        try:
+            with pytest.raises(Exception, match="Transaction failed"):
+                await db.transact([Update(collection="jobs", id="a", data={"n": 1})])
+        finally:
+            await db.close()
+
+    _, server = run([error(status), error(200)], body)
+    assert server.requests == 1
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_transact_is_retried_when_turned_away(status):
+    async def body(server):
+        db = InstantDBAdminAPI("app", "token", base_url=server.base_url, http=pool())
+        try:
+            return await db.transact([Update(collection="jobs", id="a", data={"n": 1})])
+        finally:
+            await db.close()
+
+    result, server = run([error(status)], body)
+    assert result == {"tx-id": 2}
+    assert server.requests == 2
+
+
+def test_transact_retries_5xx_when_the_caller_opts_in():
+    async def body(server):
+        db = InstantDBAdminAPI("app", "token", base_url=server.base_url, http=pool())
+        try:
+            return await db.transact([Update(collection="jobs", id="a", data={"n": 1})], idempotent=True)
+        finally:
+            await db.close()
+
+    result, server = run([error(500)], body)
+    assert result == {"tx-id": 2}
+
+
+def test_magic_code_is_not_retried_after_a_5xx():
+    async def body(server):
+        db = InstantDBAdminAPI("app", "token", base_url=server.base_url, http=pool())
+        try:
+            with pytest.raises(Exception, match="Failed to generate magic code"):
+                await db.auth.generate_magic_code("user@example.com")
+        finally:
+            await db.close()
+
+    _, server = run([error(502)], body)
+    assert server.requests == 1
+
+
+def test_timeouts_are_retried_only_for_idempotent_requests():
+    slow = (200, {}, 0.5)
+
+    async def body(server):
+        http = pool(timeout=0.1)
+        try:
+            assert await http.request_json("GET", server.base_url + "/q", "failed") == {"tx-id": 2}
+            with pytest.raises(Exception, match="failed"):
+                await http.request("POST", server.base_url + "/t", "failed", idempotent=False)
+        finally:
+            await http.close()
+
+    _, server = run([slow, (200, {}, 0.0), slow], body)
+    assert server.requests == 3
+
+
+def test_failures_to_connect_are_retried_even_when_not_idempotent():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    # Nothing listens on `port` any more
+    http = pool(max_retries=2)
+
+    async def main():
+        try:
+            with pytest.raises(Exception, match="failed"):
+                await http.request("POST", f"http://127.0.0.1:{port}/t", "failed", idempotent=False)
+        finally:
+            await http.close()
+
+    asyncio.run(main())
+    assert http.stats["retries"] == 2
+
+
+def test_retry_after_sets_the_backoff():
+    http = pool(backoff_max=5.0)
+
+    async def body(server):
+        start = time.monotonic()
+        try:
+            await http.request("GET", server.base_url + "/q", "failed")
+        finally:
+            await http.close()
+        return time.monotonic() - start
+
+    elapsed, server = run([(429, {"Retry-After": "0.3"}, 0.0)], body)
+    assert server.requests == 2
+    assert elapsed >= 0.3
+
+
+def test_backoff_is_capped_and_full_jitter():
+    http = HTTPPool(backoff_base=1.0, backoff_max=4.0)
+
+    delays = [http._backoff(attempt) for attempt in range(1, 8) for _ in range(50)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert http._backoff(1, retry_after="100") == 4.0
+    assert 0 <= http._backoff(1, retry_after="soon") <= 2.0
+
+
+def test_one_session_per_event_loop_with_reused_connections():
+    http = pool()
+
+    async def body(server):
+        for _ in range(5):
+            await http.request("GET", server.base_url + "/q", "failed")
+        return http._session
+
+    first, _ = run([], body)
+    # A new loop (e.g. the next asyncio.run) gets its own session instead of a dead one
+    second, _ = run([], body)
+    asyncio.run(http.close())
+
+    assert first is not second
+    assert http.stats["requests"] == 10
+    # Keep-alive: one connection per loop, not one per request
+    assert http.stats["connections"] == 2
+
+
+def test_max_concurrency_limits_requests_in_flight():
+    http = pool(max_concurrency=3)
+
+    async def body(server):
+        try:
+            await asyncio.gather(*(http.request("GET", server.base_url + "/q", "failed") for _ in range(10)))
+        finally:
+            await http.close()
+
+    _, server = run([(200, {}, 0.05)] * 10, body)
+    assert server.requests == 10
+    assert server.max_in_flight == 3
@@ -0,0 +1,200 @@
+"""
+Tests for InstantDBHandler against a local stand-in for the InstantDB admin API.
+
+The stand-in is an aiohttp server on 127.0.0.1 running in its own thread; it records the
+steps of every /admin/transact request, and can fail requests or hold them open so the
+handler's buffer fills up.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+import pytest
+from aiohttp import web
+
+from instant_logger import InstantDBHandler
+
+
+class StandInServer:
+    """Records the step count of each transact request. `hold()` keeps requests open until `release()`."""
+
+    def __init__(self):
+        self.batches = []
+        self.status = 200
+        self.loop = asyncio.new_event_loop()
+        self._gate = None
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait(5)
+
+    def _serve(self, started):
+        asyncio.set_event_loop(self.loop)
+
+        async def transact(request):
+            steps = json.loads(await request.read())["steps"]
+            if self._gate is not None:
+                await self._gate.wait()
+            if self.status != 200:
+                return web.Response(status=self.status, text="unavailable")
+            self.batches.append(len(steps))
+            return web.json_response({"tx-id": len(self.batches)})
+
+        async def start():
+            app = web.Application()
+            app.router.add_post("/admin/transact", transact)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+        self.loop.run_until_complete(start())
+        started.set()
+        self.loop.run_forever()
+
+    def hold(self):
+        self._gate = asyncio.Event()
+
+    def release(self):
+        self.loop.call_soon_threadsafe(self._gate.set)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(5)
+
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_logger(server, tmp_path):
+    handlers = []
+
+    def make(**options):
+        options.setdefault("spill_path", str(tmp_path / "spill.jsonl"))
+        handler = InstantDBHandler("app", "token", source="test", base_url=server.base_url, **options)
+        logger = logging.getLogger(f"instant-logger-test-{uuid.uuid4()}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        handlers.append(handler)
+        return logger, handler
+
+    yield make
+    for handler in handlers:
+        handler.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the stand-in server")
+        time.sleep(0.01)
+
+
+def test_records_are_sent_in_batches_of_batch_size(server, make_logger):
+    logger, handler = make_logger(batch_size=5, flush_interval=60)
+
+    for i in range(12):
+        logger.info("record %d", i)
+    wait_for(lambda: len(server.batches) == 2)
+    assert server.batches == [5, 5]
+
+    handler.flush()
+    assert server.batches == [5, 5, 2]
+    assert handler.stats()["sent"] == 12
+
+
+def test_partial_batch_is_sent_after_flush_interval(server, make_logger):
+    logger, _ = make_logger(batch_size=100, flush_interval=0.2)
+
+    start = time.monotonic()
+    for i in range(3):
+        logger.info("record %d", i)
+    wait_for(lambda: server.batches)
+
+    assert server.batches == [3]
+    assert time.monotonic() - start >= 0.1
+
+
+def test_full_buffer_drops_records(server, make_logger):
+    logger, handler = make_logger(batch_size=1, flush_interval=60, max_buffer=3, overflow="drop")
+    server.hold()
+
+    logger.info("in flight")
+    wait_for(lambda: handler.stats()["requests"] == 1)
+    for i in range(5):
+        logger.info("record %d", i)
+    assert handler.stats()["dropped"] == 2
+
+    server.release()
+    handler.flush()
+    assert sum(server.batches) == 4
+    assert handler.stats()["sent"] == 4
+
+
+def test_full_buffer_spills_and_replays(server, make_logger, tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    logger, handler = make_logger(batch_size=1, flush_interval=60, max_buffer=3, overflow="spill",
+                                  spill_path=str(spill))
+    server.hold()
+
+    logger.info("in flight")
+    wait_for(lambda: handler.stats()["requests"] == 1)
+    for i in range(5):
+        logger.info("record %d", i)
+    assert handler.stats()["spilled"] == 2
+    assert len(spill.read_text().splitlines()) == 2
+
+    # The next successful request re-sends the spilled records
+    server.release()
+    handler.flush()
+    assert sum(server.batches) == 6
+    assert handler.stats()["spilled"] == 0
+    assert not spill.exists()
+
+
+def test_failed_request_spills_until_the_server_recovers(server, make_logger, tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    logger, handler = make_logger(batch_size=10, flush_interval=60, overflow="spill", spill_path=str(spill))
+    server.status = 503
+
+    for i in range(3):
+        logger.info("record %d", i)
+    handler.flush()
+    assert server.batches == []
+    assert handler.stats()["spilled"] == 3
+
+    server.status = 200
+    logger.info("after recovery")
+    handler.flush()
+    assert sum(server.batches) == 4
+    assert handler.stats()["spilled"] == 0
+
+
+def test_close_delivers_everything_buffered(server, make_logger):
+    logger, handler = make_logger(batch_size=100, flush_interval=60)
+
+    for i in range(7):
+        logger.info("record %d", i)
+    handler.close()
+
+    assert server.batches == [7]
+    assert handler.stats()["queued"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,199 @@
+"""
+Tests for the durable JobQueue and the endpoints in front of it: de-duplication on
+url + video_uuid, QueueFull -> 429 with Retry-After, and re-queueing of jobs that were
+`running` when the previous process stopped.
+
+The endpoint tests import api.py and universal_transcriber/server.py (see the
+`transcriber_env` fixture); they are skipped when fastapi, yt-dlp or pywhispercpp are
+not installed.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from universal_transcriber.job_queue import JobQueue, QueueFull
+
+TRANSCRIBER_DIR = Path(__file__).resolve().parent.parent
+
+
+async def idle(url, video_uuid):
+    pass
+
+
+def run_with_queue(queue, body):
+    """Starts the queue inside a fresh event loop, runs `body(queue)`, then stops it."""
+    async def main():
+        queue.start()
+        try:
+            return await body(queue)
+        finally:
+            await queue.stop()
+
+    return asyncio.run(main())
+
+
+async def wait_for_status(queue, job_id, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id)["status"] != status:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"job {job_id} never reached {status}: {queue.get(job_id)}")
+        await asyncio.sleep(0.01)
+
+
+def test_queue_opens_nothing_until_started(tmp_path):
+    db_path = tmp_path / "queue" / "jobs.db"
+    queue = JobQueue(str(db_path), idle)
+
+    assert not db_path.parent.exists()
+    with pytest.raises(RuntimeError):
+        queue.submit("https://youtu.be/a")
+
+    run_with_queue(queue, lambda q: asyncio.sleep(0))
+    assert db_path.exists()
+
+
+def test_active_job_is_deduplicated_on_url_and_video_uuid(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), idle, workers=0)
+
+    async def body(q):
+        first, created = q.submit("https://youtu.be/a", "uuid-1")
+        assert created
+        again, created = q.submit("https://youtu.be/a", "uuid-1")
+        assert not created and again["id"] == first["id"]
+
+        # A different video_uuid (or none) is a different job
+        _, created = q.submit("https://youtu.be/a", "uuid-2")
+        assert created
+        no_uuid, created = q.submit("https://youtu.be/a")
+        assert created
+        assert q.submit("https://youtu.be/a")[0]["id"] == no_uuid["id"]
+        return q.stats()
+
+    assert run_with_queue(queue, body)["queued"] == 3
+
+
+def test_finished_job_can_be_submitted_again(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), idle, workers=1)
+
+    async def body(q):
+        first, _ = q.submit("https://youtu.be/a")
+        await wait_for_status(q, first["id"], "done")
+        second, created = q.submit("https://youtu.be/a")
+        assert created and second["id"] != first["id"]
+
+    run_with_queue(queue, body)
+
+
+def test_submit_raises_queue_full_at_max_queued(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), idle, workers=0, max_queued=2)
+
+    async def body(q):
+        q.submit("https://youtu.be/a")
+        q.submit("https://youtu.be/b")
+        with pytest.raises(QueueFull):
+            q.submit("https://youtu.be/c")
+        # Duplicates of waiting jobs are still answered
+        assert not q.submit("https://youtu.be/a")[1]
+
+    run_with_queue(queue, body)
+
+
+def test_failed_job_records_the_error(tmp_path):
+    async def fail(url, video_uuid):
+        raise RuntimeError("download failed")
+
+    queue = JobQueue(str(tmp_path / "jobs.db"), fail, workers=1)
+
+    async def body(q):
+        job, _ = q.submit("https://youtu.be/a")
+        await wait_for_status(q, job["id"], "failed")
+        return q.get(job["id"])
+
+    assert run_with_queue(queue, body)["error"] == "download failed"
+
+
+def test_running_job_is_requeued_on_start(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+
+    async def hang(url, video_uuid):
+        await asyncio.Event().wait()
+
+    async def interrupted(q):
+        job, _ = q.submit("https://youtu.be/a", "uuid-1")
+        await wait_for_status(q, job["id"], "running")
+        return job["id"]
+
+    # stop() cancels the worker mid-job, as a restart would
+    job_id = run_with_queue(JobQueue(db_path, hang, workers=1), interrupted)
+
+    handled = []
+
+    async def record(url, video_uuid):
+        handled.append((url, video_uuid))
+
+    async def restarted(q):
+        await wait_for_status(q, job_id, "done")
+        return q.get(job_id)
+
+    job = run_with_queue(JobQueue(db_path, record, workers=1), restarted)
+    assert handled == [("https://youtu.be/a", "uuid-1")]
+    assert job["attempts"] == 2
+
+
+@pytest.fixture
+def app_env(transcriber_env):
+    pytest.importorskip("fastapi.testclient")
+
+
+def test_transcribe_endpoint_answers_202_then_429_with_retry_after(app_env, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    api = importlib.import_module("api")
+    monkeypatch.setattr(api, "queue", JobQueue(str(tmp_path / "jobs.db"), idle, workers=0, max_queued=1))
+
+    with TestClient(api.app) as client:
+        accepted = client.post("/transcribe", json={"url": "https://youtu.be/a"})
+        duplicate = client.post("/transcribe", json={"url": "https://youtu.be/a"})
+        rejected = client.post("/transcribe", json={"url": "https://youtu.be/b"})
+        job = client.get(f"/jobs/{accepted.json()['job_id']}")
+        health = client.get("/health")
+
+    assert accepted.status_code == 202
+    assert duplicate.status_code == 202 and duplicate.json()["deduplicated"]
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "30"
+    assert job.json()["status"] == "queued"
+    assert health.json()["jobs"]["queued"] == 1
+
+
+def test_server_starts_the_queue_and_runs_submitted_jobs(app_env, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    # server.py is run from universal_transcriber/ and keeps its state under the cwd
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(TRANSCRIBER_DIR / "universal_transcriber"))
+    monkeypatch.delitem(sys.modules, "server", raising=False)
+    server = importlib.import_module("server")
+
+    processed = []
+
+    async def process_video(url, video_uuid=None):
+        processed.append(url)
+        return {"url": url}
+
+    monkeypatch.setattr(server.transcribe, "process_video", process_video)
+
+    with TestClient(server.app) as client:
+        response = client.post("/submit", data={"url": "https://youtu.be/a"}, follow_redirects=False)
+        assert response.status_code == 303
+        deadline = time.monotonic() + 5
+        while not processed:
+            assert time.monotonic() < deadline, "the queued job never ran"
+            time.sleep(0.01)
+
+    assert processed == ["https://youtu.be/a"]
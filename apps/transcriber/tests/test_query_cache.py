@@ -0,0 +1,163 @@
+"""
+Tests for QueryCache and its use by InstantDBAdminAPI.query / transact: TTL expiry,
+LRU eviction, namespace invalidation, the generation guard and use_cache=False.
+
+A fake clock drives expiry and a fake pool stands in for HTTPPool, so nothing waits
+on real time or the network.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from instantdb_admin_client import InstantDBAdminAPI, QueryCache, Update
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePool:
+    """Stands in for HTTPPool: counts queries per namespace and answers with that count.
+
+    Queries whose top-level namespace is in `hold` wait until the test sets `release`.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.transacts = []
+        self.hold = set()
+        self.release = asyncio.Event()
+
+    async def request_json(self, method, url, error, **kwargs):
+        body = kwargs["json"]
+        if url.endswith("/admin/transact"):
+            self.transacts.append(body["steps"])
+            return {"tx-id": len(self.transacts)}
+        query = body["query"]
+        self.queries.append(query)
+        if self.hold & set(query):
+            await self.release.wait()
+        return {name: [{"served": len(self.queries)}] for name in query}
+
+    async def close(self):
+        pass
+
+
+def client(cache):
+    pool = FakePool()
+    return InstantDBAdminAPI("app", "token", http=pool, query_cache=cache), pool
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    db, pool = client(QueryCache(ttl=10, namespace_ttl={"jobs": 2}, clock=clock))
+
+    async def main():
+        await db.query({"videos": {}})
+        await db.query({"videos": {"jobs": {}}})
+        clock.now = 5.0
+        await db.query({"videos": {}})           # still fresh
+        await db.query({"videos": {"jobs": {}}})  # jobs' 2 s TTL applies to the whole query
+        clock.now = 10.0
+        await db.query({"videos": {}})           # expired exactly at the TTL
+
+    asyncio.run(main())
+    assert pool.queries == [{"videos": {}}, {"videos": {"jobs": {}}}, {"videos": {"jobs": {}}}, {"videos": {}}]
+
+
+def test_zero_ttl_namespace_is_never_cached():
+    db, pool = client(QueryCache(namespace_ttl={"jobs": 0}, clock=FakeClock()))
+
+    async def main():
+        for _ in range(3):
+            await db.query({"jobs": {}})
+
+    asyncio.run(main())
+    assert len(pool.queries) == 3
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2, clock=FakeClock())
+    db, pool = client(cache)
+
+    async def main():
+        await db.query({"a": {}})
+        await db.query({"b": {}})
+        await db.query({"a": {}})  # hit; "b" is now least recently used
+        await db.query({"c": {}})  # evicts "b"
+        await db.query({"a": {}})
+        await db.query({"b": {}})
+
+    asyncio.run(main())
+    assert pool.queries == [{"a": {}}, {"b": {}}, {"c": {}}, {"b": {}}]
+    assert cache.stats["evictions"] == 2
+
+
+def test_transact_invalidates_touched_namespaces_only():
+    db, pool = client(QueryCache(clock=FakeClock()))
+
+    async def main():
+        await db.query({"videos": {"transcriptions": {}}})
+        await db.query({"jobs": {}})
+        await db.transact([Update(collection="transcriptions", id="t1", data={"text": "hi"})])
+        await db.query({"videos": {"transcriptions": {}}})  # touched via the nested link label
+        await db.query({"jobs": {}})
+
+    asyncio.run(main())
+    assert pool.queries == [{"videos": {"transcriptions": {}}}, {"jobs": {}}, {"videos": {"transcriptions": {}}}]
+
+
+def test_query_in_flight_during_transact_is_not_cached():
+    cache = QueryCache(clock=FakeClock())
+    db, pool = client(cache)
+    pool.hold = {"videos"}
+
+    async def main():
+        # Starts before the write and returns pre-write data after it
+        stale = asyncio.create_task(db.query({"videos": {}}))
+        await asyncio.sleep(0)
+        await db.transact([Update(collection="videos", id="v1", data={"title": "new"})])
+        pool.release.set()
+        first = await stale
+        second = await db.query({"videos": {}})
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert len(pool.queries) == 2
+    assert first != second
+
+
+def test_use_cache_false_always_hits_the_server_and_stores_nothing():
+    cache = QueryCache(clock=FakeClock())
+    db, pool = client(cache)
+
+    async def main():
+        await db.query({"videos": {}}, use_cache=False)
+        await db.query({"videos": {}}, use_cache=False)
+        await db.query({"videos": {}})
+
+    asyncio.run(main())
+    assert len(pool.queries) == 3
+    assert cache.stats["hits"] == 0
+
+
+def test_cached_results_are_copies():
+    db, _ = client(QueryCache(clock=FakeClock()))
+
+    async def main():
+        first = await db.query({"videos": {}})
+        first["videos"].append("mutated")
+        return await db.query({"videos": {}})
+
+    assert asyncio.run(main()) == {"videos": [{"served": 1}]}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
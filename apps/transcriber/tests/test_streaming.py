@@ -0,0 +1,121 @@
+"""
+Tests for the streaming path (prepare_video_streaming -> stream_transcribe) on a generated
+local WAV standing in for the resolved media URL, with a stub transcription pool: chunk
+cut points, per-chunk segment offsets and `max_pending` backpressure.
+
+Needs ffmpeg on PATH (skipped otherwise).
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+import importlib
+import json
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 16000
+# Quiet 0.1 s frames inside the last 5 s of each 30 s chunk: the cuts must land on them
+QUIET_AT = [27.3, 55.0]
+DURATION = 70.0
+
+
+def write_wav(path):
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-0.3, 0.3, int(DURATION * SAMPLE_RATE))
+    for t in QUIET_AT:
+        start = int(round(t * SAMPLE_RATE))
+        samples[start:start + SAMPLE_RATE // 10] = 0.0
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+class StubPool:
+    """Stands in for TranscriptionPool: one segment per chunk, and a record of the chunks."""
+
+    def __init__(self, workers=1, delay=0.1):
+        self.workers = workers
+        self.delay = delay
+        self.chunks = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def transcribe_samples(self, samples):
+        n = len(self.chunks)
+        self.chunks.append(len(samples))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return [{"start": 0.5, "end": 1.5, "text": f"chunk {n}"}]
+
+
+@pytest.fixture
+def transcribe(transcriber_env):
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("ffmpeg is not installed")
+    return importlib.import_module("universal_transcriber.transcribe")
+
+
+@pytest.fixture
+def local_source(tmp_path, transcribe, monkeypatch):
+    """Resolves every URL to a generated local WAV instead of asking yt-dlp."""
+    path = tmp_path / "source.wav"
+    write_wav(path)
+    monkeypatch.setattr(transcribe, "resolve_audio_stream",
+                        lambda url: (str(path), {}, "local", "Local file", "test", DURATION, None, None))
+    return path
+
+
+def test_streamed_chunks_are_cut_at_quiet_frames_and_offset(transcribe, local_source, tmp_path, monkeypatch):
+    pool = StubPool()
+    monkeypatch.setattr(transcribe, "get_pool", lambda whisper_config=None: pool)
+
+    record = asyncio.run(transcribe.prepare_video_streaming(
+        "https://example.com/watch?v=local", save_audio=False,
+        output_dir=str(tmp_path / "transcriptions"), audio_dir=str(tmp_path / "downloads")))
+
+    cuts = [0.0, *QUIET_AT]
+    assert pool.chunks == [int(round((b - a) * SAMPLE_RATE)) for a, b in zip(cuts, cuts[1:] + [DURATION])]
+    with open(record["json_path"]) as f:
+        segments = json.load(f)
+    assert [s["text"] for s in segments] == ["chunk 0", "chunk 1", "chunk 2"]
+    assert [s["start"] for s in segments] == pytest.approx([c + 0.5 for c in cuts])
+    assert [s["end"] for s in segments] == pytest.approx([c + 1.5 for c in cuts])
+    assert record["audio_path"] is None
+
+
+def test_reading_pauses_at_max_pending(transcribe, local_source, tmp_path, monkeypatch):
+    # One worker -> at most two chunks in flight; the stub is slow enough that all three
+    # chunks would be in flight at once without backpressure
+    pool = StubPool(workers=1, delay=0.3)
+    monkeypatch.setattr(transcribe, "get_pool", lambda whisper_config=None: pool)
+
+    asyncio.run(transcribe.prepare_video_streaming(
+        "https://example.com/watch?v=local", save_audio=False,
+        output_dir=str(tmp_path / "transcriptions"), audio_dir=str(tmp_path / "downloads")))
+
+    assert len(pool.chunks) == 3
+    assert pool.max_in_flight == 2
+
+
+def test_max_pending_one_runs_chunks_one_at_a_time(transcribe, local_source):
+    pool = StubPool(workers=4, delay=0.05)
+
+    segments = asyncio.run(transcribe.stream_transcribe(str(local_source), pool, chunk_length=10.0, max_pending=1))
+
+    # Each cut lands in the last SEARCH_WINDOW (here half the chunk) of its chunk
+    assert all(5 * SAMPLE_RATE <= n <= 10 * SAMPLE_RATE for n in pool.chunks[:-1])
+    assert pool.max_in_flight == 1
+    assert sum(pool.chunks) == int(DURATION * SAMPLE_RATE)
+    # Offsets are the running sum of the chunk lengths
+    offsets = np.cumsum([0] + pool.chunks[:-1]) / SAMPLE_RATE
+    assert [s["start"] for s in segments] == pytest.approx(list(offsets + 0.5))
@@ -0,0 +1,138 @@
+"""
+Tests for SyncState, the incremental watch-history sync state: the watermark only moves
+past handled entries, take_new stops consuming lazy history pages at the watermark, and
+processed/skipped ids survive a reload.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import json
+
+import pytest
+
+import lib.sync_state as sync_state
+from lib.sync_state import SyncState
+
+
+def history(*ids):
+    return [{"id": video_id} for video_id in ids]
+
+
+class LazyHistory:
+    """A newest-first history generator that records how many entries were pulled."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.pulled = 0
+
+    def __iter__(self):
+        for video_id in self.ids:
+            self.pulled += 1
+            yield {"id": video_id}
+
+
+def ids(entries):
+    return [entry["id"] for entry in entries]
+
+
+def test_take_new_stops_paging_at_the_watermark(tmp_path):
+    state = SyncState(str(tmp_path / "state.json"))
+    state.watermark = "v3"
+    entries = LazyHistory([f"v{i}" for i in range(10, 0, -1)])
+
+    new = state.take_new(entries, limit=100)
+
+    assert ids(new) == ["v10", "v9", "v8", "v7", "v6", "v5", "v4"]
+    assert state.complete
+    # v10..v4 plus the watermark entry itself; v2 and v1 are never requested
+    assert entries.pulled == 8
+
+
+def test_take_new_stops_at_the_limit_and_skips_handled_entries(tmp_path):
+    state = SyncState(str(tmp_path / "state.json"))
+    state.mark_processed(["v9"])
+    entries = LazyHistory([f"v{i}" for i in range(10, 0, -1)])
+
+    new = state.take_new(entries, limit=3)
+
+    assert ids(new) == ["v10", "v8", "v7"]
+    assert state.fetched == ["v10", "v9", "v8", "v7"]
+    assert not state.complete
+    assert entries.pulled == 5
+
+
+def test_watermark_only_advances_past_handled_entries(tmp_path):
+    state = SyncState(str(tmp_path / "state.json"))
+    state.watermark = "v1"
+    state.take_new(history("v5", "v4", "v3", "v2", "v1"), limit=10)
+
+    # v3 failed: the watermark stops just below it, so the next sync sees v3 again
+    state.mark_processed(["v5", "v2"])
+    state.mark_skipped(["v4"])
+    assert state.advance() == "v2"
+
+    new = state.take_new(history("v6", "v5", "v4", "v3", "v2", "v1"), limit=10)
+    assert ids(new) == ["v6", "v3"]
+
+    state.mark_processed(["v6", "v3"])
+    assert state.advance() == "v6"
+
+
+def test_watermark_stays_put_when_the_oldest_new_entry_failed(tmp_path):
+    state = SyncState(str(tmp_path / "state.json"))
+    state.watermark = "v1"
+    state.take_new(history("v3", "v2", "v1"), limit=10)
+    state.mark_processed(["v3"])
+
+    assert state.advance() == "v1"
+
+
+def test_watermark_stays_put_after_an_incomplete_sync(tmp_path):
+    state = SyncState(str(tmp_path / "state.json"))
+    state.watermark = "v1"
+    state.take_new(history("v5", "v4", "v3", "v2", "v1"), limit=2)
+    state.mark_processed(["v5", "v4"])
+
+    # v3 and v2 were never looked at, so the gap must stay below the watermark
+    assert state.advance() == "v1"
+
+    state.take_new(history("v5", "v4", "v3", "v2", "v1"), limit=2)
+    state.mark_processed(["v3", "v2"])
+    assert state.advance() == "v5"
+
+
+def test_state_survives_a_reload(tmp_path):
+    path = tmp_path / "sync" / "state.json"
+    state = SyncState(str(path))
+    state.take_new(history("v3", "v2", "v1"), limit=10)
+    state.mark_processed(["v1", "v3"])
+    state.mark_skipped(["v2"])
+    state.advance()
+    state.save()
+
+    reloaded = SyncState(str(path))
+    assert reloaded.watermark == "v3"
+    assert reloaded.processed == {"v1", "v3"}
+    assert reloaded.skipped == {"v2"}
+    assert reloaded.is_handled("v2") and not reloaded.is_handled("v4")
+    assert ids(reloaded.take_new(history("v4", "v3", "v2"), limit=10)) == ["v4"]
+
+
+def test_interrupted_save_keeps_the_previous_state(tmp_path, monkeypatch):
+    path = tmp_path / "state.json"
+    state = SyncState(str(path))
+    state.mark_processed(["v1"])
+    state.save()
+    before = path.read_text()
+
+    def fail(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    state.mark_processed(["v2"])
+    monkeypatch.setattr(sync_state.json, "dump", fail)
+    with pytest.raises(KeyboardInterrupt):
+        state.save()
+
+    assert path.read_text() == before
+    assert json.loads(before)["processed"] == ["v1"]
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
@@ -0,0 +1,200 @@
+"""
+Tests for TransactBatcher: Update merging, Delete barriers, request chunking and
+per-caller results, against a fake client that records each /admin/transact request.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from instantdb_admin_client import Delete, Link, Merge, TransactBatcher, Unlink, Update
+
+
+class FakeClient:
+    """Stands in for InstantDBAdminAPI: records requests and fails the ones numbered in `fail`."""
+
+    def __init__(self, fail=()):
+        self.requests = []
+        self.payloads = []
+        self.fail = set(fail)
+
+    async def transact(self, steps):
+        self.requests.append([step.to_list() for step in steps])
+        self.payloads.append(len(json.dumps({"steps": self.requests[-1]})))
+        n = len(self.requests)
+        if n in self.fail:
+            raise Exception(f"request {n} failed")
+        return {"tx-id": n}
+
+
+def run_callers(batcher, calls):
+    """Submit each list of steps from its own coroutine; returns results (or exceptions) in order."""
+    async def main():
+        results = await asyncio.gather(*(batcher.transact(steps) for steps in calls), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    return asyncio.run(main())
+
+
+def update(id, **data):
+    return Update(collection="jobs", id=id, data=data)
+
+
+def test_updates_of_same_entity_merge_into_first():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01)
+
+    results = run_callers(batcher, [[update("a", progress=0.1)], [update("b", progress=0.5)],
+                                    [update("a", progress=0.2, status="done")]])
+
+    assert client.requests == [[
+        ["update", "jobs", "a", {"progress": 0.2, "status": "done"}],
+        ["update", "jobs", "b", {"progress": 0.5}],
+    ]]
+    assert results == [{"tx-id": 1}] * 3
+    assert batcher.stats["merged"] == 1
+
+
+def test_delete_is_a_merge_barrier():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01)
+
+    run_callers(batcher, [[update("a", x=1)], [Delete(collection="jobs", id="a")], [update("a", x=2)]])
+
+    assert client.requests == [[
+        ["update", "jobs", "a", {"x": 1}],
+        ["delete", "jobs", "a"],
+        ["update", "jobs", "a", {"x": 2}],
+    ]]
+    assert batcher.stats["merged"] == 0
+
+
+def test_merge_step_is_a_merge_barrier():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01)
+
+    run_callers(batcher, [[update("a", x=1)], [Merge(collection="jobs", id="a", data={"x": 2})],
+                          [update("a", x=3)]])
+
+    # Folding the last Update into the first would leave x == 2
+    assert client.requests == [[
+        ["update", "jobs", "a", {"x": 1}],
+        ["merge", "jobs", "a", {"x": 2}],
+        ["update", "jobs", "a", {"x": 3}],
+    ]]
+    assert batcher.stats["merged"] == 0
+
+
+def test_link_steps_are_merge_barriers():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01)
+
+    run_callers(batcher, [[update("a", x=1)], [Link(collection="jobs", id="a", links={"videos": "v"})],
+                          [update("a", x=2)], [Unlink(collection="jobs", id="a", links={"videos": "v"})],
+                          [update("a", x=3)], [update("b", x=1)], [update("a", x=4)]])
+
+    assert [step[0] for step in client.requests[0]] == ["update", "link", "update", "unlink", "update", "update"]
+    assert client.requests[0][4] == ["update", "jobs", "a", {"x": 4}]
+    assert batcher.stats["merged"] == 1
+
+
+def test_requests_cut_at_max_steps():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01, max_steps=2)
+
+    results = run_callers(batcher, [[update(str(i), n=i)] for i in range(5)])
+
+    assert [len(r) for r in client.requests] == [2, 2, 1]
+    assert results == [{"tx-id": 1}, {"tx-id": 1}, {"tx-id": 2}, {"tx-id": 2}, {"tx-id": 3}]
+
+
+def test_callers_steps_stay_in_one_request_when_they_fit():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01, max_steps=3)
+
+    run_callers(batcher, [
+        [update("a", n=1), update("b", n=1)],
+        [update("c", n=1), Link(collection="jobs", id="c", links={"videos": "v"})],
+    ])
+
+    assert [[step[2] for step in r] for r in client.requests] == [["a", "b"], ["c", "c"]]
+
+
+def test_requests_cut_at_max_bytes():
+    client = FakeClient()
+    max_bytes = 300
+    batcher = TransactBatcher(client, max_delay=0.01, max_bytes=max_bytes)
+
+    run_callers(batcher, [[update(str(i), text="x" * 40)] for i in range(10)])
+
+    assert len(client.requests) > 1
+    assert sum(len(r) for r in client.requests) == 10
+    assert max(client.payloads) <= max_bytes
+
+
+def test_merge_that_would_exceed_max_bytes_is_sent_separately():
+    client = FakeClient()
+    max_bytes = 200
+    batcher = TransactBatcher(client, max_delay=0.01, max_bytes=max_bytes)
+
+    results = run_callers(batcher, [
+        [update("a", text="x" * 40)],
+        [update("b", text="y" * 40)],
+        # Merged into "a" this would push the first request past max_bytes
+        [update("a", note="z" * 80)],
+        # Must not merge into the first "a" either, or the step above would overwrite it
+        [update("a", text="w")],
+    ])
+
+    assert max(client.payloads) <= max_bytes
+    assert client.requests[0] == [
+        ["update", "jobs", "a", {"text": "x" * 40}],
+        ["update", "jobs", "b", {"text": "y" * 40}],
+    ]
+    assert client.requests[1] == [["update", "jobs", "a", {"note": "z" * 80, "text": "w"}]]
+    assert results[2] == results[3] == {"tx-id": 2}
+
+
+def test_caller_spanning_requests_gets_last_response():
+    client = FakeClient()
+    batcher = TransactBatcher(client, max_delay=0.01, max_steps=2)
+
+    results = run_callers(batcher, [[update("a", n=1)], [update("b", n=1), update("c", n=1), update("a", n=2)]])
+
+    # The second caller's steps don't fit beside the first; its Update of "a" merged into request 1
+    assert client.requests[0] == [["update", "jobs", "a", {"n": 2}]]
+    assert results == [{"tx-id": 1}, {"tx-id": 2}]
+
+
+def test_errors_reach_only_the_callers_of_the_failed_request():
+    client = FakeClient(fail={2})
+    batcher = TransactBatcher(client, max_delay=0.01, max_steps=2)
+
+    results = run_callers(batcher, [[update("a", n=1)], [update("b", n=1)], [update("c", n=1)],
+                                    # Merges into request 1, so this caller waits on requests 1 and 3
+                                    [update("a", n=2), update("d", n=1), update("e", n=1)]])
+
+    assert len(client.requests) == 3
+    assert results[0] == results[1] == {"tx-id": 1}
+    assert isinstance(results[2], Exception) and "request 2 failed" in str(results[2])
+    assert results[3] == {"tx-id": 3}
+
+
+def test_caller_with_a_merged_step_in_a_failed_request_sees_the_error():
+    client = FakeClient(fail={1})
+    batcher = TransactBatcher(client, max_delay=0.01, max_steps=2)
+
+    results = run_callers(batcher, [[update("a", n=1)], [update("b", n=1)],
+                                    [update("a", n=2), update("c", n=1)]])
+
+    assert all(isinstance(r, Exception) for r in results[:2])
+    # Its Update of "a" rode in the failed request 1, even though request 2 succeeded
+    assert isinstance(results[2], Exception)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
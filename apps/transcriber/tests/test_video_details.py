@@ -0,0 +1,212 @@
+"""
+Tests for video page enrichment: parse_video_details, DetailsCache (TTL and atomic save),
+RateLimiter across threads, and VideoDetailsFetcher.fetch_many against a local fake
+video page server.
+
+Run from apps/transcriber: python -m pytest tests
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import extractors.video_details as video_details
+from extractors.video_details import DetailsCache, RateLimiter, VideoDetailsFetcher, parse_video_details
+
+PAGE = """<html><head>
+<meta property="og:description" content="Description of {id}">
+<meta itemprop="channelId" content="UC{id}">
+<link itemprop="name" content="Channel {id}">
+<meta itemprop="datePublished" content="2024-01-01T00:00:00-08:00">
+<meta itemprop="interactionCount" content="{views}">
+</head></html>"""
+
+
+def test_parse_video_details_reads_every_field():
+    assert parse_video_details(PAGE.format(id="abc", views=1234)) == {
+        "description": "Description of abc",
+        "channel_id": "UCabc",
+        "channel_url": "https://www.youtube.com/channel/UCabc",
+        "channel_name": "Channel abc",
+        "upload_date": "2024-01-01T00:00:00-08:00",
+        "view_count": 1234,
+    }
+
+
+def test_parse_video_details_fallbacks():
+    html = """
+    <meta name="description" content="Plain description">
+    <link itemprop="url" href="http://www.youtube.com/channel/UCfromlink">
+    <script>{"viewCount":"987"}</script>
+    """
+    assert parse_video_details(html) == {
+        "description": "Plain description",
+        "channel_id": "UCfromlink",
+        "channel_url": "https://www.youtube.com/channel/UCfromlink",
+        "view_count": 987,
+    }
+    handle = parse_video_details('<link itemprop="url" href="https://www.youtube.com/@SomeUser">')
+    assert handle == {"channel_url": "https://www.youtube.com/@SomeUser"}
+    assert parse_video_details("<html></html>") == {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_entries_expire_after_ttl(tmp_path):
+    clock = FakeClock()
+    cache = DetailsCache(str(tmp_path / "details.json"), ttl=60, clock=clock)
+    cache.put("a", {"view_count": 1})
+
+    clock.now += 60
+    assert cache.get("a") == {"view_count": 1}
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.get("missing") is None
+
+
+def test_cache_save_reloads_and_drops_expired_entries(tmp_path):
+    path = tmp_path / "cache" / "details.json"
+    clock = FakeClock()
+    cache = DetailsCache(str(path), ttl=60, clock=clock)
+    cache.put("old", {"n": 1})
+    clock.now += 30
+    cache.put("new", {"n": 2})
+    clock.now += 40
+    cache.save()
+
+    assert set(json.loads(path.read_text())) == {"new"}
+    assert DetailsCache(str(path), ttl=60, clock=clock).get("new") == {"n": 2}
+    assert [p.name for p in path.parent.iterdir()] == ["details.json"]
+
+
+def test_interrupted_save_keeps_the_previous_cache(tmp_path, monkeypatch):
+    path = tmp_path / "details.json"
+    cache = DetailsCache(str(path))
+    cache.put("a", {"n": 1})
+    cache.save()
+    before = path.read_text()
+
+    def fail(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    cache.put("b", {"n": 2})
+    monkeypatch.setattr(video_details.json, "dump", fail)
+    with pytest.raises(KeyboardInterrupt):
+        cache.save()
+
+    assert path.read_text() == before
+    assert [p.name for p in tmp_path.iterdir()] == ["details.json"]
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "details.json"
+    path.write_text('{"truncated": ')
+    assert DetailsCache(str(path)).entries == {}
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    limiter = RateLimiter(rate=50)
+    starts = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(5):
+            limiter.wait()
+            with lock:
+                starts.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    starts.sort()
+    assert len(starts) == 40
+    # 40 calls at 50/s take at least 39 intervals, however the threads interleave
+    assert starts[-1] - starts[0] >= 39 * 0.02 - 0.01
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.02 - 0.005
+
+
+@pytest.fixture
+def page_server():
+    """Fake video pages at /watch?v=<id>; ids starting with "missing" answer 404."""
+    requests = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            video_id = self.path.rsplit("=", 1)[-1]
+            with lock:
+                requests.append((time.monotonic(), video_id))
+            time.sleep(0.05)
+            if video_id.startswith("missing"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAGE.format(id=video_id, views=len(video_id) * 1000).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/watch?v="
+    yield base, requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_many_fetches_concurrently_and_caches(page_server, tmp_path):
+    base, requests = page_server
+    urls = {f"vid{i:02d}": base + f"vid{i:02d}" for i in range(12)}
+    urls["missing1"] = base + "missing1"
+    cache_path = str(tmp_path / "details.json")
+
+    fetcher = VideoDetailsFetcher(max_workers=6, rate=0, cache=DetailsCache(cache_path))
+    start = time.monotonic()
+    details = fetcher.fetch_many(urls)
+    elapsed = time.monotonic() - start
+    fetcher.close()
+
+    assert details["vid03"] == parse_video_details(PAGE.format(id="vid03", views=5000))
+    assert details["missing1"] == {}
+    assert fetcher.stats == {"fetched": 12, "cached": 0, "failed": 1}
+    # 13 pages of 50 ms on 6 threads, not one after the other
+    assert elapsed < 13 * 0.05
+
+    # A re-sync serves everything from the cache except the failure, which is retried
+    requests.clear()
+    fetcher = VideoDetailsFetcher(max_workers=6, rate=0, cache=DetailsCache(cache_path))
+    assert fetcher.fetch_many(urls) == details
+    fetcher.close()
+    assert [video_id for _, video_id in requests] == ["missing1"]
+    assert fetcher.stats == {"fetched": 0, "cached": 12, "failed": 1}
+
+
+def test_fetch_many_respects_the_rate_limit_across_workers(page_server):
+    base, requests = page_server
+    urls = {f"vid{i:02d}": base + f"vid{i:02d}" for i in range(10)}
+
+    fetcher = VideoDetailsFetcher(max_workers=8, rate=20)
+    fetcher.fetch_many(urls)
+    fetcher.close()
+
+    times = sorted(t for t, _ in requests)
+    assert len(times) == 10
+    # Request starts are at least 1/20 s apart (minus scheduling jitter), even with 8 threads
+    assert times[-1] - times[0] >= 9 * 0.05 - 0.02
@@ -0,0 +1,164 @@
+"""
+Durable transcription job queue (SQLite) with a bounded pool of async workers.
+
+The HTTP handlers only insert a row and return its id; `workers` coroutines claim queued jobs
+in submission order and await `handler(url, video_uuid)`. State lives in SQLite (WAL), so:
+
+- A restart loses nothing: jobs that were `running` when the process died are re-queued by
+  `start()`, which also opens the database (nothing is opened at import time).
+- Submitting a URL (+ video_uuid) that is already queued or running returns the existing job
+  instead of processing it twice.
+- When `max_queued` jobs are waiting, `submit` raises QueueFull (the APIs answer 429).
+
+Job statuses: queued -> running -> done | failed.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    video_uuid TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_url ON jobs (url, status);
+"""
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting."""
+
+
+class JobQueue:
+    def __init__(self, db_path, handler, workers=2, max_queued=100):
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        # Opened by start(), so creating the queue at import time touches no files
+        self.conn = None
+        self._wakeup = None
+        self._tasks = []
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        # Only used from the event loop thread; statements are short, so no executor is needed
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _require_started(self):
+        if self.conn is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+
+    # ------------------------------------------------------------------ API
+
+    def submit(self, url, video_uuid=None):
+        """Returns (job, created). `created` is False when an identical job is already active."""
+        self._require_started()
+        existing = self.conn.execute(
+            "SELECT * FROM jobs WHERE url = ? AND video_uuid IS ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+            (url, video_uuid, *ACTIVE),
+        ).fetchone()
+        if existing is not None:
+            return dict(existing), False
+        queued = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if queued >= self.max_queued:
+            raise QueueFull(f"{queued} jobs already queued")
+
+        job_id = str(uuid.uuid4())
+        self.conn.execute(
+            "INSERT INTO jobs (id, url, video_uuid, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, url, video_uuid, time.time()),
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self.get(job_id), True
+
+    def get(self, job_id):
+        self._require_started()
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def stats(self):
+        self._require_started()
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    # ------------------------------------------------------------------ workers
+
+    def start(self):
+        """Opens the database and starts the workers; must be called from the event loop."""
+        if self.conn is None:
+            self.conn = self._connect()
+        # Jobs interrupted by a restart run again
+        self.conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _claim(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def _finish(self, job_id, error=None):
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("failed" if error else "done", error, time.time(), job_id),
+        )
+
+    async def _worker(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Other idle workers may be able to take the next one
+            self._wakeup.set()
+            try:
+                await self.handler(job["url"], job["video_uuid"])
+            except asyncio.CancelledError:
+                # Left as `running`; the next start() re-queues it
+                raise
+            except Exception as e:
+                print(f"Job {job['id']} ({job['url']}) failed: {e}")
+                self._finish(job["id"], str(e) or type(e).__name__)
+            else:
+                self._finish(job["id"])
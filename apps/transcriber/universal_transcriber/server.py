@@ -1,10 +1,15 @@
-from fastapi import FastAPI, BackgroundTasks, Form, Request
+from fastapi import FastAPI, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 import transcribe
+from job_queue import JobQueue, QueueFull
 import os
 import logging
 
+# Ensure directories exist (the log file and the static mount live in transcriptions/)
+os.makedirs("transcriptions", exist_ok=True)
+os.makedirs("downloads", exist_ok=True)
+
 # Configure logging to file and console
 LOG_FILE = "transcriptions/app.log"
 logging.basicConfig(
@@ -17,15 +22,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Monkeypatch DB path to be inside the volume so it persists
-transcribe.DB_NAME = "transcriptions/transcriptions.db"
-
 app = FastAPI()
 
-# Ensure directories exist
-os.makedirs("transcriptions", exist_ok=True)
-os.makedirs("downloads", exist_ok=True)
-
 from fastapi import UploadFile, File
 
 @app.post("/upload-cookies")
@@ -80,35 +78,50 @@ def view_logs():
     </html>
     """
 
-def run_transcription(url: str):
-    """Background task to run the transcription process."""
+async def run_transcription(url: str, video_uuid=None):
+    """Job handler: runs the transcription process for one queued URL."""
     logger.info(f"Starting transcription for {url}")
-    conn = transcribe.init_db()
-    try:
-        transcribe.process_video(url, conn)
-        logger.info(f"Completed transcription for {url}")
-    except Exception as e:
-        logger.error(f"Error transcribing {url}: {e}")
-    finally:
-        conn.close()
+    if await transcribe.process_video(url, video_uuid) is None:
+        raise RuntimeError("Processing failed (see logs)")
+    logger.info(f"Completed transcription for {url}")
+
+# Persisted in the volume, so queued jobs survive a restart
+queue = JobQueue("transcriptions/jobs.db", run_transcription,
+                 workers=int(os.environ.get("TRANSCRIBE_WORKERS", "2")),
+                 max_queued=int(os.environ.get("TRANSCRIBE_MAX_QUEUED", "100")))
 
 @app.post("/submit")
-async def submit_video(background_tasks: BackgroundTasks, url: str = Form(...)):
-    """Accepts a URL and starts the transcription process in the background."""
-    background_tasks.add_task(run_transcription, url)
+async def submit_video(url: str = Form(...)):
+    """Accepts a URL and queues it for transcription."""
+    try:
+        job, created = queue.submit(url)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    logger.info(f"{'Queued' if created else 'Already queued'} {url} as job {job['id']}")
     # Redirect back to home page or show a message
     return RedirectResponse(url="/", status_code=303)
 
+# async: the queue's SQLite connection belongs to the event loop thread, and sync
+# endpoints run in FastAPI's threadpool
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
-# Initialize DB and Index on startup
+# Records live in InstantDB, so the only local state to open on startup is the job queue
 @app.on_event("startup")
 async def startup_event():
-    conn = transcribe.init_db()
-    transcribe.update_index_html(conn)
-    conn.close()
+    queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await queue.stop()
 
 # Mount the transcriptions directory to the root
 # This will serve index.html, player.html, and all generated files
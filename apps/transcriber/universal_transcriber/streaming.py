@@ -0,0 +1,160 @@
+"""
+Streaming transcription: source -> ffmpeg -> raw 16 kHz PCM -> chunked whisper.cpp jobs.
+
+Instead of downloading to a WAV and transcribing afterwards, ffmpeg reads the source (a
+direct media URL resolved by yt-dlp, or a local file for testing) and writes signed 16-bit
+mono PCM to a pipe. Every ~`chunk_length` seconds of audio is cut at the quietest point of
+its last `SEARCH_WINDOW` seconds (so words are rarely split) and submitted to the
+TranscriptionPool while ffmpeg keeps reading. Segment times are shifted by the chunk offset.
+
+At most `max_pending` chunks are in flight. When the pool falls behind, we stop reading the
+pipe and ffmpeg (and the download) is paused by the OS pipe buffer rather than buffering the
+whole recording in memory.
+
+Optionally ffmpeg writes a compressed copy of the audio alongside the PCM output (codec picked
+from the file extension, Opus by default).
+
+Usage (local file standing in for the remote source):
+    python -m universal_transcriber.streaming path/to/audio.m4a [--save out.opus]
+"""
+import asyncio
+import os
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+CHUNK_LENGTH = 30.0  # seconds of audio per transcription job
+SEARCH_WINDOW = 5.0  # seconds before the chunk end searched for a quiet cut point
+FRAME = 0.1  # seconds per energy frame when searching
+
+# Output extension -> ffmpeg audio encoder options for the saved copy
+SAVE_CODECS = {
+    ".opus": ["-c:a", "libopus", "-b:a", "32k"],
+    ".ogg": ["-c:a", "libopus", "-b:a", "32k"],
+    ".m4a": ["-c:a", "aac", "-b:a", "64k"],
+    ".mp3": ["-c:a", "libmp3lame", "-b:a", "64k"],
+}
+
+
+def ffmpeg_command(source, save_path=None, headers=None):
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    if headers and "://" in source:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    cmd += ["-i", source, "-map", "0:a:0", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+    if save_path:
+        ext = os.path.splitext(save_path)[1].lower()
+        if ext not in SAVE_CODECS:
+            raise ValueError(f"Unsupported audio format {ext!r}, expected one of {sorted(SAVE_CODECS)}")
+        cmd += ["-map", "0:a:0", "-ac", "1", "-ar", str(SAMPLE_RATE), *SAVE_CODECS[ext], save_path]
+    return cmd
+
+
+def quiet_cut(samples, start, end):
+    """Index in [start, end) at the start of the lowest-energy FRAME-long frame."""
+    frame = int(FRAME * SAMPLE_RATE)
+    n = (end - start) // frame
+    if n <= 1:
+        return end
+    frames = samples[start:start + n * frame].reshape(n, frame)
+    return start + int(np.argmin((frames ** 2).mean(axis=1))) * frame
+
+
+async def stream_transcribe(source, pool, save_path=None, headers=None, chunk_length=CHUNK_LENGTH, max_pending=None):
+    """
+    Transcribes `source` while it is being read. Returns segments ({"start", "end", "text"}).
+
+    Args:
+        source: Media URL or local path (anything ffmpeg can read)
+        pool: TranscriptionPool to run the chunks on
+        save_path: Also save the audio here, compressed (.opus, .ogg, .m4a or .mp3)
+        headers: HTTP headers for URL sources (e.g. yt-dlp's `http_headers`)
+        chunk_length: Target seconds of audio per transcription job
+        max_pending: Chunks in flight before reading pauses (default: 2 per pool worker)
+    """
+    if save_path:
+        os.makedirs(os.path.dirname(save_path) or ".", exist_ok=True)
+    proc = await asyncio.create_subprocess_exec(
+        *ffmpeg_command(source, save_path, headers),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    max_pending = max_pending or 2 * pool.workers
+    chunk = int(chunk_length * SAMPLE_RATE)
+    search = min(int(SEARCH_WINDOW * SAMPLE_RATE), chunk // 2)
+    jobs = []  # (offset in seconds, task)
+    offset = 0
+    pending = bytearray()
+
+    async def submit(samples):
+        nonlocal offset
+        in_flight = [task for _, task in jobs if not task.done()]
+        if len(in_flight) >= max_pending:
+            await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        jobs.append((offset / SAMPLE_RATE, asyncio.create_task(pool.transcribe_samples(samples))))
+        offset += len(samples)
+
+    try:
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        while True:
+            data = await proc.stdout.read(1 << 16)
+            pending += data
+            # Cut while there is a full chunk; the remainder waits for more data
+            while len(pending) >= 2 * chunk:
+                samples = np.frombuffer(bytes(pending[:2 * chunk]), dtype="<i2").astype(np.float32) / 32768.0
+                cut = quiet_cut(samples, chunk - search, chunk)
+                del pending[:2 * cut]
+                await submit(samples[:cut])
+            if not data:
+                break
+        if len(pending) >= 2 * int(FRAME * SAMPLE_RATE):
+            await submit(np.frombuffer(bytes(pending), dtype="<i2").astype(np.float32) / 32768.0)
+
+        returncode = await proc.wait()
+        stderr = (await stderr_task).decode(errors="replace").strip()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed ({returncode}) on {source}: {stderr}")
+
+        segments = []
+        for start, task in jobs:
+            for seg in await task:
+                segments.append({"start": seg["start"] + start, "end": seg["end"] + start, "text": seg["text"]})
+        return segments
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        for _, task in jobs:
+            task.cancel()
+
+
+def main():
+    import argparse
+    import json
+    import sys
+    import time
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from universal_transcriber.whisper_pool import get_pool, shutdown_pools
+
+    parser = argparse.ArgumentParser(description="Stream a media file/URL through ffmpeg into chunked transcription.")
+    parser.add_argument("source")
+    parser.add_argument("--save", default=None, help="Also save the audio compressed (.opus/.ogg/.m4a/.mp3)")
+    parser.add_argument("--chunk-length", type=float, default=CHUNK_LENGTH)
+    parser.add_argument("--output", default=None, help="Write segments JSON here")
+    args = parser.parse_args()
+
+    async def run():
+        start = time.time()
+        try:
+            segments = await stream_transcribe(args.source, get_pool(), args.save, chunk_length=args.chunk_length)
+        finally:
+            shutdown_pools()
+        print(f"{len(segments)} segments in {time.time() - start:.2f}s")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(segments, f, indent=2)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
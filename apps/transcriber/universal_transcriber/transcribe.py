@@ -10,8 +10,10 @@ from pywhispercpp.model import Model
 # Add parent directory to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from instantdb_admin_client import InstantDBAdminAPI, Link, Update
+from instantdb_admin_client import InstantDBAdminAPI, Link, QueryCache, Update
 from config_model import WhisperConfig
+from universal_transcriber.whisper_pool import get_pool, shutdown_pools, transcribe_with_model
+from universal_transcriber.streaming import stream_transcribe
 
 APP_ID = os.environ.get("INSTANT_APP_ID")
 ADMIN_TOKEN = os.environ.get("INSTANT_ADMIN_TOKEN")
@@ -25,10 +27,7 @@ from instant_logger import setup_instant_logging
 
 logger = setup_instant_logging(APP_ID, ADMIN_TOKEN, source="transcriber")
 
-def download_audio(video_url, output_dir="downloads"):
-    """Downloads audio using yt-dlp and returns platform/id info."""
-    os.makedirs(output_dir, exist_ok=True)
-    
+def _ydl_common_opts():
     # Debug: Print CWD and check for cookies
     logger.info(f"DEBUG: CWD is {os.getcwd()}")
     
@@ -46,21 +45,40 @@ def download_audio(video_url, output_dir="downloads"):
         if os.path.exists("cookies.txt"):
              logger.info(f"DEBUG: Found cookies at ./cookies.txt")
              common_opts['cookiefile'] = "cookies.txt"
+    return common_opts
+
+def _video_info(info):
+    """(video_id, title, platform, duration, upload_date, channel) from a yt-dlp info dict."""
+    extractor = info.get('extractor', 'unknown').lower()
+    # Normalize youtube extractor names
+    if 'youtube' in extractor:
+        extractor = 'youtube'
+    return info['id'], info.get('title', 'Unknown Title'), extractor, info.get('duration'), info.get('upload_date'), info.get('uploader')
+
+def resolve_audio_stream(video_url):
+    """
+    Resolves the best audio format without downloading it.
+
+    Returns (stream_url, http_headers, video_id, title, platform, duration, upload_date, channel).
+    """
+    opts = dict(_ydl_common_opts(), format='bestaudio/best')
+    logger.info("Resolving audio stream...")
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+    # Merged formats have no single URL; fall back to the first requested one
+    fmt = info if info.get('url') else info['requested_formats'][0]
+    return (fmt['url'], fmt.get('http_headers') or info.get('http_headers') or {}, *_video_info(info))
+
+def download_audio(video_url, output_dir="downloads"):
+    """Downloads audio using yt-dlp and returns platform/id info."""
+    os.makedirs(output_dir, exist_ok=True)
+    common_opts = _ydl_common_opts()
 
     # Extract info first to get platform (extractor) and ID
     logger.info("Extracting video metadata...")
     with yt_dlp.YoutubeDL(common_opts) as ydl:
         info = ydl.extract_info(video_url, download=False)
-        video_id = info['id']
-        title = info.get('title', 'Unknown Title')
-        extractor = info.get('extractor', 'unknown').lower()
-        duration = info.get('duration')
-        upload_date = info.get('upload_date')
-        channel = info.get('uploader')
-        
-        # Normalize youtube extractor names
-        if 'youtube' in extractor:
-            extractor = 'youtube'
+        video_id, title, extractor, duration, upload_date, channel = _video_info(info)
 
     filename_base = f"{extractor}_{video_id}_sound"
     output_path = os.path.join(output_dir, f"{filename_base}.wav")
@@ -104,6 +122,7 @@ def format_timestamp(seconds):
     return f"{m:02d}:{s:02d}"
 
 def transcribe_audio(audio_path, video_id, platform, output_dir="transcriptions", whisper_config: WhisperConfig = None):
+    """Loads the model and transcribes one file in this process (see whisper_pool for serving many)."""
     if whisper_config is None:
         whisper_config = WhisperConfig()
 
@@ -122,25 +141,73 @@ def transcribe_audio(audio_path, video_id, platform, output_dir="transcriptions"
         print(f"Error loading model: {e}")
         return [], None
 
-    print(f"Transcribing {audio_path}...")
-    segments = model.transcribe(audio_path, n_threads=whisper_config.n_threads)
+    json_segments = transcribe_with_model(model, audio_path, json_path, whisper_config.n_threads)
+    return json_segments, json_path
+
+_db = None
+_batcher = None
+
+def get_db():
+    """Process-wide admin client, so every video reuses the same pooled connections and query cache."""
+    global _db
+    if _db is None:
+        _db = InstantDBAdminAPI(app_id=APP_ID, admin_token=ADMIN_TOKEN, query_cache=QueryCache(ttl=60))
+    return _db
+
+def get_batcher():
+    """Process-wide transaction coalescer, so concurrent upserts share /admin/transact requests."""
+    global _batcher
+    if _batcher is None:
+        _batcher = get_db().batcher()
+    return _batcher
+
+async def close_db():
+    global _db, _batcher
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
+    if _db is not None:
+        await _db.close()
+        _db = None
+
+def video_record_steps(video_uuid, video_id, platform, url, title, audio_path, json_path, duration, upload_date, channel):
+    """Update steps for a video and (if `json_path` is set) a linked transcription entity."""
+    import uuid
+    # Create/Update Video
+    video_data = {
+        "platform": platform,
+        "external_id": video_id,
+        "original_url": url,
+        "title": title,
+        "audio_path": audio_path,
+        "duration": duration,
+        "upload_date": upload_date,
+        "channel": channel,
+        "created_at": datetime.now().isoformat()
+    }
     
-    json_segments = []
-    for s in segments:
-        json_segments.append({
-            "start": s.t0 / 100.0,
-            "end": s.t1 / 100.0,
-            "text": s.text.strip()
-        })
-        
-    with open(json_path, 'w') as f:
-        json.dump(json_segments, f, indent=2)
-    print(f"Saved transcription JSON to {json_path}")
+    steps = [
+        Update(collection="videos", id=video_uuid, data=video_data)
+    ]
     
-    return json_segments, json_path
+    # Create Transcription entity
+    if json_path:
+        transcription_uuid = str(uuid.uuid4())
+        transcription_data = {
+            "path": json_path,
+            "created_at": datetime.now().isoformat(),
+            "model": "base",
+            "tool": "whisper.cpp"
+        }
+        steps.append(Update(collection="transcriptions", id=transcription_uuid, data=transcription_data))
+        steps.append(Link(collection="videos", id=video_uuid, links={"transcriptions": transcription_uuid}))
+    return steps
 
-async def upsert_video_record(video_id, platform, url, title, audio_path, json_path, duration, upload_date, channel, video_uuid=None):
-    db = InstantDBAdminAPI(app_id=APP_ID, admin_token=ADMIN_TOKEN)
+async def upsert_video_record(video_id, platform, url, title, audio_path, json_path, duration, upload_date, channel, video_uuid=None, db=None):
+    # An explicit client is written to directly; the shared one goes through the batcher
+    transact = db.transact if db else get_batcher().transact
+    db = db or get_db()
+    steps = []
     
     if not video_uuid:
         # Try to find by external_id if no UUID provided
@@ -177,44 +244,92 @@ async def upsert_video_record(video_id, platform, url, title, audio_path, json_p
                 # But wait, if we delete it, we might leave orphan transcriptions?
                 # Transcriptions are linked, so we should delete them too or rely on cascade?
                 # InstantDB doesn't cascade delete by default.
-                # For now, just delete the video.
+                # For now, just delete the video (in the same transaction as the update).
                 from instantdb_admin_client import Delete
-                await db.transact([Delete(collection="videos", id=cv["id"])])
+                steps.append(Delete(collection="videos", id=cv["id"]))
 
-    # Create/Update Video
-    video_data = {
-        "platform": platform,
-        "external_id": video_id,
-        "original_url": url,
-        "title": title,
-        "audio_path": audio_path,
-        "duration": duration,
-        "upload_date": upload_date,
-        "channel": channel,
-        "created_at": datetime.now().isoformat()
-    }
-    
-    steps = [
-        Update(collection="videos", id=video_uuid, data=video_data)
-    ]
-    
-    # Create Transcription entity
-    if json_path:
-        import uuid
-        transcription_uuid = str(uuid.uuid4())
-        transcription_data = {
-            "path": json_path,
-            "created_at": datetime.now().isoformat(),
-            "model": "base",
-            "tool": "whisper.cpp"
-        }
-        steps.append(Update(collection="transcriptions", id=transcription_uuid, data=transcription_data))
-        steps.append(Link(collection="videos", id=video_uuid, links={"transcriptions": transcription_uuid}))
-        
-    await db.transact(steps)
+    steps.extend(video_record_steps(video_uuid, video_id, platform, url, title, audio_path, json_path, duration, upload_date, channel))
+
+    await transact(steps)
     print("Upserted video and transcription to InstantDB.")
 
-async def process_video(url, video_uuid=None, whisper_config: WhisperConfig = None):
+async def bulk_upsert_video_records(records, db=None, chunk_size=200):
+    """
+    Upserts many finished videos at once.
+
+    `records` are dicts with the keyword arguments of `upsert_video_record` (video_id, platform,
+    url, title, audio_path, json_path, duration, upload_date, channel and optionally video_uuid).
+    All external_ids are resolved with a single `$in` query, then the steps are written in
+    transactions of at most `chunk_size` steps (a video's steps are never split).
+    """
+    import uuid
+    from instantdb_admin_client import Delete
+    if not records:
+        return
+    db = db or get_db()
+
+    external_ids = sorted({r["video_id"] for r in records})
+    existing = await db.query({
+        "videos": {
+            "$": {
+                "where": {"external_id": {"$in": external_ids}}
+            }
+        }
+    }, use_cache=False)
+    by_external_id = {}
+    for v in existing.get("videos", []):
+        by_external_id.setdefault(v["external_id"], []).append(v["id"])
+
+    chunks = [[]]
+    for record in records:
+        record = dict(record)
+        video_id = record["video_id"]
+        video_uuid = record.pop("video_uuid", None)
+        matches = by_external_id.get(video_id, [])
+        steps = []
+        if not video_uuid:
+            if matches:
+                video_uuid = matches[0]
+            else:
+                video_uuid = str(uuid.uuid4())
+                # Later records with the same external_id in this batch update the same video
+                by_external_id[video_id] = [video_uuid]
+        else:
+            for conflict_id in matches:
+                if conflict_id != video_uuid:
+                    print(f"Found conflicting video {conflict_id} with same external_id. Deleting it.")
+                    steps.append(Delete(collection="videos", id=conflict_id))
+            by_external_id[video_id] = [video_uuid]
+        steps.extend(video_record_steps(video_uuid, **record))
+
+        if chunks[-1] and len(chunks[-1]) + len(steps) > chunk_size:
+            chunks.append([])
+        chunks[-1].extend(steps)
+
+    for chunk in chunks:
+        await db.transact(chunk)
+    print(f"Upserted {len(records)} videos to InstantDB in {len(chunks)} transaction(s).")
+
+async def process_video(url, video_uuid=None, whisper_config: WhisperConfig = None, stream=False, save_audio=True):
+    """Downloads, transcribes and upserts one video. Returns the upserted record, or None on failure."""
+    record = await prepare_video(url, video_uuid, whisper_config, stream=stream, save_audio=save_audio)
+    if record is None:
+        return
+    # Upsert to InstantDB (already async)
+    await upsert_video_record(**record)
+    return record
+
+async def prepare_video(url, video_uuid=None, whisper_config: WhisperConfig = None, stream=False, save_audio=True):
+    """
+    Downloads and transcribes a video without writing to InstantDB.
+
+    With `stream=True` the audio is transcribed while it downloads (see `prepare_video_streaming`).
+
+    Returns the keyword arguments for `upsert_video_record` / `bulk_upsert_video_records`,
+    or None if a step failed.
+    """
+    if stream:
+        return await prepare_video_streaming(url, video_uuid, whisper_config, save_audio=save_audio)
     loop = asyncio.get_running_loop()
     
     # Download (blocking)
@@ -227,12 +342,9 @@ async def process_video(url, video_uuid=None, whisper_config: WhisperConfig = No
         print(f"Error downloading {url}: {e}")
         return
 
-    # Transcribe (blocking)
-    # segments, json_path = transcribe_audio(audio_path, vid_id, platform)
+    # Transcribe in the shared worker pool (model stays loaded between videos)
     try:
-        segments, json_path = await loop.run_in_executor(
-            None, transcribe_audio, audio_path, vid_id, platform, "transcriptions", whisper_config
-        )
+        segments, json_path = await get_pool(whisper_config).transcribe(audio_path, vid_id, platform)
     except Exception as e:
         print(f"Error transcribing {url}: {e}")
         return
@@ -241,16 +353,74 @@ async def process_video(url, video_uuid=None, whisper_config: WhisperConfig = No
         print("Failed to get segments.")
         return
 
-    # Upsert to InstantDB (already async)
-    await upsert_video_record(vid_id, platform, url, vid_title, audio_path, json_path, duration, upload_date, channel, video_uuid)
+    return {
+        "video_id": vid_id, "platform": platform, "url": url, "title": vid_title,
+        "audio_path": audio_path, "json_path": json_path, "duration": duration,
+        "upload_date": upload_date, "channel": channel, "video_uuid": video_uuid,
+    }
+
+async def prepare_video_streaming(url, video_uuid=None, whisper_config: WhisperConfig = None, save_audio=True,
+                                  output_dir="transcriptions", audio_dir="downloads"):
+    """
+    Like `prepare_video`, but without the intermediate WAV: ffmpeg reads the resolved audio
+    stream and the transcription pool works on 16 kHz PCM chunks while the download runs.
+    With `save_audio` the audio is also kept as a compressed .opus file (audio_path), otherwise
+    audio_path is None.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        stream_url, headers, vid_id, vid_title, platform, duration, upload_date, channel = await loop.run_in_executor(
+            None, resolve_audio_stream, url
+        )
+    except Exception as e:
+        print(f"Error resolving {url}: {e}")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, f"{platform}_{vid_id}_transcript.json")
+    audio_path = os.path.join(audio_dir, f"{platform}_{vid_id}_sound.opus") if save_audio else None
+    if os.path.exists(json_path):
+        print(f"Loading existing transcription from {json_path}")
+        with open(json_path, 'r') as f:
+            segments = json.load(f)
+        if audio_path and not os.path.exists(audio_path):
+            audio_path = None
+    else:
+        try:
+            segments = await stream_transcribe(stream_url, get_pool(whisper_config), audio_path, headers)
+        except Exception as e:
+            print(f"Error transcribing {url}: {e}")
+            return
+        with open(json_path, 'w') as f:
+            json.dump(segments, f, indent=2)
+        print(f"Saved transcription JSON to {json_path}")
+
+    if not segments:
+        print("Failed to get segments.")
+        return
+
+    return {
+        "video_id": vid_id, "platform": platform, "url": url, "title": vid_title,
+        "audio_path": audio_path, "json_path": json_path, "duration": duration,
+        "upload_date": upload_date, "channel": channel, "video_uuid": video_uuid,
+    }
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe.py <video_url>")
-        sys.exit(1)
-    
-    url = sys.argv[1]
-    asyncio.run(process_video(url))
+    import argparse
+    parser = argparse.ArgumentParser(description="Download, transcribe and upsert one video.")
+    parser.add_argument("url")
+    parser.add_argument("--stream", action="store_true", help="Transcribe while downloading (no intermediate WAV)")
+    parser.add_argument("--no-save-audio", action="store_true", help="With --stream, do not keep a compressed copy of the audio")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await process_video(args.url, stream=args.stream, save_audio=not args.no_save_audio)
+        finally:
+            await close_db()
+            shutdown_pools()
+
+    asyncio.run(run())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+"""
+Persistent whisper.cpp worker processes.
+
+`transcribe_audio` in transcribe.py loads the model on every call, so concurrent calls on the
+default thread pool held several copies of it and each asked for `n_threads` cores. A
+TranscriptionPool instead starts `workers` processes that each load the model once (in the
+process initializer) and then serve many files:
+
+- The machine's cores are split as workers x threads-per-worker (see `split_cores`).
+- After `max_jobs_per_worker` jobs per worker on average, new jobs go to a fresh set of
+  processes while the old ones finish what they were given and exit. This bounds memory
+  growth from the native library without interrupting running jobs. (We rotate executors
+  rather than use `max_tasks_per_child`, which can hang the executor on some Python versions.)
+
+This module must stay importable without side effects: worker processes are spawned and
+import it to find `_init_worker` / `_run`.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config_model import WhisperConfig
+
+# Per-worker state, set by _init_worker
+_model = None
+_n_threads = 1
+
+
+def split_cores(cores, workers=None, threads=None):
+    """Returns (workers, threads) with workers * threads <= cores (at least 1 each)."""
+    cores = max(1, cores)
+    if workers and threads:
+        return workers, threads
+    if workers:
+        return workers, max(1, cores // workers)
+    threads = min(threads or cores, cores)
+    return max(1, cores // threads), threads
+
+
+def segments_to_json(segments):
+    return [{"start": s.t0 / 100.0, "end": s.t1 / 100.0, "text": s.text.strip()} for s in segments]
+
+
+def transcribe_with_model(model, audio_path, json_path, n_threads):
+    """Transcribes `audio_path` with a loaded pywhispercpp model and saves the segments to `json_path`."""
+    print(f"Transcribing {audio_path}...")
+    json_segments = segments_to_json(model.transcribe(audio_path, n_threads=n_threads))
+    with open(json_path, 'w') as f:
+        json.dump(json_segments, f, indent=2)
+    print(f"Saved transcription JSON to {json_path}")
+    return json_segments
+
+
+def _init_worker(model_name, print_realtime, print_progress, n_threads):
+    global _model, _n_threads
+    from pywhispercpp.model import Model
+    print(f"[worker {os.getpid()}] Loading whisper.cpp model ({model_name}, {n_threads} threads)...")
+    _model = Model(model_name, print_realtime=print_realtime, print_progress=print_progress)
+    _n_threads = n_threads
+
+
+def _run(audio_path, json_path):
+    return transcribe_with_model(_model, audio_path, json_path, _n_threads)
+
+
+def _run_samples(samples):
+    return segments_to_json(_model.transcribe(samples, n_threads=_n_threads))
+
+
+class TranscriptionPool:
+    """
+    whisper.cpp worker processes sharing one WhisperConfig.
+
+    Args:
+        whisper_config: Model and output options. `n_threads` is the threads per worker
+            unless `workers` is given, in which case the cores are divided among the workers.
+        workers: Number of worker processes (default: cores // threads).
+        threads: Threads per worker (overrides whisper_config.n_threads).
+        max_jobs_per_worker: Average jobs per worker after which the processes are replaced (None: never).
+    """
+
+    def __init__(self, whisper_config: WhisperConfig = None, workers=None, threads=None, max_jobs_per_worker=50):
+        self.whisper_config = whisper_config or WhisperConfig()
+        if threads is None and workers is None:
+            threads = self.whisper_config.n_threads
+        self.workers, self.threads = split_cores(os.cpu_count() or 1, workers, threads)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.jobs = 0
+        self.recycled = 0
+        self._executor = None
+        self._executor_jobs = 0
+
+    def _get_executor(self):
+        limit = self.max_jobs_per_worker and self.max_jobs_per_worker * self.workers
+        if self._executor is not None and limit and self._executor_jobs >= limit:
+            # Already-submitted jobs still run; the processes exit once they are done
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self.recycled += 1
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.whisper_config.model.value, self.whisper_config.print_realtime,
+                          self.whisper_config.print_progress, self.threads),
+            )
+            self._executor_jobs = 0
+        self._executor_jobs += 1
+        return self._executor
+
+    async def transcribe(self, audio_path, video_id, platform, output_dir="transcriptions"):
+        """Same contract as `transcribe_audio`: returns (segments, json_path)."""
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, f"{platform}_{video_id}_transcript.json")
+        if os.path.exists(json_path):
+            print(f"Loading existing transcription from {json_path}")
+            with open(json_path, 'r') as f:
+                return json.load(f), json_path
+
+        self.jobs += 1
+        loop = asyncio.get_running_loop()
+        segments = await loop.run_in_executor(self._get_executor(), _run, audio_path, json_path)
+        return segments, json_path
+
+    async def transcribe_samples(self, samples):
+        """Transcribes 16 kHz mono float32 samples; returns segments with times relative to them."""
+        self.jobs += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _run_samples, samples)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_pools = {}
+
+
+def get_pool(whisper_config: WhisperConfig = None, **options):
+    """Process-wide pool per WhisperConfig (options only apply when the pool is created)."""
+    whisper_config = whisper_config or WhisperConfig()
+    key = whisper_config.model_dump_json()
+    if key not in _pools:
+        _pools[key] = TranscriptionPool(whisper_config, **options)
+    return _pools[key]
+
+
+def shutdown_pools(wait=True):
+    while _pools:
+        _pools.popitem()[1].shutdown(wait=wait)